@@ -1,4 +1,8 @@
 """NewsLingua AI Service - Python FastAPI Backend"""
 
+import time
+
 __version__ = "0.1.0"
 
+# 起動計測の基準時刻（app.main の import 完了時に import 時間として記録する）
+IMPORT_STARTED = time.perf_counter()
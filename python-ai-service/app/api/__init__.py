@@ -4,13 +4,28 @@ from fastapi import APIRouter
 
 from app.api.words import router as words_router
 from app.api.articles import router as articles_router
+from app.api.assessment import router as assessment_router
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
+from app.api.reviews import router as reviews_router
+from app.api.stories import router as stories_router
+from app.core.config import settings
 
 router = APIRouter()
 
 # ルーター登録
 router.include_router(health_router, tags=["Health"])
+router.include_router(metrics_router, tags=["Metrics"])
 router.include_router(words_router, prefix="/words", tags=["Words"])
 router.include_router(articles_router, prefix="/articles", tags=["Articles"])
+router.include_router(reviews_router, prefix="/reviews", tags=["Reviews"])
+router.include_router(assessment_router, prefix="/assessment", tags=["Assessment"])
+router.include_router(stories_router, prefix="/stories", tags=["Stories"])
+
+# デバッグ用エンドポイント（本番では登録しない）
+if settings.debug:
+    from app.api.debug import router as debug_router
+
+    router.include_router(debug_router, prefix="/debug", tags=["Debug"])
 
 __all__ = ["router"]
@@ -1,11 +1,43 @@
 """Article analysis API endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceededError
+from app.core.tenancy import current_tenant
+from app.models.articles import (
+    AnalyzeDifficultyResponse,
+    ArticleOpenedResponse,
+    ComprehensionQuizResponse,
+    ExtractVocabularyResponse,
+    SummarizeArticleResponse,
+    SummaryUpdateResponse,
+)
+from app.services.admission import CapacityError
+from app.services.cache import call_json, encode_json
+from app.services.scheduler import Priority, priority_class
 
 router = APIRouter()
 
 
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams NDJSON while the request body is still being read.
+
+    ``StreamingResponse`` watches for disconnects by calling ``receive``
+    itself, which would take request body chunks away from the handler;
+    disconnects are handled by ``RequestDeadlineMiddleware`` instead.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
 class AnalyzeDifficultyRequest(BaseModel):
     """記事難易度分析リクエスト"""
 
@@ -13,18 +45,6 @@ class AnalyzeDifficultyRequest(BaseModel):
     language: str = Field(default="english", description="記事の言語")
 
 
-class AnalyzeDifficultyResponse(BaseModel):
-    """記事難易度分析レスポンス"""
-
-    cefr_level: str  # A1, A2, B1, B2, C1, C2
-    difficulty_score: float  # 0.0 - 1.0
-    vocabulary_level: str
-    grammar_complexity: str
-    average_sentence_length: float
-    difficult_words: list[dict]  # {"word": str, "definition": str}
-    reading_time_minutes: int
-
-
 class SummarizeArticleRequest(BaseModel):
     """記事要約リクエスト"""
 
@@ -34,13 +54,15 @@ class SummarizeArticleRequest(BaseModel):
     target_language: str = Field(default="japanese", description="要約を表示する言語")
 
 
-class SummarizeArticleResponse(BaseModel):
-    """記事要約レスポンス"""
+class SummaryUpdateRequest(BaseModel):
+    """記事更新時の要約更新リクエスト"""
 
-    summary: str
-    key_points: list[str]
-    main_topic: str
-    vocabulary_to_learn: list[dict]  # {"word": str, "definition": str}
+    previous_content: str = Field(..., description="前回要約した版の記事本文")
+    previous_summary: SummarizeArticleResponse = Field(..., description="前回の要約結果")
+    content: str = Field(..., description="更新後の記事本文")
+    language: str = Field(default="english", description="記事の言語")
+    user_level: str = Field(default="B1", description="ユーザーのCEFRレベル")
+    target_language: str = Field(default="japanese", description="要約を表示する言語")
 
 
 class ExtractVocabularyRequest(BaseModel):
@@ -52,13 +74,27 @@ class ExtractVocabularyRequest(BaseModel):
     max_words: int = Field(default=10, ge=1, le=50, description="抽出する最大単語数")
 
 
-class ExtractVocabularyResponse(BaseModel):
-    """語彙抽出レスポンス"""
+class ComprehensionQuizRequest(BaseModel):
+    """理解度確認クイズリクエスト"""
+
+    content: str = Field(..., description="記事の本文")
+    language: str = Field(default="english", description="記事の言語")
+    user_level: str = Field(default="B1", description="ユーザーのCEFRレベル")
+    count: int = Field(default=3, ge=1, le=10, description="出題数")
+    seen_ids: list[str] = Field(default=[], description="回答済みの問題ID（出題から除外する）")
+
+
+class ArticleOpenedRequest(BaseModel):
+    """記事を開いた時の通知"""
 
-    words: list[dict]  # {"word": str, "definition": str, "cefr_level": str, "sentence": str}
+    content: str = Field(..., description="開いた記事の本文")
+    language: str = Field(default="english", description="記事の言語")
+    user_level: str = Field(default="B1", description="ユーザーのCEFRレベル")
+    native_language: str = Field(default="japanese", description="説明を表示する言語")
 
 
 @router.post("/analyze-difficulty", response_model=AnalyzeDifficultyResponse)
+@priority_class(Priority.STANDARD)
 async def analyze_difficulty(request: AnalyzeDifficultyRequest):
     """
     記事の難易度を分析します。
@@ -72,11 +108,18 @@ async def analyze_difficulty(request: AnalyzeDifficultyRequest):
 
     try:
         llm = get_llm_service()
-        result = await llm.analyze_article_difficulty(
-            content=request.content,
-            language=request.language,
+        body = await call_json(
+            llm.analyze_article_difficulty,
+            {
+                "content": request.content,
+                "language": request.language,
+            },
         )
-        return AnalyzeDifficultyResponse(**result)
+        return Response(content=body, media_type="application/json")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CapacityError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
@@ -84,6 +127,7 @@ async def analyze_difficulty(request: AnalyzeDifficultyRequest):
 
 
 @router.post("/summarize", response_model=SummarizeArticleResponse)
+@priority_class(Priority.STANDARD)
 async def summarize_article(request: SummarizeArticleRequest):
     """
     記事を要約します。
@@ -95,13 +139,56 @@ async def summarize_article(request: SummarizeArticleRequest):
 
     try:
         llm = get_llm_service()
-        result = await llm.summarize_article(
-            content=request.content,
-            language=request.language,
-            user_level=request.user_level,
-            target_language=request.target_language,
+        body = await call_json(
+            llm.summarize_article,
+            {
+                "content": request.content,
+                "language": request.language,
+                "user_level": request.user_level,
+                "target_language": request.target_language,
+            },
         )
-        return SummarizeArticleResponse(**result)
+        return Response(content=body, media_type="application/json")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CapacityError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI処理エラー: {str(e)}")
+
+
+@router.post("/summarize/update", response_model=SummaryUpdateResponse)
+@priority_class(Priority.STANDARD)
+async def update_summary(request: SummaryUpdateRequest):
+    """
+    更新された記事の要約を差分から作り直します。
+
+    前回の版から追加・書き換え・削除された段落だけを前回の要約とともに
+    LLM に渡し、要約と要点を更新します。変更がなければ前回の要約をそのまま、
+    変更が大きければ全体を要約し直した結果を返します（`update_mode`）。
+    """
+    from app.services.llm import get_llm_service
+
+    try:
+        llm = get_llm_service()
+        body = await call_json(
+            llm.update_summary,
+            {
+                "previous_content": request.previous_content,
+                "previous_summary": request.previous_summary.model_dump(),
+                "content": request.content,
+                "language": request.language,
+                "user_level": request.user_level,
+                "target_language": request.target_language,
+            },
+        )
+        return Response(content=body, media_type="application/json")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CapacityError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
@@ -109,6 +196,7 @@ async def summarize_article(request: SummarizeArticleRequest):
 
 
 @router.post("/extract-vocabulary", response_model=ExtractVocabularyResponse)
+@priority_class(Priority.STANDARD)
 async def extract_vocabulary(request: ExtractVocabularyRequest):
     """
     記事から学習すべき語彙を抽出します。
@@ -120,14 +208,89 @@ async def extract_vocabulary(request: ExtractVocabularyRequest):
 
     try:
         llm = get_llm_service()
-        result = await llm.extract_vocabulary(
+        body = await call_json(
+            llm.extract_vocabulary,
+            {
+                "content": request.content,
+                "language": request.language,
+                "user_level": request.user_level,
+                "max_words": request.max_words,
+            },
+        )
+        return Response(content=body, media_type="application/json")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CapacityError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI処理エラー: {str(e)}")
+
+
+@router.post("/comprehension-questions", response_model=ComprehensionQuizResponse)
+@priority_class(Priority.STANDARD)
+async def comprehension_questions(request: ComprehensionQuizRequest):
+    """
+    記事の理解度確認問題を出題します。
+
+    問題は記事・レベル毎のプールから、このユーザーがまだ見ていないものを選びます。
+    プールは最初の読者のときに一度だけ生成されます。
+    """
+    from app.services.comprehension import get_quiz_service
+
+    try:
+        quiz = await get_quiz_service().quiz(
             content=request.content,
             language=request.language,
             user_level=request.user_level,
-            max_words=request.max_words,
+            count=request.count,
+            user_id=current_tenant.get(),
+            seen_ids=request.seen_ids,
         )
-        return ExtractVocabularyResponse(**result)
+        return Response(content=encode_json(quiz), media_type="application/json")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CapacityError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI処理エラー: {str(e)}")
+
+
+@router.post("/opened", response_model=ArticleOpenedResponse, status_code=202)
+async def article_opened(request: ArticleOpenedRequest):
+    """
+    記事が開かれたことを通知します。
+
+    このユーザーのレベルでタップされそうな単語の説明をバックグラウンドで生成し、
+    単語をタップした時にはキャッシュから返せるようにします（応答は待たずに返ります）。
+    """
+    from app.services.prefetch import get_prefetcher
+
+    prefetching = get_prefetcher().schedule(
+        content=request.content,
+        language=request.language,
+        user_level=request.user_level,
+        native_language=request.native_language,
+    )
+    return ArticleOpenedResponse(prefetching=prefetching, max_words=settings.prefetch_max_words)
+
+
+@router.post("/ingest")
+@priority_class(Priority.BACKGROUND)
+async def ingest_articles(request: Request):
+    """
+    記事を NDJSON でまとめて分析します（ニュースフィードの取り込み用）。
+
+    本文は 1 行 1 記事の NDJSON（`IngestArticle`）で、チャンク転送のまま送れます。
+    記事は並行して分析され、終わった順に 1 行ずつ NDJSON で返ります
+    （`{"line": 1, "id": "...", "ok": true, "results": {"summary": {...}}}`）。
+    失敗した分析は `errors` に HTTP と同じステータスで入ります。
+    処理が追いつかない間は本文を読まず、結果が読まれない間は次の記事を処理しません。
+    """
+    from app.services.ingest import IngestPipeline
+
+    pipeline = IngestPipeline()
+    return NDJSONStreamingResponse(pipeline.run(request.stream()))
@@ -0,0 +1,67 @@
+"""Adaptive level-assessment API endpoints."""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from app.models.assessment import AssessmentStateResponse
+
+router = APIRouter()
+
+
+class StartAssessmentRequest(BaseModel):
+    """レベル判定開始リクエスト"""
+
+    language: str = Field(default="english", description="判定対象言語")
+    start_level: str | None = Field(
+        default=None, description="自己申告のCEFRレベル（最初の出題の難易度に使う）"
+    )
+
+
+class AnswerRequest(BaseModel):
+    """回答リクエスト"""
+
+    item_id: str = Field(..., description="回答した問題のID（直前の next_item_id）")
+    correct: bool = Field(..., description="正解したか")
+
+
+@router.post("/sessions", response_model=AssessmentStateResponse)
+async def start_assessment(request: StartAssessmentRequest):
+    """
+    適応型レベル判定を開始し、最初の問題を返します。
+
+    問題本文はクライアントが vocabulary_question から取得して表示します。
+    """
+    from app.services.assessment import ItemBankUnavailableError, get_assessment_engine
+
+    try:
+        return get_assessment_engine().start(request.language, request.start_level)
+    except ItemBankUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post("/sessions/{session_id}/answers", response_model=AssessmentStateResponse)
+async def answer(session_id: str, request: AnswerRequest):
+    """
+    回答を記録し、能力推定を更新して次の問題を返します。
+
+    推定レベルが十分な確信度に達すると finished=true になります。
+    """
+    from app.services.assessment import SessionNotFoundError, get_assessment_engine
+
+    try:
+        return get_assessment_engine().answer(session_id, request.item_id, request.correct)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Assessment session not found or expired")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/sessions/{session_id}", response_model=AssessmentStateResponse)
+async def assessment_status(session_id: str):
+    """現在の推定結果"""
+    from app.services.assessment import SessionNotFoundError, get_assessment_engine
+
+    try:
+        return get_assessment_engine().status(session_id)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Assessment session not found or expired")
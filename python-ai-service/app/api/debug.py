@@ -0,0 +1,33 @@
+"""Debug-only diagnostics endpoints (registered only when DEBUG=true)."""
+
+import asyncio
+from typing import Any
+
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.loop_monitor import get_loop_monitor
+from app.core.profiler import sample_stacks, to_collapsed
+
+router = APIRouter()
+
+
+@router.get("/event-loop")
+async def event_loop_stats() -> dict[str, Any]:
+    """イベントループの遅延統計と直近のブロック検出結果"""
+    return get_loop_monitor().stats()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=5.0, gt=0, le=60, description="計測時間（秒）"),
+    interval_ms: float = Query(default=5.0, ge=1, le=100, description="サンプリング間隔（ミリ秒）"),
+) -> PlainTextResponse:
+    """
+    稼働中のプロセスをサンプリングプロファイルします。
+
+    collapsed stack 形式（flamegraph.pl / speedscope にそのまま渡せる形式）で返します。
+    サンプリングは別スレッドで行うため、計測中もリクエスト処理は継続します。
+    """
+    counts = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    return PlainTextResponse(to_collapsed(counts))
@@ -1,8 +1,10 @@
 """Health check endpoints."""
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.core.startup import startup
 
 router = APIRouter()
 
@@ -19,3 +21,12 @@ async def health_check():
             "openai": settings.has_openai,
         },
     }
+
+
+@router.get("/health/ready")
+async def readiness_check():
+    """レディネスチェック（起動時のウォームアップ完了まで 503）"""
+    return JSONResponse(
+        status_code=200 if startup.ready else 503,
+        content={"status": "ready" if startup.ready else "starting", **startup.stats()},
+    )
@@ -0,0 +1,74 @@
+"""Metrics endpoints."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+from app.services.admission import get_circuit_breaker
+from app.services.cache import get_cache
+from app.services.scheduler import get_scheduler
+from app.services.word_packs import get_word_packs
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 形式のメトリクス"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/tenants")
+async def tenant_metrics():
+    """テナント毎の LLM キュー状況"""
+    return get_scheduler().stats()
+
+
+@router.get("/metrics/circuit")
+async def circuit_metrics():
+    """LLM プロバイダのサーキットブレーカーの状態"""
+    return get_circuit_breaker().stats()
+
+
+@router.get("/metrics/cache")
+async def cache_metrics():
+    """レスポンスキャッシュの状況"""
+    return get_cache().stats()
+
+
+@router.get("/metrics/word-packs")
+async def word_pack_metrics():
+    """読み込み済みの単語パック"""
+    return get_word_packs().stats()
+
+
+@router.get("/metrics/prefetch")
+async def prefetch_metrics():
+    """単語説明の先読みとその使用状況（PREFETCH_MAX_WORDS の調整用）"""
+    from app.services.prefetch import get_prefetcher
+
+    return get_prefetcher().stats()
+
+
+@router.get("/metrics/assessment")
+async def assessment_metrics():
+    """項目バンクと進行中のレベル判定"""
+    from app.services.assessment import get_assessment_engine
+
+    return get_assessment_engine().stats()
+
+
+@router.get("/metrics/stories")
+async def story_metrics():
+    """ストーリークラスタリングの状態（統合・分割の回数など）"""
+    from app.services.stories import get_story_clusterer
+
+    return get_story_clusterer().stats()
+
+
+@router.get("/metrics/token-budgets")
+async def token_budget_metrics():
+    """タスク毎の出力トークン数と較正した max_tokens"""
+    from app.services.token_budget import get_token_budgets
+
+    return get_token_budgets().stats()
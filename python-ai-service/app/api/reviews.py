@@ -0,0 +1,126 @@
+"""Spaced-repetition review API endpoints."""
+
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import BaseModel, Field
+
+from app.models.reviews import (
+    BulkReviewResponse,
+    CardStates,
+    DueCardsResponse,
+    Rating,
+    Timestamp,
+)
+from app.services.cache import encode_json
+
+router = APIRouter()
+
+SECONDS_PER_DAY = 86400
+
+
+class DueCardsRequest(BaseModel):
+    """復習カード取得リクエスト"""
+
+    cards: CardStates = Field(..., description="ユーザーの全カードの状態")
+    now: Timestamp | None = Field(
+        default=None, description="現在時刻（Unix 秒、省略時はサーバー時刻）"
+    )
+    tz_offset_minutes: int = Field(
+        default=0, ge=-840, le=840, description="ユーザーのタイムゾーン（UTC からの分）"
+    )
+    limit: int = Field(default=100, ge=1, le=100_000, description="返す復習カードの最大数")
+    new_limit: int = Field(default=20, ge=0, le=10_000, description="返す新規カードの最大数")
+
+
+class BulkReviewRequest(BaseModel):
+    """一括復習リクエスト"""
+
+    cards: CardStates = Field(..., description="復習前のカードの状態")
+    ratings: list[Rating] = Field(..., description="評価（1=Again, 2=Hard, 3=Good, 4=Easy）")
+    reviewed_at: list[Timestamp] | None = Field(
+        default=None, description="各カードの復習日時（Unix 秒、省略時はサーバー時刻）"
+    )
+
+
+def _end_of_day(now: float, tz_offset_minutes: int) -> float:
+    """End of the user's local day containing ``now``."""
+    offset = tz_offset_minutes * 60
+    return ((now + offset) // SECONDS_PER_DAY + 1) * SECONDS_PER_DAY - offset
+
+
+def _due_cards(request: DueCardsRequest) -> bytes:
+    from app.services.spaced_repetition import CardBatch, get_fsrs
+
+    cards = request.cards
+    now = request.now if request.now is not None else time.time()
+    queue = get_fsrs().due_queue(
+        CardBatch.from_columns(dict(cards)),
+        now=now,
+        until=_end_of_day(now, request.tz_offset_minutes),
+        limit=request.limit,
+        new_limit=request.new_limit,
+    )
+    return encode_json(
+        {
+            "ids": [cards.ids[i] for i in queue.indices.tolist()],
+            "retrievability": queue.retrievability.round(4).tolist(),
+            "due_count": queue.due_count,
+            "new_count": queue.new_count,
+            "total": len(cards.ids),
+        }
+    )
+
+
+def _bulk_review(request: BulkReviewRequest) -> bytes:
+    import numpy as np
+
+    from app.services.spaced_repetition import CardBatch, get_fsrs
+
+    cards = request.cards
+    if len(request.ratings) != len(cards.ids):
+        raise ValueError("ratings must have one entry per card")
+    if request.reviewed_at is not None and len(request.reviewed_at) != len(cards.ids):
+        raise ValueError("reviewed_at must have one entry per card")
+
+    reviewed_at = request.reviewed_at if request.reviewed_at is not None else time.time()
+    result = get_fsrs().review(
+        CardBatch.from_columns(dict(cards)),
+        ratings=np.asarray(request.ratings, dtype=np.int8),
+        reviewed_at=np.asarray(reviewed_at, dtype=np.float64),
+    )
+    return encode_json(
+        {
+            "cards": {"ids": cards.ids, **result.cards.to_columns()},
+            "interval_days": result.interval_days.tolist(),
+            "retrievability": result.retrievability.round(4).tolist(),
+        }
+    )
+
+
+@router.post("/due", response_model=DueCardsResponse)
+async def due_cards(request: DueCardsRequest) -> Response:
+    """
+    今日復習すべきカードを返します。
+
+    ユーザーの一日の終わりまでに期限が来るカードを忘れやすい順に並べ、
+    その後に新規カードを続けます。
+    """
+    # 大きなコレクションでもイベントループを止めない
+    body = await asyncio.to_thread(_due_cards, request)
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/bulk", response_model=BulkReviewResponse)
+async def bulk_review(request: BulkReviewRequest) -> Response:
+    """
+    復習結果をまとめて反映し、更新後のカード状態を返します。
+
+    呼び出し側は返された状態（安定度・難易度・次回期限）を保存してください。
+    """
+    try:
+        body = await asyncio.to_thread(_bulk_review, request)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,76 @@
+"""Story clustering API endpoints."""
+
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from app.models.stories import StoryAssignmentResponse, StoryListResponse, StoryResponse
+
+router = APIRouter()
+
+
+class AssignStoryRequest(BaseModel):
+    """記事のストーリー割り当てリクエスト"""
+
+    id: str = Field(..., min_length=1, description="記事ID（Article.id）")
+    title: str = Field(..., description="記事の見出し")
+    content: str = Field(default="", description="記事の本文（なければ description でもよい）")
+    language: str = Field(default="english", description="記事の言語")
+    source: str | None = Field(default=None, description="ニュースソース名")
+    published_at: datetime | None = Field(default=None, description="公開日時")
+
+
+@router.post("/assign", response_model=StoryAssignmentResponse)
+async def assign_story(request: AssignStoryRequest):
+    """
+    記事をストーリーに割り当てます。
+
+    似た記事のストーリーがあればそこに加え、なければ新しいストーリーを作ります。
+    同じ記事IDで再度呼ぶと割り当てし直します。割り当ての結果ストーリーが
+    統合・分割された場合は `merged` / `split` にそのIDが入ります。
+    """
+    from app.services.stories import get_story_clusterer
+
+    return get_story_clusterer().assign(
+        request.id,
+        request.title,
+        request.content,
+        request.language,
+        request.source,
+        request.published_at,
+    )
+
+
+@router.get("", response_model=StoryListResponse)
+async def list_stories(
+    language: str | None = Query(default=None, description="記事の言語"),
+    min_size: int = Query(default=2, ge=1, description="最小記事数（1 なら単独の記事も含む）"),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """最近更新されたストーリー（NewsTimeline / MultiPerspective の候補）"""
+    from app.services.stories import get_story_clusterer
+
+    return {"stories": get_story_clusterer().stories(language, min_size, limit)}
+
+
+@router.get("/articles/{article_id}", response_model=StoryResponse)
+async def story_of_article(article_id: str):
+    """記事が属するストーリー"""
+    from app.services.stories import StoryNotFoundError, get_story_clusterer
+
+    try:
+        return get_story_clusterer().story_of(article_id)
+    except StoryNotFoundError:
+        raise HTTPException(status_code=404, detail="Article not assigned to a story")
+
+
+@router.get("/{story_id}", response_model=StoryResponse)
+async def get_story(story_id: str):
+    """ストーリーとその記事（統合されたストーリーIDは統合先を返す）"""
+    from app.services.stories import StoryNotFoundError, get_story_clusterer
+
+    try:
+        return get_story_clusterer().story(story_id)
+    except StoryNotFoundError:
+        raise HTTPException(status_code=404, detail="Story not found")
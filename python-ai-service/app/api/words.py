@@ -1,10 +1,36 @@
 """Word explanation and analysis API endpoints."""
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Response, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError
+
+from app.core.config import settings
+from app.core.deadline import (
+    REQUESTS_CANCELLED,
+    DeadlineExceededError,
+    deadline_scope,
+    requested_timeout,
+)
+from app.core.metrics import registry
+from app.core.tenancy import ANONYMOUS_TENANT, current_tenant, tenant_from_authorization
+from app.models.words import ExplainWordResponse, GenerateExamplesResponse
+from app.services.admission import CapacityError
+from app.services.cache import call_json, encode_json
+from app.services.scheduler import Priority, priority_class
 
 router = APIRouter()
 
+SESSIONS = registry.gauge("lookup_sessions", "Open word lookup WebSocket sessions")
+LOOKUPS = registry.counter("lookup_session_requests_total", "Word lookups over WebSocket sessions")
+
+# 単語検索セッションのサブプロトコルと、JWT を載せるサブプロトコルの接頭辞
+LOOKUP_SUBPROTOCOL = "newslingua.lookup.v1"
+_BEARER_SUBPROTOCOL = "bearer."
+
 
 class ExplainWordRequest(BaseModel):
     """単語説明リクエスト"""
@@ -16,21 +42,6 @@ class ExplainWordRequest(BaseModel):
     native_language: str = Field(default="japanese", description="説明を表示する言語")
 
 
-class ExplainWordResponse(BaseModel):
-    """単語説明レスポンス"""
-
-    word: str
-    pronunciation: str
-    part_of_speech: str
-    definition: str
-    etymology: str | None = None
-    synonyms: list[str] = []
-    antonyms: list[str] = []
-    examples: list[str] = []
-    memory_tips: str | None = None
-    usage_notes: str | None = None
-
-
 class GenerateExamplesRequest(BaseModel):
     """例文生成リクエスト"""
 
@@ -43,14 +54,46 @@ class GenerateExamplesRequest(BaseModel):
     )
 
 
-class GenerateExamplesResponse(BaseModel):
-    """例文生成レスポンス"""
+async def _explain(request: ExplainWordRequest) -> bytes:
+    from app.services.llm import get_llm_service
+    from app.services.prefetch import get_prefetcher
+
+    get_prefetcher().record_tap(
+        request.word, request.language, request.user_level, request.native_language
+    )
+    llm = get_llm_service()
+    return await call_json(
+        llm.explain_word,
+        {
+            "word": request.word,
+            "language": request.language,
+            "user_level": request.user_level,
+            "context": request.context,
+            "native_language": request.native_language,
+        },
+    )
+
+
+async def _examples(request: GenerateExamplesRequest) -> bytes:
+    from app.services.llm import get_llm_service
 
-    word: str
-    examples: list[dict]  # {"sentence": str, "translation": str}
+    llm = get_llm_service()
+    examples = await call_json(
+        llm.generate_examples,
+        {
+            "word": request.word,
+            "language": request.language,
+            "user_level": request.user_level,
+            "count": request.count,
+            "context_type": request.context_type,
+        },
+    )
+    # 検証済みの例文 JSON をそのまま埋め込む
+    return b'{"word":' + encode_json(request.word) + b',"examples":' + examples + b"}"
 
 
 @router.post("/explain", response_model=ExplainWordResponse)
+@priority_class(Priority.INTERACTIVE)
 async def explain_word(request: ExplainWordRequest):
     """
     単語の詳細な説明を生成します。
@@ -61,18 +104,13 @@ async def explain_word(request: ExplainWordRequest):
     - 例文
     - 覚え方のコツ
     """
-    from app.services.llm import get_llm_service
-
     try:
-        llm = get_llm_service()
-        result = await llm.explain_word(
-            word=request.word,
-            language=request.language,
-            user_level=request.user_level,
-            context=request.context,
-            native_language=request.native_language,
-        )
-        return ExplainWordResponse(**result)
+        body = await _explain(request)
+        return Response(content=body, media_type="application/json")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CapacityError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
@@ -80,6 +118,7 @@ async def explain_word(request: ExplainWordRequest):
 
 
 @router.post("/examples", response_model=GenerateExamplesResponse)
+@priority_class(Priority.INTERACTIVE)
 async def generate_examples(request: GenerateExamplesRequest):
     """
     単語を使った例文を生成します。
@@ -87,19 +126,163 @@ async def generate_examples(request: GenerateExamplesRequest):
     ユーザーのレベルに合わせた難易度で、
     ニュースコンテキストに基づいた自然な例文を生成します。
     """
-    from app.services.llm import get_llm_service
-
     try:
-        llm = get_llm_service()
-        examples = await llm.generate_examples(
-            word=request.word,
-            language=request.language,
-            user_level=request.user_level,
-            count=request.count,
-            context_type=request.context_type,
-        )
-        return GenerateExamplesResponse(word=request.word, examples=examples)
+        body = await _examples(request)
+        return Response(content=body, media_type="application/json")
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CapacityError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI処理エラー: {str(e)}")
+
+
+# セッションで使える操作（リクエストモデルと処理）
+_LOOKUPS: dict[str, tuple[type[BaseModel], Callable[[Any], Awaitable[bytes]]]] = {
+    "explain": (ExplainWordRequest, _explain),
+    "examples": (GenerateExamplesRequest, _examples),
+}
+
+
+def _error_frame(request_id: str | int | None, status: int, error: str, **extra: Any) -> bytes:
+    return encode_json({"id": request_id, "ok": False, "status": status, "error": error, **extra})
+
+
+@router.websocket("/session")
+@priority_class(Priority.INTERACTIVE)
+async def lookup_session(websocket: WebSocket):
+    """
+    読書セッション用の単語検索（1 本の WebSocket で多重化）。
+
+    クライアントは `{"id": 1, "op": "explain", "word": "...", ...}` を送り続けてよく
+    （`op` は `explain` / `examples`、残りのフィールドは各 HTTP エンドポイントと同じ。
+    `timeout_ms` で期限を指定可能）、応答は完了した順に
+    `{"id": 1, "ok": true, "result": {...}}` または
+    `{"id": 1, "ok": false, "status": 504, "error": "..."}` で返ります。
+    キャッシュ済みの単語はすぐに、それ以外は LLM の完了順に届きます。
+    `{"id": 1, "op": "cancel"}` で処理中の検索を取り消せます（応答は返りません）。
+
+    認証は Authorization ヘッダーのほか、ヘッダーを付けられないブラウザ向けに
+    サブプロトコル（`new WebSocket(url, ["newslingua.lookup.v1", "bearer.<jwt>"])`）か、
+    最初のメッセージ `{"type": "auth", "token": "<jwt>"}` で受け付けます
+    （URL に載せるとアクセスログに残るため `?token=` は使いません）。
+    どれもなければ匿名のセッションになります。
+    """
+    authorization = websocket.headers.get("authorization")
+    subprotocol: str | None = None
+    for offered in websocket.scope.get("subprotocols", []):
+        if offered == LOOKUP_SUBPROTOCOL:
+            subprotocol = offered
+        elif offered.startswith(_BEARER_SUBPROTOCOL) and authorization is None:
+            authorization = f"Bearer {offered[len(_BEARER_SUBPROTOCOL) :]}"
+
+    # トークンを含むプロトコルは応答ヘッダーに返さない
+    await websocket.accept(subprotocol=subprotocol)
+    tenant = current_tenant.set(tenant_from_authorization(authorization))
+    # auth メッセージを受け付けるのは、まだ認証されていない接続の最初のメッセージだけ
+    accepts_auth = authorization is None
+    SESSIONS.inc()
+    pending: dict[str | int, asyncio.Task[None]] = {}
+    send_lock = asyncio.Lock()
+
+    async def send(frame: bytes) -> None:
+        async with send_lock:
+            await websocket.send_text(frame.decode("utf-8"))
+
+    async def answer(request_id: str | int, op: str, request: BaseModel, timeout: float) -> None:
+        try:
+            with deadline_scope(timeout):
+                body = await _LOOKUPS[op][1](request)
+            frame = b'{"id":' + encode_json(request_id) + b',"ok":true,"result":' + body + b"}"
+            outcome = "ok"
+        except DeadlineExceededError as e:
+            frame, outcome = _error_frame(request_id, 504, str(e)), "error"
+        except CapacityError as e:
+            frame = _error_frame(request_id, e.status_code, str(e), retry_after=e.retry_after)
+            outcome = "rejected"
+        except ValueError as e:
+            frame, outcome = _error_frame(request_id, 503, str(e)), "error"
+        except Exception as e:
+            frame, outcome = _error_frame(request_id, 500, f"AI処理エラー: {str(e)}"), "error"
+        LOOKUPS.inc(op=op, outcome=outcome)
+        try:
+            await send(frame)
+        except (WebSocketDisconnect, RuntimeError):
+            # 送信中に切断された（後始末は受信側で行う）
+            pass
+        finally:
+            # 取り消し後に同じ id で送られた検索は消さない
+            if pending.get(request_id) is asyncio.current_task():
+                del pending[request_id]
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except (KeyError, ValueError):
+                # バイナリフレーム（KeyError）や JSON でないテキスト
+                message = None
+            if not isinstance(message, dict):
+                await send(_error_frame(None, 400, "Messages must be JSON objects"))
+                continue
+            if message.get("type") == "auth":
+                if not accepts_auth:
+                    await send(_error_frame(None, 400, "auth must be the first message"))
+                    continue
+                accepts_auth = False
+                token = message.get("token")
+                tenant_id = tenant_from_authorization(
+                    f"Bearer {token}" if isinstance(token, str) else None
+                )
+                # 以降に作る検索タスクはこのテナントで実行される
+                current_tenant.set(tenant_id)
+                await send(
+                    encode_json(
+                        {"type": "auth", "ok": True, "authenticated": tenant_id != ANONYMOUS_TENANT}
+                    )
+                )
+                continue
+            accepts_auth = False
+            request_id = message.get("id")
+            op = message.get("op", "explain")
+            if not isinstance(request_id, str | int) or isinstance(request_id, bool):
+                await send(_error_frame(None, 400, "Messages need a string or integer id"))
+                continue
+
+            if op == "cancel":
+                task = pending.pop(request_id, None)
+                if task is not None and not task.done():
+                    REQUESTS_CANCELLED.inc(reason="client_cancelled", transport="websocket")
+                    task.cancel()
+                continue
+            if op not in _LOOKUPS:
+                await send(_error_frame(request_id, 400, f"Unknown op: {op}"))
+                continue
+            if request_id in pending:
+                await send(_error_frame(request_id, 400, "A request with this id is pending"))
+                continue
+            if len(pending) >= settings.lookup_session_max_pending:
+                LOOKUPS.inc(op=op, outcome="rejected")
+                await send(_error_frame(request_id, 429, "Too many pending lookups", retry_after=1))
+                continue
+            try:
+                request = _LOOKUPS[op][0].model_validate(message)
+                timeout_ms = message.get("timeout_ms")
+                timeout = requested_timeout(float(timeout_ms) if timeout_ms is not None else None)
+            except (ValidationError, TypeError, ValueError) as e:
+                await send(_error_frame(request_id, 422, str(e)))
+                continue
+            pending[request_id] = asyncio.create_task(answer(request_id, op, request, timeout))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        SESSIONS.dec()
+        tasks = [task for task in pending.values() if not task.done()]
+        if tasks:
+            # 閉じた読書画面の検索は待たずに LLM 呼び出しごと取り消す
+            REQUESTS_CANCELLED.inc(len(tasks), reason="client_disconnect", transport="websocket")
+            for task in tasks:
+                task.cancel()
+        current_tenant.reset(tenant)
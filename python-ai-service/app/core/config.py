@@ -26,16 +26,155 @@ class Settings(BaseSettings):
 
     # Anthropic (Claude)
     anthropic_api_key: str = ""
+    # ローカルのフェイクLLMサーバー等に向ける場合に指定（空なら公式エンドポイント）
+    anthropic_base_url: str = ""
 
     # OpenAI (fallback)
     openai_api_key: str = ""
 
+    # LLM cassette (record/replay) - "" で無効、"record" / "replay"
+    llm_cassette_mode: str = ""
+    llm_cassette_path: str = "cassettes/llm.jsonl.gz"
+    # 再生時の待ち時間 = 録画時のレイテンシ × この係数（0 で待ちなし）
+    llm_cassette_latency_scale: float = 1.0
+
     # Redis (optional caching)
     redis_url: str = "redis://localhost:6379"
 
     # JWT Secret (shared with Next.js)
     jwt_secret: str = ""
 
+    # Request deadlines（X-Request-Timeout-Ms で上書き可能。0 で既定の期限なし）
+    request_timeout_seconds: float = 60.0
+    request_max_timeout_seconds: float = 300.0
+    mcp_tool_timeout_seconds: float = 120.0
+    # 期限までの残りがこれ未満なら LLM 呼び出し（とリトライ）を始めない
+    llm_min_call_seconds: float = 1.0
+
+    # Word lookup sessions（WebSocket 1 本で単語検索を多重化する）
+    # 1 接続で同時に処理する検索の上限（超えた分はすぐ 429 で返す）
+    lookup_session_max_pending: int = 32
+
+    # LLM scheduler (per-tenant fair share)
+    llm_max_concurrency: int = 32
+    tenant_max_concurrency: int = 16
+    # テナント毎のトークン上限（入力+出力、1分あたり）。0 で無制限
+    tenant_tokens_per_minute: int = 0
+    tenant_default_weight: float = 1.0
+    # テナントID -> 重み（例: TENANT_WEIGHTS='{"user_123": 2.0}'）
+    tenant_weights: dict[str, float] = {}
+    # インタラクティブ専用に確保するスロット数
+    llm_interactive_reserved_slots: int = 4
+    # インタラクティブの待ち時間がこれを超えたらバックグラウンド呼び出しを中断する（0 で無効）
+    llm_interactive_wait_target_ms: float = 500.0
+
+    # Admission control（待ち行列が長すぎる LLM 呼び出しは 429 で早期に断る。0 で無効）
+    # 上限は interactive の値。standard はその 3/4、background は半分
+    llm_admission_max_queue: int = 64
+    llm_admission_max_queue_wait_ms: float = 10000.0
+    # Provider circuit breaker（連続失敗でこの秒数だけ呼び出しを止める。0 で無効）
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_seconds: float = 30.0
+    # Degraded mode: "off"（失敗を返す）/ "fallback"（過負荷時にローカル計算の結果を返す）/
+    # "always"（ローカル計算できるものは常に LLM を使わない）
+    degraded_mode: str = "fallback"
+
+    # Token budgets（タスク毎に観測した出力トークン数の高パーセンタイル × 余裕を max_tokens にする）
+    token_budget_enabled: bool = True
+    token_budget_percentile: float = 0.99
+    token_budget_margin: float = 1.2
+    # 較正を始めるまでのサンプル数と、パーセンタイルを取る直近のサンプル数
+    token_budget_min_samples: int = 20
+    token_budget_window: int = 500
+    token_budget_min_tokens: int = 64
+    # 較正で呼び出し元の指定より大きくする場合の上限
+    token_budget_max_tokens: int = 8192
+    # max_tokens で切れた応答の続きを生成する回数（0 で切れたまま返す）
+    llm_max_continuations: int = 2
+
+    # Bulk ingestion（NDJSON で送られた記事を並行して分析し、終わった順に NDJSON で返す）
+    ingest_concurrency: int = 4
+    # 1 記事あたりの期限（リクエスト全体ではなく記事毎に適用）
+    ingest_article_timeout_seconds: float = 120.0
+    ingest_max_line_bytes: int = 1_048_576
+
+    # Predictive prefetch（記事を開いた時にタップされそうな単語の説明をバックグラウンドで生成）
+    prefetch_enabled: bool = True
+    # 1 記事あたりの先読み単語数（/api/metrics/prefetch の順位別ヒット数を見て調整する）
+    prefetch_max_words: int = 8
+    # 同時に先読みする記事の上限（超えた記事は先読みしない）
+    prefetch_max_jobs: int = 16
+    prefetch_timeout_seconds: float = 300.0
+    # 先読みした単語がタップされたかを追跡する期間と件数
+    prefetch_tracking_seconds: float = 3600.0
+    prefetch_tracking_max_entries: int = 10000
+
+    # Response cache（プロセス内 LRU + 同一ホストのワーカー間で共有するメモリマップ）
+    cache_enabled: bool = True
+    cache_ttl_seconds: int = 86400
+    local_cache_max_entries: int = 1024
+    shared_cache_enabled: bool = True
+    # 空なら /dev/shm（無ければ一時ディレクトリ）に作成する
+    shared_cache_path: str = ""
+    shared_cache_size_mb: int = 64
+
+    # Word packs（事前生成した単語解説。文脈なしの explain_word を LLM なしで返す）
+    word_packs_enabled: bool = True
+    word_packs_dir: str = "packs"
+
+    # Documents（前処理済みの記事本文を保持する件数。0 で共有しない）
+    document_cache_max_entries: int = 256
+
+    # Summary updates（本文の変更割合がこれを超えたら差分ではなく全体を要約し直す）
+    summary_update_max_changed_ratio: float = 0.5
+
+    # Story clustering（記事をストーリーにまとめるオンラインクラスタリング）
+    story_join_threshold: float = 0.3  # 既存ストーリーに加える最小のコサイン類似度
+    story_merge_threshold: float = 0.35  # ストーリー同士を統合する重心の類似度
+    story_split_threshold: float = 0.15  # 2 分割した両側の類似度がこれ未満なら分割する
+    story_fingerprint_terms: int = 48  # 記事の指紋にする語数
+    story_index_terms: int = 12  # ストーリーを転置索引に載せる語数
+    story_candidates: int = 32  # 類似度を計算する候補ストーリー数の上限
+    story_min_split_size: int = 3
+    story_split_check_interval: int = 8  # 何記事毎に分割を判定するか
+    story_window_hours: float = 72.0  # この間記事が来なかったストーリーには加えない
+    story_max_articles: int = 20000
+
+    # Comprehension quizzes（記事・レベル毎に一度だけ生成する問題数）
+    comprehension_pool_size: int = 12
+
+    # Spaced repetition (FSRS)
+    srs_desired_retention: float = 0.9
+    srs_maximum_interval_days: int = 36500
+    # 空なら FSRS-4.5 の既定値（例: SRS_WEIGHTS='[0.4872, 1.4003, ...]'、17 個）
+    srs_weights: list[float] = []
+
+    # Adaptive level assessment (IRT)
+    # vocabulary_question をエクスポートした JSON（id, language, cefrLevel, difficulty, options）
+    assessment_item_bank_path: str = "assessment/items.json"
+    assessment_min_items: int = 5
+    assessment_max_items: int = 30
+    # 標準誤差がこれ以下、または推定レベルの確信度がこれ以上になったら終了する
+    assessment_se_target: float = 0.3
+    assessment_level_confidence: float = 0.9
+    assessment_max_sessions: int = 10000
+    assessment_session_ttl_seconds: int = 1800
+
+    # Startup warm-up（完了するまで /api/health/ready は 503 を返す）
+    startup_warm_up: bool = True
+    # 起動時に確立しておくプロバイダー接続数
+    llm_warm_connections: int = 4
+
+    # Event-loop monitor
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_ms: float = 20.0
+    loop_block_threshold_ms: float = 100.0
+
+    # Tracing (OpenTelemetry) - "" で無効、"console" / "file" / "otlp"
+    tracing_exporter: str = ""
+    tracing_file_path: str = "traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+
     @property
     def has_anthropic(self) -> bool:
         """Check if Anthropic API key is configured."""
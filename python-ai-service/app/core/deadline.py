@@ -0,0 +1,145 @@
+"""Request deadlines and client-disconnect cancellation.
+
+Every HTTP request and MCP tool call runs with a deadline (monotonic
+seconds) in ``current_deadline``; ``LLMService.generate`` does not start
+provider calls or retries that cannot finish before it and aborts calls that
+are still running when it passes. ``RequestDeadlineMiddleware`` also cancels
+the handler when the client disconnects, which cancels any provider call it
+is waiting on.
+"""
+
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = structlog.get_logger()
+
+REQUESTS_CANCELLED = registry.counter(
+    "requests_cancelled_total", "Requests abandoned before completion"
+)
+LLM_CALLS_CANCELLED = registry.counter(
+    "llm_calls_cancelled_total", "LLM calls abandoned before the provider answered"
+)
+
+TIMEOUT_HEADER = b"x-request-timeout-ms"
+
+# 現在の処理の期限（time.monotonic() 基準、None は期限なし）
+current_deadline: ContextVar[float | None] = ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """The request deadline passed (or would pass before an LLM call could finish)."""
+
+
+def remaining() -> float | None:
+    """Seconds left until the current deadline (None without a deadline)."""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    """Run with a deadline ``seconds`` from now; an earlier outer deadline still applies."""
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = current_deadline.get()
+    token = current_deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+def requested_timeout(milliseconds: float | None) -> float:
+    """Timeout a client asked for (capped at the maximum), or the configured default."""
+    if milliseconds is not None and milliseconds > 0:
+        return min(milliseconds / 1000, settings.request_max_timeout_seconds)
+    return settings.request_timeout_seconds
+
+
+def request_timeout(headers: list[tuple[bytes, bytes]]) -> float:
+    """Timeout of an HTTP request: ``X-Request-Timeout-Ms`` or the configured default."""
+    for name, value in headers:
+        if name.lower() == TIMEOUT_HEADER:
+            try:
+                return requested_timeout(float(value))
+            except ValueError:
+                break
+    return settings.request_timeout_seconds
+
+
+class RequestDeadlineMiddleware:
+    """
+    ASGI middleware that sets the request deadline and cancels the handler
+    when the client disconnects before the response is complete.
+
+    The client's connection is watched only after the request body has been
+    read; the handler sees the disconnect through its own ``receive`` too.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        body_read = asyncio.Event()
+        disconnected = asyncio.Event()
+        response_complete = False
+
+        async def receive_request() -> dict[str, Any]:
+            if body_read.is_set():
+                # 本文の後は監視タスクが接続を見ているので切断を待つだけ
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                body_read.set()
+            elif not message.get("more_body", False):
+                body_read.set()
+            return message
+
+        async def send_response(message: dict[str, Any]) -> None:
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        with deadline_scope(request_timeout(scope.get("headers", []))):
+            handler = asyncio.create_task(self.app(scope, receive_request, send_response))
+
+        async def watch_client() -> None:
+            await body_read.wait()
+            if not disconnected.is_set():
+                message = await receive()
+                if message["type"] != "http.disconnect":
+                    return
+                disconnected.set()
+            if not response_complete and not handler.done():
+                REQUESTS_CANCELLED.inc(reason="client_disconnect", transport="http")
+                logger.info("request_cancelled", reason="client_disconnect", path=scope["path"])
+                handler.cancel()
+
+        watcher = asyncio.create_task(watch_client())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            # 切断によるキャンセルはここで止める（サーバー停止などの外側のキャンセルは伝播）
+            current = asyncio.current_task()
+            if not disconnected.is_set() or (current is not None and current.cancelling()):
+                raise
+        finally:
+            watcher.cancel()
@@ -0,0 +1,138 @@
+"""Event-loop lag monitor and blocking-callback detector.
+
+A heartbeat coroutine measures how late the event loop wakes it up, and a
+watchdog thread captures the loop thread's stack whenever the heartbeat
+stalls for longer than the configured threshold (e.g. a synchronous HTTP
+call made directly inside a coroutine).
+"""
+
+import asyncio
+import contextlib
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# 記録するスタックの最大フレーム数（ログ肥大化防止）
+MAX_STACK_FRAMES = 50
+
+
+class LoopMonitor:
+    """Measures event-loop lag and reports callbacks that block the loop."""
+
+    def __init__(self, interval: float, block_threshold: float, history: int = 1000) -> None:
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lag_samples: deque[float] = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.blocked_events = 0
+        self.last_block: dict[str, Any] | None = None
+
+        self._heartbeat_at = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            self._heartbeat_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.lag_samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def _watch(self) -> None:
+        reported = False
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self._heartbeat_at - self.interval
+            if stalled < self.block_threshold:
+                reported = False
+                continue
+            if reported:
+                continue
+
+            # ブロック中のループスレッドのスタックを取得（1回のブロックにつき1度だけ）
+            reported = True
+            frame = sys._current_frames().get(self._loop_thread_id or 0)
+            stack = traceback.format_stack(frame)[-MAX_STACK_FRAMES:] if frame else []
+            self.blocked_events += 1
+            self.last_block = {
+                "detected_at": time.time(),
+                "blocked_ms": round(stalled * 1000, 1),
+                "stack": "".join(stack),
+            }
+            logger.warning(
+                "event_loop_blocked",
+                blocked_ms=self.last_block["blocked_ms"],
+                threshold_ms=round(self.block_threshold * 1000, 1),
+                stack=self.last_block["stack"],
+            )
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat_at = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the watchdog thread."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    def stats(self) -> dict[str, Any]:
+        """Lag statistics over the recent history window."""
+        samples = sorted(self.lag_samples)
+
+        def pct(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 2)
+
+        return {
+            "interval_ms": round(self.interval * 1000, 1),
+            "block_threshold_ms": round(self.block_threshold * 1000, 1),
+            "samples": len(samples),
+            "lag_p50_ms": pct(50),
+            "lag_p99_ms": pct(99),
+            "lag_max_ms": round(self.max_lag * 1000, 2),
+            "blocked_events": self.blocked_events,
+            "last_block": self.last_block,
+        }
+
+
+# Singleton instance
+_loop_monitor: LoopMonitor | None = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Get or create the LoopMonitor singleton."""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopMonitor(
+            interval=settings.loop_monitor_interval_ms / 1000,
+            block_threshold=settings.loop_block_threshold_ms / 1000,
+        )
+    return _loop_monitor
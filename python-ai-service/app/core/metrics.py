@@ -0,0 +1,84 @@
+"""Minimal in-process metrics registry with Prometheus text exposition."""
+
+import threading
+from collections.abc import Iterable
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    """A labelled counter or gauge."""
+
+    def __init__(self, name: str, documentation: str, metric_type: str = "counter") -> None:
+        if metric_type not in ("counter", "gauge"):
+            raise ValueError(f"Unsupported metric type: {metric_type}")
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels: dict[str, str]) -> LabelKey:
+        return tuple(sorted(labels.items()))
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[tuple[LabelKey, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        for key, value in self.samples():
+            if key:
+                label_text = ",".join(f'{name}="{_escape(val)}"' for name, val in key)
+                lines.append(f"{self.name}{{{label_text}}} {value:g}")
+            else:
+                lines.append(f"{self.name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRegistry:
+    """Holds every metric of the process."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, documentation: str) -> Metric:
+        return self._register(name, documentation, "counter")
+
+    def gauge(self, name: str, documentation: str) -> Metric:
+        return self._register(name, documentation, "gauge")
+
+    def _register(self, name: str, documentation: str, metric_type: str) -> Metric:
+        if name not in self._metrics:
+            self._metrics[name] = Metric(name, documentation, metric_type)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format."""
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,50 @@
+"""Sampling profiler for the live process.
+
+Samples the Python stacks of every thread at a fixed interval and
+aggregates them in the "collapsed stack" format understood by
+flamegraph.pl, speedscope and inferno (``frame;frame;frame count``).
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter[str]:
+    """
+    Sample all thread stacks for ``seconds`` (blocking; run in a worker thread).
+
+    Returns:
+        Collapsed stack (root first, ``;``-separated) -> sample count
+    """
+    own_thread = threading.get_ident()
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    counts: Counter[str] = Counter()
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        for thread_id, top in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            labels = []
+            frame: FrameType | None = top
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            counts[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+
+    return counts
+
+
+def to_collapsed(counts: Counter[str]) -> str:
+    """Render samples as collapsed stacks (one ``stack count`` per line)."""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,75 @@
+"""Startup timing and readiness state.
+
+``app.main`` records how long its imports took, and the lifespan runs the
+warm-up steps (``app.services.warmup``) in the background. The readiness
+probe (``/api/health/ready``) only passes once every step has finished, so
+the first users after a deploy or scale-out do not pay for imports, TLS
+handshakes or cache loading.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import structlog
+
+from app import IMPORT_STARTED
+
+logger = structlog.get_logger()
+
+
+class StartupState:
+    """Duration of each startup phase and whether the process is ready."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.ready = False
+        self._ready_at: float | None = None
+
+    def mark_imported(self) -> None:
+        """Record the time spent importing the application modules."""
+        self.phases["import"] = time.perf_counter() - IMPORT_STARTED
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a warm-up step.
+
+        Failures are logged and recorded but not raised: a step that cannot
+        warm up (e.g. the provider is unreachable) must not keep the process
+        from serving.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors[name] = str(e)
+            logger.warning("startup_phase_failed", phase=name, error=str(e))
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self._ready_at = time.perf_counter()
+        logger.info(
+            "startup_ready",
+            total_ms=round((self._ready_at - IMPORT_STARTED) * 1000, 1),
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "total_ms": (
+                round((self._ready_at - IMPORT_STARTED) * 1000, 1)
+                if self._ready_at is not None
+                else None
+            ),
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "errors": self.errors,
+        }
+
+
+startup = StartupState()
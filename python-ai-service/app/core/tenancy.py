@@ -0,0 +1,75 @@
+"""Tenant identification from the JWT shared with Next.js."""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from contextvars import ContextVar
+from typing import Any
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+ANONYMOUS_TENANT = "anonymous"
+
+# 現在のリクエストのテナント（HTTPミドルウェアで設定し、LLMスケジューラーが参照する）
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default=ANONYMOUS_TENANT)
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def decode_jwt(token: str, secret: str) -> dict[str, Any] | None:
+    """
+    Verify an HS256 JWT and return its claims.
+
+    Returns:
+        Claims, or None if the token is malformed, badly signed or expired
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64url_decode(header_b64))
+        if header.get("alg") != "HS256":
+            return None
+
+        expected = hmac.new(
+            secret.encode("utf-8"),
+            f"{header_b64}.{payload_b64}".encode("ascii"),
+            hashlib.sha256,
+        ).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+            return None
+
+        claims = json.loads(_b64url_decode(payload_b64))
+    except (ValueError, UnicodeError):
+        return None
+
+    if not isinstance(claims, dict):
+        return None
+    exp = claims.get("exp")
+    if isinstance(exp, int | float) and exp < time.time():
+        return None
+    return claims
+
+
+def tenant_from_authorization(authorization: str | None) -> str:
+    """Resolve the tenant id from an ``Authorization: Bearer <jwt>`` header."""
+    if not authorization or not settings.jwt_secret:
+        return ANONYMOUS_TENANT
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return ANONYMOUS_TENANT
+
+    claims = decode_jwt(token.strip(), settings.jwt_secret)
+    if claims is None:
+        logger.info("invalid_jwt")
+        return ANONYMOUS_TENANT
+
+    tenant = claims.get("sub") or claims.get("userId") or claims.get("id")
+    return str(tenant) if tenant else ANONYMOUS_TENANT
@@ -0,0 +1,167 @@
+"""Distributed tracing with OpenTelemetry-compatible spans.
+
+OpenTelemetry is optional: spans are only created once ``setup_tracing`` has
+installed an exporter (``TRACING_EXPORTER`` with ``uv sync --extra tracing``);
+until then, or without ``opentelemetry-api``, every helper here is a no-op.
+"""
+
+import contextvars
+import functools
+import os
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+from contextlib import contextmanager
+from typing import Any
+
+import structlog
+
+from app.core.config import settings
+
+try:
+    from opentelemetry import propagate as otel_propagate
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_propagate = None  # type: ignore[assignment]
+    otel_trace = None  # type: ignore[assignment]
+
+logger = structlog.get_logger()
+
+TRACER_NAME = "newslingua.ai"
+
+_provider: Any = None
+
+# 実行中の @traced メソッド（入れ子なら最も内側）の名前
+current_operation: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_operation", default=None
+)
+
+
+class _NoopSpan:
+    """Stand-in span used when tracing is off."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Mapping[str, Any]) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def setup_tracing() -> None:
+    """Configure the tracer provider and exporter from settings (idempotent)."""
+    global _provider
+    if _provider is not None or not settings.tracing_exporter or otel_trace is None:
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("tracing_sdk_not_installed", exporter=settings.tracing_exporter)
+        return
+
+    exporter_name = settings.tracing_exporter.lower()
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        exporter: Any = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    elif exporter_name == "file":
+        # 1行1スパンのJSON（JSON Lines）で追記する
+        exporter = ConsoleSpanExporter(
+            out=open(settings.tracing_file_path, "a", encoding="utf-8"),  # noqa: SIM115
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    elif exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        raise ValueError(f"Unknown tracing exporter: {settings.tracing_exporter}")
+
+    provider = TracerProvider(
+        resource=Resource.create(
+            {"service.name": "newslingua-ai-service", "service.version": settings.version}
+        )
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    otel_trace.set_tracer_provider(provider)
+    _provider = provider
+    logger.info("tracing_enabled", exporter=exporter_name)
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and shut the exporter down."""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+def _clean(attributes: Mapping[str, Any]) -> dict[str, Any]:
+    """Drop ``None`` values (not a valid OpenTelemetry attribute value)."""
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+@contextmanager
+def start_span(
+    name: str,
+    *,
+    carrier: Mapping[str, str] | None = None,
+    attributes: Mapping[str, Any] | None = None,
+) -> Iterator[Any]:
+    """
+    Start a span as a child of the current one.
+
+    Args:
+        name: Span name
+        carrier: Incoming headers (W3C ``traceparent``) to continue a remote trace;
+            the span is created as a SERVER span when given
+        attributes: Initial span attributes
+    """
+    if _provider is None:
+        # エクスポーターがなければスパンは捨てられるだけなので作らない
+        yield _NOOP_SPAN
+        return
+
+    tracer = otel_trace.get_tracer(TRACER_NAME)
+    kwargs: dict[str, Any] = {"attributes": _clean(attributes or {})}
+    if carrier is not None and otel_propagate is not None:
+        kwargs["context"] = otel_propagate.extract(carrier)
+        kwargs["kind"] = otel_trace.SpanKind.SERVER
+
+    with tracer.start_as_current_span(name, **kwargs) as span:
+        yield span
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Add attributes to the current span (e.g. cache outcome from an inner layer)."""
+    if _provider is None:
+        return
+    span = otel_trace.get_current_span()
+    if span.is_recording():
+        span.set_attributes(_clean(attributes))
+
+
+def traced[**P, R](func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Wrap an async method in a span named after its qualified name (``current_operation``)."""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        # 名前はトークン予算の較正にも使うので、トレースが無効でも設定する
+        token = current_operation.set(name)
+        try:
+            if _provider is None:
+                return await func(*args, **kwargs)
+            with start_span(name):
+                return await func(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+
+    return wrapper
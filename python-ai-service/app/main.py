@@ -1,13 +1,23 @@
 """NewsLingua AI Service - Main FastAPI Application"""
 
+import asyncio
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import router as api_router
 from app.core.config import settings
+from app.core.deadline import RequestDeadlineMiddleware
+from app.core.loop_monitor import get_loop_monitor
+from app.core.startup import startup
+from app.core.tenancy import current_tenant, tenant_from_authorization
+from app.core.tracing import setup_tracing, shutdown_tracing, start_span
+from app.services.scheduler import current_priority, requested_priority
+from app.services.warmup import warm_up
+
+startup.mark_imported()
 
 
 @asynccontextmanager
@@ -17,8 +27,22 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     print(f"🚀 Starting {settings.app_name} v{settings.version}")
     print(f"   Anthropic API: {'✅' if settings.has_anthropic else '❌'}")
     print(f"   OpenAI API: {'✅' if settings.has_openai else '❌'}")
+    setup_tracing()
+    if settings.loop_monitor_enabled:
+        get_loop_monitor().start()
+    # ウォームアップ中も /api/health には応答し、完了後に readiness を通す
+    warm_up_task: asyncio.Task[None] | None = None
+    if settings.startup_warm_up:
+        warm_up_task = asyncio.create_task(warm_up())
+    else:
+        startup.mark_ready()
     yield
     # Shutdown
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    if settings.loop_monitor_enabled:
+        await get_loop_monitor().stop()
+    shutdown_tracing()
     print(f"👋 Shutting down {settings.app_name}")
 
 
@@ -40,6 +64,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# リクエスト単位のトレーシング（traceparent ヘッダーがあれば親トレースを引き継ぐ）
+@app.middleware("http")
+async def trace_requests(request: Request, call_next) -> Response:
+    with start_span(
+        f"{request.method} {request.url.path}",
+        carrier=dict(request.headers),
+        attributes={"http.request.method": request.method, "url.path": request.url.path},
+    ) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            span.update_name(f"{request.method} {route.path}")
+            span.set_attribute("http.route", route.path)
+        span.set_attribute("http.response.status_code", response.status_code)
+        return response
+
+
+# JWT からテナントを特定（LLM スケジューラーの公平配分に使用）
+@app.middleware("http")
+async def identify_tenant(request: Request, call_next) -> Response:
+    token = current_tenant.set(tenant_from_authorization(request.headers.get("authorization")))
+    try:
+        return await call_next(request)
+    finally:
+        current_tenant.reset(token)
+
+
+# X-Request-Priority ヘッダーで優先度を下げられる（一括処理などは background を指定）
+# 上げることはできない（interactive は無視する）
+@app.middleware("http")
+async def request_priority(request: Request, call_next) -> Response:
+    requested = requested_priority(request.headers.get("x-request-priority"))
+    if requested is None:
+        return await call_next(request)
+    token = current_priority.set(requested)
+    try:
+        return await call_next(request)
+    finally:
+        current_priority.reset(token)
+
+
+# リクエストの期限を設定し、クライアントが切断したら処理（と LLM 呼び出し）をキャンセルする
+app.add_middleware(RequestDeadlineMiddleware)
+
+
 # APIルーター登録
 app.include_router(api_router, prefix="/api")
 
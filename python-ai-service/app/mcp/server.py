@@ -1,5 +1,6 @@
 """NewsLingua MCP Server - Model Context Protocol implementation."""
 
+import asyncio
 import json
 from typing import Any
 
@@ -8,6 +9,10 @@ from mcp.server.stdio import stdio_server
 from mcp.types import Resource, TextContent, Tool
 
 from app.core.config import settings
+from app.core.deadline import REQUESTS_CANCELLED, deadline_scope
+from app.core.tracing import setup_tracing, shutdown_tracing, start_span
+from app.services.admission import CapacityError
+from app.services.cache import call_json, encode_json
 
 # Create MCP server instance
 server = Server("newslingua-ai")
@@ -173,6 +178,47 @@ async def list_tools() -> list[Tool]:
                 "required": ["content"],
             },
         ),
+        Tool(
+            name="generate_comprehension_questions",
+            description=(
+                "Quiz a reader on an article with comprehension questions they have not seen yet."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "content": {
+                        "type": "string",
+                        "description": "The article content",
+                    },
+                    "language": {
+                        "type": "string",
+                        "description": "Language of the article",
+                        "default": "english",
+                    },
+                    "user_level": {
+                        "type": "string",
+                        "description": "User's CEFR level",
+                        "default": "B1",
+                    },
+                    "count": {
+                        "type": "integer",
+                        "description": "Number of questions",
+                        "default": 3,
+                    },
+                    "user_id": {
+                        "type": "string",
+                        "description": "Reader id; questions already shown to this reader are skipped",
+                    },
+                    "seen_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Question ids the reader has already answered",
+                        "default": [],
+                    },
+                },
+                "required": ["content"],
+            },
+        ),
         Tool(
             name="explain_grammar",
             description="Analyze and explain the grammar of a given text.",
@@ -387,66 +433,125 @@ async def list_tools() -> list[Tool]:
 @server.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """Handle tool calls."""
+    with (
+        start_span("mcp.call_tool", attributes={"mcp.tool.name": name}),
+        deadline_scope(settings.mcp_tool_timeout_seconds),
+    ):
+        try:
+            return await _call_tool(name, arguments)
+        except asyncio.CancelledError:
+            # クライアントの notifications/cancelled でハンドラーごとキャンセルされた
+            REQUESTS_CANCELLED.inc(reason="client_cancelled", transport="mcp")
+            raise
+
+
+def _json_content(body: bytes) -> list[TextContent]:
+    """Wrap serialized JSON (e.g. a cache hit) as MCP text content."""
+    return [TextContent(type="text", text=body.decode("utf-8"))]
+
+
+async def _call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Dispatch a tool call to the matching service."""
     try:
-        from app.services.word_explainer import get_word_explainer
         from app.services.article_analyzer import get_article_analyzer
+        from app.services.llm import get_llm_service
+        from app.services.word_explainer import get_word_explainer
 
+        # 単語説明・例文・難易度はキャッシュ済みバイト列を返せる LLMService を直接呼ぶ
+        llm = get_llm_service()
         word_explainer = get_word_explainer()
         article_analyzer = get_article_analyzer()
 
         if name == "explain_word":
-            result = await word_explainer.explain_word(
-                word=arguments["word"],
-                language=arguments.get("language", "english"),
-                user_level=arguments.get("user_level", "B1"),
-                context=arguments.get("context"),
-                native_language=arguments.get("native_language", "japanese"),
+            body = await call_json(
+                llm.explain_word,
+                {
+                    "word": arguments["word"],
+                    "language": arguments.get("language", "english"),
+                    "user_level": arguments.get("user_level", "B1"),
+                    "context": arguments.get("context"),
+                    "native_language": arguments.get("native_language", "japanese"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         elif name == "generate_examples":
-            result = await word_explainer.generate_examples(
-                word=arguments["word"],
-                language=arguments.get("language", "english"),
-                user_level=arguments.get("user_level", "B1"),
-                count=arguments.get("count", 3),
-                context_type=arguments.get("context_type", "news"),
+            body = await call_json(
+                llm.generate_examples,
+                {
+                    "word": arguments["word"],
+                    "language": arguments.get("language", "english"),
+                    "user_level": arguments.get("user_level", "B1"),
+                    "count": arguments.get("count", 3),
+                    "context_type": arguments.get("context_type", "news"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         elif name == "explain_grammar":
-            result = await word_explainer.explain_grammar(
-                text=arguments["text"],
-                language=arguments.get("language", "english"),
-                user_level=arguments.get("user_level", "B1"),
-                native_language=arguments.get("native_language", "japanese"),
+            body = await call_json(
+                word_explainer.explain_grammar,
+                {
+                    "text": arguments["text"],
+                    "language": arguments.get("language", "english"),
+                    "user_level": arguments.get("user_level", "B1"),
+                    "native_language": arguments.get("native_language", "japanese"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         elif name == "analyze_difficulty":
-            result = await article_analyzer.analyze_difficulty(
-                content=arguments["content"],
-                language=arguments.get("language", "english"),
+            body = await call_json(
+                llm.analyze_article_difficulty,
+                {
+                    "content": arguments["content"],
+                    "language": arguments.get("language", "english"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         elif name == "summarize_article":
-            result = await article_analyzer.summarize_article(
+            body = await call_json(
+                article_analyzer.summarize_article,
+                {
+                    "content": arguments["content"],
+                    "language": arguments.get("language", "english"),
+                    "user_level": arguments.get("user_level", "B1"),
+                    "target_language": arguments.get("target_language", "japanese"),
+                },
+                strict=False,
+            )
+            return _json_content(body)
+
+        elif name == "generate_comprehension_questions":
+            from app.services.comprehension import get_quiz_service
+
+            quiz = await get_quiz_service().quiz(
                 content=arguments["content"],
                 language=arguments.get("language", "english"),
                 user_level=arguments.get("user_level", "B1"),
-                target_language=arguments.get("target_language", "japanese"),
+                count=arguments.get("count", 3),
+                user_id=arguments.get("user_id"),
+                seen_ids=arguments.get("seen_ids", []),
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(encode_json(quiz))
 
         elif name == "extract_vocabulary":
-            result = await article_analyzer.extract_vocabulary(
-                content=arguments["content"],
-                language=arguments.get("language", "english"),
-                user_level=arguments.get("user_level", "B1"),
-                max_words=arguments.get("max_words", 10),
+            body = await call_json(
+                article_analyzer.extract_vocabulary,
+                {
+                    "content": arguments["content"],
+                    "language": arguments.get("language", "english"),
+                    "user_level": arguments.get("user_level", "B1"),
+                    "max_words": arguments.get("max_words", 10),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         # ========================================
         # Phase 3.3: レジスター分析ツール
@@ -455,23 +560,31 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             from app.services.register_analyzer import get_register_analyzer
 
             register_analyzer = get_register_analyzer()
-            result = await register_analyzer.analyze_register(
-                expression=arguments["expression"],
-                language=arguments.get("language", "english"),
-                native_language=arguments.get("native_language", "japanese"),
+            body = await call_json(
+                register_analyzer.analyze_register,
+                {
+                    "expression": arguments["expression"],
+                    "language": arguments.get("language", "english"),
+                    "native_language": arguments.get("native_language", "japanese"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         elif name == "generate_situational_examples":
             from app.services.register_analyzer import get_register_analyzer
 
             register_analyzer = get_register_analyzer()
-            result = await register_analyzer.generate_situational_examples(
-                word=arguments["word"],
-                language=arguments.get("language", "english"),
-                native_language=arguments.get("native_language", "japanese"),
+            body = await call_json(
+                register_analyzer.generate_situational_examples,
+                {
+                    "word": arguments["word"],
+                    "language": arguments.get("language", "english"),
+                    "native_language": arguments.get("native_language", "japanese"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         # ========================================
         # Phase 3.4: バズワード・スラングツール
@@ -480,53 +593,70 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             from app.services.slang_analyzer import get_slang_analyzer
 
             slang_analyzer = get_slang_analyzer()
-            result = await slang_analyzer.get_buzzwords(
-                language=arguments.get("language", "english"),
-                source=arguments.get("source", "all"),
-                count=arguments.get("count", 10),
+            body = await call_json(
+                slang_analyzer.get_buzzwords,
+                {
+                    "language": arguments.get("language", "english"),
+                    "source": arguments.get("source", "all"),
+                    "count": arguments.get("count", 10),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         elif name == "analyze_slang":
             from app.services.slang_analyzer import get_slang_analyzer
 
             slang_analyzer = get_slang_analyzer()
-            result = await slang_analyzer.analyze_slang(
-                slang=arguments["slang"],
-                language=arguments.get("language", "english"),
-                native_language=arguments.get("native_language", "japanese"),
+            body = await call_json(
+                slang_analyzer.analyze_slang,
+                {
+                    "slang": arguments["slang"],
+                    "language": arguments.get("language", "english"),
+                    "native_language": arguments.get("native_language", "japanese"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         elif name == "suggest_learning_plan":
             from app.services.learning_planner import get_learning_planner
 
             learning_planner = get_learning_planner()
-            result = await learning_planner.suggest_learning_plan(
-                user_level=arguments.get("user_level", "B1"),
-                target_level=arguments.get("target_level", "B2"),
-                vocabulary_count=arguments.get("vocabulary_count", 0),
-                articles_read=arguments.get("articles_read", 0),
-                weak_areas=arguments.get("weak_areas", []),
-                interests=arguments.get("interests", []),
-                native_language=arguments.get("native_language", "japanese"),
+            body = await call_json(
+                learning_planner.suggest_learning_plan,
+                {
+                    "user_level": arguments.get("user_level", "B1"),
+                    "target_level": arguments.get("target_level", "B2"),
+                    "vocabulary_count": arguments.get("vocabulary_count", 0),
+                    "articles_read": arguments.get("articles_read", 0),
+                    "weak_areas": arguments.get("weak_areas", []),
+                    "interests": arguments.get("interests", []),
+                    "native_language": arguments.get("native_language", "japanese"),
+                },
+                strict=False,
             )
-            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, indent=2))]
+            return _json_content(body)
 
         else:
             raise ValueError(f"Unknown tool: {name}")
 
+    except CapacityError as e:
+        error = {"error": str(e), "retry_after": e.retry_after}
+        return [TextContent(type="text", text=json.dumps(error))]
     except Exception as e:
         return [TextContent(type="text", text=json.dumps({"error": str(e)}))]
 
 
 async def run_mcp_server():
     """Run the MCP server using stdio transport."""
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+    setup_tracing()
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        shutdown_tracing()
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(run_mcp_server())
@@ -1 +1,47 @@
 """Pydantic models for the AI service."""
+
+from app.models.articles import (
+    AnalyzeDifficultyResponse,
+    ArticleOpenedResponse,
+    ComprehensionQuestion,
+    ComprehensionQuizResponse,
+    ExtractVocabularyResponse,
+    IngestArticle,
+    PooledQuestion,
+    SummarizeArticleResponse,
+    SummaryUpdateResponse,
+)
+from app.models.assessment import AssessmentStateResponse
+from app.models.reviews import BulkReviewResponse, CardStates, DueCardsResponse
+from app.models.stories import (
+    StoryAssignmentResponse,
+    StoryListResponse,
+    StoryMember,
+    StoryResponse,
+    StorySummary,
+)
+from app.models.words import ExplainWordResponse, GenerateExamplesResponse, WordSenseResponse
+
+__all__ = [
+    "AnalyzeDifficultyResponse",
+    "ArticleOpenedResponse",
+    "AssessmentStateResponse",
+    "BulkReviewResponse",
+    "CardStates",
+    "ComprehensionQuestion",
+    "ComprehensionQuizResponse",
+    "DueCardsResponse",
+    "ExplainWordResponse",
+    "ExtractVocabularyResponse",
+    "GenerateExamplesResponse",
+    "IngestArticle",
+    "PooledQuestion",
+    "StoryAssignmentResponse",
+    "StoryListResponse",
+    "StoryMember",
+    "StoryResponse",
+    "StorySummary",
+    "SummarizeArticleResponse",
+    "SummaryUpdateResponse",
+    "WordSenseResponse",
+]
@@ -0,0 +1,89 @@
+"""Article analysis models."""
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class AnalyzeDifficultyResponse(BaseModel):
+    """記事難易度分析レスポンス"""
+
+    cefr_level: str  # A1, A2, B1, B2, C1, C2
+    difficulty_score: float  # 0.0 - 1.0
+    vocabulary_level: str
+    grammar_complexity: str
+    average_sentence_length: float
+    difficult_words: list[dict]  # {"word": str, "definition": str}
+    reading_time_minutes: int
+
+
+class SummarizeArticleResponse(BaseModel):
+    """記事要約レスポンス"""
+
+    summary: str
+    key_points: list[str]
+    main_topic: str
+    vocabulary_to_learn: list[dict]  # {"word": str, "definition": str}
+
+
+class SummaryUpdateResponse(SummarizeArticleResponse):
+    """記事更新時の要約レスポンス"""
+
+    update_mode: Literal["unchanged", "incremental", "full"]  # 要約をどう作り直したか
+    changed_paragraphs: int  # 追加・書き換え・削除された段落数
+
+
+class ExtractVocabularyResponse(BaseModel):
+    """語彙抽出レスポンス"""
+
+    words: list[dict]  # {"word": str, "definition": str, "cefr_level": str, "sentence": str}
+
+
+class ComprehensionQuestion(BaseModel):
+    """理解度確認問題"""
+
+    question: str
+    options: list[str]
+    correct_index: int
+    explanation: str = ""
+
+
+class PooledQuestion(ComprehensionQuestion):
+    """問題プールから出題された問題"""
+
+    id: str  # "<pool_id>:<index>"（既出問題の除外に使う）
+
+
+class ComprehensionQuizResponse(BaseModel):
+    """理解度確認クイズレスポンス"""
+
+    pool_id: str  # 記事・レベル毎の問題プールID
+    questions: list[PooledQuestion]
+    pool_size: int
+    remaining: int  # このユーザーがまだ見ていない問題数
+
+
+class ArticleOpenedResponse(BaseModel):
+    """記事を開いた時の先読みレスポンス"""
+
+    prefetching: bool  # 単語説明の先読みを行っているか
+    max_words: int  # 先読みする単語数の上限
+
+
+class IngestArticle(BaseModel):
+    """一括取り込みの記事（NDJSON の 1 行）"""
+
+    id: str | None = Field(default=None, description="呼び出し側の記事ID（結果にそのまま返す）")
+    title: str = Field(default="", description="記事の見出し（story で使う）")
+    content: str = Field(..., min_length=1, description="記事の本文")
+    language: str = Field(default="english", description="記事の言語")
+    user_level: str = Field(default="B1", description="対象読者のCEFRレベル")
+    target_language: str = Field(default="japanese", description="要約を表示する言語")
+    source: str | None = Field(default=None, description="ニュースソース名（story で使う）")
+    published_at: datetime | None = Field(default=None, description="公開日時（story で使う）")
+    analyses: list[Literal["difficulty", "summary", "vocabulary", "questions", "story"]] = Field(
+        default=["difficulty", "summary", "vocabulary"], min_length=1, description="実行する分析"
+    )
+    max_words: int = Field(default=10, ge=1, le=50, description="抽出する最大単語数")
+    question_count: int = Field(default=3, ge=1, le=10, description="理解度確認問題の数")
@@ -0,0 +1,19 @@
+"""Adaptive level-assessment models."""
+
+from pydantic import BaseModel
+
+
+class AssessmentStateResponse(BaseModel):
+    """適応型レベル判定の状態"""
+
+    session_id: str
+    finished: bool
+    next_item_id: str | None  # 次に出題する問題（vocabulary_question.id）。終了時は None
+    answered: int
+    correct: int
+    theta: float  # 能力推定値（EAP）
+    standard_error: float
+    level: str  # 最も確率の高い CEFR レベル
+    confidence: float  # そのレベルである事後確率
+    level_probabilities: dict[str, float]
+    score: float  # 0-100（LevelAssessment.vocabularyScore 用）
@@ -0,0 +1,64 @@
+"""Spaced-repetition review models."""
+
+from typing import Annotated
+
+from pydantic import BaseModel, Field, model_validator
+
+# Unix 秒（1970-01-01 〜 9999-12-31）。経過日数もこの範囲に収まる
+Timestamp = Annotated[float, Field(ge=0, le=253_402_300_799)]
+# 復習回数・忘却回数（int32 の配列に入れても溢れない範囲）
+ReviewCount = Annotated[int, Field(ge=0, le=1_000_000)]
+# 評価: 1=Again, 2=Hard, 3=Good, 4=Easy
+Rating = Annotated[int, Field(ge=1, le=4)]
+
+
+class CardStates(BaseModel):
+    """カードの復習状態（列指向: 各配列の i 番目が同じカード）"""
+
+    ids: list[str] = Field(..., description="カードID（VocabularyWord.id など）")
+    stability: list[Annotated[float, Field(ge=0, allow_inf_nan=False)]] = Field(
+        ..., description="安定度（日）"
+    )
+    difficulty: list[Annotated[float, Field(ge=0, le=10)]] = Field(
+        ..., description="難易度（1-10、未学習のカードは 0 でもよい）"
+    )
+    last_review: list[Timestamp] = Field(..., description="最終復習日時（Unix 秒）")
+    due: list[Timestamp] = Field(..., description="次回復習日時（Unix 秒）")
+    reps: list[ReviewCount] = Field(..., description="復習回数（0 は未学習）")
+    lapses: list[ReviewCount] = Field(..., description="忘却回数")
+
+    @model_validator(mode="after")
+    def _same_length(self) -> "CardStates":
+        lengths = {
+            len(column)
+            for column in (
+                self.ids,
+                self.stability,
+                self.difficulty,
+                self.last_review,
+                self.due,
+                self.reps,
+                self.lapses,
+            )
+        }
+        if len(lengths) > 1:
+            raise ValueError("all card state columns must have the same length")
+        return self
+
+
+class DueCardsResponse(BaseModel):
+    """今日の復習カード"""
+
+    ids: list[str]  # 復習期限のカード（忘れやすい順）の後に新規カード
+    retrievability: list[float]  # 現時点の想起確率（新規カードは 0）
+    due_count: int
+    new_count: int
+    total: int
+
+
+class BulkReviewResponse(BaseModel):
+    """一括復習結果"""
+
+    cards: CardStates
+    interval_days: list[int]
+    retrievability: list[float]  # 復習時点の想起確率
@@ -0,0 +1,50 @@
+"""Story clustering models."""
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class StoryAssignmentResponse(BaseModel):
+    """記事のストーリー割り当て結果"""
+
+    article_id: str
+    story_id: str
+    created: bool  # この記事で新しいストーリーができたか
+    similarity: float  # 記事とストーリー重心のコサイン類似度
+    size: int  # ストーリーの記事数
+    merged: str | None  # この割り当てで統合されて消えたストーリーID
+    split: str | None  # この割り当てで分割されてできたストーリーID
+
+
+class StorySummary(BaseModel):
+    """ストーリーの概要"""
+
+    story_id: str
+    language: str
+    size: int
+    keywords: list[str]  # 重心の上位語（原形）
+    sources: list[str]
+    updated_at: datetime  # 最後に記事が加わった時刻
+
+
+class StoryMember(BaseModel):
+    """ストーリーに属する記事"""
+
+    id: str
+    title: str
+    source: str | None
+    published_at: datetime | None
+    similarity: float  # 重心との類似度（代表記事の選択に使える）
+
+
+class StoryResponse(StorySummary):
+    """ストーリーとその記事（公開日時順）"""
+
+    articles: list[StoryMember]
+
+
+class StoryListResponse(BaseModel):
+    """最近更新されたストーリー"""
+
+    stories: list[StorySummary]
@@ -0,0 +1,33 @@
+"""Word explanation response models."""
+
+from pydantic import BaseModel
+
+
+class ExplainWordResponse(BaseModel):
+    """単語説明レスポンス"""
+
+    word: str
+    pronunciation: str
+    part_of_speech: str
+    definition: str
+    etymology: str | None = None
+    synonyms: list[str] = []
+    antonyms: list[str] = []
+    examples: list[str] = []
+    memory_tips: str | None = None
+    usage_notes: str | None = None
+
+
+class WordSenseResponse(BaseModel):
+    """文脈での語義（explain_word の文脈依存部分）"""
+
+    part_of_speech: str = ""
+    definition: str
+    usage_notes: str | None = None
+
+
+class GenerateExamplesResponse(BaseModel):
+    """例文生成レスポンス"""
+
+    word: str
+    examples: list[dict]  # {"sentence": str, "translation": str}
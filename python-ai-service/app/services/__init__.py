@@ -1,5 +1,14 @@
 """AI Services."""
 
-from app.services.llm import LLMService, get_llm_service
+from typing import Any
 
 __all__ = ["LLMService", "get_llm_service"]
+
+
+def __getattr__(name: str) -> Any:
+    # anthropic SDK の import は重いため、実際に使われるまで遅延させる
+    if name in __all__:
+        from app.services import llm
+
+        return getattr(llm, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
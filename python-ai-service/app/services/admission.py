@@ -0,0 +1,216 @@
+"""Admission Control - Early rejection under overload and a provider circuit breaker.
+
+Before an LLM call is queued, ``admit`` checks two things:
+
+- the scheduler queue: if too many calls of the same or a higher priority
+  class are already waiting, or the oldest of them has waited too long, the
+  call is rejected at once with ``OverloadedError`` (HTTP 429 with
+  ``Retry-After``) instead of joining a queue it would time out in. Lower
+  classes are shed first (background at half the limit, standard at three
+  quarters).
+- the circuit breaker: after ``llm_circuit_failure_threshold`` consecutive
+  provider failures (5xx, 429, connection errors and timeouts) calls fail
+  fast with ``CircuitOpenError`` (HTTP 503) for ``llm_circuit_reset_seconds``;
+  then a single trial call decides whether it closes again.
+
+Cache hits, word packs and local computations never reach ``admit``, and
+``@cached(degraded=...)`` methods answer with a locally computed result
+instead of raising (see ``DEGRADED_MODE``).
+"""
+
+import math
+import time
+from typing import Any
+
+import structlog
+from tenacity import RetryError
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.scheduler import Priority, get_scheduler
+
+logger = structlog.get_logger()
+
+REJECTED = registry.counter("llm_admission_rejected_total", "LLM calls rejected before queueing")
+CIRCUIT_STATE = registry.gauge(
+    "llm_circuit_state", "Provider circuit breaker state (0=closed, 1=half-open, 2=open)"
+)
+DEGRADED_RESPONSES = registry.counter(
+    "degraded_responses_total", "Responses computed locally instead of by the LLM"
+)
+
+# 優先度クラス毎の待ち行列上限の割合（低い優先度から先に断る）
+QUEUE_SHARE = {Priority.INTERACTIVE: 1.0, Priority.STANDARD: 0.75, Priority.BACKGROUND: 0.5}
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CapacityError(RuntimeError):
+    """The LLM cannot take this call now; retry after ``retry_after`` seconds."""
+
+    status_code = 429
+    reason = "overloaded"
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Retry-After": str(self.retry_after)}
+
+
+class OverloadedError(CapacityError):
+    """The LLM queue is too long to admit another call."""
+
+
+class CircuitOpenError(CapacityError):
+    """The provider is failing; calls are not attempted until the circuit closes."""
+
+    status_code = 503
+    reason = "circuit_open"
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether an LLM call failure counts against the provider's health."""
+    # SDK の import は起動時ではなく最初の LLM 呼び出しまで遅らせる（app.services 参照）
+    import anthropic
+
+    if isinstance(error, RetryError):
+        error = error.last_attempt.exception() or error
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with a single half-open trial call.
+
+    ``before_call`` hands each admitted call the breaker's generation, which
+    changes with every state transition. ``after_call`` ignores the outcome of
+    calls admitted under an earlier generation, so only the trial call decides
+    whether a half-open circuit closes or opens again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.generation = 0
+        self._trial_in_flight = False
+        CIRCUIT_STATE.set(0)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("llm_circuit_state_changed", previous=self.state, state=state)
+            self.generation += 1
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+    def before_call(self) -> int:
+        """
+        Returns:
+            The token to pass to ``after_call``
+
+        Raises:
+            CircuitOpenError: The circuit is open (or its trial call is running)
+        """
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            return self.generation
+        retry_after = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == OPEN and retry_after <= 0:
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return self.generation
+        raise CircuitOpenError("LLM provider is unavailable", max(retry_after, 1.0))
+
+    def after_call(self, token: int, failed: bool | None) -> None:
+        """Record a call outcome (``None`` for a call that was cancelled)."""
+        if token != self.generation:
+            # 状態が変わる前に始まった呼び出し（半開状態の試行以外）は判定に使わない
+            return
+        if self.state == HALF_OPEN:
+            self._trial_in_flight = False
+            if failed is None:
+                return  # 試行がキャンセルされたので次の呼び出しで試し直す
+            if failed:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+            else:
+                self.failures = 0
+                self._set_state(CLOSED)
+            return
+        if failed is None:
+            return
+        if not failed:
+            self.failures = 0
+            return
+        self.failures += 1
+        if 0 < self.failure_threshold <= self.failures:
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after_seconds": (
+                round(max(self.opened_at + self.reset_timeout - time.monotonic(), 0), 1)
+                if self.state == OPEN
+                else 0
+            ),
+        }
+
+
+def admit(priority: Priority) -> int:
+    """
+    Admit an LLM call of ``priority`` or reject it early.
+
+    Returns:
+        The circuit breaker token to report the call's outcome with
+
+    Raises:
+        OverloadedError: The queue ahead of the call is too long or too slow
+        CircuitOpenError: The provider circuit is open
+    """
+    queued, oldest_wait = get_scheduler().backlog(priority)
+    limit = settings.llm_admission_max_queue * QUEUE_SHARE[priority]
+    max_wait = settings.llm_admission_max_queue_wait_ms / 1000
+    reason: str | None = None
+    if settings.llm_admission_max_queue > 0 and queued >= limit:
+        reason = "queue_length"
+    elif max_wait > 0 and oldest_wait > max_wait:
+        reason = "queue_wait"
+    if reason is not None:
+        REJECTED.inc(priority=priority.label, reason=reason)
+        raise OverloadedError(
+            "Too many AI requests are waiting; please retry shortly", max(oldest_wait, 1.0)
+        )
+
+    try:
+        return get_circuit_breaker().before_call()
+    except CircuitOpenError:
+        REJECTED.inc(priority=priority.label, reason="circuit_open")
+        raise
+
+
+# Singleton instance
+_circuit_breaker: CircuitBreaker | None = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get or create the provider CircuitBreaker singleton."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.llm_circuit_failure_threshold,
+            reset_timeout=settings.llm_circuit_reset_seconds,
+        )
+    return _circuit_breaker
@@ -4,7 +4,13 @@ from typing import Any
 
 import structlog
 
+from app.core.tracing import traced
+from app.models.articles import ComprehensionQuestion
+from app.services import degraded
+from app.services.cache import cached
+from app.services.document import get_document
 from app.services.llm import get_llm_service
+from app.services.scheduler import Priority, priority_class
 
 logger = structlog.get_logger()
 
@@ -15,6 +21,8 @@ class ArticleAnalyzerService:
     def __init__(self):
         self.llm = get_llm_service()
 
+    @traced
+    @priority_class(Priority.STANDARD)
     async def analyze_difficulty(
         self,
         content: str,
@@ -32,6 +40,9 @@ class ArticleAnalyzerService:
             language=language,
         )
 
+    @cached(document="content", degraded=degraded.lead_summary)
+    @traced
+    @priority_class(Priority.STANDARD)
     async def summarize_article(
         self,
         content: str,
@@ -60,7 +71,7 @@ Format as JSON:
 }}"""
 
         response = await self.llm.generate(
-            prompt=f"Summarize this {language} article:\n\n{content[:3000]}",
+            prompt=f"Summarize this {language} article:\n\n{get_document(content).excerpt(3000)}",
             system=system_prompt,
             temperature=0.3,
         )
@@ -82,6 +93,9 @@ Format as JSON:
             "vocabulary_to_learn": [],
         }
 
+    @cached(document="content")
+    @traced
+    @priority_class(Priority.STANDARD)
     async def extract_vocabulary(
         self,
         content: str,
@@ -115,7 +129,7 @@ Format as JSON array:
 ]"""
 
         response = await self.llm.generate(
-            prompt=f"Extract vocabulary from this {language} article:\n\n{content[:3000]}",
+            prompt=f"Extract vocabulary from this {language} article:\n\n{get_document(content).excerpt(3000)}",
             system=system_prompt,
             temperature=0.3,
         )
@@ -132,6 +146,9 @@ Format as JSON array:
 
         return []
 
+    @cached(schema=list[ComprehensionQuestion], document="content")
+    @traced
+    @priority_class(Priority.STANDARD)
     async def generate_comprehension_questions(
         self,
         content: str,
@@ -146,6 +163,7 @@ Format as JSON array:
             List of {question, options, correct_index, explanation}
         """
         system_prompt = f"""Create {count} comprehension questions for a {user_level} level learner.
+Each question must cover a different part or detail of the article.
 
 Format as JSON array:
 [
@@ -158,8 +176,10 @@ Format as JSON array:
 ]"""
 
         response = await self.llm.generate(
-            prompt=f"Create comprehension questions for this {language} article:\n\n{content[:2000]}",
+            prompt=f"Create comprehension questions for this {language} article:\n\n{get_document(content).excerpt(2000)}",
             system=system_prompt,
+            # 問題プール（十数問）でも途中で切れないようにする
+            max_tokens=max(2048, 300 * count),
             temperature=0.5,
         )
 
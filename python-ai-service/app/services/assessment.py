@@ -0,0 +1,333 @@
+"""Level Assessment - Computerized adaptive testing with item response theory.
+
+Items follow the three-parameter logistic model (discrimination ``a``,
+difficulty ``b``, guessing ``c``) on a CEFR-anchored ability scale. When the
+item bank is loaded, response log-likelihoods and Fisher information are
+precomputed on a fixed ability grid, so that:
+
+- the next item is an ``argmax`` over one precomputed column (maximum
+  information at the current estimate, randomized among the best few to
+  limit item exposure), and
+- recording an answer adds one precomputed row to the session's
+  log-posterior (expected a posteriori estimation, no iterative solver).
+
+A session is just the log-posterior over the grid plus the administered item
+indices (well under 1 KB), so thousands of concurrent tests fit in memory.
+The test stops once the CEFR level is known with the configured confidence
+or the standard error is small enough.
+"""
+
+import json
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = structlog.get_logger()
+
+ASSESSMENT_SESSIONS = registry.counter(
+    "assessment_sessions_total", "Adaptive level assessments by outcome"
+)
+ASSESSMENT_ACTIVE = registry.gauge("assessment_sessions_active", "Adaptive assessments in memory")
+ASSESSMENT_ANSWERS = registry.counter("assessment_answers_total", "Answers recorded")
+
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+# 能力尺度上の各レベルの中心（境界はその中間: -2, -1, 0, 1, 2）
+LEVEL_CENTERS = {"A1": -2.5, "A2": -1.5, "B1": -0.5, "B2": 0.5, "C1": 1.5, "C2": 2.5}
+LEVEL_CUTS = np.array([-2.0, -1.0, 0.0, 1.0, 2.0])
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+GRID_LEVELS = np.searchsorted(LEVEL_CUTS, THETA_GRID)
+SCALING = 1.7  # ロジスティックを正規累積に近づける定数
+EXPOSURE_TOP_K = 5
+
+
+class ItemBankUnavailableError(RuntimeError):
+    """No items are loaded for the requested language."""
+
+
+class SessionNotFoundError(KeyError):
+    """Unknown or expired assessment session."""
+
+
+def item_parameters(item: dict[str, Any]) -> tuple[float, float, float]:
+    """
+    IRT parameters of an item.
+
+    Calibrated ``a``/``b``/``c`` are used when present. Otherwise the
+    difficulty is derived from the question's CEFR level and its 0-1
+    ``difficulty`` (placed within the level's band), and the guessing
+    parameter from the number of options.
+    """
+    level = str(item.get("cefrLevel") or item.get("level") or "B1").upper()
+    difficulty = float(item.get("difficulty", 0.5))
+    b = item.get("b")
+    if b is None:
+        b = LEVEL_CENTERS.get(level, 0.0) + (min(max(difficulty, 0.0), 1.0) - 0.5)
+    c = item.get("c")
+    if c is None:
+        options = item.get("options")
+        if isinstance(options, str):
+            try:
+                options = json.loads(options)
+            except json.JSONDecodeError:
+                options = None
+        c = 1 / len(options) if isinstance(options, list) and options else 0.0
+    return float(item.get("a", 1.0)), float(b), float(c)
+
+
+class ItemBank:
+    """Item parameters with per-grid-point likelihood and information tables."""
+
+    def __init__(self, items: list[dict[str, Any]]) -> None:
+        self.ids = [str(item["id"]) for item in items]
+        self.index = {item_id: i for i, item_id in enumerate(self.ids)}
+        languages = [str(item.get("language", "english")).lower() for item in items]
+        parameters = np.array([item_parameters(item) for item in items]).reshape(-1, 3)
+        self.a, self.b, self.c = parameters.T
+
+        # P(正答 | θ) を (項目, グリッド) で前計算する
+        logistic = 1 / (
+            1 + np.exp(-SCALING * self.a[:, None] * (THETA_GRID[None, :] - self.b[:, None]))
+        )
+        p = np.clip(self.c[:, None] + (1 - self.c[:, None]) * logistic, 1e-9, 1 - 1e-9)
+        self.log_p = np.log(p).astype(np.float32)
+        self.log_q = np.log1p(-p).astype(np.float32)
+        information = (
+            (SCALING * self.a[:, None]) ** 2
+            * ((p - self.c[:, None]) / (1 - self.c[:, None])) ** 2
+            * ((1 - p) / p)
+        )
+        self.information = information.astype(np.float32)
+        self.by_language = {
+            language: np.flatnonzero(np.array(languages) == language) for language in set(languages)
+        }
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ItemBank":
+        """Load a JSON array (or ``{"items": [...]}``) of exported questions."""
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        items = data["items"] if isinstance(data, dict) else data
+        return cls([item for item in items if item.get("isActive", True)])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass(slots=True)
+class AssessmentSession:
+    """Compact per-test state."""
+
+    language: str
+    log_posterior: np.ndarray
+    administered: list[int] = field(default_factory=list)
+    correct: int = 0
+    pending: int | None = None
+    finished: bool = False
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class Estimate:
+    theta: float
+    standard_error: float
+    level: str
+    confidence: float
+    level_probabilities: dict[str, float]
+
+    @property
+    def score(self) -> float:
+        """Ability on a 0-100 scale (LevelAssessment scores)."""
+        return round(float(np.clip((self.theta + 3) / 6 * 100, 0, 100)), 1)
+
+
+def estimate(log_posterior: np.ndarray) -> Estimate:
+    """Expected a posteriori ability, its standard error and level probabilities."""
+    weights = np.exp(log_posterior - log_posterior.max())
+    weights /= weights.sum()
+    theta = float(weights @ THETA_GRID)
+    standard_error = float(np.sqrt(weights @ (THETA_GRID - theta) ** 2))
+    probabilities = np.bincount(GRID_LEVELS, weights=weights, minlength=len(CEFR_LEVELS))
+    best = int(probabilities.argmax())
+    return Estimate(
+        theta=round(theta, 3),
+        standard_error=round(standard_error, 3),
+        level=CEFR_LEVELS[best],
+        confidence=round(float(probabilities[best]), 3),
+        level_probabilities={
+            level: round(float(probability), 3)
+            for level, probability in zip(CEFR_LEVELS, probabilities, strict=True)
+        },
+    )
+
+
+class AssessmentEngine:
+    """Adaptive test sessions over an item bank."""
+
+    def __init__(
+        self,
+        bank: ItemBank,
+        min_items: int = 5,
+        max_items: int = 30,
+        se_target: float = 0.3,
+        level_confidence: float = 0.9,
+        max_sessions: int = 10000,
+        session_ttl: float = 1800.0,
+    ) -> None:
+        self.bank = bank
+        self.min_items = min_items
+        self.max_items = max_items
+        self.se_target = se_target
+        self.level_confidence = level_confidence
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self._sessions: OrderedDict[str, AssessmentSession] = OrderedDict()
+        self._rng = np.random.default_rng()
+
+    def _evict(self) -> None:
+        """Drop idle sessions and, beyond ``max_sessions``, the least recently used."""
+        cutoff = time.monotonic() - self.session_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.updated_at >= cutoff and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[session_id]
+            if not session.finished:
+                ASSESSMENT_SESSIONS.inc(result="expired")
+        ASSESSMENT_ACTIVE.set(len(self._sessions))
+
+    def _session(self, session_id: str) -> AssessmentSession:
+        session = self._sessions.get(session_id)
+        if session is None or session.updated_at < time.monotonic() - self.session_ttl:
+            raise SessionNotFoundError(session_id)
+        session.updated_at = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _next_item(self, session: AssessmentSession, theta: float) -> int | None:
+        candidates = self.bank.by_language.get(session.language)
+        if candidates is None:
+            return None
+        column = int(np.abs(THETA_GRID - theta).argmin())
+        information = self.bank.information[candidates, column].copy()
+        if session.administered:
+            information[np.isin(candidates, session.administered)] = -np.inf
+        available = int(np.isfinite(information).sum())
+        if available == 0:
+            return None
+        # 最大情報量の上位数問からランダムに選び、特定の項目の露出を抑える
+        k = min(EXPOSURE_TOP_K, available)
+        top = np.argpartition(information, -k)[-k:]
+        return int(candidates[self._rng.choice(top)])
+
+    def _should_stop(self, session: AssessmentSession, current: Estimate) -> bool:
+        answered = len(session.administered)
+        if answered >= self.max_items:
+            return True
+        if answered < self.min_items:
+            return False
+        return (
+            current.standard_error <= self.se_target or current.confidence >= self.level_confidence
+        )
+
+    def _state(self, session_id: str, session: AssessmentSession) -> dict[str, Any]:
+        current = estimate(session.log_posterior)
+        return {
+            "session_id": session_id,
+            "finished": session.finished,
+            "next_item_id": self.bank.ids[session.pending] if session.pending is not None else None,
+            "answered": len(session.administered),
+            "correct": session.correct,
+            "theta": current.theta,
+            "standard_error": current.standard_error,
+            "level": current.level,
+            "confidence": current.confidence,
+            "level_probabilities": current.level_probabilities,
+            "score": current.score,
+        }
+
+    def start(self, language: str = "english", start_level: str | None = None) -> dict[str, Any]:
+        """Open a session and pick its first item."""
+        language = language.lower()
+        if language not in self.bank.by_language:
+            raise ItemBankUnavailableError(f"No assessment items for {language}")
+        self._evict()
+
+        # 事前分布: 申告レベル（なければ B1/B2 の境界）を中心とする標準正規分布
+        prior_mean = LEVEL_CENTERS.get((start_level or "").upper(), 0.0)
+        session = AssessmentSession(
+            language=language, log_posterior=-0.5 * (THETA_GRID - prior_mean) ** 2
+        )
+        session.pending = self._next_item(session, prior_mean)
+        session_id = secrets.token_urlsafe(12)
+        self._sessions[session_id] = session
+        ASSESSMENT_SESSIONS.inc(result="started")
+        ASSESSMENT_ACTIVE.set(len(self._sessions))
+        return self._state(session_id, session)
+
+    def answer(self, session_id: str, item_id: str, correct: bool) -> dict[str, Any]:
+        """Record the answer to the pending item and pick the next one."""
+        session = self._session(session_id)
+        if session.finished:
+            raise ValueError("Assessment already finished")
+        index = self.bank.index.get(item_id)
+        if index is None or index != session.pending:
+            raise ValueError(f"Item {item_id} is not the pending item of this session")
+
+        table = self.bank.log_p if correct else self.bank.log_q
+        session.log_posterior = session.log_posterior + table[index]
+        session.administered.append(index)
+        session.correct += bool(correct)
+        ASSESSMENT_ANSWERS.inc()
+
+        current = estimate(session.log_posterior)
+        session.pending = None
+        if not self._should_stop(session, current):
+            session.pending = self._next_item(session, current.theta)
+        if session.pending is None:
+            session.finished = True
+            ASSESSMENT_SESSIONS.inc(result="finished")
+        return self._state(session_id, session)
+
+    def status(self, session_id: str) -> dict[str, Any]:
+        return self._state(session_id, self._session(session_id))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "items": len(self.bank),
+            "languages": {language: len(ids) for language, ids in self.bank.by_language.items()},
+            "active_sessions": len(self._sessions),
+        }
+
+
+# Singleton instance
+_assessment_engine: AssessmentEngine | None = None
+
+
+def get_assessment_engine() -> AssessmentEngine:
+    """Get or create the AssessmentEngine singleton (loads the item bank)."""
+    global _assessment_engine
+    if _assessment_engine is None:
+        path = Path(settings.assessment_item_bank_path)
+        if path.is_file():
+            bank = ItemBank.load(path)
+        else:
+            logger.warning("assessment_item_bank_missing", path=str(path))
+            bank = ItemBank([])
+        _assessment_engine = AssessmentEngine(
+            bank,
+            min_items=settings.assessment_min_items,
+            max_items=settings.assessment_max_items,
+            se_target=settings.assessment_se_target,
+            level_confidence=settings.assessment_level_confidence,
+            max_sessions=settings.assessment_max_sessions,
+            session_ttl=settings.assessment_session_ttl_seconds,
+        )
+    return _assessment_engine
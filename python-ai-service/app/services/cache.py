@@ -0,0 +1,619 @@
+"""Response Cache - In-process LRU tier plus a host-wide shared-memory tier.
+
+LLM results are cached as JSON bytes in two tiers:
+
+- ``LocalCache``: a small LRU dict inside each worker process.
+- ``SharedCache``: a fixed-size memory-mapped file (``/dev/shm`` by default)
+  shared by every uvicorn worker on the host, so workers reuse each other's
+  explanations and memory per pod stays flat as the worker count grows.
+
+The shared file is an open-addressing index in front of a ring buffer of
+self-validating records (key digest, expiry and CRC32). Writers serialize on
+an ``flock``; readers take no lock at all and simply discard a record whose
+digest or checksum does not match, which also covers records overwritten by
+the ring wrapping around while they were being read.
+
+Entries are validated against the method's response schema before they are
+stored, so ``call_json`` can hand the stored bytes of a hit straight to an
+HTTP response or MCP ``TextContent`` without decoding or re-validating them.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, overload
+
+import pydantic_core
+import structlog
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.tracing import set_span_attributes
+from app.services.admission import DEGRADED_RESPONSES, CapacityError
+from app.services.document import get_document
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = structlog.get_logger()
+
+CACHE_REQUESTS = registry.counter(
+    "response_cache_requests_total", "Response cache lookups by namespace and result"
+)
+
+# ファイルヘッダー: magic, version, slot 数, データ領域サイズ, 次の書き込み位置
+_HEADER = struct.Struct("<8sIIQQ")
+_HEADER_SIZE = 64
+_MAGIC = b"NLCACHE1"
+_VERSION = 1
+# インデックススロット: キー指紋, レコード位置 + 1（0 は空き）
+_SLOT = struct.Struct("<QQ")
+# レコードヘッダー: magic, キーダイジェスト, 有効期限, 値の長さ, CRC32
+_RECORD = struct.Struct("<I16sdII")
+_RECORD_MAGIC = 0x4E4C5243
+# 線形探索するスロット数
+_PROBES = 8
+# 平均エントリサイズの想定（スロット数の決定に使う）
+_AVERAGE_ENTRY_BYTES = 4096
+
+
+def encode_json(value: Any) -> bytes:
+    """Compact UTF-8 JSON via pydantic-core (much faster than ``json.dumps``)."""
+    return pydantic_core.to_json(value, fallback=str)
+
+
+class LocalCache:
+    """Per-process LRU of ``digest -> (expires_at, value)``."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[float, bytes]] = OrderedDict()
+
+    def get(self, digest: bytes) -> bytes | None:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[digest]
+            return None
+        self._entries.move_to_end(digest)
+        return value
+
+    def set(self, digest: bytes, value: bytes, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[digest] = (expires_at, value)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedCache:
+    """Memory-mapped hash table shared by the worker processes of a host."""
+
+    def __init__(self, path: str | Path, size_bytes: int) -> None:
+        if fcntl is None:
+            raise RuntimeError("Shared cache requires fcntl (POSIX)")
+
+        self.path = Path(path)
+        self.size = size_bytes
+        self.n_slots = max(1024, size_bytes // _AVERAGE_ENTRY_BYTES)
+        self._index_offset = _HEADER_SIZE
+        self._data_offset = _HEADER_SIZE + self.n_slots * _SLOT.size
+        self.data_size = size_bytes - self._data_offset
+        if self.data_size < 64 * 1024:
+            raise ValueError(f"Shared cache size is too small: {size_bytes} bytes")
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self._locked():
+                self._attach(size_bytes)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._mm = mmap.mmap(self._fd, size_bytes)
+
+    def _attach(self, size_bytes: int) -> None:
+        """Initialize a new segment or check that an existing one matches (flock held)."""
+        expected = (_MAGIC, _VERSION, self.n_slots, self.data_size)
+        # 他のワーカーがマップ中のファイルを切り詰めると SIGBUS になるので、
+        # サイズを決めるのは作成直後（空のファイル）だけにする
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.ftruncate(self._fd, size_bytes)
+            os.pwrite(self._fd, _HEADER.pack(*expected, 0), 0)
+            logger.info("shared_cache_initialized", path=str(self.path), size=size_bytes)
+            return
+        if size != size_bytes:
+            raise ValueError(f"Shared cache {self.path} is {size} bytes, expected {size_bytes}")
+        header = os.pread(self._fd, _HEADER.size, 0)
+        if header == bytes(_HEADER.size):
+            # サイズを決めた後、ヘッダーを書く前に止まったワーカーの残り（誰も使っていない）
+            os.pwrite(self._fd, _HEADER.pack(*expected, 0), 0)
+            logger.info("shared_cache_initialized", path=str(self.path), size=size_bytes)
+        elif _HEADER.unpack(header)[:4] != expected:
+            raise ValueError(f"Shared cache {self.path} has a different layout")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _fingerprint(digest: bytes) -> int:
+        return int.from_bytes(digest[:8], "little") or 1
+
+    def _slots(self, fingerprint: int) -> Iterator[int]:
+        base = fingerprint % self.n_slots
+        for i in range(_PROBES):
+            yield self._index_offset + ((base + i) % self.n_slots) * _SLOT.size
+
+    def _read_record(self, offset: int, digest: bytes | None = None) -> bytes | None:
+        """Read and validate the record at ``offset`` of the data area."""
+        if offset + _RECORD.size > self.data_size:
+            return None
+        position = self._data_offset + offset
+        header = _RECORD.unpack_from(self._mm, position)
+        magic, record_digest, expires_at, length, crc = header
+        if magic != _RECORD_MAGIC or expires_at < time.time():
+            return None
+        if digest is not None and record_digest != digest:
+            return None
+        if offset + _RECORD.size + length > self.data_size:
+            return None
+
+        start = position + _RECORD.size
+        value = self._mm[start : start + length]
+        # 読み取り中に上書きされた場合はチェックサムかヘッダーが一致しない
+        if zlib.crc32(value) != crc or _RECORD.unpack_from(self._mm, position) != header:
+            return None
+        return value
+
+    def get(self, digest: bytes) -> bytes | None:
+        """Lock-free lookup."""
+        fingerprint = self._fingerprint(digest)
+        for slot in self._slots(fingerprint):
+            slot_fingerprint, location = _SLOT.unpack_from(self._mm, slot)
+            if slot_fingerprint != fingerprint or location == 0:
+                continue
+            value = self._read_record(location - 1, digest)
+            if value is not None:
+                return value
+        return None
+
+    def set(self, digest: bytes, value: bytes, expires_at: float) -> bool:
+        """
+        Append a record to the ring buffer and point an index slot at it.
+
+        Returns:
+            False if the value is too large to be shared
+        """
+        record_size = _RECORD.size + len(value)
+        if record_size > self.data_size // 4:
+            return False
+
+        fingerprint = self._fingerprint(digest)
+        with self._locked():
+            *header, write_position = _HEADER.unpack_from(self._mm, 0)
+            if write_position + record_size > self.data_size:
+                write_position = 0
+
+            # 値を先に書き、最後にヘッダーを書いて読み手に公開する
+            position = self._data_offset + write_position
+            self._mm[position + _RECORD.size : position + record_size] = value
+            _RECORD.pack_into(
+                self._mm, position, _RECORD_MAGIC, digest, expires_at, len(value), zlib.crc32(value)
+            )
+
+            target: int | None = None
+            for slot in self._slots(fingerprint):
+                slot_fingerprint, location = _SLOT.unpack_from(self._mm, slot)
+                if slot_fingerprint == fingerprint or location == 0:
+                    target = slot
+                    break
+                if target is None and self._read_record(location - 1) is None:
+                    target = slot  # 期限切れ・上書き済みのスロットを再利用
+            if target is None:
+                target = next(self._slots(fingerprint))
+            _SLOT.pack_into(self._mm, target, fingerprint, write_position + 1)
+
+            next_position = write_position + (record_size + 7) // 8 * 8
+            _HEADER.pack_into(self._mm, 0, *header, next_position)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        *_, write_position = _HEADER.unpack_from(self._mm, 0)
+        return {
+            "path": str(self.path),
+            "size_bytes": self.size,
+            "slots": self.n_slots,
+            "write_position": write_position,
+        }
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+class ResponseCache:
+    """Two-tier cache of JSON-serializable results."""
+
+    def __init__(self, local: LocalCache, shared: SharedCache | None, ttl: float) -> None:
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+
+    @staticmethod
+    def key(namespace: str, params: dict[str, Any]) -> bytes:
+        """Digest of the namespace, service version and call parameters."""
+        canonical = json.dumps(
+            [settings.version, namespace, params],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).digest()[:16]
+
+    def get_bytes(self, namespace: str, params: dict[str, Any]) -> bytes | None:
+        """Stored JSON bytes, without decoding them."""
+        digest = self.key(namespace, params)
+        result = "local_hit"
+        value = self.local.get(digest)
+        if value is None and self.shared is not None:
+            value = self.shared.get(digest)
+            if value is not None:
+                result = "shared_hit"
+                # 共有ヒットはローカルにも載せる（期限は共有側に合わせず TTL で近似）
+                self.local.set(digest, value, time.time() + self.ttl)
+        if value is None:
+            result = "miss"
+
+        CACHE_REQUESTS.inc(namespace=namespace, result=result)
+        set_span_attributes(**{"cache.namespace": namespace, "cache.result": result})
+        return value
+
+    def get(self, namespace: str, params: dict[str, Any]) -> Any | None:
+        value = self.get_bytes(namespace, params)
+        return json.loads(value) if value is not None else None
+
+    def set_bytes(
+        self, namespace: str, params: dict[str, Any], encoded: bytes, ttl: float | None = None
+    ) -> None:
+        """Store already-serialized JSON bytes."""
+        digest = self.key(namespace, params)
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        self.local.set(digest, encoded, expires_at)
+        if self.shared is not None:
+            self.shared.set(digest, encoded, expires_at)
+
+    def set(
+        self, namespace: str, params: dict[str, Any], value: Any, ttl: float | None = None
+    ) -> None:
+        self.set_bytes(namespace, params, encode_json(value), ttl)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl,
+            "local_entries": len(self.local),
+            "local_max_entries": self.local.max_entries,
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+
+def _cacheable(result: Any) -> bool:
+    """Skip empty results, error payloads (e.g. ``{"error": ...}``) and degraded results."""
+    if not result:
+        return False
+    return not (isinstance(result, dict) and ("error" in result or result.get("degraded")))
+
+
+@dataclass
+class CacheSpec:
+    """How a ``@cached`` method is keyed, validated and serialized."""
+
+    namespace: str
+    func: Callable[..., Awaitable[Any]]
+    adapter: TypeAdapter[Any] | None
+    names: tuple[str, ...]
+    defaults: dict[str, Any]
+    # 事前計算済みの JSON を返す参照関数 (word packs など)。None ならライブ生成へ
+    precomputed: Callable[[dict[str, Any]], bytes | None] | None = None
+    # 記事本文の引数名。キーには本文ではなく Document のハッシュを使う
+    documents: tuple[str, ...] = ()
+    # LLM が使えないとき（過負荷・障害・DEGRADED_MODE=always）にローカルで結果を作る関数
+    degraded: Callable[[dict[str, Any]], Any] | None = None
+    # 引数名 -> キーにする前に値を正規化する関数（大文字小文字違いの単語を同じキーにする等）
+    normalizers: dict[str, Callable[[Any], Any]] = field(default_factory=dict)
+
+    @classmethod
+    def for_function(
+        cls,
+        func: Callable[..., Awaitable[Any]],
+        schema: Any,
+        precomputed: Callable[[dict[str, Any]], bytes | None] | None = None,
+        document: str | tuple[str, ...] | None = None,
+        degraded: Callable[[dict[str, Any]], Any] | None = None,
+        normalize: dict[str, Callable[[Any], Any]] | None = None,
+    ) -> "CacheSpec":
+        parameters = inspect.signature(func).parameters.values()
+        return cls(
+            namespace=func.__qualname__,
+            func=func,
+            adapter=TypeAdapter(schema) if schema is not None else None,
+            names=tuple(p.name for p in parameters),
+            defaults={
+                p.name: p.default
+                for p in parameters
+                if p.default is not inspect.Parameter.empty and p.name != "self"
+            },
+            precomputed=precomputed,
+            documents=(document,) if isinstance(document, str) else tuple(document or ()),
+            degraded=degraded,
+            normalizers=dict(normalize or {}),
+        )
+
+    def arguments(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Call arguments by name, defaults applied (``Signature.bind`` is too slow here)."""
+        arguments = dict(self.defaults)
+        arguments.update(zip(self.names, args, strict=False))
+        arguments.update(kwargs)
+        arguments.pop("self", None)
+        for name, normalize in self.normalizers.items():
+            if name in arguments:
+                arguments[name] = normalize(arguments[name])
+        return arguments
+
+    def params(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Cache key parameters: the call arguments, article text replaced by its hash."""
+        params = self.arguments(args, kwargs)
+        for name in self.documents:
+            if name in params:
+                params[name] = get_document(params[name]).cache_key
+        return params
+
+    def degraded_result(
+        self, args: tuple[Any, ...], kwargs: dict[str, Any], reason: str
+    ) -> Any | None:
+        """Locally computed result marked ``degraded`` (None if there is none)."""
+        if self.degraded is None or settings.degraded_mode == "off":
+            return None
+        result = self.degraded(self.arguments(args, kwargs))
+        if result is None:
+            return None
+        DEGRADED_RESPONSES.inc(method=self.namespace, reason=reason)
+        return {**result, "degraded": True} if isinstance(result, dict) else result
+
+    def validate(self, result: Any) -> Any:
+        return self.adapter.validate_python(result) if self.adapter is not None else result
+
+    def dump_json(self, validated: Any) -> bytes:
+        if self.adapter is not None:
+            return self.adapter.dump_json(validated)
+        return encode_json(validated)
+
+    def dump_python(self, validated: Any) -> Any:
+        if self.adapter is not None:
+            return self.adapter.dump_python(validated, mode="json")
+        return validated
+
+    async def fill(
+        self,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        params: dict[str, Any],
+        *,
+        encode: bool,
+    ) -> tuple[Any, bytes | None, bool]:
+        """
+        Call the method, validate its result and store it serialized.
+
+        Args:
+            encode: Serialize even when the cache is disabled
+
+        Returns:
+            (result, JSON bytes or None, whether the result was validated);
+            the raw result is returned when it is not cacheable or does not
+            match the schema
+        """
+        result = await self.func(*args, **kwargs)
+        if not _cacheable(result):
+            return result, None, False
+        try:
+            validated = self.validate(result)
+        except ValidationError as e:
+            logger.warning(
+                "cache_schema_mismatch", namespace=self.namespace, errors=e.error_count()
+            )
+            return result, None, False
+
+        if not (encode or settings.cache_enabled):
+            return validated, None, True
+        encoded = self.dump_json(validated)
+        if settings.cache_enabled:
+            get_cache().set_bytes(self.namespace, params, encoded)
+        return validated, encoded, True
+
+
+@overload
+def cached[**P, R](func: Callable[P, Awaitable[R]], /) -> Callable[P, Awaitable[R]]: ...
+
+
+@overload
+def cached[**P, R](
+    *,
+    schema: Any = None,
+    precomputed: Callable[[dict[str, Any]], bytes | None] | None = None,
+    document: str | tuple[str, ...] | None = None,
+    degraded: Callable[[dict[str, Any]], Any] | None = None,
+    normalize: dict[str, Callable[[Any], Any]] | None = None,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]: ...
+
+
+def cached(
+    func: Any = None,
+    /,
+    *,
+    schema: Any = None,
+    precomputed: Callable[[dict[str, Any]], bytes | None] | None = None,
+    document: str | tuple[str, ...] | None = None,
+    degraded: Callable[[dict[str, Any]], Any] | None = None,
+    normalize: dict[str, Callable[[Any], Any]] | None = None,
+) -> Any:
+    """
+    Cache an async method's JSON-serializable result by its arguments.
+
+    Use as ``@cached`` or ``@cached(schema=ResponseModel)``; with a schema,
+    results are validated (and normalized) before they are stored, and
+    results that do not validate are returned as-is without caching.
+    ``precomputed`` maps the call arguments to prebuilt, already validated
+    JSON bytes (or None); it is consulted before the cache. ``document``
+    names the article-text parameter (or a tuple of them, e.g. two revisions
+    of an article), which is keyed by the hash of its memoized ``Document``
+    instead of by the text itself. ``degraded`` maps
+    the call arguments to a locally computed result (or None) that is
+    returned, uncached, when the LLM rejects the call under overload or
+    (``DEGRADED_MODE=always``) instead of calling it at all. ``normalize``
+    maps parameter names to functions applied to their values in the key
+    (and in the arguments passed to ``precomputed`` and ``degraded``), so
+    e.g. differently cased spellings of a word share one entry.
+    """
+
+    def decorator[**P, R](func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        spec = CacheSpec.for_function(func, schema, precomputed, document, degraded, normalize)
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            params = spec.params(args, kwargs)
+            if spec.precomputed is not None:
+                prebuilt = spec.precomputed(params)
+                if prebuilt is not None:
+                    return json.loads(prebuilt)
+            if settings.cache_enabled:
+                hit = get_cache().get(spec.namespace, params)
+                if hit is not None:
+                    return hit
+            if settings.degraded_mode == "always":
+                forced = spec.degraded_result(args, kwargs, "forced")
+                if forced is not None:
+                    return forced
+
+            try:
+                result, _, validated = await spec.fill(args, kwargs, params, encode=False)
+            except CapacityError as e:
+                fallback = spec.degraded_result(args, kwargs, e.reason)
+                if fallback is None:
+                    raise
+                return fallback
+            return spec.dump_python(result) if validated else result
+
+        wrapper.cache_spec = spec  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+async def call_json(
+    method: Callable[..., Awaitable[Any]],
+    arguments: dict[str, Any],
+    *,
+    strict: bool = True,
+) -> bytes:
+    """
+    Call a service method and return its result as JSON bytes.
+
+    For ``@cached`` methods a precomputed or cached result is returned as
+    stored (no decode, no validation, no re-serialization); a miss validates
+    the result against the method's schema and encodes it once. Other methods are encoded with
+    ``encode_json``.
+
+    Args:
+        method: Bound service method
+        arguments: Keyword arguments for the method
+        strict: Raise ``ValidationError`` if the result does not match the
+            schema (HTTP routes); otherwise encode it as-is (MCP tools)
+    """
+    spec: CacheSpec | None = getattr(method, "cache_spec", None)
+    if spec is None:
+        return encode_json(await method(**arguments))
+
+    args = (method.__self__,)  # type: ignore[attr-defined]
+    params = spec.params(args, arguments)
+    if spec.precomputed is not None:
+        prebuilt = spec.precomputed(params)
+        if prebuilt is not None:
+            return prebuilt
+    if settings.cache_enabled:
+        hit = get_cache().get_bytes(spec.namespace, params)
+        if hit is not None:
+            return hit
+    if settings.degraded_mode == "always":
+        forced = spec.degraded_result(args, arguments, "forced")
+        if forced is not None:
+            return encode_json(forced)
+
+    try:
+        result, encoded, _ = await spec.fill(args, arguments, params, encode=True)
+    except CapacityError as e:
+        fallback = spec.degraded_result(args, arguments, e.reason)
+        if fallback is None:
+            raise
+        return encode_json(fallback)
+    if encoded is not None:
+        return encoded
+    if strict:
+        return spec.dump_json(spec.validate(result))
+    return encode_json(result)
+
+
+def _default_shared_path() -> Path:
+    shm = Path("/dev/shm")
+    directory = shm if shm.is_dir() else Path(tempfile.gettempdir())
+    return directory / "newslingua-ai-cache"
+
+
+# Singleton instance
+_cache: ResponseCache | None = None
+
+
+def get_cache() -> ResponseCache:
+    """Get or create the ResponseCache singleton."""
+    global _cache
+    if _cache is None:
+        shared: SharedCache | None = None
+        if settings.shared_cache_enabled:
+            try:
+                shared = SharedCache(
+                    settings.shared_cache_path or _default_shared_path(),
+                    settings.shared_cache_size_mb * 1024 * 1024,
+                )
+            except (OSError, RuntimeError, ValueError) as e:
+                logger.warning("shared_cache_unavailable", error=str(e))
+        _cache = ResponseCache(
+            local=LocalCache(settings.local_cache_max_entries),
+            shared=shared,
+            ttl=settings.cache_ttl_seconds,
+        )
+    return _cache
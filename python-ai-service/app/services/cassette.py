@@ -0,0 +1,143 @@
+"""LLM Cassette - Record/replay provider calls for deterministic offline runs.
+
+In ``record`` mode every provider response is appended to a JSON Lines file
+(gzip-compressed when the path ends with ``.gz``) together with its token
+usage and latency. In ``replay`` mode responses are served from that file
+with the recorded latency multiplied by ``latency_scale``, so benchmarks and
+tests can reproduce production traffic without network access.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO, Any, Literal
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+@dataclass
+class CassetteEntry:
+    """A recorded provider response."""
+
+    key: str
+    model: str
+    text: str
+    stop_reason: str | None
+    input_tokens: int
+    output_tokens: int
+    latency_ms: float
+    recorded_at: float
+
+
+class LLMCassette:
+    """On-disk store of request/response pairs keyed by a request hash."""
+
+    def __init__(self, path: str | Path, mode: str, latency_scale: float = 1.0) -> None:
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries: dict[str, list[CassetteEntry]] = {}
+        # 同じリクエストが複数回録画されている場合は順番に再生する
+        self._cursors: dict[str, int] = {}
+        self._load()
+
+    def _open(self, mode: Literal["r", "a"]) -> IO[str]:
+        if self.path.suffix == ".gz":
+            text_mode: Literal["rt", "at"] = "rt" if mode == "r" else "at"
+            return gzip.open(self.path, text_mode, encoding="utf-8")
+        return self.path.open(mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with self._open("r") as f:
+            for line in f:
+                if line.strip():
+                    entry = CassetteEntry(**json.loads(line))
+                    self.entries.setdefault(entry.key, []).append(entry)
+        logger.info(
+            "cassette_loaded",
+            path=str(self.path),
+            mode=self.mode,
+            requests=len(self.entries),
+        )
+
+    @staticmethod
+    def request_key(request: dict[str, Any]) -> str:
+        """Stable hash of the provider request parameters."""
+        canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+    def record(
+        self,
+        request: dict[str, Any],
+        *,
+        text: str,
+        stop_reason: str | None,
+        input_tokens: int,
+        output_tokens: int,
+        latency_ms: float,
+    ) -> None:
+        """Append a provider response to the cassette."""
+        entry = CassetteEntry(
+            key=self.request_key(request),
+            model=request.get("model", ""),
+            text=text,
+            stop_reason=stop_reason,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=round(latency_ms, 1),
+            recorded_at=time.time(),
+        )
+        self.entries.setdefault(entry.key, []).append(entry)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._open("a") as f:
+            f.write(json.dumps(asdict(entry), ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    async def replay(self, request: dict[str, Any]) -> CassetteEntry:
+        """Return the recorded response, waiting for the scaled recorded latency."""
+        key = self.request_key(request)
+        recordings = self.entries.get(key)
+        if not recordings:
+            raise CassetteMissError(f"No cassette recording for request {key}")
+
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        entry = recordings[cursor % len(recordings)]
+
+        delay = entry.latency_ms / 1000 * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return entry
+
+
+# Singleton instance
+_cassette: LLMCassette | None = None
+
+
+def get_cassette() -> LLMCassette | None:
+    """Get the cassette configured by settings (None when disabled)."""
+    global _cassette
+    if _cassette is None and settings.llm_cassette_mode:
+        _cassette = LLMCassette(
+            path=settings.llm_cassette_path,
+            mode=settings.llm_cassette_mode,
+            latency_scale=settings.llm_cassette_latency_scale,
+        )
+    return _cassette
@@ -0,0 +1,154 @@
+"""Comprehension Quizzes - Per-article question pools sampled per reader.
+
+A pool of ``COMPREHENSION_POOL_SIZE`` questions is generated once per
+(article, language, level) through ``generate_comprehension_questions`` and
+kept in the response cache, so every later reader of the article is served
+without an LLM call. Concurrent first readers share one generation.
+
+Each reader walks the pool in a fixed per-reader order and gets the next
+questions they have not seen; once the pool is exhausted the order restarts.
+The questions a reader has seen are kept in the response cache as well (the
+shared tier makes them visible to every worker), and clients can also pass
+the ids they have already answered.
+"""
+
+import asyncio
+import hashlib
+import random
+from typing import Any
+
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.tenancy import ANONYMOUS_TENANT
+from app.core.tracing import set_span_attributes, traced
+from app.services.article_analyzer import get_article_analyzer
+from app.services.cache import get_cache
+from app.services.document import get_document
+from app.services.scheduler import Priority, priority_class
+
+logger = structlog.get_logger()
+
+QUIZZES = registry.counter(
+    "comprehension_quizzes_total", "Comprehension quizzes served from question pools"
+)
+
+_SEEN_NAMESPACE = "ComprehensionQuizService.seen"
+
+
+def pool_id(content: str, language: str, user_level: str) -> str:
+    """Stable id of the question pool of an article at a level."""
+    document = get_document(content)
+    key = f"{language}\0{user_level.upper()}\0{document.content_hash}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _is_question(question: Any) -> bool:
+    return (
+        isinstance(question, dict)
+        and isinstance(question.get("question"), str)
+        and isinstance(question.get("options"), list)
+        and isinstance(question.get("correct_index"), int)
+    )
+
+
+class ComprehensionQuizService:
+    """Serves non-repeating quizzes from shared per-article question pools."""
+
+    def __init__(self) -> None:
+        self.analyzer = get_article_analyzer()
+        # 生成中のプール（同じ記事の最初の読者が同時に来ても LLM 呼び出しは 1 回）
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+
+    async def _pool(self, key: str, content: str, language: str, user_level: str) -> list[Any]:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self.analyzer.generate_comprehension_questions(
+                    content=content,
+                    language=language,
+                    user_level=user_level,
+                    count=settings.comprehension_pool_size,
+                )
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # 待っている読者がキャンセルしても生成自体は続ける
+        pool = await asyncio.shield(future)
+        return pool if isinstance(pool, list) else []
+
+    @traced
+    @priority_class(Priority.STANDARD)
+    async def quiz(
+        self,
+        content: str,
+        language: str = "english",
+        user_level: str = "B1",
+        count: int = 3,
+        user_id: str | None = None,
+        seen_ids: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Sample questions the reader has not seen yet.
+
+        Args:
+            content: Article text
+            language: Language of the article
+            user_level: Reader's CEFR level
+            count: Number of questions
+            user_id: Reader (anonymous readers get a random sample)
+            seen_ids: Question ids the client knows were already answered
+
+        Raises:
+            ValueError: If no questions could be generated for the article
+        """
+        key = pool_id(content, language, user_level)
+        questions = [
+            q for q in await self._pool(key, content, language, user_level) if _is_question(q)
+        ]
+        if not questions:
+            raise ValueError("Could not generate comprehension questions for this article")
+
+        tracked = user_id is not None and user_id != ANONYMOUS_TENANT and settings.cache_enabled
+        cache = get_cache()
+        seen_params = {"user": user_id, "pool": key}
+        seen: set[int] = set(cache.get(_SEEN_NAMESPACE, seen_params) or []) if tracked else set()
+        prefix = f"{key}:"
+        for question_id in seen_ids or []:
+            if question_id.startswith(prefix) and question_id[len(prefix) :].isdigit():
+                seen.add(int(question_id[len(prefix) :]))
+
+        # 読者ごとに固定の順序でプールを巡回する（匿名はランダム）
+        order = list(range(len(questions)))
+        random.Random(f"{user_id}:{key}" if tracked else None).shuffle(order)
+        unseen = [index for index in order if index not in seen]
+        if len(unseen) < count:
+            # 一巡したら最初から（今回の出題と重ならないよう未出題分を先頭に）
+            unseen += [index for index in order if index in seen]
+            seen = set()
+        picked = unseen[:count]
+        seen.update(picked)
+        if tracked:
+            cache.set(_SEEN_NAMESPACE, seen_params, sorted(seen))
+
+        QUIZZES.inc()
+        set_span_attributes(**{"quiz.pool_size": len(questions), "quiz.tracked": tracked})
+        return {
+            "pool_id": key,
+            "questions": [{"id": f"{prefix}{index}", **questions[index]} for index in picked],
+            "pool_size": len(questions),
+            "remaining": len(questions) - len(seen),
+        }
+
+
+# Singleton instance
+_quiz_service: ComprehensionQuizService | None = None
+
+
+def get_quiz_service() -> ComprehensionQuizService:
+    """Get or create the ComprehensionQuizService singleton."""
+    global _quiz_service
+    if _quiz_service is None:
+        _quiz_service = ComprehensionQuizService()
+    return _quiz_service
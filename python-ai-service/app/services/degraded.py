@@ -0,0 +1,132 @@
+"""Degraded Mode - Locally computed stand-ins for LLM results.
+
+When the LLM rejects a call (queue full, circuit open) or ``DEGRADED_MODE``
+is ``always``, ``@cached(degraded=...)`` methods answer with these instead
+of failing. They only use the preprocessed ``Document``, word packs, the
+response cache and bundled data, so they are cheap and never block; the
+results are marked ``"degraded": true`` and are not cached.
+"""
+
+import json
+from collections import Counter
+from typing import Any
+
+from app.core.config import settings
+from app.services.cache import get_cache
+from app.services.document import Document, diff_paragraphs, get_document
+from app.services.word_packs import lookup_explanation
+
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+
+# 難易度スコアの目安（文長・語長・語彙の多様さをそれぞれ 0-1 に線形で当てはめる）
+_SENTENCE_LENGTH_RANGE = (8.0, 30.0)
+_WORD_LENGTH_RANGE = (3.5, 6.5)
+_DIVERSITY_RANGE = (0.3, 0.8)
+
+LEAD_SENTENCES = 3
+KEY_POINTS = 3
+# 語彙候補にする語の最短の長さ（短い語はたいてい基本語）
+MIN_CANDIDATE_LENGTH = 7
+
+
+def _scale(value: float, bounds: tuple[float, float]) -> float:
+    low, high = bounds
+    return min(max((value - low) / (high - low), 0.0), 1.0)
+
+
+def _band(score: float, labels: tuple[str, str, str]) -> str:
+    return labels[0] if score < 0.35 else labels[1] if score < 0.7 else labels[2]
+
+
+def _candidates(content: str, limit: int) -> list[tuple[str, str]]:
+    """Long, frequent words of an article with the first sentence they occur in."""
+    document = get_document(content)
+    counts: Counter[str] = Counter()
+    first_form: dict[str, str] = {}
+    for token, lemma in zip(document.tokens, document.lemmas, strict=True):
+        # 固有名詞（大文字始まり）と数字混じりは除く
+        if len(token) >= MIN_CANDIDATE_LENGTH and token.isalpha() and token.islower():
+            counts[lemma] += 1
+            first_form.setdefault(lemma, token)
+    candidates = []
+    for lemma, _ in counts.most_common(limit):
+        # 語幹ルールの見出し語は不完全なことがあるので本文中の語形を返す
+        form = first_form[lemma]
+        sentence = next((s for s in document.sentences if form in s), "")
+        candidates.append((form, sentence))
+    return candidates
+
+
+def difficulty(params: dict[str, Any]) -> dict[str, Any]:
+    """``analyze_article_difficulty`` from sentence length, word length and lexical diversity."""
+    document = get_document(params["content"])
+    words = [token for token in document.tokens if token.isalpha()]
+    word_length = sum(map(len, words)) / max(len(words), 1)
+    sentence_score = _scale(document.average_sentence_length, _SENTENCE_LENGTH_RANGE)
+    word_score = _scale(word_length, _WORD_LENGTH_RANGE)
+    score = round(
+        0.45 * sentence_score
+        + 0.4 * word_score
+        + 0.15 * _scale(document.lexical_diversity, _DIVERSITY_RANGE),
+        2,
+    )
+    return {
+        "cefr_level": CEFR_LEVELS[min(int(score * len(CEFR_LEVELS)), len(CEFR_LEVELS) - 1)],
+        "difficulty_score": score,
+        "vocabulary_level": _band(word_score, ("basic", "intermediate", "advanced")),
+        "grammar_complexity": _band(sentence_score, ("simple", "moderate", "complex")),
+        "average_sentence_length": document.average_sentence_length,
+        "difficult_words": [
+            {"word": word, "definition": ""} for word, _ in _candidates(params["content"], 10)
+        ],
+        "reading_time_minutes": document.reading_time_minutes,
+    }
+
+
+def lead_summary(params: dict[str, Any]) -> dict[str, Any] | None:
+    """Extractive summary: the leading sentences, in the article's own language."""
+    document = get_document(params["content"])
+    if not document.sentences:
+        return None
+    return {
+        "summary": " ".join(document.sentences[:LEAD_SENTENCES]),
+        "key_points": list(document.sentences[:KEY_POINTS]),
+        "main_topic": "",
+        "vocabulary_to_learn": [
+            {"word": word, "definition": ""} for word, _ in _candidates(params["content"], 5)
+        ],
+    }
+
+
+def summary_update(params: dict[str, Any]) -> dict[str, Any]:
+    """``update_summary``: the previous summary plus the lead sentence of each new paragraph."""
+    diff = diff_paragraphs(params["previous_content"], params["content"])
+    previous = params["previous_summary"]
+    # 段落毎の Document は使い捨て（記事の Document キャッシュに入れない）
+    leads = [s[0] for s in (Document(p).sentences for p in diff.added) if s]
+    return {
+        **previous,
+        "key_points": [*previous.get("key_points", []), *leads[:KEY_POINTS]],
+        "update_mode": "unchanged" if diff.unchanged else "incremental",
+        "changed_paragraphs": diff.changes,
+    }
+
+
+def vocabulary(params: dict[str, Any]) -> dict[str, Any] | None:
+    """``extract_vocabulary`` candidates without definitions or levels."""
+    words = [
+        {"word": word, "definition": "", "cefr_level": "", "sentence": sentence}
+        for word, sentence in _candidates(params["content"], params["max_words"])
+    ]
+    return {"words": words} if words else None
+
+
+def word_core(params: dict[str, Any]) -> dict[str, Any] | None:
+    """``explain_word`` without the sense in context, from a word pack or the cache."""
+    core = {**params, "context": None}
+    packed = lookup_explanation(core)
+    if packed is not None:
+        return json.loads(packed)
+    if not settings.cache_enabled:
+        return None
+    return get_cache().get("LLMService.explain_word", core)
@@ -0,0 +1,285 @@
+"""Documents - Article text preprocessed once and shared by every analyzer.
+
+``get_document`` normalizes an article (Unicode NFC, line endings, runs of
+blank space) and memoizes the result per content, so difficulty analysis,
+summaries, vocabulary extraction and comprehension quizzes of the same
+article share one ``Document``: the same sentences, tokens, lemmas, prompt
+excerpts and content hash. ``@cached(document="content")`` keys responses by
+that hash instead of serializing and hashing the full text on every call.
+``diff_paragraphs`` compares two revisions of an article paragraph by
+paragraph, so updated stories can be re-summarized from the delta only.
+
+Segmentation and lemmatization are deliberately light (regular expressions
+and English suffix rules, no NLP models): the results feed statistics and
+cache keys, while the understanding of the text is left to the LLM.
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import cached_property
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+DOCUMENTS = registry.counter("document_cache_requests_total", "Preprocessed article lookups")
+
+# 1 分あたりの読書量の目安（分かち書きする言語は語数、CJK は文字数）
+WORDS_PER_MINUTE = 200
+CJK_CHARS_PER_MINUTE = 500
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN = re.compile(rf"[{_CJK}]|[^\W\d_{_CJK}]+(?:['’-][^\W\d_{_CJK}]+)*|\d+(?:[.,]\d+)*")
+_CJK_CHARACTER = re.compile(rf"[{_CJK}]")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"'”’)\]])\s+|(?<=[。！？])\s*|\n+")
+_BLANKS = re.compile(r"[ \t\u00a0\u3000]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_ABBREVIATIONS = frozenset(
+    {"mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "etc", "e.g", "i.e", "u.s", "u.k"}
+)
+
+_KANA = re.compile(r"[\u3040-\u30ff]")
+_HANGUL = re.compile(r"[\uac00-\ud7af]")
+_HAN = re.compile(r"[\u4e00-\u9fff]")
+# ラテン文字の言語は頻出機能語の出現数で推定する
+_FUNCTION_WORDS = {
+    "english": frozenset({"the", "and", "is", "of", "to", "in", "that", "it", "was", "for"}),
+    "spanish": frozenset({"el", "la", "de", "que", "y", "en", "los", "las", "es", "por"}),
+    "french": frozenset({"le", "la", "les", "de", "et", "est", "une", "des", "que", "dans"}),
+    "german": frozenset({"der", "die", "das", "und", "ist", "nicht", "ein", "eine", "zu", "den"}),
+}
+
+_IRREGULAR_LEMMAS = {
+    "is": "be", "are": "be", "was": "be", "were": "be", "been": "be", "being": "be", "am": "be",
+    "has": "have", "had": "have", "does": "do", "did": "do", "done": "do",
+    "went": "go", "gone": "go", "said": "say", "made": "make", "took": "take", "taken": "take",
+    "came": "come", "saw": "see", "seen": "see", "got": "get", "gave": "give", "given": "give",
+    "found": "find", "thought": "think", "told": "tell", "became": "become", "left": "leave",
+    "children": "child", "men": "man", "women": "woman", "people": "person", "mice": "mouse",
+    "feet": "foot", "teeth": "tooth", "better": "good", "best": "good", "worse": "bad",
+    "worst": "bad",
+}  # fmt: skip
+
+
+def normalize_text(content: str) -> str:
+    """NFC text with ``\\n`` line endings, single spaces and single blank lines."""
+    text = unicodedata.normalize("NFC", content).replace("\r\n", "\n").replace("\r", "\n")
+    text = _BLANKS.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return "\n".join(line.strip() for line in text.split("\n")).strip()
+
+
+def lemmatize(token: str) -> str:
+    """Lower-cased English lemma by irregular forms and suffix rules."""
+    word = token.lower()
+    lemma = _IRREGULAR_LEMMAS.get(word)
+    if lemma is not None:
+        return lemma
+    if len(word) <= 3 or not word.isascii():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("ied") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("sses"):
+        return word[:-2]
+    if word.endswith("ing") and len(word) > 5:
+        return _undouble(word[:-3])
+    if word.endswith("ed") and len(word) > 4:
+        return _undouble(word[:-2])
+    if word.endswith("s") and not word.endswith(("ss", "us", "is", "ous")):
+        return word[:-1]
+    return word
+
+
+def _undouble(stem: str) -> str:
+    # running -> run（ただし "call" や "miss" のような二重子音はそのまま）
+    if len(stem) > 2 and stem[-1] == stem[-2] and stem[-1] not in "aeiouslz":
+        return stem[:-1]
+    return stem
+
+
+def detect_language(text: str) -> str | None:
+    """Guess the language from the script (and function words for Latin text)."""
+    sample = text[:2000]
+    if _KANA.search(sample):
+        return "japanese"
+    if _HANGUL.search(sample):
+        return "korean"
+    if _HAN.search(sample):
+        return "chinese"
+    words = [token.lower() for token in _TOKEN.findall(sample)]
+    if not words:
+        return None
+    scores = {
+        language: sum(word in function_words for word in words)
+        for language, function_words in _FUNCTION_WORDS.items()
+    }
+    language, score = max(scores.items(), key=lambda item: item[1])
+    return language if score else None
+
+
+class Document:
+    """
+    Normalized article text and the artifacts derived from it.
+
+    Everything except ``text`` and ``content_hash`` is computed on first
+    access and kept for the lifetime of the document.
+    """
+
+    def __init__(self, content: str) -> None:
+        self.text = normalize_text(content)
+        self.content_hash = hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:32]
+        self._excerpts: dict[int, str] = {}
+
+    @property
+    def cache_key(self) -> str:
+        """Stands for the full text in response cache keys."""
+        return f"doc:{self.content_hash}"
+
+    @cached_property
+    def sentences(self) -> tuple[str, ...]:
+        pieces = [piece.strip() for piece in _SENTENCE_END.split(self.text)]
+        sentences: list[str] = []
+        for piece in pieces:
+            if not piece:
+                continue
+            # "Mr. Smith" のような略語の後では文を区切らない
+            last_word = sentences[-1].rsplit(" ", 1)[-1].rstrip(".").lower() if sentences else ""
+            if last_word in _ABBREVIATIONS:
+                sentences[-1] = f"{sentences[-1]} {piece}"
+            else:
+                sentences.append(piece)
+        return tuple(sentences)
+
+    @cached_property
+    def paragraphs(self) -> tuple[str, ...]:
+        """Blank-line separated paragraphs (lines, if the text has no blank lines)."""
+        separator = "\n\n" if "\n\n" in self.text else "\n"
+        return tuple(p for p in self.text.split(separator) if p.strip())
+
+    @cached_property
+    def tokens(self) -> tuple[str, ...]:
+        return tuple(_TOKEN.findall(self.text))
+
+    @cached_property
+    def lemmas(self) -> tuple[str, ...]:
+        return tuple(lemmatize(token) for token in self.tokens)
+
+    @cached_property
+    def language(self) -> str | None:
+        return detect_language(self.text)
+
+    @cached_property
+    def cjk_characters(self) -> int:
+        return sum(1 for token in self.tokens if _CJK_CHARACTER.fullmatch(token))
+
+    @property
+    def word_count(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def average_sentence_length(self) -> float:
+        """Tokens per sentence."""
+        return round(len(self.tokens) / max(len(self.sentences), 1), 1)
+
+    @property
+    def reading_time_minutes(self) -> int:
+        minutes = (
+            self.cjk_characters / CJK_CHARS_PER_MINUTE
+            + (len(self.tokens) - self.cjk_characters) / WORDS_PER_MINUTE
+        )
+        return max(1, round(minutes))
+
+    @cached_property
+    def lexical_diversity(self) -> float:
+        """Distinct lemmas per token (0-1)."""
+        return round(len(set(self.lemmas)) / max(len(self.lemmas), 1), 3)
+
+    def excerpt(self, limit: int) -> str:
+        """
+        Leading text of at most ``limit`` characters, cut at a sentence boundary.
+
+        Excerpts are what prompts embed; each length is built once.
+        """
+        excerpt = self._excerpts.get(limit)
+        if excerpt is None:
+            excerpt = self.text
+            if len(excerpt) > limit:
+                cut = excerpt[:limit]
+                boundary = max(cut.rfind(mark) for mark in (". ", "! ", "? ", "。", "\n"))
+                # 最初の文だけで上限を超える場合は文字数で切る
+                excerpt = cut[: boundary + 1].rstrip() if boundary > limit // 2 else cut
+            self._excerpts[limit] = excerpt
+        return excerpt
+
+    def statistics(self) -> dict[str, float | int]:
+        return {
+            "sentences": len(self.sentences),
+            "words": self.word_count,
+            "average_sentence_length": self.average_sentence_length,
+            "lexical_diversity": self.lexical_diversity,
+            "reading_time_minutes": self.reading_time_minutes,
+        }
+
+
+@dataclass(frozen=True)
+class ParagraphDiff:
+    """Paragraph-level changes between two revisions of an article."""
+
+    added: tuple[str, ...]  # 新しい版で追加・書き換えられた段落
+    removed: tuple[str, ...]  # 古い版から削除・書き換えられた段落
+    changes: int  # 追加・書き換え・削除された段落数（書き換えは 1 と数える）
+    changed_ratio: float  # 変更された文字数の割合（0-1）
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.added and not self.removed
+
+
+def diff_paragraphs(old: "str | Document", new: "str | Document") -> ParagraphDiff:
+    """Which paragraphs of ``old`` a revision ``new`` rewrote, dropped or added."""
+    before, after = get_document(old).paragraphs, get_document(new).paragraphs
+    added: list[str] = []
+    removed: list[str] = []
+    changes = 0
+    matcher = SequenceMatcher(None, before, after, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            removed += before[i1:i2]
+            added += after[j1:j2]
+            changes += max(i2 - i1, j2 - j1)
+    total = sum(map(len, before)) + sum(map(len, after))
+    changed = sum(map(len, added)) + sum(map(len, removed))
+    return ParagraphDiff(
+        added=tuple(added),
+        removed=tuple(removed),
+        changes=changes,
+        changed_ratio=round(changed / total, 3) if total else 0.0,
+    )
+
+
+# 本文 -> Document の LRU（同じ記事への複数の分析呼び出しで前処理を共有する）
+_documents: OrderedDict[str, Document] = OrderedDict()
+
+
+def get_document(content: "str | Document") -> Document:
+    """Memoized ``Document`` of an article text."""
+    if isinstance(content, Document):
+        return content
+    document = _documents.get(content)
+    if document is not None:
+        _documents.move_to_end(content)
+        DOCUMENTS.inc(result="hit")
+        return document
+
+    document = Document(content)
+    DOCUMENTS.inc(result="miss")
+    if settings.document_cache_max_entries > 0:
+        _documents[content] = document
+        while len(_documents) > settings.document_cache_max_entries:
+            _documents.popitem(last=False)
+    return document
@@ -0,0 +1,207 @@
+"""Bulk Ingestion - Streaming NDJSON analysis of article feeds.
+
+``IngestPipeline.run`` reads newline-delimited ``IngestArticle`` JSON from a
+request body as it arrives, analyzes up to ``INGEST_CONCURRENCY`` articles at
+a time through the ``ArticleAnalyzerService`` stages (and, on request, story
+clustering), and yields one NDJSON result line per article as soon as that
+article is done (so results come back out of order; each carries its line
+number and ``id``).
+
+Both ends are bounded: the reader stops pulling the request body while the
+workers are busy, and the workers stop taking articles while the client is
+not reading results, so neither side ever holds more than a few articles in
+memory. Stage results are embedded as the JSON bytes ``call_json`` returns
+(cache hits are not decoded), and each stage failure is reported with the
+status code its HTTP route would have answered with.
+"""
+
+import asyncio
+import contextvars
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import structlog
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceededError, current_deadline, deadline_scope
+from app.core.metrics import registry
+from app.models.articles import IngestArticle
+from app.services.admission import CapacityError
+from app.services.article_analyzer import get_article_analyzer
+from app.services.cache import call_json, encode_json
+from app.services.document import get_document
+from app.services.stories import get_story_clusterer
+
+logger = structlog.get_logger()
+
+INGESTED = registry.counter("ingest_articles_total", "Articles processed by bulk ingestion")
+
+
+def _error(error: Exception) -> dict[str, Any]:
+    """The status and message the HTTP route would have answered a failure with."""
+    if isinstance(error, DeadlineExceededError):
+        return {"status": 504, "error": str(error)}
+    if isinstance(error, CapacityError):
+        return {"status": error.status_code, "error": str(error), "retry_after": error.retry_after}
+    if isinstance(error, ValueError):
+        return {"status": 503, "error": str(error)}
+    return {"status": 500, "error": f"AI処理エラー: {str(error)}"}
+
+
+class IngestPipeline:
+    """Bounded concurrent analysis of an NDJSON article stream."""
+
+    def __init__(self, concurrency: int | None = None) -> None:
+        self.concurrency = max(concurrency or settings.ingest_concurrency, 1)
+        self.analyzer = get_article_analyzer()
+        # 呼び出し元のテナントと優先度を引き継ぐ。期限はリクエスト全体ではなく記事毎
+        self._context = contextvars.copy_context()
+        self._context.run(current_deadline.set, None)
+
+    def _stages(self, article: IngestArticle) -> dict[str, Callable[[], Awaitable[bytes]]]:
+        analyzer = self.analyzer
+        common = {"content": article.content, "language": article.language}
+        leveled = {**common, "user_level": article.user_level}
+        return {
+            "difficulty": lambda: call_json(analyzer.llm.analyze_article_difficulty, common),
+            "summary": lambda: call_json(
+                analyzer.summarize_article,
+                {**leveled, "target_language": article.target_language},
+            ),
+            "vocabulary": lambda: call_json(
+                analyzer.extract_vocabulary, {**leveled, "max_words": article.max_words}
+            ),
+            "questions": lambda: call_json(
+                analyzer.generate_comprehension_questions,
+                {**leveled, "count": article.question_count},
+            ),
+            "story": lambda: self._story(article),
+        }
+
+    async def _story(self, article: IngestArticle) -> bytes:
+        # ID のない記事は本文のハッシュで区別する
+        assignment = get_story_clusterer().assign(
+            article.id or get_document(article.content).content_hash,
+            article.title,
+            article.content,
+            article.language,
+            article.source,
+            article.published_at,
+        )
+        return encode_json(assignment)
+
+    async def _analyze(self, line_no: int, line: bytes) -> bytes:
+        try:
+            article = IngestArticle.model_validate_json(line)
+        except ValidationError as e:
+            INGESTED.inc(outcome="invalid")
+            validation_errors = e.errors(
+                include_url=False, include_context=False, include_input=False
+            )
+            return encode_json(
+                {"line": line_no, "ok": False, "status": 422, "error": validation_errors}
+            )
+
+        stages = self._stages(article)
+        names = list(dict.fromkeys(article.analyses))
+        with deadline_scope(settings.ingest_article_timeout_seconds):
+            outputs = await asyncio.gather(
+                *(stages[name]() for name in names), return_exceptions=True
+            )
+
+        results: list[bytes] = []
+        errors: dict[str, Any] = {}
+        for name, output in zip(names, outputs, strict=True):
+            if isinstance(output, BaseException):
+                if not isinstance(output, Exception):
+                    raise output
+                errors[name] = _error(output)
+            else:
+                # 分析結果の JSON はそのまま埋め込む
+                results.append(encode_json(name) + b":" + output)
+        INGESTED.inc(outcome="ok" if not errors else "partial" if results else "failed")
+
+        head = {"line": line_no, "id": article.id, "ok": not errors}
+        body = encode_json(head)[:-1] + b',"results":{' + b",".join(results) + b"}"
+        if errors:
+            body += b',"errors":' + encode_json(errors)
+        return body + b"}"
+
+    async def _read(
+        self, chunks: AsyncIterator[bytes], inbox: asyncio.Queue[tuple[int, bytes] | None]
+    ) -> None:
+        """Split the body into lines and queue them (waits while the workers are busy)."""
+        buffer = b""
+        line_no = 0
+        skipping = False
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                while (end := buffer.find(b"\n")) != -1:
+                    line, buffer = buffer[:end], buffer[end + 1 :]
+                    if skipping:
+                        # 長すぎた行の残り
+                        skipping = False
+                        continue
+                    line_no += 1
+                    if len(line) > settings.ingest_max_line_bytes:
+                        await inbox.put((line_no, b""))
+                    elif line.strip():
+                        await inbox.put((line_no, line))
+                if len(buffer) > settings.ingest_max_line_bytes:
+                    if not skipping:
+                        line_no += 1
+                        # 空の行は「長すぎる行」の印（空行そのものは送らない）
+                        await inbox.put((line_no, b""))
+                        skipping = True
+                    buffer = b""
+            if buffer.strip() and not skipping:
+                await inbox.put((line_no + 1, buffer))
+        except Exception as e:
+            # 本文の途中でクライアントが切断したなど（読めた分の結果は返す）
+            logger.info("ingest_body_aborted", error=str(e))
+        for _ in range(self.concurrency):
+            await inbox.put(None)
+
+    async def _work(
+        self,
+        inbox: asyncio.Queue[tuple[int, bytes] | None],
+        outbox: asyncio.Queue[bytes | None],
+    ) -> None:
+        while (item := await inbox.get()) is not None:
+            line_no, line = item
+            if not line:
+                result = encode_json(
+                    {"line": line_no, "ok": False, "status": 413, "error": "Line too long"}
+                )
+            else:
+                try:
+                    result = await self._analyze(line_no, line)
+                except Exception as e:
+                    INGESTED.inc(outcome="failed")
+                    result = encode_json({"line": line_no, "ok": False, **_error(e)})
+            # 結果が読まれるまで次の記事を取らない
+            await outbox.put(result)
+        await outbox.put(None)
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Analyze the articles of an NDJSON byte stream, yielding result lines as they finish."""
+        inbox: asyncio.Queue[tuple[int, bytes] | None] = asyncio.Queue(self.concurrency)
+        outbox: asyncio.Queue[bytes | None] = asyncio.Queue(self.concurrency)
+        tasks = [asyncio.create_task(self._read(chunks, inbox), context=self._context.copy())]
+        tasks += [
+            asyncio.create_task(self._work(inbox, outbox), context=self._context.copy())
+            for _ in range(self.concurrency)
+        ]
+        try:
+            finished = 0
+            while finished < self.concurrency:
+                result = await outbox.get()
+                if result is None:
+                    finished += 1
+                    continue
+                yield result + b"\n"
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,262 @@
+"""Learning Metrics - Local rules for the numeric parts of plans and progress reports.
+
+Readiness, pace, weekly targets and milestones are derived from a handful of
+profile numbers with fixed rules, so they are computed here instantly instead
+of by the LLM. ``profile_bucket`` quantizes a profile so that the narrative
+text, which is still generated by the LLM, can be shared between users with
+similar profiles.
+
+The per-level figures are rough, commonly cited estimates (receptive
+vocabulary size and cumulative guided learning hours per CEFR level).
+"""
+
+import math
+from typing import Any
+
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+
+# レベル到達に必要な語彙数の目安
+VOCABULARY_BY_LEVEL = {"A1": 500, "A2": 1000, "B1": 2000, "B2": 4000, "C1": 8000, "C2": 16000}
+# レベル到達までの累積学習時間の目安（時間）
+HOURS_BY_LEVEL = {"A1": 90, "A2": 180, "B1": 375, "B2": 550, "C1": 750, "C2": 1100}
+# レベル毎に読んでおきたい記事数の目安
+ARTICLES_PER_LEVEL = 20
+# 週あたり XP の目安（これを超えれば平均以上）
+WEEKLY_XP_TARGET = 300
+MILESTONE_WEEKS = (1, 4, 12)
+
+# 量子化の境界（下限値）。LLM のナラティブはこの帯単位でキャッシュされる
+VOCABULARY_BANDS = (0, 100, 250, 500, 1000, 2000, 4000, 8000)
+ARTICLE_BANDS = (0, 10, 25, 50, 100, 250)
+STREAK_BANDS = (0, 3, 7, 14, 30, 100)
+XP_BANDS = (0, 100, 300, 600, 1000)
+MAX_BUCKET_TOPICS = 3
+
+_DURATION_TEMPLATES = {
+    "japanese": "約{weeks}週間",
+    "english": "About {weeks} weeks",
+    "korean": "약 {weeks}주",
+    "chinese": "约{weeks}周",
+    "spanish": "Unas {weeks} semanas",
+}
+
+
+def normalize_level(level: str, default: str = "B1") -> str:
+    level = level.strip().upper()
+    return level if level in CEFR_LEVELS else default
+
+
+def band(value: int, bands: tuple[int, ...]) -> int:
+    """Lower bound of the band ``value`` falls into."""
+    result = bands[0]
+    for lower in bands:
+        if value >= lower:
+            result = lower
+    return result
+
+
+def normalize_topics(topics: list[str] | None) -> tuple[str, ...]:
+    """
+    The first ``MAX_BUCKET_TOPICS`` distinct topics, lower-cased.
+
+    Topics are kept in the user's order when truncating (the first ones matter
+    most) and only sorted afterwards, so the cache key does not depend on order.
+    """
+    unique = dict.fromkeys(topic.strip().lower() for topic in topics or [] if topic.strip())
+    return tuple(sorted(list(unique)[:MAX_BUCKET_TOPICS]))
+
+
+def profile_bucket(
+    user_level: str,
+    target_level: str,
+    vocabulary_count: int,
+    articles_read: int,
+    weak_areas: list[str] | None,
+    interests: list[str] | None,
+) -> dict[str, Any]:
+    """Quantized learning-plan profile (the cache key of the plan narrative)."""
+    return {
+        "user_level": normalize_level(user_level),
+        "target_level": normalize_level(target_level, "B2"),
+        "vocabulary_band": band(vocabulary_count, VOCABULARY_BANDS),
+        "articles_band": band(articles_read, ARTICLE_BANDS),
+        "weak_areas": list(normalize_topics(weak_areas)),
+        "interests": list(normalize_topics(interests)),
+    }
+
+
+def progress_bucket(
+    user_level: str,
+    vocabulary_count: int,
+    articles_read: int,
+    streak_days: int,
+    weekly_xp: int,
+) -> dict[str, Any]:
+    """Quantized progress profile (the cache key of the progress narrative)."""
+    return {
+        "user_level": normalize_level(user_level),
+        "vocabulary_band": band(vocabulary_count, VOCABULARY_BANDS),
+        "articles_band": band(articles_read, ARTICLE_BANDS),
+        "streak_band": band(streak_days, STREAK_BANDS),
+        "xp_band": band(weekly_xp, XP_BANDS),
+    }
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def _round_to(value: float, step: int) -> int:
+    return int(step * round(value / step))
+
+
+def format_duration(weeks: int, native_language: str) -> str:
+    template = _DURATION_TEMPLATES.get(native_language.lower(), _DURATION_TEMPLATES["english"])
+    return template.format(weeks=weeks)
+
+
+def plan_metrics(
+    user_level: str,
+    target_level: str,
+    vocabulary_count: int,
+    articles_read: int,
+    weak_areas: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Numeric parts of a learning plan.
+
+    Returns:
+        readiness_score, estimated_weeks, weekly targets, daily minutes and
+        milestone targets (cumulative vocabulary and articles)
+    """
+    user_level = normalize_level(user_level)
+    target_level = normalize_level(target_level, "B2")
+    user_index = CEFR_LEVELS.index(user_level)
+    target_index = CEFR_LEVELS.index(target_level)
+    level_gap = max(target_index - user_index, 0)
+    weak = {area.lower() for area in weak_areas or []}
+
+    target_vocabulary = VOCABULARY_BY_LEVEL[target_level]
+    vocabulary_gap = max(target_vocabulary - vocabulary_count, 0)
+    hours_gap = max(HOURS_BY_LEVEL[target_level] - HOURS_BY_LEVEL[user_level], 0)
+
+    # 目標との差が大きいほど 1 日の学習時間を増やす（既に到達済みなら維持モード）
+    daily_minutes = 20 if level_gap == 0 else 30 if level_gap == 1 else 45
+    weekly_hours = daily_minutes * 7 / 60
+    estimated_weeks = int(_clamp(math.ceil(hours_gap / weekly_hours), 4, 104))
+
+    weekly_vocabulary = int(_clamp(_round_to(vocabulary_gap / estimated_weeks, 5), 20, 150))
+    articles_per_week = int(_clamp(3 + level_gap + ("reading" in weak), 3, 7))
+    # 新出語 1 語あたり数回の復習が発生する（間隔反復の定常負荷）
+    flashcard_reviews = int(_clamp(_round_to(weekly_vocabulary / 7 * 5, 5), 10, 150))
+    quiz_sessions = 2 + (level_gap >= 2) + bool(weak & {"grammar", "vocabulary"})
+
+    vocabulary_ratio = min(vocabulary_count / target_vocabulary, 1.0)
+    reading_ratio = min(articles_read / (ARTICLES_PER_LEVEL * (target_index + 1)), 1.0)
+    readiness = 100 * (0.7 * vocabulary_ratio + 0.3 * reading_ratio)
+    readiness_score = int(_clamp(round(readiness), 1, 100))
+
+    next_level = CEFR_LEVELS[min(user_index + 1, target_index)] if level_gap else user_level
+    recommended_difficulty = (
+        user_level
+        if readiness_score < 50 or next_level == user_level
+        else f"{user_level}-{next_level}"
+    )
+
+    milestones = [
+        {
+            "week": week,
+            "vocabulary_target": max(
+                min(vocabulary_count + weekly_vocabulary * week, target_vocabulary),
+                vocabulary_count,
+            ),
+            "articles_target": articles_read + articles_per_week * week,
+        }
+        for week in MILESTONE_WEEKS
+    ]
+
+    return {
+        "readiness_score": readiness_score,
+        "estimated_weeks": estimated_weeks,
+        "level_gap": level_gap,
+        "weekly_vocabulary": weekly_vocabulary,
+        "articles_per_week": articles_per_week,
+        "recommended_difficulty": recommended_difficulty,
+        "flashcard_reviews_per_day": flashcard_reviews,
+        "quiz_sessions_per_week": quiz_sessions,
+        "daily_minutes": daily_minutes,
+        "milestones": milestones,
+    }
+
+
+def _next_threshold(value: int, thresholds: tuple[int, ...]) -> int | None:
+    return next((threshold for threshold in thresholds if threshold > value), None)
+
+
+def progress_metrics(
+    user_level: str,
+    vocabulary_count: int,
+    articles_read: int,
+    streak_days: int,
+    weekly_xp: int,
+) -> dict[str, Any]:
+    """
+    Numeric and categorical parts of a progress report.
+
+    ``trend`` is a heuristic from the current streak and XP pace; no history
+    is available to this service.
+    """
+    user_level = normalize_level(user_level)
+    user_index = CEFR_LEVELS.index(user_level)
+    level_vocabulary = VOCABULARY_BY_LEVEL[user_level]
+    next_vocabulary = VOCABULARY_BY_LEVEL[CEFR_LEVELS[min(user_index + 1, len(CEFR_LEVELS) - 1)]]
+
+    vocabulary_ratio = min(vocabulary_count / next_vocabulary, 1.0)
+    reading_ratio = min(articles_read / (ARTICLES_PER_LEVEL * (user_index + 1)), 1.0)
+    xp_ratio = min(weekly_xp / WEEKLY_XP_TARGET, 1.5) / 1.5
+    streak_ratio = min(streak_days / 30, 1.0)
+    weighted = 0.4 * vocabulary_ratio + 0.2 * reading_ratio + 0.25 * xp_ratio + 0.15 * streak_ratio
+    score = int(_clamp(round(100 * weighted), 1, 100))
+
+    if streak_days >= 3 and weekly_xp >= WEEKLY_XP_TARGET:
+        trend = "improving"
+    elif streak_days == 0 and weekly_xp < WEEKLY_XP_TARGET / 3:
+        trend = "declining"
+    else:
+        trend = "stable"
+
+    # 単語数は「現レベルの目安語彙」に対する割合で速さを判定する
+    vocabulary_pace = vocabulary_count / level_vocabulary
+    pace = "fast" if vocabulary_pace >= 1.0 else "average" if vocabulary_pace >= 0.5 else "slow"
+    # 連続学習日数が長いほど定着率が高いとみなす（忘却曲線の復習効果の近似）
+    retention = int(_clamp(55 + streak_days * 1.5 + (weekly_xp >= WEEKLY_XP_TARGET) * 10, 50, 95))
+    consistency = "consistent" if streak_days >= 7 else "irregular"
+    if streak_days >= 7 and weekly_xp >= WEEKLY_XP_TARGET:
+        motivation_level = "high"
+    elif streak_days < 2 and weekly_xp < WEEKLY_XP_TARGET / 2:
+        motivation_level = "low"
+    else:
+        motivation_level = "medium"
+
+    achievements_near: list[dict[str, Any]] = []
+    for metric, value, thresholds in (
+        ("vocabulary", vocabulary_count, (50, 100, 250, 500, 1000, 2000, 4000, 8000)),
+        ("articles", articles_read, (10, 25, 50, 100, 250, 500)),
+        ("streak_days", streak_days, (3, 7, 14, 30, 60, 100, 365)),
+    ):
+        threshold = _next_threshold(value, thresholds)
+        if threshold is not None and value >= threshold * 0.7:
+            achievements_near.append(
+                {"metric": metric, "target": threshold, "remaining": threshold - value}
+            )
+
+    return {
+        "score": score,
+        "trend": trend,
+        "pace": pace,
+        "retention_estimate": f"{retention}%",
+        "consistency": consistency,
+        "motivation_level": motivation_level,
+        "xp_ratio": round(weekly_xp / WEEKLY_XP_TARGET, 2),
+        "achievements_near": achievements_near,
+    }
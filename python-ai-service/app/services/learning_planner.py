@@ -2,15 +2,44 @@
 
 from typing import Any
 
+from app.core.tracing import traced
+from app.services.cache import cached
+from app.services.learning_metrics import (
+    MILESTONE_WEEKS,
+    format_duration,
+    plan_metrics,
+    profile_bucket,
+    progress_bucket,
+    progress_metrics,
+)
 from app.services.llm import get_llm_service
+from app.services.scheduler import Priority, priority_class
+
+
+def _merge(base: dict[str, Any], overlay: dict[str, Any]) -> dict[str, Any]:
+    """Recursively overlay ``overlay`` on ``base`` (the locally computed values win)."""
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
 
 
 class LearningPlanner:
-    """Service for generating personalized learning plans."""
+    """
+    Service for generating personalized learning plans.
+
+    Scores, paces and targets come from ``learning_metrics``; the LLM only
+    writes the narrative text, cached per quantized profile bucket.
+    """
 
     def __init__(self):
         self.llm = get_llm_service()
 
+    @traced
+    @priority_class(Priority.BACKGROUND)
     async def suggest_learning_plan(
         self,
         user_level: str = "B1",
@@ -23,7 +52,7 @@ class LearningPlanner:
     ) -> dict[str, Any]:
         """
         Generate a personalized learning plan based on user's progress and goals.
-        
+
         Args:
             user_level: Current CEFR level
             target_level: Target CEFR level
@@ -36,63 +65,98 @@ class LearningPlanner:
         weak_areas = weak_areas or []
         interests = interests or ["news", "technology"]
 
-        prompt = f"""Create a personalized language learning plan based on the following user profile.
-Provide your response in {native_language}.
+        metrics = plan_metrics(
+            user_level, target_level, vocabulary_count, articles_read, weak_areas
+        )
+        plan: dict[str, Any] = {
+            "estimated_duration": format_duration(metrics["estimated_weeks"], native_language),
+            "estimated_weeks": metrics["estimated_weeks"],
+            "current_assessment": {"readiness_score": metrics["readiness_score"]},
+            "weekly_goals": {
+                "vocabulary": {"target": metrics["weekly_vocabulary"]},
+                "reading": {
+                    "articles_per_week": metrics["articles_per_week"],
+                    "recommended_difficulty": metrics["recommended_difficulty"],
+                },
+                "practice": {
+                    "flashcard_reviews": metrics["flashcard_reviews_per_day"],
+                    "quiz_sessions": metrics["quiz_sessions_per_week"],
+                },
+            },
+            "daily_routine": {"estimated_time": metrics["daily_minutes"]},
+            "user_profile": {
+                "current_level": user_level,
+                "target_level": target_level,
+                "vocabulary_count": vocabulary_count,
+                "articles_read": articles_read,
+            },
+        }
 
-User Profile:
+        bucket = profile_bucket(
+            user_level, target_level, vocabulary_count, articles_read, weak_areas, interests
+        )
+        try:
+            narrative = await self._plan_narrative(
+                **bucket, native_language=native_language.lower()
+            )
+        except Exception as e:
+            # 数値部分はローカルで計算済みなので、ナラティブなしでも返す
+            return {**plan, "narrative_error": str(e)}
+
+        goals = {
+            target.get("week"): target
+            for target in narrative.get("milestone_targets", [])
+            if isinstance(target, dict)
+        }
+        plan = _merge(narrative, plan)
+        plan["milestone_targets"] = [
+            {**goals.get(milestone["week"], {}), **milestone} for milestone in metrics["milestones"]
+        ]
+        return plan
+
+    @cached
+    @traced
+    async def _plan_narrative(
+        self,
+        user_level: str,
+        target_level: str,
+        vocabulary_band: int,
+        articles_band: int,
+        weak_areas: list[str],
+        interests: list[str],
+        native_language: str,
+    ) -> dict[str, Any]:
+        """Narrative text of a learning plan for a profile bucket."""
+        weeks = ", ".join(str(week) for week in MILESTONE_WEEKS)
+        prompt = f"""Write the text parts of a personalized language learning plan for the following learner profile.
+Provide your response in {native_language}. Do not include numbers of words, articles or minutes; they are computed separately.
+
+Learner Profile:
 - Current Level: {user_level}
 - Target Level: {target_level}
-- Vocabulary Learned: {vocabulary_count} words
-- Articles Read: {articles_read}
-- Weak Areas: {', '.join(weak_areas) if weak_areas else 'Not specified'}
-- Interests: {', '.join(interests)}
+- Vocabulary Learned: {vocabulary_band}+ words
+- Articles Read: {articles_band}+
+- Weak Areas: {", ".join(weak_areas) if weak_areas else "Not specified"}
+- Interests: {", ".join(interests) if interests else "news"}
 
 Respond in this exact JSON format:
 {{
     "summary": "Brief summary of the learning plan",
-    "estimated_duration": "Estimated time to reach target level",
     "current_assessment": {{
-        "strengths": ["User's strengths based on data"],
-        "areas_to_improve": ["Areas needing improvement"],
-        "readiness_score": 1-100
+        "strengths": ["Learner's likely strengths"],
+        "areas_to_improve": ["Areas needing improvement"]
     }},
     "weekly_goals": {{
-        "vocabulary": {{
-            "target": 50,
-            "focus_areas": ["Types of vocabulary to focus on"]
-        }},
-        "reading": {{
-            "articles_per_week": 5,
-            "recommended_difficulty": "CEFR level for reading",
-            "topics": ["Recommended topics based on interests"]
-        }},
-        "practice": {{
-            "flashcard_reviews": "Number of reviews per day",
-            "quiz_sessions": "Number of quizzes per week"
-        }}
+        "vocabulary": {{"focus_areas": ["Types of vocabulary to focus on"]}},
+        "reading": {{"topics": ["Recommended topics based on interests"]}}
     }},
     "daily_routine": {{
         "morning": "Morning learning activity suggestion",
         "afternoon": "Afternoon activity",
-        "evening": "Evening review activity",
-        "estimated_time": "Total daily time in minutes"
+        "evening": "Evening review activity"
     }},
     "milestone_targets": [
-        {{
-            "week": 1,
-            "goal": "First week goal",
-            "metrics": "How to measure success"
-        }},
-        {{
-            "week": 4,
-            "goal": "First month goal",
-            "metrics": "How to measure success"
-        }},
-        {{
-            "week": 12,
-            "goal": "Three month goal",
-            "metrics": "How to measure success"
-        }}
+        {{"week": 1, "goal": "Goal for this week", "metrics": "How to measure success"}}
     ],
     "recommended_content": {{
         "article_categories": ["Recommended news categories"],
@@ -100,54 +164,20 @@ Respond in this exact JSON format:
         "grammar_points": ["Grammar points to study"]
     }},
     "weak_area_strategies": [
-        {{
-            "area": "Weak area",
-            "strategy": "Strategy to improve",
-            "resources": ["Recommended resources"]
-        }}
-    ],
-    "motivational_tips": [
-        "Tip 1 for staying motivated",
-        "Tip 2 for effective learning",
-        "Tip 3 for building habits"
+        {{"area": "Weak area", "strategy": "Strategy to improve", "resources": ["Recommended resources"]}}
     ],
+    "motivational_tips": ["Tip 1", "Tip 2", "Tip 3"],
     "next_actions": [
-        {{
-            "action": "First action to take",
-            "priority": "high/medium/low",
-            "estimated_time": "Time in minutes"
-        }},
-        {{
-            "action": "Second action",
-            "priority": "high/medium/low",
-            "estimated_time": "Time in minutes"
-        }},
-        {{
-            "action": "Third action",
-            "priority": "high/medium/low",
-            "estimated_time": "Time in minutes"
-        }}
+        {{"action": "First action to take", "priority": "high/medium/low", "estimated_time": "Time in minutes"}}
     ]
-}}"""
+}}
 
-        try:
-            result = await self.llm.generate_json(prompt)
-            result["user_profile"] = {
-                "current_level": user_level,
-                "target_level": target_level,
-                "vocabulary_count": vocabulary_count,
-                "articles_read": articles_read,
-            }
-            return result
-        except Exception as e:
-            return {
-                "error": str(e),
-                "user_profile": {
-                    "current_level": user_level,
-                    "target_level": target_level,
-                },
-            }
+Give one milestone_targets entry for each of weeks {weeks} and three next_actions."""
 
+        return await self.llm.generate_json(prompt)
+
+    @traced
+    @priority_class(Priority.BACKGROUND)
     async def analyze_progress(
         self,
         user_level: str,
@@ -160,51 +190,77 @@ Respond in this exact JSON format:
         """
         Analyze user's learning progress and provide insights.
         """
-        prompt = f"""Analyze the following user's learning progress and provide insights.
-Provide your response in {native_language}.
+        metrics = progress_metrics(
+            user_level, vocabulary_count, articles_read, streak_days, weekly_xp
+        )
+        report: dict[str, Any] = {
+            "overall_progress": {"score": metrics["score"], "trend": metrics["trend"]},
+            "vocabulary_insights": {
+                "pace": metrics["pace"],
+                "retention_estimate": metrics["retention_estimate"],
+            },
+            "reading_insights": {"consistency": metrics["consistency"]},
+            "engagement": {
+                "motivation_level": metrics["motivation_level"],
+                "xp_ratio": metrics["xp_ratio"],
+            },
+            "achievements_near": metrics["achievements_near"],
+        }
+
+        bucket = progress_bucket(
+            user_level, vocabulary_count, articles_read, streak_days, weekly_xp
+        )
+        try:
+            narrative = await self._progress_narrative(
+                **bucket,
+                trend=metrics["trend"],
+                pace=metrics["pace"],
+                native_language=native_language.lower(),
+            )
+        except Exception as e:
+            return {**report, "narrative_error": str(e)}
+        # 数値・区分はローカルの値を優先し、LLM の文章だけを取り込む
+        narrative = {k: v for k, v in narrative.items() if k != "achievements_near"}
+        return _merge(narrative, report)
+
+    @cached
+    @traced
+    async def _progress_narrative(
+        self,
+        user_level: str,
+        vocabulary_band: int,
+        articles_band: int,
+        streak_band: int,
+        xp_band: int,
+        trend: str,
+        pace: str,
+        native_language: str,
+    ) -> dict[str, Any]:
+        """Narrative text of a progress report for a progress bucket."""
+        prompt = f"""Comment on the following learner's learning progress.
+Provide your response in {native_language}. The scores are computed separately; write text only.
 
 Progress Data:
 - Current Level: {user_level}
-- Vocabulary Learned: {vocabulary_count} words
-- Articles Read: {articles_read}
-- Current Streak: {streak_days} days
-- Weekly XP: {weekly_xp}
+- Vocabulary Learned: {vocabulary_band}+ words ({pace} pace)
+- Articles Read: {articles_band}+
+- Current Streak: {streak_band}+ days
+- Weekly XP: {xp_band}+
+- Trend: {trend}
 
 Respond in this exact JSON format:
 {{
-    "overall_progress": {{
-        "score": 1-100,
-        "trend": "improving/stable/declining",
-        "summary": "Brief summary of progress"
-    }},
-    "vocabulary_insights": {{
-        "pace": "fast/average/slow",
-        "retention_estimate": "estimated retention rate",
-        "recommendation": "Recommendation for vocabulary learning"
-    }},
-    "reading_insights": {{
-        "consistency": "consistent/irregular",
-        "recommendation": "Recommendation for reading practice"
-    }},
+    "overall_progress": {{"summary": "Brief summary of progress"}},
+    "vocabulary_insights": {{"recommendation": "Recommendation for vocabulary learning"}},
+    "reading_insights": {{"recommendation": "Recommendation for reading practice"}},
     "engagement": {{
         "streak_assessment": "Assessment of streak",
-        "xp_pace": "Assessment of XP earning",
-        "motivation_level": "high/medium/low"
+        "xp_pace": "Assessment of XP earning"
     }},
-    "achievements_near": [
-        "Achievement 1 that's close to being earned",
-        "Achievement 2 that's close"
-    ],
     "personalized_encouragement": "Personalized message to encourage the user"
 }}"""
 
-        try:
-            result = await self.llm.generate_json(prompt)
-            return result
-        except Exception as e:
-            return {
-                "error": str(e),
-            }
+        return await self.llm.generate_json(prompt)
 
 
 # Singleton instance
@@ -217,4 +273,3 @@ def get_learning_planner() -> LearningPlanner:
     if _learning_planner is None:
         _learning_planner = LearningPlanner()
     return _learning_planner
-
@@ -1,31 +1,117 @@
 """LLM Service - Anthropic Claude integration."""
 
+import asyncio
+import json
+import time
+from dataclasses import dataclass
 from typing import Any
 
 import anthropic
 import structlog
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import AsyncRetrying, RetryCallState, RetryError, stop_after_attempt, wait_exponential
+from tenacity.stop import stop_base
 
 from app.core.config import settings
+from app.core.deadline import LLM_CALLS_CANCELLED, DeadlineExceededError, remaining
+from app.core.tenancy import current_tenant
+from app.core.tracing import current_operation, start_span, traced
+from app.models.articles import (
+    AnalyzeDifficultyResponse,
+    ExtractVocabularyResponse,
+    SummarizeArticleResponse,
+    SummaryUpdateResponse,
+)
+from app.models.words import ExplainWordResponse
+from app.services import degraded
+from app.services.admission import admit, get_circuit_breaker, is_provider_failure
+from app.services.cache import cached
+from app.services.cassette import get_cassette
+from app.services.document import Document, diff_paragraphs, get_document
+from app.services.prefetch import get_prefetcher
+from app.services.scheduler import (
+    PreemptedError,
+    Priority,
+    current_priority,
+    get_scheduler,
+    priority_class,
+)
+from app.services.token_budget import get_token_budgets
+from app.services.word_packs import lookup_explanation, normalize_word
 
 logger = structlog.get_logger()
 
 
+def _time_left(stage: str) -> float | None:
+    """Seconds until the request deadline; raises if an LLM call cannot fit."""
+    left = remaining()
+    if left is not None and left < settings.llm_min_call_seconds:
+        LLM_CALLS_CANCELLED.inc(reason="deadline", stage=stage)
+        raise DeadlineExceededError("Request deadline is too close to call the LLM")
+    return left
+
+
+class _StopBeforeDeadline(stop_base):
+    """Stop retrying when the next attempt would start too close to the deadline."""
+
+    def __init__(self) -> None:
+        self.stopped = False
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        left = remaining()
+        if left is None:
+            return False
+        self.stopped = left < retry_state.upcoming_sleep + settings.llm_min_call_seconds
+        return self.stopped
+
+
+@dataclass
+class Completion:
+    """Provider response reduced to what the service uses."""
+
+    text: str
+    stop_reason: str | None
+    input_tokens: int
+    output_tokens: int
+
+
 class LLMService:
     """Anthropic Claude API wrapper service."""
 
     def __init__(self) -> None:
         """Initialize LLM service."""
-        if not settings.has_anthropic:
+        self.cassette = get_cassette()
+        replay_only = self.cassette is not None and self.cassette.mode == "replay"
+        if not settings.has_anthropic and not replay_only:
             raise ValueError("ANTHROPIC_API_KEY is not configured")
 
-        self.client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+        self.client = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key or "replay-only",
+            base_url=settings.anthropic_base_url or None,
+        )
         self.default_model = "claude-sonnet-4-20250514"
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        Open pooled provider connections (DNS, TCP and TLS) ahead of traffic.
+
+        Args:
+            connections: Number of concurrent connections to establish
+        """
+        if self.cassette is not None and self.cassette.mode == "replay":
+            return
+
+        client = self.client.with_options(max_retries=0, timeout=10.0)
+
+        async def open_connection() -> None:
+            try:
+                await client.models.list(limit=1)
+            except anthropic.APIStatusError as e:
+                # エラー応答でも接続は確立済みなのでプールに残る
+                logger.info("provider_warm_up_status", status_code=e.status_code)
+
+        await asyncio.gather(*(open_connection() for _ in range(connections)))
+        logger.info("provider_warmed_up", connections=connections)
+
     async def generate(
         self,
         prompt: str,
@@ -38,30 +124,43 @@ class LLMService:
         """
         Generate a response from Claude.
 
+        ``max_tokens`` is replaced by the calibrated budget of the calling
+        task once it has enough samples (see ``token_budget``), and a
+        response cut off at the budget is continued from where it stopped
+        (up to ``LLM_MAX_CONTINUATIONS`` times) instead of being returned
+        truncated.
+
         Args:
             prompt: User prompt
             system: System prompt (optional)
             model: Model to use (defaults to claude-sonnet-4-20250514)
-            max_tokens: Maximum tokens in response
+            max_tokens: Maximum tokens in response (before calibration)
             temperature: Sampling temperature
 
         Returns:
             Generated text response
         """
         model = model or self.default_model
+        operation = current_operation.get()
+        budgets = get_token_budgets()
+        # 録画・再生中は max_tokens をリクエストのキーに含むので較正しない
+        if self.cassette is not None:
+            budget = max_tokens
+        else:
+            budget = budgets.max_tokens(operation, max_tokens)
 
         logger.info(
             "generating_response",
             model=model,
             prompt_length=len(prompt),
-            max_tokens=max_tokens,
+            max_tokens=budget,
         )
 
         messages: list[dict[str, Any]] = [{"role": "user", "content": prompt}]
 
         kwargs: dict[str, Any] = {
             "model": model,
-            "max_tokens": max_tokens,
+            "max_tokens": budget,
             "messages": messages,
         }
 
@@ -71,7 +170,167 @@ class LLMService:
         if temperature != 1.0:
             kwargs["temperature"] = temperature
 
-        response = self.client.messages.create(**kwargs)
+        with start_span(
+            "LLMService.generate",
+            attributes={
+                "gen_ai.system": "anthropic",
+                "gen_ai.request.model": model,
+                "gen_ai.request.max_tokens": budget,
+                "gen_ai.request.temperature": temperature,
+                "llm.operation": operation,
+            },
+        ) as span:
+            # 1文字≒0.25トークンとして入力を見積もり、出力は max_tokens を上限とみなす
+            prompt_tokens = (len(prompt) + len(system or "")) / 4
+            completion = await self._complete(kwargs, prompt_tokens + budget, span)
+            text = completion.text
+            input_tokens, output_tokens = completion.input_tokens, completion.output_tokens
+            continuations = 0
+            while (
+                completion.stop_reason == "max_tokens"
+                and continuations < settings.llm_max_continuations
+            ):
+                # 最初からやり直さず、生成済みの部分をアシスタントの発話として続きを書かせる
+                # （末尾の空白で終わるアシスタント発話はプロバイダーが受け付けない）
+                continuations += 1
+                prefix = text.rstrip()
+                kwargs["messages"] = [*messages, {"role": "assistant", "content": prefix}]
+                completion = await self._complete(
+                    kwargs, prompt_tokens + len(prefix) / 4 + budget, span
+                )
+                if completion.text[:1].isspace():
+                    text = prefix + completion.text
+                else:
+                    text += completion.text
+                input_tokens += completion.input_tokens
+                output_tokens += completion.output_tokens
+            truncated = completion.stop_reason == "max_tokens"
+            budgets.record(operation, max_tokens, output_tokens, continuations, truncated)
+
+            span.set_attributes(
+                {
+                    "gen_ai.response.finish_reasons": [completion.stop_reason or ""],
+                    "gen_ai.usage.input_tokens": input_tokens,
+                    "gen_ai.usage.output_tokens": output_tokens,
+                    "llm.continuations": continuations,
+                }
+            )
+
+        if truncated:
+            logger.warning(
+                "response_truncated",
+                operation=operation,
+                max_tokens=budget,
+                continuations=continuations,
+            )
+
+        logger.info(
+            "response_generated",
+            model=model,
+            response_length=len(text),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            continuations=continuations,
+        )
+
+        return text
+
+    async def _complete(
+        self, kwargs: dict[str, Any], estimated_tokens: float, span: Any
+    ) -> Completion:
+        """One provider call under the deadline, admission control and the scheduler."""
+        replayed = self.cassette is not None and self.cassette.mode == "replay"
+        stage = "queued"
+        # 期限に間に合わない呼び出しは始めず、期限を過ぎたら実行中でも打ち切る
+        timeout = asyncio.timeout(_time_left(stage))
+        try:
+            async with timeout:
+                if replayed:
+                    assert self.cassette is not None
+                    stage = "in_flight"
+                    entry = await self.cassette.replay(kwargs)
+                    completion = Completion(
+                        text=entry.text,
+                        stop_reason=entry.stop_reason,
+                        input_tokens=entry.input_tokens,
+                        output_tokens=entry.output_tokens,
+                    )
+                else:
+                    tenant = current_tenant.get()
+                    # INTERACTIVE は 0 なので `or` で既定値を補うと STANDARD になってしまう
+                    declared = current_priority.get()
+                    priority = Priority.STANDARD if declared is None else declared
+                    span.set_attributes({"llm.tenant": tenant, "llm.priority": priority.label})
+                    # 過負荷・プロバイダー障害時は並ばせずにすぐ断る
+                    circuit_token = admit(priority)
+                    failed: bool | None = None
+                    preemptions = 0
+                    try:
+                        while True:
+                            try:
+                                async with get_scheduler().slot(
+                                    tenant, estimated_tokens, priority
+                                ) as lease:
+                                    span.set_attribute("llm.queue_wait_ms", lease.queue_wait * 1000)
+                                    # 待っている間に期限が迫ったらスロットを返して諦める
+                                    _time_left(stage)
+                                    stage = "in_flight"
+                                    completion = await self._create_message(kwargs, span)
+                                    lease.settle(completion.input_tokens + completion.output_tokens)
+                                break
+                            except PreemptedError:
+                                # インタラクティブ優先で中断されたので並び直す
+                                preemptions += 1
+                                span.set_attribute("llm.preemptions", preemptions)
+                                stage = "queued"
+                        failed = False
+                    except DeadlineExceededError:
+                        raise
+                    except Exception as e:
+                        # 400 系などプロバイダーに届いた失敗は障害として数えない
+                        failed = is_provider_failure(e)
+                        raise
+                    finally:
+                        get_circuit_breaker().after_call(circuit_token, failed)
+        except TimeoutError as e:
+            if not timeout.expired():
+                raise
+            LLM_CALLS_CANCELLED.inc(reason="deadline", stage=stage)
+            span.set_attribute("llm.cancelled", "deadline")
+            raise DeadlineExceededError("Request deadline exceeded") from e
+        except asyncio.CancelledError:
+            # クライアント切断などで呼び出し元ごとキャンセルされた
+            LLM_CALLS_CANCELLED.inc(reason="cancelled", stage=stage)
+            span.set_attribute("llm.cancelled", "cancelled")
+            raise
+        span.set_attribute("llm.cassette.replayed", replayed)
+        return completion
+
+    async def _create_message(self, kwargs: dict[str, Any], span: Any) -> Completion:
+        """Call the provider with retries (and record the result in record mode)."""
+        started = time.perf_counter()
+        before_deadline = _StopBeforeDeadline()
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(3) | before_deadline,
+                wait=wait_exponential(multiplier=1, min=1, max=10),
+            ):
+                with attempt:
+                    attempt_number = attempt.retry_state.attempt_number
+                    span.set_attribute("llm.retry.attempts", attempt_number)
+                    # リトライ毎にプロバイダー呼び出しのスパンを分ける
+                    with start_span(
+                        "anthropic.messages.create",
+                        attributes={"llm.retry.attempt": attempt_number},
+                    ):
+                        response = await self.client.messages.create(**kwargs)
+        except RetryError as e:
+            if not before_deadline.stopped:
+                raise
+            LLM_CALLS_CANCELLED.inc(reason="deadline", stage="retry")
+            raise DeadlineExceededError(
+                "Request deadline exceeded before the LLM call could be retried"
+            ) from e.last_attempt.exception()
 
         # Extract text from response
         text_content = ""
@@ -79,16 +338,79 @@ class LLMService:
             if block.type == "text":
                 text_content += block.text
 
-        logger.info(
-            "response_generated",
-            model=model,
-            response_length=len(text_content),
+        completion = Completion(
+            text=text_content,
+            stop_reason=response.stop_reason,
             input_tokens=response.usage.input_tokens,
             output_tokens=response.usage.output_tokens,
         )
 
-        return text_content
+        if self.cassette is not None and self.cassette.mode == "record":
+            self.cassette.record(
+                kwargs,
+                text=completion.text,
+                stop_reason=completion.stop_reason,
+                input_tokens=completion.input_tokens,
+                output_tokens=completion.output_tokens,
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+
+        return completion
 
+    async def generate_json(
+        self,
+        prompt: str,
+        *,
+        system: str | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.5,
+    ) -> dict[str, Any]:
+        """
+        Generate a response and parse it as a JSON object.
+
+        Args:
+            prompt: User prompt
+            system: System prompt (optional)
+            model: Model to use (defaults to claude-sonnet-4-20250514)
+            max_tokens: Maximum tokens in response
+            temperature: Sampling temperature
+
+        Returns:
+            Parsed JSON object
+
+        Raises:
+            ValueError: If the response does not contain a JSON object
+        """
+        response = await self.generate(
+            prompt=prompt,
+            system=system,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+
+        import json
+
+        json_start = response.find("{")
+        json_end = response.rfind("}") + 1
+        if json_start != -1 and json_end > json_start:
+            try:
+                return json.loads(response[json_start:json_end])
+            except json.JSONDecodeError:
+                logger.warning("failed_to_parse_json", response=response[:200])
+
+        raise ValueError("LLM response did not contain a valid JSON object")
+
+    @cached(
+        schema=ExplainWordResponse,
+        precomputed=lookup_explanation,
+        degraded=degraded.word_core,
+        # 記事中の "Inflation" のタップも先読みした "inflation" と同じエントリを使う
+        normalize={"word": normalize_word},
+    )
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def explain_word(
         self,
         word: str,
@@ -100,6 +422,12 @@ class LLMService:
         """
         Generate a detailed word explanation.
 
+        The context-free explanation (pronunciation, etymology, synonyms...)
+        is cached per word, level and native language (or served from a word
+        pack); with a context sentence only the sense in that sentence is
+        generated and laid over it, and the combined explanation is cached
+        per sentence.
+
         Args:
             word: Word to explain
             language: Language of the word
@@ -110,6 +438,47 @@ class LLMService:
         Returns:
             Structured word explanation
         """
+        if context:
+            # 文脈に依存しない部分（キャッシュ済みのことが多い）と文脈での意味を並行して取得する。
+            # 文脈ごとの結果はこのメソッドのキャッシュに入るので、意味だけを別にキャッシュしない
+            sensing = asyncio.ensure_future(
+                self.explain_word_in_context(word, language, user_level, context, native_language)
+            )
+            try:
+                core = await self.explain_word(word, language, user_level, None, native_language)
+            except BaseException:
+                sensing.cancel()
+                raise
+            sense = await sensing
+            return {**core, **{key: value for key, value in sense.items() if value}}
+
+        prefetching = get_prefetcher().in_flight(word, language, user_level, native_language)
+        if prefetching is not None and prefetching is not asyncio.current_task():
+            # 記事を開いた時の先読みが生成中なら、同じ説明をもう一度生成せずに待つ。
+            # 先読みはバックグラウンドなので、待つ間は待っている側の優先度に引き上げる
+            declared = current_priority.get()
+            get_scheduler().promote(
+                prefetching, Priority.STANDARD if declared is None else declared
+            )
+            timeout = asyncio.timeout(remaining())
+            try:
+                async with timeout:
+                    prefetched = await asyncio.shield(prefetching)
+            except TimeoutError as e:
+                if not timeout.expired():
+                    prefetched = None  # 先読みが失敗したので自分で生成する
+                else:
+                    # 先読みの期限ではなく待っている側の期限で打ち切る
+                    raise DeadlineExceededError("Request deadline exceeded") from e
+            except asyncio.CancelledError:
+                if not prefetching.cancelled():
+                    raise  # 待っている側が取り消された
+                prefetched = None
+            except Exception:
+                prefetched = None  # 先読みが失敗したので自分で生成する
+            if isinstance(prefetched, dict) and not prefetched.get("degraded"):
+                return dict(prefetched)
+
         system_prompt = f"""You are an expert language teacher helping a {user_level} level learner.
 Provide explanations in {native_language}.
 Format your response as JSON with the following structure:
@@ -126,18 +495,12 @@ Format your response as JSON with the following structure:
   "usage_notes": "common mistakes or usage patterns"
 }}"""
 
-        context_text = f"\nContext: {context}" if context else ""
-        prompt = f"Explain the {language} word: {word}{context_text}"
-
         response = await self.generate(
-            prompt=prompt,
+            prompt=f"Explain the {language} word: {word}",
             system=system_prompt,
             temperature=0.5,
         )
 
-        # Parse JSON response
-        import json
-
         try:
             # Try to extract JSON from response
             json_start = response.find("{")
@@ -161,6 +524,52 @@ Format your response as JSON with the following structure:
             "usage_notes": None,
         }
 
+    @traced
+    @priority_class(Priority.INTERACTIVE)
+    async def explain_word_in_context(
+        self,
+        word: str,
+        language: str,
+        user_level: str,
+        context: str,
+        native_language: str = "japanese",
+    ) -> dict[str, Any]:
+        """
+        Explain only the sense of a word in a sentence.
+
+        Returns:
+            part_of_speech, definition and usage_notes as used in ``context``
+        """
+        system_prompt = f"""You are an expert language teacher helping a {user_level} level learner.
+The learner already has a general explanation of the word. Explain only how it is
+used in the given sentence, in {native_language}.
+Format your response as JSON with the following structure:
+{{
+  "part_of_speech": "part of speech in this sentence",
+  "definition": "meaning in this sentence for {user_level} level",
+  "usage_notes": "how the word is used in this sentence"
+}}"""
+
+        response = await self.generate(
+            prompt=f"Explain the {language} word: {word}\nContext: {context}",
+            system=system_prompt,
+            max_tokens=400,
+            temperature=0.3,
+        )
+
+        try:
+            json_start = response.find("{")
+            json_end = response.rfind("}") + 1
+            if json_start != -1 and json_end > json_start:
+                return json.loads(response[json_start:json_end])
+        except json.JSONDecodeError:
+            logger.warning("failed_to_parse_json", response=response[:200])
+
+        return {"part_of_speech": "", "definition": response, "usage_notes": None}
+
+    @cached(schema=list[dict[str, Any]])
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def generate_examples(
         self,
         word: str,
@@ -211,6 +620,13 @@ Format as JSON array:
 
         return []
 
+    @cached(
+        schema=AnalyzeDifficultyResponse,
+        document="content",
+        degraded=degraded.difficulty,
+    )
+    @traced
+    @priority_class(Priority.STANDARD)
     async def analyze_article_difficulty(
         self,
         content: str,
@@ -224,8 +640,10 @@ Format as JSON array:
             language: Article language
 
         Returns:
-            Difficulty analysis with CEFR level
+            Difficulty analysis with CEFR level (sentence length and reading
+            time are measured locally)
         """
+        document = get_document(content)
         system_prompt = """Analyze the difficulty of this article for language learners.
 Provide your analysis as JSON:
 {
@@ -238,19 +656,29 @@ Provide your analysis as JSON:
   "reading_time_minutes": number
 }"""
 
+        statistics = document.statistics()
         response = await self.generate(
-            prompt=f"Analyze this {language} article:\n\n{content[:3000]}",
+            prompt=(
+                f"Analyze this {language} article.\n"
+                f"Measured statistics: {json.dumps(statistics)}\n\n{document.excerpt(3000)}"
+            ),
             system=system_prompt,
             temperature=0.3,
         )
 
-        import json
-
+        # 文長と読了時間は推測させずに本文全体から測った値を使う
+        measured = {
+            "average_sentence_length": document.average_sentence_length,
+            "reading_time_minutes": document.reading_time_minutes,
+        }
         try:
             json_start = response.find("{")
             json_end = response.rfind("}") + 1
             if json_start != -1 and json_end > json_start:
-                return json.loads(response[json_start:json_end])
+                analysis = json.loads(response[json_start:json_end])
+                if isinstance(analysis, dict):
+                    return {**analysis, **measured}
+                return analysis
         except json.JSONDecodeError:
             logger.warning("failed_to_parse_analysis", response=response[:200])
 
@@ -259,11 +687,17 @@ Provide your analysis as JSON:
             "difficulty_score": 0.5,
             "vocabulary_level": "intermediate",
             "grammar_complexity": "moderate",
-            "average_sentence_length": 15,
             "difficult_words": [],
-            "reading_time_minutes": 5,
+            **measured,
         }
 
+    @cached(
+        schema=SummarizeArticleResponse,
+        document="content",
+        degraded=degraded.lead_summary,
+    )
+    @traced
+    @priority_class(Priority.STANDARD)
     async def summarize_article(
         self,
         content: str,
@@ -310,7 +744,7 @@ Respond ONLY with valid JSON in this exact format:
 }}"""
 
         response = await self.generate(
-            prompt=f"Summarize this {language} article for a {user_level} learner:\n\n{content[:4000]}",
+            prompt=f"Summarize this {language} article for a {user_level} learner:\n\n{get_document(content).excerpt(4000)}",
             system=system_prompt,
             temperature=0.4,
         )
@@ -332,6 +766,120 @@ Respond ONLY with valid JSON in this exact format:
             "vocabulary_to_learn": [],
         }
 
+    @cached(
+        schema=SummaryUpdateResponse,
+        document=("previous_content", "content"),
+        degraded=degraded.summary_update,
+    )
+    @traced
+    @priority_class(Priority.STANDARD)
+    async def update_summary(
+        self,
+        previous_content: str,
+        previous_summary: dict[str, Any],
+        content: str,
+        language: str = "english",
+        user_level: str = "B1",
+        target_language: str = "japanese",
+    ) -> dict[str, Any]:
+        """
+        Update the summary of an article for a new revision of it.
+
+        Only the paragraphs the revision added, rewrote or removed are sent
+        to the LLM along with the previous summary; an unchanged article
+        returns the previous summary as-is, and a revision that changed more
+        than ``summary_update_max_changed_ratio`` of the text is summarized
+        from scratch.
+
+        Args:
+            previous_content: Article content the previous summary was made from
+            previous_summary: ``summarize_article`` result for ``previous_content``
+            content: Updated article content
+            language: Article language
+            user_level: User's CEFR level
+            target_language: Language for summary output
+
+        Returns:
+            Updated summary with ``update_mode`` and ``changed_paragraphs``
+        """
+        diff = diff_paragraphs(previous_content, content)
+        if diff.unchanged:
+            return {**previous_summary, "update_mode": "unchanged", "changed_paragraphs": 0}
+        if (
+            diff.changed_ratio > settings.summary_update_max_changed_ratio
+            or not previous_summary.get("summary")
+        ):
+            summary = await self.summarize_article(content, language, user_level, target_language)
+            return {**summary, "update_mode": "full", "changed_paragraphs": diff.changes}
+
+        system_prompt = f"""You are a language learning assistant helping a {user_level} level learner.
+A news article you already summarized in {target_language} has been updated.
+Revise the summary and key points so they reflect the updated article: keep what
+still holds, correct what the update changed, drop what it removed and add what is new.
+Pick out key vocabulary only from the new paragraphs.
+
+Respond ONLY with valid JSON in this exact format:
+{{
+  "summary": "Updated article summary in {target_language}",
+  "key_points": ["Key point 1", "Key point 2", "Key point 3"],
+  "main_topic": "Brief topic description",
+  "vocabulary_to_learn": [
+    {{"word": "English word", "definition": "Definition in {target_language}"}}
+  ]
+}}"""
+
+        previous = {
+            key: previous_summary.get(key) for key in ("summary", "key_points", "main_topic")
+        }
+        removed = "\n\n".join(diff.removed) or "(none)"
+        added = Document("\n\n".join(diff.added)).excerpt(4000) or "(none)"
+        response = await self.generate(
+            prompt=(
+                f"Previous summary:\n{json.dumps(previous, ensure_ascii=False)}\n\n"
+                f"Removed or rewritten paragraphs of the {language} article:\n{removed}\n\n"
+                f"New or rewritten paragraphs:\n{added}"
+            ),
+            system=system_prompt,
+            temperature=0.4,
+            max_tokens=1024,
+        )
+
+        updated: Any = None
+        try:
+            json_start = response.find("{")
+            json_end = response.rfind("}") + 1
+            if json_start != -1 and json_end > json_start:
+                updated = json.loads(response[json_start:json_end])
+        except json.JSONDecodeError:
+            updated = None
+        if not isinstance(updated, dict) or not updated.get("summary"):
+            logger.warning("failed_to_parse_summary_update", response=response[:200])
+            summary = await self.summarize_article(content, language, user_level, target_language)
+            return {**summary, "update_mode": "full", "changed_paragraphs": diff.changes}
+
+        # 語彙は新しい段落の分だけ返ってくるので以前の語彙に足す
+        vocabulary = list(previous_summary.get("vocabulary_to_learn") or [])
+        known = {entry.get("word") for entry in vocabulary if isinstance(entry, dict)}
+        for entry in updated.get("vocabulary_to_learn") or []:
+            if isinstance(entry, dict) and entry.get("word") not in known:
+                vocabulary.append(entry)
+                known.add(entry.get("word"))
+        return {
+            "summary": updated["summary"],
+            "key_points": updated.get("key_points") or previous["key_points"] or [],
+            "main_topic": updated.get("main_topic") or previous["main_topic"] or "",
+            "vocabulary_to_learn": vocabulary,
+            "update_mode": "incremental",
+            "changed_paragraphs": diff.changes,
+        }
+
+    @cached(
+        schema=ExtractVocabularyResponse,
+        document="content",
+        degraded=degraded.vocabulary,
+    )
+    @traced
+    @priority_class(Priority.STANDARD)
     async def extract_vocabulary(
         self,
         content: str,
@@ -385,7 +933,7 @@ Respond ONLY with valid JSON in this exact format:
 }}"""
 
         response = await self.generate(
-            prompt=f"Extract {max_words} useful vocabulary words from this {language} article for a {user_level} learner:\n\n{content[:4000]}",
+            prompt=f"Extract {max_words} useful vocabulary words from this {language} article for a {user_level} learner:\n\n{get_document(content).excerpt(4000)}",
             system=system_prompt,
             temperature=0.3,
         )
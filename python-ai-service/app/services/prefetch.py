@@ -0,0 +1,297 @@
+"""Predictive Prefetch - Warm word explanations when a reader opens an article.
+
+``WordPrefetcher.schedule`` picks the words a reader at a given level is
+likely to tap (the article's ``extract_vocabulary`` words for that level,
+then the ``difficult_words`` of its difficulty analysis) and generates the
+context-free ``explain_word`` of the top ``PREFETCH_MAX_WORDS`` in the
+background. Taps, including taps with a context sentence, then find the
+explanation in the response cache and only the sense in context is left to
+generate.
+
+Prefetch jobs run at background priority (they yield to interactive calls
+and are the first to be shed under load), are deduplicated per article,
+level and native language, and never hold up the request that scheduled
+them. A tap on a word whose explanation is still being prefetched waits for
+that call (``in_flight``) instead of starting a second one, and raises it to
+the tap's priority class while it waits. Words are matched and cached in
+their ``normalize_word`` form, so taps on capitalized words in the article
+text find them too. Every prefetched
+word is remembered, from the moment it is scheduled, for
+``PREFETCH_TRACKING_SECONDS`` per reader, and ``record_tap`` counts whether the words readers actually tap
+were prefetched and at which rank, which is what ``PREFETCH_MAX_WORDS`` is
+tuned from (``GET /api/metrics/prefetch``).
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any
+
+import structlog
+
+from app.core.config import settings
+from app.core.deadline import current_deadline, deadline_scope
+from app.core.metrics import registry
+from app.core.tenancy import current_tenant
+from app.services.admission import CapacityError
+from app.services.document import get_document
+from app.services.scheduler import Priority, priority_class
+from app.services.word_packs import normalize_word
+
+logger = structlog.get_logger()
+
+PREFETCH_JOBS = registry.counter("prefetch_jobs_total", "Article prefetch jobs by outcome")
+PREFETCH_WORDS = registry.counter("prefetch_words_total", "Prefetched word explanations")
+PREFETCH_TAPS = registry.counter(
+    "prefetch_taps_total", "Word lookups of readers with a prefetched article open"
+)
+
+# (tenant, word, language, level, native_language)
+TapKey = tuple[str, str, str, str, str]
+# explain_word の引数 (word, language, user_level, native_language)
+ExplainKey = tuple[str, str, str, str]
+
+
+class WordPrefetcher:
+    """Schedules background explanations of likely-tapped words and tracks their use."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[tuple[str, str, str, str], asyncio.Task[None]] = {}
+        # 実行中の先読みを待っている読者（同じ記事を開いた読者は 1 つの先読みを共有する）
+        self._job_readers: dict[tuple[str, str, str, str], set[str]] = {}
+        # 実行中の先読みが選んだ単語（後から同じ記事を開いた読者の分も記録する）
+        self._job_words: dict[tuple[str, str, str, str], list[str]] = {}
+        # 生成中の単語説明。同じ単語のタップは 2 回目の呼び出しをせずにこれを待つ
+        self._in_flight: dict[ExplainKey, asyncio.Task[Any]] = {}
+        # 先読みした単語 -> (順位, 先読みした時刻)
+        self._prefetched: OrderedDict[TapKey, tuple[int, float]] = OrderedDict()
+        # 先読み中の記事を開いている読者 -> 最後に記事を開いた時刻
+        self._readers: OrderedDict[str, float] = OrderedDict()
+        self._counts = {"prefetched": 0, "used": 0, "expired": 0, "taps": 0}
+        self._used_by_rank = [0] * max(settings.prefetch_max_words, 1)
+
+    def schedule(
+        self,
+        content: str,
+        language: str = "english",
+        user_level: str = "B1",
+        native_language: str = "japanese",
+    ) -> bool:
+        """
+        Start prefetching for an opened article (returns at once).
+
+        Returns:
+            Whether a job is running for the article (False when prefetching is
+            disabled or too many jobs are running)
+        """
+        if not settings.prefetch_enabled or settings.prefetch_max_words <= 0:
+            return False
+        tenant = current_tenant.get()
+        self._touch_reader(tenant)
+
+        key = (get_document(content).content_hash, language, user_level.upper(), native_language)
+        if key in self._jobs:
+            self._job_readers[key].add(tenant)
+            self._remember_words(key, tenant, language, user_level, native_language)
+            return True
+        if len(self._jobs) >= settings.prefetch_max_jobs:
+            PREFETCH_JOBS.inc(outcome="dropped")
+            return False
+
+        self._job_readers[key] = {tenant}
+        task = asyncio.ensure_future(
+            self._prefetch(key, content, language, user_level, native_language)
+        )
+        self._jobs[key] = task
+        task.add_done_callback(lambda _: self._finish(key))
+        return True
+
+    def _finish(self, key: tuple[str, str, str, str]) -> None:
+        self._jobs.pop(key, None)
+        self._job_readers.pop(key, None)
+        self._job_words.pop(key, None)
+
+    def in_flight(
+        self, word: str, language: str, user_level: str, native_language: str
+    ) -> asyncio.Task[Any] | None:
+        """The running prefetch of a context-free ``explain_word`` call, if any."""
+        return self._in_flight.get((normalize_word(word), language, user_level, native_language))
+
+    def _explain(
+        self, word: str, language: str, user_level: str, native_language: str
+    ) -> asyncio.Task[Any]:
+        from app.services.llm import get_llm_service
+
+        key = (word, language, user_level, native_language)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                get_llm_service().explain_word(word, language, user_level, None, native_language)
+            )
+            self._in_flight[key] = task
+
+            def forget(done: asyncio.Task[Any]) -> None:
+                if self._in_flight.get(key) is done:
+                    del self._in_flight[key]
+
+            task.add_done_callback(forget)
+        return task
+
+    def _remember_words(
+        self,
+        key: tuple[str, str, str, str],
+        tenant: str,
+        language: str,
+        user_level: str,
+        native_language: str,
+    ) -> None:
+        now = time.monotonic()
+        level = user_level.upper()
+        for rank, word in enumerate(self._job_words.get(key, ())):
+            self._remember((tenant, word, language, level, native_language), rank, now)
+
+    @priority_class(Priority.BACKGROUND)
+    async def _prefetch(
+        self,
+        key: tuple[str, str, str, str],
+        content: str,
+        language: str,
+        user_level: str,
+        native_language: str,
+    ) -> None:
+        # 開いたリクエストの期限ではなく先読み自体の期限で動かす
+        current_deadline.set(None)
+        try:
+            with deadline_scope(settings.prefetch_timeout_seconds):
+                words = await self._candidates(content, language, user_level)
+                # 生成を始めた時点で記録する（生成中にタップされても先読み済みとして数える）
+                self._job_words[key] = words
+                for tenant in self._job_readers.get(key, ()):
+                    self._remember_words(key, tenant, language, user_level, native_language)
+                results = await asyncio.gather(
+                    *(self._explain(word, language, user_level, native_language) for word in words),
+                    return_exceptions=True,
+                )
+        except CapacityError:
+            PREFETCH_JOBS.inc(outcome="shed")
+            return
+        except Exception as e:
+            PREFETCH_JOBS.inc(outcome="failed")
+            logger.warning("prefetch_failed", error=str(e))
+            return
+
+        for result in results:
+            if isinstance(result, BaseException):
+                shed = isinstance(result, CapacityError)
+                PREFETCH_WORDS.inc(outcome="shed" if shed else "failed")
+            else:
+                PREFETCH_WORDS.inc(outcome="ok")
+        PREFETCH_JOBS.inc(outcome="ok")
+
+    async def _candidates(self, content: str, language: str, user_level: str) -> list[str]:
+        """The words of an article a reader at ``user_level`` is most likely to tap, best first."""
+        from app.services.llm import get_llm_service
+
+        llm = get_llm_service()
+        vocabulary: dict[str, Any] | BaseException
+        difficulty: dict[str, Any] | BaseException
+        vocabulary, difficulty = await asyncio.gather(
+            # max_words は /api/articles/extract-vocabulary の既定値のまま呼び、
+            # 読者の画面が同じ記事の単語リストを取りに来たときにキャッシュに当たるようにする
+            # （PREFETCH_MAX_WORDS への切り詰めは下で行う）
+            llm.extract_vocabulary(content, language, user_level),
+            llm.analyze_article_difficulty(content, language),
+            return_exceptions=True,
+        )
+        entries: list[Any] = []
+        if isinstance(vocabulary, dict):
+            entries += vocabulary.get("words") or []
+        if isinstance(difficulty, dict):
+            entries += difficulty.get("difficult_words") or []
+        if not entries:
+            # 両方とも失敗したら（過負荷など）その理由を呼び出し元に伝える
+            for error in (vocabulary, difficulty):
+                if isinstance(error, BaseException):
+                    raise error
+
+        words: list[str] = []
+        for entry in entries:
+            word = normalize_word(entry.get("word", "")) if isinstance(entry, dict) else ""
+            if word and word not in words:
+                words.append(word)
+        return words[: settings.prefetch_max_words]
+
+    def _touch_reader(self, tenant: str) -> None:
+        self._readers[tenant] = time.monotonic()
+        self._readers.move_to_end(tenant)
+        while len(self._readers) > settings.prefetch_tracking_max_entries:
+            self._readers.popitem(last=False)
+
+    def _remember(self, key: TapKey, rank: int, now: float) -> None:
+        if key in self._prefetched:
+            return
+        self._prefetched[key] = (rank, now)
+        self._counts["prefetched"] += 1
+        self._expire(now)
+        while len(self._prefetched) > settings.prefetch_tracking_max_entries:
+            self._prefetched.popitem(last=False)
+            self._counts["expired"] += 1
+
+    def _expire(self, now: float) -> None:
+        horizon = now - settings.prefetch_tracking_seconds
+        while self._prefetched:
+            _, (_, prefetched_at) = next(iter(self._prefetched.items()))
+            if prefetched_at >= horizon:
+                break
+            self._prefetched.popitem(last=False)
+            self._counts["expired"] += 1
+
+    def record_tap(
+        self, word: str, language: str, user_level: str, native_language: str = "japanese"
+    ) -> None:
+        """Count a word lookup against the reader's prefetched words."""
+        tenant = current_tenant.get()
+        opened_at = self._readers.get(tenant)
+        now = time.monotonic()
+        if opened_at is None or now - opened_at > settings.prefetch_tracking_seconds:
+            return
+        self._expire(now)
+        key = (tenant, normalize_word(word), language, user_level.upper(), native_language)
+        entry = self._prefetched.pop(key, None)
+        self._counts["taps"] += 1
+        if entry is None:
+            PREFETCH_TAPS.inc(result="not_prefetched")
+            return
+        rank = entry[0]
+        PREFETCH_TAPS.inc(result="prefetched")
+        self._counts["used"] += 1
+        if rank < len(self._used_by_rank):
+            self._used_by_rank[rank] += 1
+
+    def stats(self) -> dict[str, Any]:
+        prefetched, used, taps = (self._counts[k] for k in ("prefetched", "used", "taps"))
+        return {
+            "jobs_running": len(self._jobs),
+            "max_words": settings.prefetch_max_words,
+            "words_prefetched": prefetched,
+            "words_tracked": len(self._prefetched),
+            "words_expired_unused": self._counts["expired"],
+            "taps": taps,
+            "taps_prefetched": used,
+            # 先読みした単語のうちタップされた割合 / タップのうち先読み済みだった割合
+            "precision": round(used / prefetched, 3) if prefetched else None,
+            "hit_rate": round(used / taps, 3) if taps else None,
+            "used_by_rank": self._used_by_rank,
+        }
+
+
+# Singleton instance
+_prefetcher: WordPrefetcher | None = None
+
+
+def get_prefetcher() -> WordPrefetcher:
+    """Get or create the WordPrefetcher singleton."""
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = WordPrefetcher()
+    return _prefetcher
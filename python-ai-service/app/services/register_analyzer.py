@@ -2,7 +2,10 @@
 
 from typing import Any
 
+from app.core.tracing import traced
+from app.services.cache import cached
 from app.services.llm import get_llm_service
+from app.services.scheduler import Priority, priority_class
 
 
 class RegisterAnalyzer:
@@ -11,6 +14,9 @@ class RegisterAnalyzer:
     def __init__(self):
         self.llm = get_llm_service()
 
+    @cached
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def analyze_register(
         self,
         expression: str,
@@ -66,6 +72,9 @@ Respond in this exact JSON format:
                 "register": "UNKNOWN",
             }
 
+    @cached
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def generate_situational_examples(
         self,
         word: str,
@@ -0,0 +1,617 @@
+"""LLM Scheduler - Per-tenant weighted fair sharing of provider capacity.
+
+Every provider call acquires a slot from the scheduler. Slots are limited
+globally (``llm_max_concurrency``) and per tenant (``tenant_max_concurrency``),
+and waiting requests are granted in start-time fair queuing order: each
+request's start tag advances its tenant's virtual clock by
+``estimated_tokens / weight``, so a tenant issuing many large requests is
+served in proportion to its weight instead of starving everyone else.
+An optional token bucket caps each tenant's token throughput per minute.
+
+Each request also carries a priority class. Waiters are granted strictly by
+class first (interactive, then standard, then background) and by start tag
+within a class; ``llm_interactive_reserved_slots`` slots are kept free for
+interactive calls only. When the oldest interactive waiter has queued longer
+than ``llm_interactive_wait_target_ms``, the most recently started background
+call is cancelled and transparently re-queued (see ``PreemptedError``).
+
+Only active tenants (with waiting or running calls) are tracked: a tenant is
+forgotten, together with its virtual-time tag, as soon as it is idle and its
+token bucket is full again, and dispatch only looks at tenants that have
+waiters. Metrics are labelled with the tenant only for tenants listed in
+``tenant_weights`` (all others share the ``default`` label), so neither the
+per-call cost nor the metric cardinality grows with the number of users.
+"""
+
+import asyncio
+import functools
+import heapq
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, ParamSpec, TypeVar
+
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = structlog.get_logger()
+
+QUEUE_DEPTH = registry.gauge("llm_scheduler_queue_depth", "LLM requests waiting for a slot")
+IN_FLIGHT = registry.gauge("llm_scheduler_in_flight", "LLM requests holding a slot")
+ADMITTED = registry.counter("llm_scheduler_admitted_total", "LLM requests granted a slot")
+QUEUE_WAIT = registry.counter(
+    "llm_scheduler_queue_wait_seconds_total", "Total time LLM requests spent queued"
+)
+TOKENS = registry.counter("llm_scheduler_tokens_total", "Tokens consumed (input + output)")
+THROTTLED = registry.counter(
+    "llm_scheduler_quota_throttled_total", "Times a tenant was held back by its token quota"
+)
+PRIORITY_QUEUE_DEPTH = registry.gauge(
+    "llm_scheduler_priority_queue_depth", "LLM requests waiting for a slot per priority class"
+)
+PRIORITY_ADMITTED = registry.counter(
+    "llm_scheduler_priority_admitted_total", "LLM requests granted a slot per priority class"
+)
+PRIORITY_QUEUE_WAIT = registry.counter(
+    "llm_scheduler_priority_queue_wait_seconds_total",
+    "Total time LLM requests spent queued per priority class",
+)
+PREEMPTED = registry.counter(
+    "llm_scheduler_preempted_total", "Background LLM calls cancelled for interactive traffic"
+)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class Priority(IntEnum):
+    """Priority class of an LLM call (lower value is served first)."""
+
+    INTERACTIVE = 0
+    STANDARD = 1
+    BACKGROUND = 2
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+# 現在の処理の優先度クラス（None は未指定 = STANDARD 扱い）
+current_priority: ContextVar[Priority | None] = ContextVar("current_priority", default=None)
+
+
+def requested_priority(value: str | None) -> Priority | None:
+    """
+    Priority class a client asked for (``X-Request-Priority``), if it lowers one.
+
+    Clients may only lower priority: ``interactive`` is ignored, since code
+    that declares no class runs as standard and would otherwise be raised.
+    """
+    level = Priority.__members__.get((value or "").strip().upper())
+    return None if level is None or level is Priority.INTERACTIVE else level
+
+
+def priority_class(
+    level: Priority,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """
+    Run an async function (service method or endpoint) at ``level``.
+
+    Nested declarations never raise the priority: background work that
+    calls an interactive method stays background.
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            outer = current_priority.get()
+            token = current_priority.set(level if outer is None else max(outer, level))
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current_priority.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+class PreemptedError(Exception):
+    """Raised from ``FairScheduler.slot`` when a background call was preempted.
+
+    The provider call has been cancelled and the slot released; the caller
+    should simply request a new slot.
+    """
+
+
+class TokenBucket:
+    """Token-rate quota (tokens per minute); may go negative after settlement."""
+
+    def __init__(self, tokens_per_minute: float) -> None:
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60
+        self.tokens = tokens_per_minute
+        self.updated_at = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if available now)."""
+        self.refill()
+        needed = min(amount, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate) if self.rate > 0 else float("inf")
+
+
+@dataclass
+class _Waiter:
+    tenant: str
+    priority: Priority
+    cost: float
+    start_tag: float
+    enqueued_at: float
+    future: asyncio.Future[None]
+    task: asyncio.Task[Any] | None = None
+
+
+@dataclass
+class _Tenant:
+    weight: float
+    bucket: TokenBucket | None
+    queues: dict[Priority, deque[_Waiter]] = field(
+        default_factory=lambda: {level: deque() for level in Priority}
+    )
+    in_flight: int = 0
+    last_finish_tag: float = 0.0
+    # /api/metrics/tenants 用（テナントが忘れられると一緒に消える）
+    admitted: int = 0
+    queue_wait: float = 0.0
+    tokens: float = 0.0
+    preempted: int = 0
+
+    @property
+    def idle(self) -> bool:
+        return self.in_flight == 0 and not any(self.queues.values())
+
+
+@dataclass(eq=False)
+class Lease:
+    """A granted slot; call ``settle`` with the real token usage."""
+
+    tenant: str
+    priority: Priority
+    estimated_tokens: float
+    queue_wait: float
+    actual_tokens: float | None = None
+    granted_at: float = field(default_factory=time.monotonic)
+    preempted: bool = False
+    task: asyncio.Task[Any] | None = field(default=None, repr=False)
+
+    def settle(self, tokens: float) -> None:
+        self.actual_tokens = tokens
+
+
+class FairScheduler:
+    """Weighted fair queue in front of the LLM provider."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        tenant_max_concurrency: int,
+        tenant_tokens_per_minute: float = 0,
+        default_weight: float = 1.0,
+        weights: dict[str, float] | None = None,
+        interactive_reserved_slots: int = 0,
+        interactive_wait_target: float = 0.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.tenant_max_concurrency = tenant_max_concurrency
+        self.tenant_tokens_per_minute = tenant_tokens_per_minute
+        self.default_weight = default_weight
+        self.weights = weights or {}
+        self.interactive_reserved_slots = min(interactive_reserved_slots, max_concurrency - 1)
+        self.interactive_wait_target = interactive_wait_target
+
+        # 待機中・実行中の呼び出しがあるテナント（とトークン枠の回復待ちのテナント）
+        self._tenants: dict[str, _Tenant] = {}
+        # 優先度クラス毎の、待機中の呼び出しがあるテナント
+        self._waiting: dict[Priority, dict[str, _Tenant]] = {level: {} for level in Priority}
+        # (トークン枠が満タンに戻る時刻, テナント) - 枠を使い込んだまま休止したテナント
+        self._refilling: list[tuple[float, str]] = []
+        self._in_flight = 0
+        self._virtual_time = 0.0
+        self._wakeup: asyncio.TimerHandle | None = None
+        self._leases: set[Lease] = set()
+        # 優先度を引き上げたタスク（完了すると消える）
+        self._promoted: dict[asyncio.Task[Any], Priority] = {}
+
+    def _label(self, tenant: str) -> str:
+        """Metric label of a tenant (only configured tenants get their own)."""
+        return tenant if tenant in self.weights else "default"
+
+    def _tenant(self, tenant: str) -> _Tenant:
+        self._forget_refilled()
+        state = self._tenants.get(tenant)
+        if state is None:
+            bucket = (
+                TokenBucket(self.tenant_tokens_per_minute)
+                if self.tenant_tokens_per_minute > 0
+                else None
+            )
+            state = _Tenant(weight=self.weights.get(tenant, self.default_weight), bucket=bucket)
+            self._tenants[tenant] = state
+        return state
+
+    def _retire(self, tenant: str, state: _Tenant) -> None:
+        """Forget a tenant that has become idle (once its token bucket is full)."""
+        if not state.idle or self._tenants.get(tenant) is not state:
+            return
+        bucket = state.bucket
+        if bucket is not None:
+            bucket.refill()
+            if bucket.tokens < bucket.capacity:
+                # 休止して枠をリセットできないよう、回復するまでは覚えておく
+                full_at = bucket.updated_at + (bucket.capacity - bucket.tokens) / bucket.rate
+                heapq.heappush(self._refilling, (full_at, tenant))
+                return
+        del self._tenants[tenant]
+
+    def _forget_refilled(self) -> None:
+        now = time.monotonic()
+        while self._refilling and self._refilling[0][0] <= now:
+            _, tenant = heapq.heappop(self._refilling)
+            state = self._tenants.get(tenant)
+            if state is not None:
+                self._retire(tenant, state)
+
+    def _enqueue(self, state: _Tenant, waiter: _Waiter) -> None:
+        state.queues[waiter.priority].append(waiter)
+        self._waiting[waiter.priority][waiter.tenant] = state
+        QUEUE_DEPTH.inc(tenant=self._label(waiter.tenant))
+        PRIORITY_QUEUE_DEPTH.inc(priority=waiter.priority.label)
+
+    def _dequeue(self, state: _Tenant, waiter: _Waiter) -> None:
+        queue = state.queues[waiter.priority]
+        if queue[0] is waiter:
+            queue.popleft()
+        else:
+            queue.remove(waiter)
+        if not queue:
+            del self._waiting[waiter.priority][waiter.tenant]
+        QUEUE_DEPTH.dec(tenant=self._label(waiter.tenant))
+        PRIORITY_QUEUE_DEPTH.dec(priority=waiter.priority.label)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        tenant: str,
+        estimated_tokens: float,
+        priority: Priority = Priority.STANDARD,
+    ) -> AsyncIterator[Lease]:
+        """
+        Wait for a fair-share slot for ``tenant``; released on exit.
+
+        Raises:
+            PreemptedError: A background call was cancelled to make room for
+                interactive traffic (the slot is already released)
+        """
+        task = asyncio.current_task()
+        if task is not None:
+            priority = min(priority, self._promoted.get(task, priority))
+        state = self._tenant(tenant)
+        start_tag = max(self._virtual_time, state.last_finish_tag)
+        state.last_finish_tag = start_tag + estimated_tokens / state.weight
+
+        waiter = _Waiter(
+            tenant=tenant,
+            priority=priority,
+            cost=estimated_tokens,
+            start_tag=start_tag,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+            task=task,
+        )
+        self._enqueue(state, waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # 割り当て直後にキャンセルされた場合はスロットを返す
+                self._release(state, tenant)
+            elif waiter in state.queues[waiter.priority]:
+                self._dequeue(state, waiter)
+                self._retire(tenant, state)
+            raise
+
+        # 待っている間に promote されていればその優先度で数える
+        priority = waiter.priority
+        lease = Lease(
+            tenant=tenant,
+            priority=priority,
+            estimated_tokens=estimated_tokens,
+            queue_wait=time.monotonic() - waiter.enqueued_at,
+            task=task,
+        )
+        state.queue_wait += lease.queue_wait
+        QUEUE_WAIT.inc(lease.queue_wait, tenant=self._label(tenant))
+        PRIORITY_QUEUE_WAIT.inc(lease.queue_wait, priority=priority.label)
+        self._leases.add(lease)
+        try:
+            yield lease
+        except asyncio.CancelledError:
+            if not lease.preempted or lease.task is None:
+                raise
+            # スケジューラー自身によるキャンセルは呼び出し元に伝播させない
+            lease.task.uncancel()
+            raise PreemptedError(f"Background LLM call of {tenant} was preempted") from None
+        finally:
+            self._leases.discard(lease)
+            if lease.actual_tokens is not None:
+                state.tokens += lease.actual_tokens
+                TOKENS.inc(lease.actual_tokens, tenant=self._label(tenant))
+                if state.bucket is not None:
+                    # 見積もりとの差分を精算する
+                    state.bucket.tokens -= lease.actual_tokens - estimated_tokens
+            self._release(state, tenant)
+
+    def promote(self, task: asyncio.Task[Any], priority: Priority) -> None:
+        """
+        Raise the priority class of a task's LLM calls (never lowers it).
+
+        Used when a caller waits for another task, e.g. a tap joining a
+        background prefetch: the task's queued call moves to ``priority``,
+        its running call is no longer preempted below that class, and its
+        later calls (retries, continuations) are queued at ``priority`` too.
+        """
+        promoted = self._promoted.get(task)
+        if task.done() or (promoted is not None and promoted <= priority):
+            return
+        if promoted is None:
+            task.add_done_callback(lambda done: self._promoted.pop(done, None))
+        self._promoted[task] = priority
+
+        for lease in self._leases:
+            if lease.task is task and lease.priority > priority:
+                lease.priority = priority
+        moved = False
+        for level in Priority:
+            if level <= priority:
+                continue
+            for state in list(self._waiting[level].values()):
+                for waiter in list(state.queues[level]):
+                    if waiter.task is task:
+                        self._dequeue(state, waiter)
+                        waiter.priority = priority
+                        self._enqueue(state, waiter)
+                        moved = True
+        if moved:
+            self._dispatch()
+
+    def _release(self, state: _Tenant, tenant: str) -> None:
+        state.in_flight -= 1
+        self._in_flight -= 1
+        IN_FLIGHT.dec(tenant=self._label(tenant))
+        self._retire(tenant, state)
+        self._dispatch()
+
+    def _quota_wait(self, tenant: str, state: _Tenant, head: _Waiter) -> float:
+        """Seconds until the tenant's quota admits ``head`` (0 if it does now)."""
+        if state.bucket is None:
+            return 0.0
+        wait = state.bucket.seconds_until(head.cost)
+        if wait > 0:
+            THROTTLED.inc(tenant=self._label(tenant))
+        return wait
+
+    def _best_waiter(self, priority: Priority) -> tuple[_Waiter | None, float | None]:
+        """Eligible waiter of ``priority`` with the smallest start tag.
+
+        Returns:
+            The waiter (or None) and the earliest quota refill among skipped tenants
+        """
+        best: _Waiter | None = None
+        retry_in: float | None = None
+        for tenant, state in self._waiting[priority].items():
+            if state.in_flight >= self.tenant_max_concurrency:
+                continue
+            queue = state.queues[priority]
+            head = queue[0]
+            wait = self._quota_wait(tenant, state, head)
+            if wait > 0:
+                retry_in = wait if retry_in is None else min(retry_in, wait)
+                continue
+            if best is None or head.start_tag < best.start_tag:
+                best = head
+        return best, retry_in
+
+    def _dispatch(self) -> None:
+        """Grant slots to eligible waiters by priority class, then start-tag order."""
+        retry_in: float | None = None
+
+        while self._in_flight < self.max_concurrency:
+            best: _Waiter | None = None
+            for priority in Priority:
+                # 予約枠はインタラクティブ専用
+                if (
+                    priority is not Priority.INTERACTIVE
+                    and self._in_flight >= self.max_concurrency - self.interactive_reserved_slots
+                ):
+                    break
+                best, wait = self._best_waiter(priority)
+                if wait is not None:
+                    retry_in = wait if retry_in is None else min(retry_in, wait)
+                if best is not None:
+                    break
+
+            if best is None:
+                break
+
+            state = self._tenants[best.tenant]
+            self._dequeue(state, best)
+            state.in_flight += 1
+            state.admitted += 1
+            self._in_flight += 1
+            self._virtual_time = max(self._virtual_time, best.start_tag)
+            if state.bucket is not None:
+                state.bucket.tokens -= best.cost
+
+            label = self._label(best.tenant)
+            IN_FLIGHT.inc(tenant=label)
+            ADMITTED.inc(tenant=label)
+            PRIORITY_ADMITTED.inc(priority=best.priority.label)
+            best.future.set_result(None)
+
+        recheck_in = self._preempt_if_starved()
+        if recheck_in is not None:
+            retry_in = recheck_in if retry_in is None else min(retry_in, recheck_in)
+
+        # トークン枠の回復やインタラクティブ待ち時間の目標到達時に再ディスパッチする
+        if retry_in is not None:
+            loop = asyncio.get_running_loop()
+            if self._wakeup is not None:
+                if self._wakeup.when() <= loop.time() + retry_in:
+                    return
+                self._wakeup.cancel()
+
+            def wakeup() -> None:
+                self._wakeup = None
+                self._dispatch()
+
+            self._wakeup = loop.call_later(retry_in, wakeup)
+
+    def _preempt_if_starved(self) -> float | None:
+        """
+        Cancel one background call if interactive waiters are over the target.
+
+        Returns:
+            Seconds until the oldest interactive waiter reaches the target, if
+            it has not yet
+        """
+        if self.interactive_wait_target <= 0:
+            return None
+
+        oldest: float | None = None
+        for state in self._waiting[Priority.INTERACTIVE].values():
+            queue = state.queues[Priority.INTERACTIVE]
+            # テナント上限で待っている場合はプリエンプトしても解消しない
+            if state.in_flight >= self.tenant_max_concurrency:
+                continue
+            if state.bucket is not None and state.bucket.seconds_until(queue[0].cost) > 0:
+                continue
+            if oldest is None or queue[0].enqueued_at < oldest:
+                oldest = queue[0].enqueued_at
+        if oldest is None:
+            return None
+
+        waited = time.monotonic() - oldest
+        if waited < self.interactive_wait_target:
+            return self.interactive_wait_target - waited
+
+        current = asyncio.current_task()
+        victims = [
+            lease
+            for lease in self._leases
+            if lease.priority is Priority.BACKGROUND
+            and not lease.preempted
+            and lease.task is not None
+            and lease.task is not current
+        ]
+        if not victims:
+            return None
+
+        # 最後に開始した呼び出しを選ぶ（捨てる処理が最も少ない）
+        victim = max(victims, key=lambda lease: lease.granted_at)
+        victim.preempted = True
+        if victim.task is not None:
+            victim.task.cancel()
+        self._tenants[victim.tenant].preempted += 1
+        PREEMPTED.inc(tenant=self._label(victim.tenant))
+        logger.info(
+            "llm_background_preempted",
+            tenant=victim.tenant,
+            interactive_wait_ms=round(waited * 1000, 1),
+            ran_ms=round((time.monotonic() - victim.granted_at) * 1000, 1),
+        )
+        return None
+
+    def backlog(self, priority: Priority) -> tuple[int, float]:
+        """
+        Waiters that would be served before or with a new call of ``priority``.
+
+        Returns:
+            Their number and the queue wait of the oldest one (seconds)
+        """
+        queued = 0
+        oldest: float | None = None
+        for level in Priority:
+            if level > priority:
+                break
+            for state in self._waiting[level].values():
+                queue = state.queues[level]
+                queued += len(queue)
+                if oldest is None or queue[0].enqueued_at < oldest:
+                    oldest = queue[0].enqueued_at
+        return queued, 0.0 if oldest is None else time.monotonic() - oldest
+
+    def stats(self) -> dict[str, Any]:
+        """Per-tenant queue statistics (of the tenants currently tracked)."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "interactive_reserved_slots": self.interactive_reserved_slots,
+            "in_flight": self._in_flight,
+            "priorities": {
+                priority.label: {
+                    "queued": PRIORITY_QUEUE_DEPTH.get(priority=priority.label),
+                    "admitted": PRIORITY_ADMITTED.get(priority=priority.label),
+                    "queue_wait_seconds": round(
+                        PRIORITY_QUEUE_WAIT.get(priority=priority.label), 3
+                    ),
+                }
+                for priority in Priority
+            },
+            "tenants": {
+                tenant: {
+                    "weight": state.weight,
+                    "queued": sum(len(queue) for queue in state.queues.values()),
+                    "in_flight": state.in_flight,
+                    "admitted": state.admitted,
+                    "queue_wait_seconds": round(state.queue_wait, 3),
+                    "tokens": state.tokens,
+                    "preempted": state.preempted,
+                    "bucket_tokens": (
+                        round(state.bucket.tokens) if state.bucket is not None else None
+                    ),
+                }
+                for tenant, state in self._tenants.items()
+            },
+        }
+
+
+# Singleton instance
+_scheduler: FairScheduler | None = None
+
+
+def get_scheduler() -> FairScheduler:
+    """Get or create the FairScheduler singleton."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairScheduler(
+            max_concurrency=settings.llm_max_concurrency,
+            tenant_max_concurrency=settings.tenant_max_concurrency,
+            tenant_tokens_per_minute=settings.tenant_tokens_per_minute,
+            default_weight=settings.tenant_default_weight,
+            weights=settings.tenant_weights,
+            interactive_reserved_slots=settings.llm_interactive_reserved_slots,
+            interactive_wait_target=settings.llm_interactive_wait_target_ms / 1000,
+        )
+    return _scheduler
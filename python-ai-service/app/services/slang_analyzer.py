@@ -3,7 +3,11 @@
 from typing import Any
 from datetime import datetime
 
+from app.core.tracing import traced
+from app.services.admission import CapacityError
+from app.services.cache import cached
 from app.services.llm import get_llm_service
+from app.services.scheduler import Priority, priority_class
 
 
 # Sample buzzwords data (in production, this would come from SNS APIs)
@@ -109,12 +113,33 @@ SAMPLE_BUZZWORDS = {
 }
 
 
+def buzzword_entry(params: dict[str, Any]) -> dict[str, Any] | None:
+    """Degraded ``analyze_slang``: the bundled buzzword entry of the term, if any."""
+    term = params["slang"].strip().lower()
+    for entry in SAMPLE_BUZZWORDS.get(params["language"], SAMPLE_BUZZWORDS["english"]):
+        if entry["word"].lower() == term:
+            return {
+                "slang": params["slang"],
+                "meaning": (
+                    entry["meaning_ja"]
+                    if params["native_language"] == "japanese"
+                    else entry["meaning"]
+                ),
+                "register": "SLANG",
+                "origin": {"source": entry["source"]},
+                "popularity_rating": round(entry["trend_score"] / 10),
+            }
+    return None
+
+
 class SlangAnalyzer:
     """Service for analyzing slang and tracking buzzwords."""
 
     def __init__(self):
         self.llm = get_llm_service()
 
+    @traced
+    @priority_class(Priority.STANDARD)
     async def get_buzzwords(
         self,
         language: str = "english",
@@ -150,6 +175,9 @@ class SlangAnalyzer:
             "buzzwords": sorted_buzzwords,
         }
 
+    @cached(degraded=buzzword_entry)
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def analyze_slang(
         self,
         slang: str,
@@ -211,6 +239,8 @@ Respond in this exact JSON format:
         try:
             result = await self.llm.generate_json(prompt)
             return result
+        except CapacityError:
+            raise
         except Exception as e:
             return {
                 "slang": slang,
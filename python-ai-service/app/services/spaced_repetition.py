@@ -0,0 +1,271 @@
+"""Spaced Repetition - Vectorized FSRS review scheduling.
+
+Card states are held column-wise in NumPy arrays (``CardBatch``), so due
+queues and interval updates for large collections are a handful of array
+operations instead of a Python loop per card. The memory model is FSRS-4.5
+(stability / difficulty / retrievability) with day-level intervals; the
+default weights are the published FSRS-4.5 defaults.
+
+The service does not store cards: callers (Next.js, the mobile app) send the
+states they hold and persist the updated states returned by ``review``.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.core.config import settings
+
+SECONDS_PER_DAY = 86400.0
+
+# FSRS-4.5 の既定パラメータ
+DEFAULT_WEIGHTS = (
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+)  # fmt: skip
+DECAY = -0.5
+FACTOR = 0.9 ** (1 / DECAY) - 1  # R(S, S) = 90%
+
+# 評価: 1=Again, 2=Hard, 3=Good, 4=Easy
+AGAIN, HARD, GOOD, EASY = 1, 2, 3, 4
+
+
+@dataclass
+class CardBatch:
+    """
+    Review state of many cards, one array per field.
+
+    Times are Unix seconds; ``reps == 0`` marks a card that was never
+    reviewed (its stability, difficulty and last_review are ignored).
+    """
+
+    stability: np.ndarray
+    difficulty: np.ndarray
+    last_review: np.ndarray
+    due: np.ndarray
+    reps: np.ndarray
+    lapses: np.ndarray
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, Any]) -> "CardBatch":
+        return cls(
+            stability=np.asarray(columns["stability"], dtype=np.float64),
+            difficulty=np.asarray(columns["difficulty"], dtype=np.float64),
+            last_review=np.asarray(columns["last_review"], dtype=np.float64),
+            due=np.asarray(columns["due"], dtype=np.float64),
+            reps=np.asarray(columns["reps"], dtype=np.int32),
+            lapses=np.asarray(columns["lapses"], dtype=np.int32),
+        )
+
+    def to_columns(self) -> dict[str, list[Any]]:
+        return {
+            "stability": np.round(self.stability, 4).tolist(),
+            "difficulty": np.round(self.difficulty, 4).tolist(),
+            "last_review": self.last_review.tolist(),
+            "due": self.due.tolist(),
+            "reps": self.reps.tolist(),
+            "lapses": self.lapses.tolist(),
+        }
+
+    def __len__(self) -> int:
+        return len(self.stability)
+
+
+@dataclass
+class DueQueue:
+    """Cards to review now, most urgent first."""
+
+    indices: np.ndarray
+    retrievability: np.ndarray
+    due_count: int
+    new_count: int
+
+
+@dataclass
+class ReviewResult:
+    """Updated states after a batch of reviews."""
+
+    cards: CardBatch
+    interval_days: np.ndarray
+    retrievability: np.ndarray
+
+
+class FSRS:
+    """FSRS-4.5 scheduler over ``CardBatch`` arrays."""
+
+    def __init__(
+        self,
+        weights: tuple[float, ...] | list[float] = DEFAULT_WEIGHTS,
+        desired_retention: float = 0.9,
+        maximum_interval: int = 36500,
+    ) -> None:
+        if len(weights) != len(DEFAULT_WEIGHTS):
+            raise ValueError(f"FSRS needs {len(DEFAULT_WEIGHTS)} weights, got {len(weights)}")
+        if not 0 < desired_retention < 1:
+            raise ValueError("desired_retention must be between 0 and 1")
+        self.w = np.asarray(weights, dtype=np.float64)
+        self.desired_retention = desired_retention
+        self.maximum_interval = maximum_interval
+        # 保持率 r で次回復習までの日数 = S * interval_factor
+        self._interval_factor = (desired_retention ** (1 / DECAY) - 1) / FACTOR
+
+    def retrievability(self, elapsed_days: np.ndarray, stability: np.ndarray) -> np.ndarray:
+        """Probability of recall after ``elapsed_days`` (forgetting curve)."""
+        return (1 + FACTOR * elapsed_days / np.maximum(stability, 1e-6)) ** DECAY
+
+    def _initial_difficulty(self, rating: np.ndarray | int) -> np.ndarray:
+        return np.clip(self.w[4] - (np.asarray(rating) - 3) * self.w[5], 1, 10)
+
+    def _next_difficulty(self, difficulty: np.ndarray, rating: np.ndarray) -> np.ndarray:
+        updated = difficulty - self.w[6] * (rating - 3)
+        # 「Good」の初期難易度 D0(3) = w4 へ平均回帰させる（FSRS-4.5。Easy へ戻すのは FSRS-5）
+        reverted = self.w[7] * self._initial_difficulty(GOOD) + (1 - self.w[7]) * updated
+        return np.clip(reverted, 1, 10)
+
+    def _recall_stability(
+        self,
+        difficulty: np.ndarray,
+        stability: np.ndarray,
+        retrievability: np.ndarray,
+        rating: np.ndarray,
+    ) -> np.ndarray:
+        w = self.w
+        hard_penalty = np.where(rating == HARD, w[15], 1.0)
+        easy_bonus = np.where(rating == EASY, w[16], 1.0)
+        growth = (
+            np.exp(w[8])
+            * (11 - difficulty)
+            * np.power(stability, -w[9])
+            * (np.exp(w[10] * (1 - retrievability)) - 1)
+            * hard_penalty
+            * easy_bonus
+        )
+        return stability * (growth + 1)
+
+    def _forget_stability(
+        self, difficulty: np.ndarray, stability: np.ndarray, retrievability: np.ndarray
+    ) -> np.ndarray:
+        w = self.w
+        forgotten = (
+            w[11]
+            * np.power(difficulty, -w[12])
+            * (np.power(stability + 1, w[13]) - 1)
+            * np.exp(w[14] * (1 - retrievability))
+        )
+        # 忘れても安定度が上がることはない
+        return np.minimum(forgotten, stability)
+
+    def next_interval(self, stability: np.ndarray) -> np.ndarray:
+        """Days until retrievability falls to the desired retention."""
+        interval = np.rint(stability * self._interval_factor)
+        return np.clip(interval, 1, self.maximum_interval).astype(np.int32)
+
+    def due_queue(
+        self,
+        cards: CardBatch,
+        now: float,
+        until: float | None = None,
+        limit: int = 100,
+        new_limit: int = 20,
+    ) -> DueQueue:
+        """
+        Select the cards to review.
+
+        Args:
+            cards: Card states
+            now: Current time (retrievability is evaluated here)
+            until: Cards due before this time count as due (e.g. end of the
+                user's day); defaults to ``now``
+            limit: Maximum number of reviewed cards to return
+            new_limit: Maximum number of new cards appended after them
+
+        Returns:
+            Indices into ``cards``: due cards by ascending retrievability
+            (the most likely to be forgotten first), then new cards in input
+            order
+        """
+        until = now if until is None else until
+        is_new = cards.reps == 0
+        due_mask = ~is_new & (cards.due <= until)
+        due_indices = np.flatnonzero(due_mask)
+
+        elapsed = np.maximum(now - cards.last_review[due_indices], 0) / SECONDS_PER_DAY
+        retrievability = self.retrievability(elapsed, cards.stability[due_indices])
+        if len(due_indices) > limit:
+            # 全件ソートせず上位 limit 件だけを部分選択してから並べる
+            top = np.argpartition(retrievability, limit - 1)[:limit]
+            due_indices, retrievability = due_indices[top], retrievability[top]
+        order = np.argsort(retrievability, kind="stable")
+        due_indices, retrievability = due_indices[order], retrievability[order]
+
+        new_indices = np.flatnonzero(is_new)
+        return DueQueue(
+            indices=np.concatenate([due_indices, new_indices[:new_limit]]),
+            retrievability=np.concatenate(
+                [retrievability, np.zeros(min(len(new_indices), new_limit))]
+            ),
+            due_count=int(due_mask.sum()),
+            new_count=len(new_indices),
+        )
+
+    def review(
+        self, cards: CardBatch, ratings: np.ndarray, reviewed_at: np.ndarray
+    ) -> ReviewResult:
+        """
+        Apply one review outcome to every card.
+
+        Args:
+            cards: States before the review
+            ratings: 1=Again, 2=Hard, 3=Good, 4=Easy
+            reviewed_at: Review times (Unix seconds)
+        """
+        ratings = np.asarray(ratings, dtype=np.int8)
+        if ratings.size and (ratings.min() < AGAIN or ratings.max() > EASY):
+            raise ValueError("ratings must be between 1 (Again) and 4 (Easy)")
+        reviewed_at = np.broadcast_to(np.asarray(reviewed_at, dtype=np.float64), ratings.shape)
+        is_new = cards.reps == 0
+        # 新規カードの状態は未定義なので、計算が発散しない値に置き換えておく
+        prior_stability = np.where(is_new, 1.0, np.maximum(cards.stability, 0.01))
+        prior_difficulty = np.where(is_new, 5.0, np.clip(cards.difficulty, 1, 10))
+
+        elapsed = np.maximum(reviewed_at - cards.last_review, 0) / SECONDS_PER_DAY
+        retrievability = np.where(is_new, 0.0, self.retrievability(elapsed, prior_stability))
+
+        stability = np.where(
+            ratings == AGAIN,
+            self._forget_stability(prior_difficulty, prior_stability, retrievability),
+            self._recall_stability(prior_difficulty, prior_stability, retrievability, ratings),
+        )
+        difficulty = self._next_difficulty(prior_difficulty, ratings)
+        # 初回は評価ごとの初期値を使う
+        stability = np.where(is_new, self.w[ratings - 1], stability)
+        difficulty = np.where(is_new, self._initial_difficulty(ratings), difficulty)
+        stability = np.maximum(stability, 0.01)
+
+        interval = self.next_interval(stability)
+        updated = CardBatch(
+            stability=stability,
+            difficulty=difficulty,
+            last_review=reviewed_at.copy(),
+            due=reviewed_at + interval * SECONDS_PER_DAY,
+            reps=cards.reps + 1,
+            lapses=cards.lapses + ((ratings == AGAIN) & ~is_new),
+        )
+        return ReviewResult(cards=updated, interval_days=interval, retrievability=retrievability)
+
+
+# Singleton instance
+_fsrs: FSRS | None = None
+
+
+def get_fsrs() -> FSRS:
+    """Get or create the FSRS scheduler singleton."""
+    global _fsrs
+    if _fsrs is None:
+        _fsrs = FSRS(
+            weights=settings.srs_weights or DEFAULT_WEIGHTS,
+            desired_retention=settings.srs_desired_retention,
+            maximum_interval=settings.srs_maximum_interval_days,
+        )
+    return _fsrs
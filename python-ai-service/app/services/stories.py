@@ -0,0 +1,483 @@
+"""Story Clustering - Online grouping of incoming articles into developing stories.
+
+Each article is reduced to a compact fingerprint: the log term frequencies
+of its ``STORY_FINGERPRINT_TERMS`` highest-weighted lemmas by TF-IDF (title
+words count double, words seen only once are left out). A story keeps the
+sum of its members' fingerprints as its centroid and is listed in an
+inverted index under the top ``STORY_INDEX_TERMS`` terms of that centroid.
+Document frequencies are learned online and applied whenever vectors are
+compared, so stories formed while few articles had been seen are re-weighted
+as they settle.
+
+``assign`` places an article in near-constant time: the index yields the
+stories sharing the most top terms with it (at most ``STORY_CANDIDATES``), and
+the article joins the most similar of them if the cosine similarity reaches
+``STORY_JOIN_THRESHOLD``, or starts a new story. Stories then change
+incrementally, never by reclustering the corpus:
+
+- merge: a story whose centroid came close to another story's
+  (``STORY_MERGE_THRESHOLD``) absorbs it; the absorbed id keeps resolving.
+- split: every ``STORY_SPLIT_CHECK_INTERVAL`` additions (or a quarter of its
+  size, so the cost per article stays constant) a story is split in two by
+  2-means over its members, if the two halves are less similar than
+  ``STORY_SPLIT_THRESHOLD`` (it holds two unrelated stories, typically
+  joined while the document frequencies were still settling).
+
+Stories that received no article for ``STORY_WINDOW_HOURS`` take no new ones,
+and beyond ``STORY_MAX_ARTICLES`` the oldest articles are forgotten. Like
+assessment sessions, the state lives in the worker process.
+"""
+
+import heapq
+import math
+import secrets
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.document import Document, get_document
+
+STORY_ASSIGNMENTS = registry.counter(
+    "story_assignments_total", "Articles assigned to stories by outcome"
+)
+STORY_CHANGES = registry.counter("story_changes_total", "Incremental story merges and splits")
+STORIES = registry.gauge("stories", "Stories in memory")
+
+# 指紋に使う語の最短の長さ（短い語はたいてい機能語）
+MIN_TERM_LENGTH = 3
+MIN_TERM_COUNT = 2
+TITLE_WEIGHT = 2  # 見出しの語は 1 回でも指紋に入る
+KMEANS_ITERATIONS = 5
+IDF_WARMUP_DOCUMENTS = 50
+
+Vector = dict[str, float]
+
+
+class StoryNotFoundError(KeyError):
+    """Unknown story, or an article that was never assigned (or was forgotten)."""
+
+
+def _dot(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+
+def _normalized(vector: Vector) -> Vector:
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+
+def _add(total: Vector, vector: Vector, sign: float = 1.0) -> None:
+    for term, weight in vector.items():
+        value = total.get(term, 0.0) + sign * weight
+        if value > 1e-9:
+            total[term] = value
+        else:
+            total.pop(term, None)
+
+
+@dataclass(slots=True)
+class StoryArticle:
+    """An assigned article and its fingerprint."""
+
+    story_id: str
+    fingerprint: Vector  # 上位語の対数頻度（idf は比較する時に掛ける）
+    title: str
+    source: str | None
+    published_at: datetime | None
+
+
+def _published_order(article: StoryArticle) -> tuple[bool, float]:
+    """Sort key putting articles oldest first and those without a date last."""
+    if article.published_at is None:
+        return True, 0.0
+    return False, article.published_at.timestamp()
+
+
+@dataclass(slots=True)
+class Story:
+    """A cluster of articles about the same developing story."""
+
+    language: str
+    members: set[str] = field(default_factory=set)
+    centroid: Vector = field(default_factory=dict)  # 指紋の和（大きい順の上位語のみ）
+    index_terms: tuple[str, ...] = ()
+    updated_at: float = field(default_factory=time.time)
+    additions: int = 0  # 前回の分割判定以降に加わった記事数
+
+
+class StoryClusterer:
+    """Online article clustering with incremental merges and splits."""
+
+    def __init__(
+        self,
+        join_threshold: float = 0.3,
+        merge_threshold: float = 0.35,
+        split_threshold: float = 0.15,
+        fingerprint_terms: int = 48,
+        index_terms: int = 12,
+        candidates: int = 32,
+        min_split_size: int = 3,
+        split_check_interval: int = 8,
+        window_seconds: float = 72 * 3600.0,
+        max_articles: int = 20000,
+    ) -> None:
+        self.join_threshold = join_threshold
+        self.merge_threshold = merge_threshold
+        self.split_threshold = split_threshold
+        self.fingerprint_terms = max(fingerprint_terms, 1)
+        self.index_terms = max(index_terms, 1)
+        self.candidates = max(candidates, 1)
+        self.min_split_size = max(min_split_size, 1)
+        self.split_check_interval = max(split_check_interval, 1)
+        self.window_seconds = window_seconds
+        self.max_articles = max_articles
+        self._articles: OrderedDict[str, StoryArticle] = OrderedDict()
+        self._stories: dict[str, Story] = {}
+        self._index: dict[tuple[str, str], set[str]] = {}
+        # 統合で消えたストーリーID -> 統合先
+        self._aliases: OrderedDict[str, str] = OrderedDict()
+        # 語の文書頻度（オンラインで数え、記事数が上限の 2 倍を超えたら半減させる）
+        self._document_frequency: Counter[str] = Counter()
+        self._documents = 0
+        self._counts = {"merges": 0, "splits": 0}
+
+    def fingerprint(self, title: str, content: str) -> Vector:
+        """Log term frequencies of an article's top lemmas by TF-IDF (counts them in the IDF)."""
+        counts: Counter[str] = Counter()
+        # 見出しは使い捨ての Document（本文は他の分析と Document を共有する）
+        for document, weight in ((Document(title), TITLE_WEIGHT), (get_document(content), 1)):
+            for token, lemma in zip(document.tokens, document.lemmas, strict=True):
+                if len(lemma) >= MIN_TERM_LENGTH and token.isalpha():
+                    counts[lemma] += weight
+
+        if self._documents >= 2 * max(self.max_articles, 1):
+            self._decay()
+        self._documents += 1
+        self._document_frequency.update(counts.keys())
+        # 一度しか出ない語（誤字や初出の固有名詞）は idf が高すぎるので指紋に入れない
+        frequencies = {
+            term: 1 + math.log(count) for term, count in counts.items() if count >= MIN_TERM_COUNT
+        }
+        top = heapq.nlargest(
+            self.fingerprint_terms,
+            frequencies,
+            key=lambda term: frequencies[term] * self._idf(term),
+        )
+        return {term: frequencies[term] for term in top}
+
+    def _idf(self, term: str) -> float:
+        # 記事が少ないうちは idf があてにならないので、全語に下駄を履かせる（記事数とともに 0 へ）
+        floor = IDF_WARMUP_DOCUMENTS / (IDF_WARMUP_DOCUMENTS + self._documents)
+        return math.log((1 + self._documents) / (1 + self._document_frequency[term])) + floor
+
+    def _weighted(self, vector: Vector) -> Vector:
+        """
+        TF-IDF unit vector of a fingerprint or centroid.
+
+        The IDF is applied when vectors are compared rather than stored, so
+        stories formed while few articles had been seen are re-weighted as the
+        document frequencies settle.
+        """
+        return _normalized({term: weight * self._idf(term) for term, weight in vector.items()})
+
+    def _decay(self) -> None:
+        self._documents //= 2
+        for term, frequency in list(self._document_frequency.items()):
+            if frequency // 2:
+                self._document_frequency[term] = frequency // 2
+            else:
+                del self._document_frequency[term]
+
+    def _reindex(self, story_id: str) -> None:
+        story = self._stories[story_id]
+        self._unindex(story_id)
+        weighted = self._weighted(story.centroid)
+        # 重心の語は上位だけ残す（記事数に比例して増えないように）
+        limit = self.fingerprint_terms * 4
+        if len(story.centroid) > 2 * limit:
+            kept = heapq.nlargest(limit, weighted, key=weighted.__getitem__)
+            story.centroid = {term: story.centroid[term] for term in kept}
+        top = heapq.nlargest(self.index_terms, weighted, key=weighted.__getitem__)
+        story.index_terms = tuple(top)
+        for term in story.index_terms:
+            self._index.setdefault((story.language, term), set()).add(story_id)
+
+    def _unindex(self, story_id: str) -> None:
+        story = self._stories[story_id]
+        for term in story.index_terms:
+            postings = self._index.get((story.language, term))
+            if postings is not None:
+                postings.discard(story_id)
+                if not postings:
+                    del self._index[(story.language, term)]
+        story.index_terms = ()
+
+    def _nearest(
+        self, language: str, vector: Vector, exclude: str | None = None
+    ) -> tuple[str | None, float]:
+        """The open story most similar to a unit ``vector``, among those sharing its top terms."""
+        overlaps: Counter[str] = Counter()
+        for term in heapq.nlargest(self.index_terms, vector, key=vector.__getitem__):
+            overlaps.update(self._index.get((language, term), ()))
+        horizon = time.time() - self.window_seconds
+        best: str | None = None
+        best_similarity = 0.0
+        for story_id, _ in overlaps.most_common(self.candidates + 1):
+            if story_id == exclude:
+                continue
+            story = self._stories[story_id]
+            if story.updated_at < horizon:
+                # 期間内に記事が来なかったストーリーは閉じる
+                self._unindex(story_id)
+                continue
+            similarity = _dot(vector, self._weighted(story.centroid))
+            if similarity > best_similarity:
+                best, best_similarity = story_id, similarity
+        return best, best_similarity
+
+    def _new_story(self, language: str) -> str:
+        story_id = f"story_{secrets.token_hex(6)}"
+        self._stories[story_id] = Story(language=language)
+        STORIES.set(len(self._stories))
+        return story_id
+
+    def _attach(self, story_id: str, article_id: str, article: StoryArticle) -> None:
+        story = self._stories[story_id]
+        article.story_id = story_id
+        story.members.add(article_id)
+        _add(story.centroid, article.fingerprint)
+
+    def _detach(self, article_id: str) -> StoryArticle:
+        article = self._articles.pop(article_id)
+        story = self._stories[article.story_id]
+        story.members.discard(article_id)
+        _add(story.centroid, article.fingerprint, -1.0)
+        if story.members:
+            self._reindex(article.story_id)
+        else:
+            self._unindex(article.story_id)
+            del self._stories[article.story_id]
+            STORIES.set(len(self._stories))
+        return article
+
+    def _resolve(self, story_id: str) -> str:
+        while story_id in self._aliases:
+            story_id = self._aliases[story_id]
+        return story_id
+
+    def _merge(self, story_id: str) -> tuple[str, str | None]:
+        """Merge the story into (or absorb) the closest other story if they converged."""
+        story = self._stories[story_id]
+        other_id, similarity = self._nearest(
+            story.language, self._weighted(story.centroid), exclude=story_id
+        )
+        if other_id is None or similarity < self.merge_threshold:
+            return story_id, None
+        keep, absorbed = (story_id, other_id)
+        if len(self._stories[other_id].members) > len(story.members):
+            keep, absorbed = absorbed, keep
+        for article_id in self._stories[absorbed].members:
+            self._attach(keep, article_id, self._articles[article_id])
+        self._unindex(absorbed)
+        del self._stories[absorbed]
+        self._aliases[absorbed] = keep
+        while len(self._aliases) > max(self.max_articles, 1):
+            self._aliases.popitem(last=False)
+        self._reindex(keep)
+        self._counts["merges"] += 1
+        STORY_CHANGES.inc(change="merge")
+        STORIES.set(len(self._stories))
+        return keep, absorbed
+
+    def _split(self, story_id: str) -> str | None:
+        """Split a story in two by 2-means if it holds two distinct stories."""
+        story = self._stories[story_id]
+        # 判定の間隔は記事数の 1/4 以上にする（1 記事あたりの償却コストを一定に保つ）
+        interval = max(self.split_check_interval, len(story.members) // 4)
+        if story.additions < interval or len(story.members) < 2 * self.min_split_size:
+            return None
+        story.additions = 0
+        members = list(story.members)
+        vectors = [self._weighted(self._articles[a].fingerprint) for a in members]
+
+        # 重心から最も遠い記事と、その記事から最も遠い記事を種にする
+        direction = self._weighted(story.centroid)
+        first = min(vectors, key=lambda vector: _dot(vector, direction))
+        second = min(vectors, key=lambda vector: _dot(vector, first))
+        centers = [first, second]
+        sides: list[int] = []
+        for _ in range(KMEANS_ITERATIONS):
+            sides = [int(_dot(v, centers[1]) > _dot(v, centers[0])) for v in vectors]
+            sums: list[Vector] = [{}, {}]
+            for vector, side in zip(vectors, sides, strict=True):
+                _add(sums[side], vector)
+            centers = [_normalized(total) for total in sums]
+        if min(sides.count(0), sides.count(1)) < self.min_split_size:
+            return None
+        if _dot(centers[0], centers[1]) >= self.split_threshold:
+            return None
+
+        # 少ない側を新しいストーリーにする
+        moving = 0 if sides.count(0) < sides.count(1) else 1
+        new_id = self._new_story(story.language)
+        self._stories[new_id].updated_at = story.updated_at
+        for article_id, side in zip(members, sides, strict=True):
+            if side == moving:
+                article = self._articles[article_id]
+                story.members.discard(article_id)
+                _add(story.centroid, article.fingerprint, -1.0)
+                self._attach(new_id, article_id, article)
+        self._reindex(story_id)
+        self._reindex(new_id)
+        self._counts["splits"] += 1
+        STORY_CHANGES.inc(change="split")
+        return new_id
+
+    def _evict(self) -> None:
+        while len(self._articles) >= max(self.max_articles, 1):
+            self._detach(next(iter(self._articles)))
+
+    def assign(
+        self,
+        article_id: str,
+        title: str,
+        content: str = "",
+        language: str = "english",
+        source: str | None = None,
+        published_at: datetime | None = None,
+    ) -> dict[str, Any]:
+        """
+        Assign an article to a story (re-assigning it if it was assigned before).
+
+        Returns:
+            The story id, whether it was created for this article, the
+            article's similarity to it, and the stories merged into it or
+            split off from it on the way
+        """
+        if article_id in self._articles:
+            self._detach(article_id)
+        self._evict()
+        language = language.lower()
+        fingerprint = self.fingerprint(title, content)
+        nearest, similarity = self._nearest(language, self._weighted(fingerprint))
+        created = nearest is None or similarity < self.join_threshold
+        if nearest is not None and not created:
+            story_id = nearest
+        else:
+            story_id = self._new_story(language)
+            similarity = 1.0
+        STORY_ASSIGNMENTS.inc(outcome="created" if created else "joined")
+
+        article = StoryArticle(story_id, fingerprint, title, source, published_at)
+        self._articles[article_id] = article
+        self._attach(story_id, article_id, article)
+        story = self._stories[story_id]
+        story.updated_at = time.time()
+        story.additions += 1
+        self._reindex(story_id)
+
+        story_id, merged = self._merge(story_id)
+        split = self._split(story_id)
+        return {
+            "article_id": article_id,
+            "story_id": article.story_id,
+            "created": created,
+            "similarity": round(similarity, 3),
+            "size": len(self._stories[article.story_id].members),
+            "merged": merged,
+            "split": split,
+        }
+
+    def _summary(self, story_id: str) -> dict[str, Any]:
+        story = self._stories[story_id]
+        sources = {self._articles[a].source for a in story.members}
+        return {
+            "story_id": story_id,
+            "language": story.language,
+            "size": len(story.members),
+            "keywords": list(story.index_terms),
+            "sources": sorted(source for source in sources if source),
+            "updated_at": datetime.fromtimestamp(story.updated_at, UTC),
+        }
+
+    def story(self, story_id: str) -> dict[str, Any]:
+        """A story and its articles, oldest first (articles without a date last)."""
+        story_id = self._resolve(story_id)
+        if story_id not in self._stories:
+            raise StoryNotFoundError(story_id)
+        direction = self._weighted(self._stories[story_id].centroid)
+        members = []
+        for article_id in sorted(
+            self._stories[story_id].members,
+            key=lambda article_id: _published_order(self._articles[article_id]),
+        ):
+            article = self._articles[article_id]
+            members.append(
+                {
+                    "id": article_id,
+                    "title": article.title,
+                    "source": article.source,
+                    "published_at": article.published_at,
+                    "similarity": round(_dot(self._weighted(article.fingerprint), direction), 3),
+                }
+            )
+        return {**self._summary(story_id), "articles": members}
+
+    def story_of(self, article_id: str) -> dict[str, Any]:
+        article = self._articles.get(article_id)
+        if article is None:
+            raise StoryNotFoundError(article_id)
+        return self.story(article.story_id)
+
+    def stories(
+        self, language: str | None = None, min_size: int = 1, limit: int = 20
+    ) -> list[dict[str, Any]]:
+        """The most recently updated stories."""
+        language = language.lower() if language else None
+        matching = (
+            (story.updated_at, story_id)
+            for story_id, story in self._stories.items()
+            if len(story.members) >= min_size and language in (None, story.language)
+        )
+        return [self._summary(story_id) for _, story_id in heapq.nlargest(limit, matching)]
+
+    def stats(self) -> dict[str, Any]:
+        sizes = [len(story.members) for story in self._stories.values()]
+        return {
+            "stories": len(self._stories),
+            "articles": len(self._articles),
+            "largest_story": max(sizes, default=0),
+            "singletons": sizes.count(1),
+            "indexed_terms": len(self._index),
+            "vocabulary": len(self._document_frequency),
+            **self._counts,
+        }
+
+
+# Singleton instance
+_story_clusterer: StoryClusterer | None = None
+
+
+def get_story_clusterer() -> StoryClusterer:
+    """Get or create the StoryClusterer singleton."""
+    global _story_clusterer
+    if _story_clusterer is None:
+        _story_clusterer = StoryClusterer(
+            join_threshold=settings.story_join_threshold,
+            merge_threshold=settings.story_merge_threshold,
+            split_threshold=settings.story_split_threshold,
+            fingerprint_terms=settings.story_fingerprint_terms,
+            index_terms=settings.story_index_terms,
+            candidates=settings.story_candidates,
+            min_split_size=settings.story_min_split_size,
+            split_check_interval=settings.story_split_check_interval,
+            window_seconds=settings.story_window_hours * 3600,
+            max_articles=settings.story_max_articles,
+        )
+    return _story_clusterer
@@ -0,0 +1,137 @@
+"""Token Budgets - ``max_tokens`` calibrated from observed output lengths.
+
+Every ``LLMService.generate`` call records how many output tokens its task
+used. The task is the innermost ``@traced`` method making the call (e.g.
+``LLMService.summarize_article``) together with the ``max_tokens`` that
+method asks for, so prompts whose budget scales with the request (the number
+of questions, of words) are calibrated separately.
+
+Once a task has ``TOKEN_BUDGET_MIN_SAMPLES`` samples, its calls are sent
+with ``max_tokens`` = the ``TOKEN_BUDGET_PERCENTILE`` of its last
+``TOKEN_BUDGET_WINDOW`` outputs times ``TOKEN_BUDGET_MARGIN``, which keeps
+scheduler estimates and tenant token quotas close to what calls really use.
+A response that still hits the budget is continued by ``generate`` rather
+than re-run, and its sample is the full length, so the budget follows.
+"""
+
+import math
+from collections import deque
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+CONTINUATIONS = registry.counter(
+    "llm_continuations_total", "Follow-up calls that continued a response cut off at max_tokens"
+)
+TRUNCATED = registry.counter(
+    "llm_truncated_responses_total", "Responses still cut off after the last continuation"
+)
+
+# (@traced メソッド名, 呼び出し元が指定した max_tokens)
+TaskKey = tuple[str, int]
+
+
+class _Task:
+    """Output lengths and counters of one task."""
+
+    def __init__(self) -> None:
+        self.samples: deque[int] = deque(maxlen=max(settings.token_budget_window, 1))
+        self.calls = 0
+        self.continued = 0
+        self.truncated = 0
+        # 較正済みの max_tokens（サンプルが足りない間は None）
+        self.budget: int | None = None
+
+
+class TokenBudgets:
+    """Per-task output token statistics and the ``max_tokens`` derived from them."""
+
+    def __init__(self) -> None:
+        self._tasks: dict[TaskKey, _Task] = {}
+
+    def max_tokens(self, operation: str | None, requested: int) -> int:
+        """The ``max_tokens`` to send for a call that asks for ``requested``."""
+        if not settings.token_budget_enabled or operation is None:
+            return requested
+        task = self._tasks.get((operation, requested))
+        if task is None or task.budget is None:
+            return requested
+        # 指定より大きくするのは上限まで（続きの生成より 1 回で済む方が安い）
+        return min(task.budget, max(requested, settings.token_budget_max_tokens))
+
+    def record(
+        self,
+        operation: str | None,
+        requested: int,
+        output_tokens: int,
+        continuations: int,
+        truncated: bool,
+    ) -> None:
+        """Record the total output of a call (including its continuations)."""
+        if continuations:
+            CONTINUATIONS.inc(continuations)
+        if truncated:
+            TRUNCATED.inc()
+        if operation is None:
+            return
+        task = self._tasks.get((operation, requested))
+        if task is None:
+            task = self._tasks[(operation, requested)] = _Task()
+        task.calls += 1
+        task.continued += continuations > 0
+        task.truncated += truncated
+        task.samples.append(output_tokens)
+        if len(task.samples) >= settings.token_budget_min_samples:
+            observed = _percentile(task.samples, settings.token_budget_percentile)
+            task.budget = max(
+                math.ceil(observed * settings.token_budget_margin),
+                settings.token_budget_min_tokens,
+            )
+
+    def stats(self) -> dict[str, Any]:
+        tasks = []
+        for (operation, requested), task in sorted(self._tasks.items()):
+            tasks.append(
+                {
+                    "operation": operation,
+                    "requested_max_tokens": requested,
+                    "max_tokens": self.max_tokens(operation, requested),
+                    "calibrated": task.budget is not None,
+                    "samples": len(task.samples),
+                    "p50_output_tokens": _percentile(task.samples, 0.5),
+                    "high_output_tokens": _percentile(
+                        task.samples, settings.token_budget_percentile
+                    ),
+                    "calls": task.calls,
+                    # 続きを生成した呼び出し / 続きを生成しても途中で切れた呼び出し
+                    "continued": task.continued,
+                    "truncated": task.truncated,
+                }
+            )
+        return {
+            "enabled": settings.token_budget_enabled,
+            "percentile": settings.token_budget_percentile,
+            "margin": settings.token_budget_margin,
+            "tasks": tasks,
+        }
+
+
+def _percentile(samples: deque[int], q: float) -> int:
+    """Nearest-rank percentile (0 for no samples)."""
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+# Singleton instance
+_budgets: TokenBudgets | None = None
+
+
+def get_token_budgets() -> TokenBudgets:
+    """Get or create the TokenBudgets singleton."""
+    global _budgets
+    if _budgets is None:
+        _budgets = TokenBudgets()
+    return _budgets
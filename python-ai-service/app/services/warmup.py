@@ -0,0 +1,91 @@
+"""Startup warm-up - Load heavy modules, caches, word packs and provider connections.
+
+Runs in the background from the FastAPI lifespan; ``/api/health/ready``
+reports ready only after ``warm_up`` returns. Heavy imports run in a worker
+thread so the event loop keeps answering ``/api/health`` meanwhile.
+"""
+
+import asyncio
+import importlib
+
+from app.core.config import settings
+from app.core.startup import startup
+
+# ハンドラー内で遅延 import されるモジュール（初回リクエストの負担になる）
+DEFERRED_MODULES = (
+    "app.services.llm",
+    "app.services.word_explainer",
+    "app.services.article_analyzer",
+    "app.services.register_analyzer",
+    "app.services.slang_analyzer",
+    "app.services.learning_planner",
+    "app.services.comprehension",
+    "app.services.ingest",
+    "app.services.prefetch",
+    "app.services.stories",
+    "app.services.spaced_repetition",
+    "app.services.assessment",
+)
+
+
+def _import_deferred_modules() -> None:
+    for module in DEFERRED_MODULES:
+        importlib.import_module(module)
+
+
+async def warm_up() -> None:
+    """Run every warm-up step, then mark the process ready."""
+    with startup.phase("deferred_imports"):
+        await asyncio.to_thread(_import_deferred_modules)
+
+    with startup.phase("scheduler"):
+        from app.services.cassette import get_cassette
+        from app.services.scheduler import get_scheduler
+
+        get_scheduler()
+        # replay モードではカセットの索引をここで読み込む
+        get_cassette()
+
+    if settings.cache_enabled:
+        with startup.phase("cache"):
+            from app.services.cache import get_cache
+
+            # 共有メモリのマップ（他ワーカーが温めたエントリもここから見える）
+            get_cache()
+
+    with startup.phase("assessment"):
+        from app.services.assessment import get_assessment_engine
+
+        # 項目バンクの読み込みと尤度・情報量テーブルの前計算
+        await asyncio.to_thread(get_assessment_engine)
+
+    if settings.word_packs_enabled:
+        with startup.phase("word_packs"):
+            from app.services.word_packs import get_word_packs
+
+            # パックをマップしておく（ページはワーカー間でページキャッシュを共有する）
+            await asyncio.to_thread(get_word_packs().load_all)
+
+    cassette_mode = settings.llm_cassette_mode
+    if settings.has_anthropic or cassette_mode == "replay":
+        with startup.phase("llm_provider"):
+            from app.services.llm import get_llm_service
+
+            # クライアント生成（SSL コンテキストの読み込み）もループ外で行う
+            llm = await asyncio.to_thread(get_llm_service)
+            await llm.warm_up(settings.llm_warm_connections)
+
+        with startup.phase("services"):
+            from app.services.article_analyzer import get_article_analyzer
+            from app.services.learning_planner import get_learning_planner
+            from app.services.register_analyzer import get_register_analyzer
+            from app.services.slang_analyzer import get_slang_analyzer
+            from app.services.word_explainer import get_word_explainer
+
+            get_word_explainer()
+            get_article_analyzer()
+            get_register_analyzer()
+            get_slang_analyzer()
+            get_learning_planner()
+
+    startup.mark_ready()
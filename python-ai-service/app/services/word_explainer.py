@@ -4,7 +4,10 @@ from typing import Any
 
 import structlog
 
+from app.core.tracing import traced
+from app.services.cache import cached
 from app.services.llm import get_llm_service
+from app.services.scheduler import Priority, priority_class
 
 logger = structlog.get_logger()
 
@@ -15,6 +18,8 @@ class WordExplainerService:
     def __init__(self):
         self.llm = get_llm_service()
 
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def explain_word(
         self,
         word: str,
@@ -38,6 +43,8 @@ class WordExplainerService:
             native_language=native_language,
         )
 
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def generate_examples(
         self,
         word: str,
@@ -60,6 +67,9 @@ class WordExplainerService:
             context_type=context_type,
         )
 
+    @cached
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def explain_grammar(
         self,
         text: str,
@@ -113,6 +123,9 @@ Format your response as JSON:
             "tips": [],
         }
 
+    @cached
+    @traced
+    @priority_class(Priority.INTERACTIVE)
     async def get_collocations(
         self,
         word: str,
@@ -0,0 +1,262 @@
+"""Word Packs - Prebuilt, memory-mapped word explanation dictionaries.
+
+A pack holds the explanations of a fixed word list for one
+(language, native_language, CEFR level) combination, already validated and
+serialized as ``ExplainWordResponse`` JSON. ``LLMService.explain_word``
+serves packed words straight from the mapped file (no LLM call, no JSON
+work) and only falls back to live generation for the long tail; calls with a
+context sentence reuse the packed explanation and only generate the sense.
+
+File layout (little endian)::
+
+    header   magic "NLPACK01", version u32, count u32,
+             index_offset u64, meta_offset u64, meta_length u32
+    data     per word: key_length u16, key (UTF-8), value (JSON)
+    index    count x (key_hash u64, record_offset u64, value_length u32),
+             sorted by key_hash
+    meta     JSON object (language, native_language, level, built_at, ...)
+
+Packs are built with ``python -m scripts.build_word_packs``.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.tracing import set_span_attributes
+
+logger = structlog.get_logger()
+
+WORD_PACK_REQUESTS = registry.counter(
+    "word_pack_requests_total", "Context-free explain_word lookups served from word packs"
+)
+
+PACK_SUFFIX = ".pack"
+_MAGIC = b"NLPACK01"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQI")
+_HEADER_SIZE = 64
+_ENTRY = struct.Struct("<QQI4x")
+_KEY_LENGTH = struct.Struct("<H")
+_HASH = struct.Struct("<Q")
+# パックファイルが作り直されたかを確認する間隔（秒）
+_RELOAD_CHECK_SECONDS = 1.0
+
+
+def normalize_word(word: str) -> str:
+    """Lookup key of a word (NFC, trimmed, lower-cased)."""
+    return unicodedata.normalize("NFC", word).strip().lower()
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def pack_filename(language: str, native_language: str, level: str) -> str:
+    return f"{language.lower()}.{native_language.lower()}.{level.upper()}{PACK_SUFFIX}"
+
+
+def write_pack(path: Path, entries: dict[str, bytes], meta: dict[str, Any]) -> None:
+    """
+    Write a pack file atomically.
+
+    Args:
+        path: Destination file
+        entries: Word -> serialized explanation JSON
+        meta: Descriptive metadata stored alongside the index
+    """
+    data = bytearray()
+    index: list[tuple[int, int, int]] = []
+    for word, value in entries.items():
+        key = normalize_word(word).encode("utf-8")
+        index.append((_key_hash(key), _HEADER_SIZE + len(data), len(value)))
+        data += _KEY_LENGTH.pack(len(key)) + key + value
+    index.sort()
+
+    index_offset = _HEADER_SIZE + len(data)
+    meta_bytes = json.dumps(
+        {**meta, "words": len(entries), "built_at": time.time()}, ensure_ascii=False
+    ).encode("utf-8")
+    meta_offset = index_offset + len(index) * _ENTRY.size
+
+    header = _HEADER.pack(_MAGIC, _VERSION, len(index), index_offset, meta_offset, len(meta_bytes))
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tmp_path.open("wb") as f:
+        f.write(header.ljust(_HEADER_SIZE, b"\0"))
+        f.write(data)
+        for entry in index:
+            f.write(_ENTRY.pack(*entry))
+        f.write(meta_bytes)
+    # 配信中のワーカーは古いファイルのマップを保持したまま読み続けられる
+    tmp_path.replace(path)
+
+
+class WordPack:
+    """A read-only, memory-mapped pack file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # 開いたファイルの (inode, mtime)。置き換えられたかの判定に使う
+        self.signature = (stat.st_ino, stat.st_mtime_ns)
+        magic, version, count, index_offset, meta_offset, meta_length = _HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            raise ValueError(f"Not a word pack (or unsupported version): {path}")
+        self.count = count
+        self._index_offset = index_offset
+        self.meta: dict[str, Any] = json.loads(self._mm[meta_offset : meta_offset + meta_length])
+
+    def get(self, word: str) -> bytes | None:
+        """Serialized explanation of ``word``, or None if it is not packed."""
+        key = normalize_word(word).encode("utf-8")
+        key_hash = _key_hash(key)
+
+        # ハッシュ昇順のインデックスを二分探索する
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            (middle_hash,) = _HASH.unpack_from(self._mm, self._index_offset + middle * _ENTRY.size)
+            if middle_hash < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+
+        # ハッシュ衝突に備えてキー本体も照合する
+        for position in range(low, self.count):
+            entry_hash, offset, length = _ENTRY.unpack_from(
+                self._mm, self._index_offset + position * _ENTRY.size
+            )
+            if entry_hash != key_hash:
+                break
+            (key_length,) = _KEY_LENGTH.unpack_from(self._mm, offset)
+            start = offset + _KEY_LENGTH.size
+            if self._mm[start : start + key_length] == key:
+                return self._mm[start + key_length : start + key_length + length]
+        return None
+
+    def entries(self) -> dict[str, bytes]:
+        """Every packed word and its explanation (used for incremental rebuilds)."""
+        result: dict[str, bytes] = {}
+        for position in range(self.count):
+            _, offset, length = _ENTRY.unpack_from(
+                self._mm, self._index_offset + position * _ENTRY.size
+            )
+            (key_length,) = _KEY_LENGTH.unpack_from(self._mm, offset)
+            start = offset + _KEY_LENGTH.size
+            key = self._mm[start : start + key_length].decode("utf-8")
+            result[key] = self._mm[start + key_length : start + key_length + length]
+        return result
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class WordPackStore:
+    """Packs found in a directory at startup, opened on first use and reopened when rebuilt."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        # 起動時にあったパックだけを扱う（リクエストの言語の組み合わせでエントリを増やさない）
+        self._paths: dict[str, Path] = {}
+        if self.directory.is_dir():
+            for path in sorted(self.directory.glob(f"*{PACK_SUFFIX}")):
+                if len(path.name[: -len(PACK_SUFFIX)].split(".")) == 3:
+                    self._paths[path.name] = path
+        self._packs: dict[str, WordPack | None] = {}
+        # パック名 -> 最後に確認したファイルの (inode, mtime)、確認した時刻
+        self._signatures: dict[str, tuple[int, int] | None] = {}
+        self._checked_at: dict[str, float] = {}
+
+    def _pack(self, language: str, native_language: str, level: str) -> WordPack | None:
+        name = pack_filename(language, native_language, level)
+        path = self._paths.get(name)
+        if path is None:
+            return None
+        now = time.monotonic()
+        if name in self._packs and now - self._checked_at[name] < _RELOAD_CHECK_SECONDS:
+            return self._packs[name]
+        self._checked_at[name] = now
+
+        try:
+            stat = path.stat()
+            signature: tuple[int, int] | None = (stat.st_ino, stat.st_mtime_ns)
+        except OSError:
+            signature = None
+        if name in self._packs and signature == self._signatures[name]:
+            return self._packs[name]
+
+        # 初回、または write_pack で置き換えられた・削除された
+        previous = self._packs.get(name)
+        pack: WordPack | None = None
+        if signature is not None:
+            try:
+                pack = WordPack(path)
+                signature = pack.signature
+            except (OSError, ValueError) as e:
+                logger.warning("word_pack_unreadable", path=str(path), error=str(e))
+        self._packs[name] = pack
+        self._signatures[name] = signature
+        if previous is not None:
+            # get() が返すのはコピーなので、古いマップはすぐ閉じてよい
+            previous.close()
+            logger.info("word_pack_reloaded", path=str(path), words=pack.count if pack else 0)
+        return pack
+
+    def lookup(self, word: str, language: str, native_language: str, level: str) -> bytes | None:
+        pack = self._pack(language, native_language, level)
+        return pack.get(word) if pack is not None else None
+
+    def load_all(self) -> int:
+        """Map every pack found at startup (warm-up); returns the word count."""
+        words = 0
+        for name in self._paths:
+            pack = self._pack(*name[: -len(PACK_SUFFIX)].split("."))
+            words += pack.count if pack is not None else 0
+        return words
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "packs": {name: pack.count for name, pack in self._packs.items() if pack is not None},
+        }
+
+
+def lookup_explanation(params: dict[str, Any]) -> bytes | None:
+    """Pack lookup for ``LLMService.explain_word`` (context-free calls only)."""
+    if not settings.word_packs_enabled or params.get("context"):
+        return None
+    value = get_word_packs().lookup(
+        params["word"], params["language"], params["native_language"], params["user_level"]
+    )
+    result = "hit" if value is not None else "miss"
+    WORD_PACK_REQUESTS.inc(result=result)
+    set_span_attributes(**{"word_pack.result": result})
+    return value
+
+
+# Singleton instance
+_word_packs: WordPackStore | None = None
+
+
+def get_word_packs() -> WordPackStore:
+    """Get or create the WordPackStore singleton."""
+    global _word_packs
+    if _word_packs is None:
+        _word_packs = WordPackStore(settings.word_packs_dir)
+    return _word_packs
@@ -0,0 +1 @@
+"""Benchmarks for NewsLingua AI Service (no real LLM tokens required)."""
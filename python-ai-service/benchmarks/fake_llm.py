@@ -0,0 +1,187 @@
+"""Fake LLM Server - Anthropic Messages API compatible stand-in for load tests.
+
+Usage:
+    python -m benchmarks.fake_llm --port 8765 --latency lognormal:0.4,0.5 \
+        --tokens-per-second 80 --error-rate 0.02
+
+Point the service at it with ``ANTHROPIC_BASE_URL=http://127.0.0.1:8765``.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from benchmarks.payloads import canned_response_for
+
+# 1トークンあたりのおおよその文字数（usage計算と max_tokens 打ち切り用）
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class LatencyDistribution:
+    """Time-to-first-token distribution.
+
+    Spec format: ``fixed:S``, ``uniform:LO,HI``, ``exponential:MEAN`` or
+    ``lognormal:MEDIAN,SIGMA`` (all values in seconds).
+    """
+
+    kind: str = "fixed"
+    params: tuple[float, ...] = (0.05,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, raw = spec.partition(":")
+        params = tuple(float(p) for p in raw.split(",") if p)
+        expected = {"fixed": 1, "uniform": 2, "exponential": 1, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        return cls(kind=kind, params=params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exponential":
+            return rng.expovariate(1.0 / self.params[0])
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma)
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake provider."""
+
+    latency: LatencyDistribution
+    tokens_per_second: float = 0.0  # 0 = 出力トークン分の待ち時間なし
+    error_rate: float = 0.0
+    error_status: int = 529
+    seed: int | None = None
+
+
+def _text(content: str | list[dict[str, Any]]) -> str:
+    """Text of a message content (a string or a list of content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+def create_app(config: FakeLLMConfig) -> Starlette:
+    """Create the fake Anthropic API application."""
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "errors": 0, "output_tokens": 0}
+
+    async def messages(request: Request) -> JSONResponse:
+        body = await request.json()
+        stats["requests"] += 1
+
+        system = body.get("system") or ""
+        system = _text(system)
+        contents = [
+            (message["role"], _text(message["content"])) for message in body.get("messages", [])
+        ]
+        # 最後のアシスタント発話はプレフィル（応答はその続きから）
+        prefill = contents.pop()[1] if contents and contents[-1][0] == "assistant" else ""
+        prompt = "".join(content for _, content in contents)
+
+        await asyncio.sleep(config.latency.sample(rng))
+
+        if rng.random() < config.error_rate:
+            stats["errors"] += 1
+            error_type = "overloaded_error" if config.error_status == 529 else "api_error"
+            return JSONResponse(
+                {"type": "error", "error": {"type": error_type, "message": "injected failure"}},
+                status_code=config.error_status,
+            )
+
+        text = canned_response_for(f"{system}\n{prompt}")
+        if prefill and text.startswith(prefill):
+            text = text[len(prefill) :]
+        max_tokens = int(body.get("max_tokens", 1024))
+        stop_reason = "end_turn"
+        if len(text) > max_tokens * CHARS_PER_TOKEN:
+            text = text[: max_tokens * CHARS_PER_TOKEN]
+            stop_reason = "max_tokens"
+
+        output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        if config.tokens_per_second > 0:
+            await asyncio.sleep(output_tokens / config.tokens_per_second)
+        stats["output_tokens"] += output_tokens
+
+        return JSONResponse(
+            {
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": body.get("model", "fake-model"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": stop_reason,
+                "stop_sequence": None,
+                "usage": {
+                    "input_tokens": max(1, len(system + prompt + prefill) // CHARS_PER_TOKEN),
+                    "output_tokens": output_tokens,
+                },
+            }
+        )
+
+    async def list_models(request: Request) -> JSONResponse:
+        # 起動時の接続ウォームアップ用
+        return JSONResponse({"data": [], "has_more": False, "first_id": None, "last_id": None})
+
+    async def get_stats(request: Request) -> JSONResponse:
+        return JSONResponse(stats)
+
+    return Starlette(
+        routes=[
+            Route("/v1/messages", messages, methods=["POST"]),
+            Route("/v1/models", list_models, methods=["GET"]),
+            Route("/stats", get_stats, methods=["GET"]),
+        ]
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register fake provider options (shared with the load generator)."""
+    parser.add_argument("--latency", default="fixed:0.05", help="Latency distribution spec")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=529)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeLLMConfig:
+    return FakeLLMConfig(
+        latency=LatencyDistribution.parse(args.latency),
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Anthropic API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    config = config_from_args(args)
+    print(json.dumps({"fake_llm": f"http://{args.host}:{args.port}", "latency": args.latency}))
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
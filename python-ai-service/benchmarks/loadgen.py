@@ -0,0 +1,412 @@
+"""Load generator - drives every API route and MCP tool against the fake LLM.
+
+Usage:
+    python -m benchmarks.loadgen                        # run and compare with baseline
+    python -m benchmarks.loadgen --update-baseline      # rewrite benchmarks/baseline.json
+    python -m benchmarks.loadgen --concurrency 1,8,32 --requests 100 \
+        --latency lognormal:0.3,0.6 --tokens-per-second 120 --error-rate 0.05
+    python -m benchmarks.loadgen --cassette cassettes/prod.jsonl.gz --latency-scale 0.1
+
+The fake LLM runs as a separate process; the FastAPI app and the MCP tool
+handlers run in-process so that event-loop lag is measured on the same loop
+that serves the requests.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from benchmarks import fake_llm
+from benchmarks.payloads import (
+    ASSESSMENT_ITEMS,
+    HTTP_TARGETS,
+    MCP_TARGETS,
+    NDJSON_TARGETS,
+    WEBSOCKET_TARGETS,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+LAG_SAMPLE_INTERVAL = 0.01
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (values need not be sorted)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a periodic sleeper."""
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: list[float] = []
+        self._expected: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - self._expected))
+
+    def start(self) -> None:
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # ループが一度も解放されなかった場合も、最後の待機の遅れを記録する
+        if self._expected is not None:
+            overdue = asyncio.get_running_loop().time() - self._expected
+            if overdue > 0:
+                self.samples.append(overdue)
+            self._expected = None
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+
+async def run_level(
+    call: Callable[[], Awaitable[bool]], concurrency: int, total: int
+) -> dict[str, float]:
+    """Run ``total`` calls with ``concurrency`` workers and summarise them."""
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+    monitor = LoopLagMonitor()
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            ok = await call()
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "throughput_rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "errors": errors,
+        "loop_lag_p99_ms": round(percentile(monitor.samples, 99) * 1000, 2),
+        "loop_lag_max_ms": round(max(monitor.samples, default=0.0) * 1000, 2),
+    }
+
+
+async def websocket_session(app: Any, path: str, messages: list[dict[str, Any]]) -> bool:
+    """
+    Open a WebSocket on the ASGI app, send ``messages`` and wait for every reply.
+
+    httpx has no WebSocket support, so the ASGI messages are exchanged
+    directly (on the same loop, like the HTTP targets).
+    """
+    inbox: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+    await inbox.put({"type": "websocket.connect"})
+    for message in messages:
+        await inbox.put({"type": "websocket.receive", "text": json.dumps(message)})
+    replies: list[dict[str, Any]] = []
+    accepted = False
+
+    async def send(event: dict[str, Any]) -> None:
+        nonlocal accepted
+        if event["type"] == "websocket.accept":
+            accepted = True
+        elif event["type"] == "websocket.send":
+            replies.append(json.loads(event["text"]))
+            if len(replies) == len(messages):
+                await inbox.put({"type": "websocket.disconnect", "code": 1000})
+        elif event["type"] == "websocket.close":
+            # サーバー側から閉じられた（受信待ちを終わらせる）
+            await inbox.put({"type": "websocket.disconnect", "code": event.get("code", 1000)})
+
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "scheme": "ws",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"loadgen")],
+        "client": ("127.0.0.1", 0),
+        "server": ("loadgen", 80),
+        "subprotocols": [],
+    }
+    await app(scope, inbox.get, send)
+    return accepted and len(replies) == len(messages) and all(r.get("ok") for r in replies)
+
+
+def build_targets() -> dict[str, Callable[[], Awaitable[bool]]]:
+    """Build one zero-argument coroutine factory per route, MCP tool and session scenario."""
+    import httpx
+
+    from app.main import app
+    from app.mcp.server import call_tool
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://loadgen", timeout=None
+    )
+    targets: dict[str, Callable[[], Awaitable[bool]]] = {}
+
+    for method, path, body in HTTP_TARGETS:
+
+        async def http_call(method: str = method, path: str = path, body: Any = body) -> bool:
+            response = await client.request(method, path, json=body)
+            return response.status_code < 400
+
+        targets[f"http {method} {path}"] = http_call
+
+    for path, articles in NDJSON_TARGETS:
+        ndjson = "".join(json.dumps(article) + "\n" for article in articles).encode()
+
+        async def ndjson_call(
+            path: str = path, ndjson: bytes = ndjson, count: int = len(articles)
+        ) -> bool:
+            response = await client.post(
+                path, content=ndjson, headers={"content-type": "application/x-ndjson"}
+            )
+            lines = [json.loads(line) for line in response.text.splitlines() if line]
+            return (
+                response.status_code < 400
+                and len(lines) == count
+                and all(line["ok"] for line in lines)
+            )
+
+        targets[f"ndjson POST {path}"] = ndjson_call
+
+    for path, messages in WEBSOCKET_TARGETS:
+
+        async def ws_call(path: str = path, messages: list[dict[str, Any]] = messages) -> bool:
+            return await websocket_session(app, path, messages)
+
+        targets[f"ws {path}"] = ws_call
+
+    async def assessment_call() -> bool:
+        # 開始から判定終了まで（正誤は問題IDから決める）
+        response = await client.post("/api/assessment/sessions", json={"start_level": "B1"})
+        if response.status_code >= 400:
+            return False
+        state = response.json()
+        while not state["finished"]:
+            item_id = state["next_item_id"]
+            response = await client.post(
+                f"/api/assessment/sessions/{state['session_id']}/answers",
+                json={"item_id": item_id, "correct": hash(item_id) % 3 != 0},
+            )
+            if response.status_code >= 400:
+                return False
+            state = response.json()
+        return True
+
+    targets["session assessment"] = assessment_call
+
+    for tool, arguments in MCP_TARGETS:
+
+        async def mcp_call(tool: str = tool, arguments: dict[str, Any] = arguments) -> bool:
+            contents = await call_tool(tool, dict(arguments))
+            text = contents[0].text
+            return not (text.startswith('{"error"') or '"error":' in text[:200])
+
+        targets[f"mcp {tool}"] = mcp_call
+
+    return targets
+
+
+def compare(
+    results: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    tolerance: float,
+) -> list[str]:
+    """Return regressions (p95 latency up or throughput down beyond tolerance)."""
+    regressions = []
+    for target, levels in results.items():
+        for level, current in levels.items():
+            previous = baseline.get(target, {}).get(level)
+            if previous is None:
+                continue
+            if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{target} @c={level}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+                )
+            if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{target} @c={level}: throughput {previous['throughput_rps']} -> "
+                    f"{current['throughput_rps']} rps"
+                )
+    return regressions
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_fake_llm(args: argparse.Namespace, port: int) -> subprocess.Popen[bytes]:
+    command = [
+        sys.executable, "-m", "benchmarks.fake_llm",
+        "--port", str(port),
+        "--latency", args.latency,
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status),
+    ]  # fmt: skip
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return process
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fake LLM server did not start")
+
+
+async def run(args: argparse.Namespace) -> dict[str, dict[str, dict[str, float]]]:
+    from app.core.startup import startup
+    from app.main import app, lifespan
+
+    targets = build_targets()
+    if args.only:
+        targets = {name: call for name, call in targets.items() if args.only in name}
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    results: dict[str, dict[str, dict[str, float]]] = {}
+
+    async with lifespan(app):
+        while not startup.ready:
+            await asyncio.sleep(0.01)
+        print(f"startup phases (ms): {startup.stats()['phases_ms']}", flush=True)
+        for name, call in targets.items():
+            await call()  # warm-up (singletons, connection pool)
+            results[name] = {}
+            for concurrency in levels:
+                stats = await run_level(call, concurrency, max(args.requests, concurrency))
+                results[name][str(concurrency)] = stats
+                print(
+                    f"{name:<48} c={concurrency:<4} p50={stats['p50_ms']:>8.1f}ms "
+                    f"p95={stats['p95_ms']:>8.1f}ms p99={stats['p99_ms']:>8.1f}ms "
+                    f"rps={stats['throughput_rps']:>7.1f} err={stats['errors']:<3} "
+                    f"lag_max={stats['loop_lag_max_ms']:>7.1f}ms",
+                    flush=True,
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="NewsLingua AI Service load generator")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated levels")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per level")
+    parser.add_argument("--only", default="", help="Run only targets containing this text")
+    parser.add_argument("--output", type=Path, help="Write results JSON to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--cassette", type=Path, help="Replay recorded LLM traffic instead of the fake server"
+    )
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Replay latency factor")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Keep the response cache and word packs on (measures hits)",
+    )
+    fake_llm.add_arguments(parser)
+    args = parser.parse_args()
+
+    # app をインポートする前に設定する（Settings はインポート時に読み込まれる）
+    process = None
+    item_bank = Path(tempfile.gettempdir()) / "loadgen-assessment-items.json"
+    item_bank.write_text(json.dumps(ASSESSMENT_ITEMS))
+    os.environ["ASSESSMENT_ITEM_BANK_PATH"] = str(item_bank)
+    # 全ルートを 1 テナントから叩くので、一括取り込みの呼び出しが待ち行列で断られないようにする
+    # （測るのはサービスのオーバーヘッド。既存のルートはこの並行度では並ばない）
+    os.environ["LLM_ADMISSION_MAX_QUEUE"] = "0"
+    if not args.cache:
+        os.environ["CACHE_ENABLED"] = "false"
+        os.environ["WORD_PACKS_ENABLED"] = "false"
+    if args.cassette:
+        os.environ["LLM_CASSETTE_MODE"] = "replay"
+        os.environ["LLM_CASSETTE_PATH"] = str(args.cassette)
+        os.environ["LLM_CASSETTE_LATENCY_SCALE"] = str(args.latency_scale)
+    else:
+        port = free_port()
+        process = start_fake_llm(args, port)
+        os.environ["ANTHROPIC_API_KEY"] = "fake-key"
+        os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{port}"
+
+    import structlog
+
+    # リクエスト毎の info ログは計測のノイズになるので抑制する
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate,
+            "cassette": str(args.cassette) if args.cassette else None,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("config") != report["config"]:
+            print("Baseline was recorded with a different configuration; skipping comparison")
+            return
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
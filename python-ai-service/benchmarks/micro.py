@@ -0,0 +1,274 @@
+"""Microbenchmarks for the non-LLM overhead of each request.
+
+Measures prompt construction, ``find``/``rfind`` JSON slicing + ``json.loads``,
+Pydantic response model construction and MCP ``json.dumps(..., indent=2)``
+serialization in isolation, with ``LLMService.generate`` replaced by a stub
+that returns realistic canned output (50-word vocabulary lists, full
+learning plans).
+
+Usage:
+    python -m benchmarks.micro                 # run and compare with last record
+    python -m benchmarks.micro --record        # append results to micro_history.jsonl
+    python -m benchmarks.micro --only json     # run matching cases only
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable, Coroutine
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from benchmarks.payloads import (
+    ARTICLE,
+    EXPLAIN_WORD_RESPONSE,
+    LEARNING_PLAN_RESPONSE,
+    SUMMARY_RESPONSE,
+    VOCABULARY_RESPONSE,
+    canned_response_for,
+)
+
+HISTORY_PATH = Path(__file__).with_name("micro_history.jsonl")
+
+
+def run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Drive a coroutine that never suspends without an event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("coroutine suspended; stubbed LLM calls must not await I/O")
+
+
+def install_stub_llm() -> Any:
+    """Replace the LLM singleton with one whose ``generate`` returns canned text."""
+    from app.services import llm as llm_module
+
+    service = object.__new__(llm_module.LLMService)
+    service.default_model = "stub"
+
+    async def generate(prompt: str, *, system: str | None = None, **kwargs: Any) -> str:
+        return canned_response_for(f"{system or ''}\n{prompt}")
+
+    service.generate = generate  # type: ignore[method-assign]
+    llm_module._llm_service = service
+    return service
+
+
+def measure(func: Callable[[], Any], min_time: float, repeat: int) -> dict[str, float]:
+    """Return per-call timings in microseconds (auto-calibrated loop count)."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops * 1e6)
+
+    return {
+        "median_us": round(statistics.median(timings), 3),
+        "min_us": round(min(timings), 3),
+        "loops": loops,
+    }
+
+
+def build_cases() -> dict[str, Callable[[], Any]]:
+    """Build benchmark cases (name -> zero-argument callable)."""
+    from app.mcp.server import call_tool
+    from app.models import ExplainWordResponse, ExtractVocabularyResponse, SummarizeArticleResponse
+    from app.services.cache import LocalCache, ResponseCache, SharedCache, encode_json
+    from app.services.document import Document, get_document
+    from app.services.learning_planner import LearningPlanner
+    from app.services.spaced_repetition import FSRS, CardBatch
+
+    llm = install_stub_llm()
+    planner = LearningPlanner()
+    # 文脈付きの explain_word はコアと語義を並行に取得するのでイベントループで回す
+    loop = asyncio.new_event_loop()
+
+    plan_text = canned_response_for("learning plan")
+    vocab_text = "Here are the words:\n" + json.dumps(VOCABULARY_RESPONSE, ensure_ascii=False)
+    article_3k = ARTICLE[:3000]
+
+    shared = SharedCache(Path(tempfile.mkdtemp()) / "cache", 8 * 1024 * 1024)
+    two_tier = ResponseCache(LocalCache(1024), shared, ttl=3600)
+    shared_only = ResponseCache(LocalCache(0), shared, ttl=3600)
+    cache_params = {"word": "resilient", "language": "english", "user_level": "B1"}
+    two_tier.set("explain_word", cache_params, EXPLAIN_WORD_RESPONSE)
+
+    # 復習カード 10 万枚（最大 60 日前に復習、1 割は新規）
+    rng = np.random.default_rng(0)
+    fsrs = FSRS()
+    card_count = 100_000
+    srs_now = 1.75e9
+    stability = rng.uniform(0.5, 100, card_count)
+    last_review = srs_now - rng.uniform(0, 60, card_count) * 86400
+    srs_cards = CardBatch(
+        stability=stability,
+        difficulty=rng.uniform(1, 10, card_count),
+        last_review=last_review,
+        due=last_review + stability * 86400,
+        reps=rng.integers(0, 10, card_count).astype(np.int32),
+        lapses=np.zeros(card_count, dtype=np.int32),
+    )
+    srs_ratings = rng.integers(1, 5, card_count)
+
+    def extract_object(text: str) -> Any:
+        json_start = text.find("{")
+        json_end = text.rfind("}") + 1
+        return json.loads(text[json_start:json_end])
+
+    return {
+        # プロンプト構築のみ（f-string）
+        "prompt.explain_word": lambda: (
+            f"You are an expert language teacher helping a B1 level learner.\n"
+            f"Provide explanations in japanese.\n{json.dumps(EXPLAIN_WORD_RESPONSE)}",
+            f"Explain the english word: resilient\nContext: {ARTICLE[:200]}",
+        ),
+        "prompt.summarize_article": lambda: (
+            f"Summarize this english article for a B1 learner:\n\n{ARTICLE[:4000]}"
+        ),
+        # 記事の前処理（初回の構築と、2 回目以降のメモ化ヒット）
+        "document.build": lambda: Document(ARTICLE).statistics(),
+        "document.memo_hit": lambda: get_document(ARTICLE).excerpt(4000),
+        # JSON 抽出（find/rfind スライス + json.loads）
+        "json.extract_learning_plan": lambda: extract_object(plan_text),
+        "json.extract_vocabulary_50": lambda: extract_object(vocab_text),
+        # サービスメソッド全体（プロンプト構築 + スタブ生成 + JSON 抽出）
+        "service.explain_word": lambda: run_sync(llm.explain_word("resilient", "english", "B1")),
+        "service.explain_word_in_context": lambda: loop.run_until_complete(
+            llm.explain_word("resilient", "english", "B1", context=ARTICLE[:200])
+        ),
+        "service.analyze_article_difficulty": lambda: run_sync(
+            llm.analyze_article_difficulty(article_3k)
+        ),
+        "service.summarize_article": lambda: run_sync(llm.summarize_article(ARTICLE)),
+        "service.extract_vocabulary_50": lambda: run_sync(
+            llm.extract_vocabulary(ARTICLE, max_words=50)
+        ),
+        "service.suggest_learning_plan": lambda: run_sync(
+            planner.suggest_learning_plan(vocabulary_count=420, articles_read=37)
+        ),
+        # Pydantic レスポンスモデル構築・シリアライズ
+        "pydantic.explain_word": lambda: ExplainWordResponse(**EXPLAIN_WORD_RESPONSE),
+        "pydantic.summarize_article": lambda: SummarizeArticleResponse(**SUMMARY_RESPONSE),
+        "pydantic.extract_vocabulary_50": lambda: ExtractVocabularyResponse(**VOCABULARY_RESPONSE),
+        "pydantic.dump_json.extract_vocabulary_50": lambda: ExtractVocabularyResponse(
+            **VOCABULARY_RESPONSE
+        ).model_dump_json(),
+        # レスポンスキャッシュ（ローカル LRU / 共有メモリ）
+        "cache.local_hit.explain_word": lambda: two_tier.get("explain_word", cache_params),
+        "cache.local_hit_bytes.explain_word": lambda: two_tier.get_bytes(
+            "explain_word", cache_params
+        ),
+        "cache.shared_hit.explain_word": lambda: shared_only.get("explain_word", cache_params),
+        "cache.set.explain_word": lambda: shared_only.set(
+            "explain_word", cache_params, EXPLAIN_WORD_RESPONSE
+        ),
+        # MCP 経路のシリアライズ
+        "mcp.dumps_indent.learning_plan": lambda: json.dumps(
+            LEARNING_PLAN_RESPONSE, ensure_ascii=False, indent=2
+        ),
+        "mcp.dumps_indent.vocabulary_50": lambda: json.dumps(
+            VOCABULARY_RESPONSE, ensure_ascii=False, indent=2
+        ),
+        "json.encode_json.vocabulary_50": lambda: encode_json(VOCABULARY_RESPONSE),
+        "mcp.call_tool.explain_word": lambda: loop.run_until_complete(
+            call_tool("explain_word", {"word": "resilient", "context": ARTICLE[:200]})
+        ),
+        "mcp.call_tool.suggest_learning_plan": lambda: run_sync(
+            call_tool("suggest_learning_plan", {"vocabulary_count": 420, "articles_read": 37})
+        ),
+        # 間隔反復（NumPy 一括計算）
+        "srs.due_queue_100k": lambda: fsrs.due_queue(srs_cards, srs_now, limit=200),
+        "srs.review_100k": lambda: fsrs.review(srs_cards, srs_ratings, srs_now),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def last_record(path: Path) -> dict[str, Any] | None:
+    if not path.exists():
+        return None
+    lines = [line for line in path.read_text().splitlines() if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="NewsLingua AI Service microbenchmarks")
+    parser.add_argument("--only", default="", help="Run only cases containing this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--record", action="store_true", help="Append results to history")
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH)
+    args = parser.parse_args()
+
+    # サービス経路はキャッシュなしで計測する（ヒット経路は cache.* で別に計測）
+    os.environ["CACHE_ENABLED"] = "false"
+    os.environ["WORD_PACKS_ENABLED"] = "false"
+
+    import logging
+
+    import structlog
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    previous = last_record(args.history)
+    previous_results = previous["results"] if previous else {}
+
+    results: dict[str, dict[str, float]] = {}
+    for name, func in build_cases().items():
+        if args.only and args.only not in name:
+            continue
+        func()  # warm-up
+        stats = measure(func, args.min_time, args.repeat)
+        results[name] = stats
+
+        delta = ""
+        if name in previous_results:
+            before = previous_results[name]["median_us"]
+            delta = f"  ({(stats['median_us'] - before) / before * 100:+.1f}% vs {previous['revision']})"
+        print(
+            f"{name:<44} median={stats['median_us']:>10.2f}us min={stats['min_us']:>10.2f}us{delta}"
+        )
+
+    if args.record:
+        record = {
+            "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "results": results,
+        }
+        with args.history.open("a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Recorded to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
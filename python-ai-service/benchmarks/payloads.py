@@ -0,0 +1,485 @@
+"""Realistic request/response payloads shared by the benchmark tools.
+
+The fake LLM server answers with these canned responses, and the load
+generator drives the API and MCP tools with the matching requests.
+"""
+
+import json
+from typing import Any
+
+ARTICLE_PARAGRAPH = (
+    "The central bank raised interest rates by a quarter of a percentage point on Wednesday, "
+    "citing persistent inflation and a resilient labour market. Policymakers signalled that "
+    "further increases were possible if price pressures failed to ease. "
+    "Economists had widely anticipated the move, although several analysts warned that the "
+    "cumulative effect of tighter monetary policy could weigh on household spending. "
+    "Mortgage lenders responded within hours, with some of the largest banks announcing "
+    "higher rates on fixed-term products. Consumer groups criticised the decision, arguing "
+    "that vulnerable borrowers were already struggling with elevated energy bills. "
+)
+
+ARTICLE = ARTICLE_PARAGRAPH * 6
+
+# 段落に分けた記事と、段落を 1 つ追加した改訂版（要約の差分更新用）
+PREVIOUS_ARTICLE = "\n\n".join([ARTICLE_PARAGRAPH.strip()] * 6)
+REVISED_ARTICLE = (
+    PREVIOUS_ARTICLE
+    + "\n\nLawmakers said on Thursday that they were considering additional support for "
+    "households facing higher borrowing costs, including a temporary cap on energy bills."
+)
+
+VOCABULARY_WORDS = [
+    "inflation",
+    "resilient",
+    "policymaker",
+    "anticipate",
+    "cumulative",
+    "monetary",
+    "household",
+    "mortgage",
+    "lender",
+    "criticise",
+    "vulnerable",
+    "borrower",
+    "elevated",
+    "persistent",
+    "signal",
+    "increase",
+    "analyst",
+    "pressure",
+    "decision",
+    "consumer",
+    "spending",
+    "economy",
+    "forecast",
+    "recession",
+    "deficit",
+    "surplus",
+    "tariff",
+    "subsidy",
+    "regulation",
+    "legislation",
+    "stimulus",
+    "austerity",
+    "volatility",
+    "yield",
+    "bond",
+    "equity",
+    "dividend",
+    "liquidity",
+    "solvency",
+    "collateral",
+    "depreciation",
+    "appreciation",
+    "benchmark",
+    "commodity",
+    "consensus",
+    "downturn",
+    "fiscal",
+    "incentive",
+    "productivity",
+    "sustainable",
+]
+
+EXPLAIN_WORD_RESPONSE: dict[str, Any] = {
+    "word": "resilient",
+    "pronunciation": "/rɪˈzɪliənt/",
+    "part_of_speech": "adjective",
+    "definition": "困難な状況から素早く回復できる、打たれ強い",
+    "etymology": "ラテン語 resilire（跳ね返る）から",
+    "synonyms": ["robust", "tough", "hardy", "adaptable"],
+    "antonyms": ["fragile", "vulnerable", "weak"],
+    "examples": [
+        "The economy proved resilient despite the crisis.",
+        "Children are often more resilient than adults expect.",
+    ],
+    "memory_tips": "re（再び）+ silire（跳ぶ）＝何度でも跳ね返る",
+    "usage_notes": "経済・人・組織などに幅広く使われる。",
+}
+
+WORD_SENSE_RESPONSE: dict[str, Any] = {
+    "part_of_speech": "adjective",
+    "definition": "（この文では）景気が悪化しても労働市場が崩れず底堅い",
+    "usage_notes": "labour market を修飾し、経済指標の強さを表す。",
+}
+
+EXAMPLES_RESPONSE: list[dict[str, str]] = [
+    {
+        "sentence": f"Analysts described the market as {adj} after the announcement.",
+        "translation": f"アナリストは発表後の市場を{ja}と表現した。",
+    }
+    for adj, ja in [("resilient", "底堅い"), ("volatile", "不安定"), ("buoyant", "活況")]
+]
+
+DIFFICULTY_RESPONSE: dict[str, Any] = {
+    "cefr_level": "B2",
+    "difficulty_score": 0.64,
+    "vocabulary_level": "advanced",
+    "grammar_complexity": "moderate",
+    "average_sentence_length": 21.5,
+    "difficult_words": [{"word": w, "definition": f"{w} の定義"} for w in VOCABULARY_WORDS[:15]],
+    "reading_time_minutes": 4,
+}
+
+SUMMARY_RESPONSE: dict[str, Any] = {
+    "summary": "中央銀行は根強いインフレと底堅い労働市場を理由に利上げを決定した。" * 3,
+    "key_points": [
+        "中央銀行が0.25ポイントの利上げを実施",
+        "さらなる利上げの可能性を示唆",
+        "住宅ローン金利が即座に上昇",
+        "消費者団体は決定を批判",
+    ],
+    "main_topic": "金融政策",
+    "vocabulary_to_learn": [
+        {"word": w, "definition": f"{w} の意味"} for w in VOCABULARY_WORDS[:10]
+    ],
+}
+
+SUMMARY_UPDATE_RESPONSE: dict[str, Any] = {
+    **SUMMARY_RESPONSE,
+    "key_points": [*SUMMARY_RESPONSE["key_points"], "議会は追加の景気対策を検討中"],
+    "vocabulary_to_learn": [
+        {"word": w, "definition": f"{w} の意味"} for w in VOCABULARY_WORDS[10:12]
+    ],
+}
+
+VOCABULARY_RESPONSE: dict[str, Any] = {
+    "words": [
+        {
+            "word": w,
+            "definition": f"{w} の日本語定義",
+            "cefr_level": ("B1", "B2", "C1")[i % 3],
+            "sentence": f"The report mentioned {w} several times in its conclusion.",
+            "importance": ("high", "medium", "low")[i % 3],
+        }
+        for i, w in enumerate(VOCABULARY_WORDS)
+    ]
+}
+
+GRAMMAR_RESPONSE: dict[str, Any] = {
+    "grammar_points": [
+        {
+            "pattern": "現在完了形",
+            "explanation": "過去の出来事が現在に影響していることを示す",
+            "example_in_text": "Policymakers have signalled further increases.",
+        },
+        {
+            "pattern": "分詞構文",
+            "explanation": "理由や付帯状況を簡潔に表す",
+            "example_in_text": "citing persistent inflation",
+        },
+    ],
+    "sentence_structure": "主節＋分詞構文による理由の補足",
+    "common_mistakes": ["分詞の主語の不一致"],
+    "tips": ["分詞構文は接続詞＋主語＋動詞に書き換えて理解する"],
+}
+
+COMPREHENSION_RESPONSE: list[dict[str, Any]] = [
+    {
+        "question": f"Question {i + 1}: Why did the central bank raise rates?",
+        "options": ["Inflation", "Deflation", "Elections", "Exports"],
+        "correct_index": 0,
+        "explanation": "The article cites persistent inflation.",
+    }
+    for i in range(3)
+]
+
+REGISTER_RESPONSE: dict[str, Any] = {
+    "expression": "gonna",
+    "register": "CASUAL",
+    "formality_score": 2,
+    "definition": "going to の口語形",
+    "tpo_advice": {
+        "appropriate_situations": ["友人との会話", "SNS"],
+        "inappropriate_situations": ["ビジネスメール", "論文"],
+        "audience": "親しい相手",
+    },
+    "synonyms": [
+        {"word": "will", "register": "FORMAL"},
+        {"word": "going to", "register": "NEUTRAL"},
+        {"word": "gonna", "register": "CASUAL"},
+    ],
+    "usage_examples": {
+        "formal_context": "We are going to announce the results.",
+        "casual_context": "I'm gonna grab a coffee.",
+        "written_context": "We will publish the report tomorrow.",
+    },
+    "cultural_notes": "話し言葉では非常に一般的。",
+}
+
+SITUATIONAL_RESPONSE: dict[str, Any] = {
+    "word": "leverage",
+    "examples": {
+        key: {
+            "sentence": f"Example of leverage in {key}.",
+            "translation": "訳文",
+            "register": register,
+            "context_note": "使用上の注意",
+        }
+        for key, register in [
+            ("business_email", "FORMAL"),
+            ("casual_conversation", "CASUAL"),
+            ("sns_post", "SLANG"),
+            ("academic_writing", "FORMAL"),
+            ("news_article", "NEUTRAL"),
+        ]
+    },
+    "tips": "ビジネス文脈で頻出。",
+}
+
+SLANG_RESPONSE: dict[str, Any] = {
+    "slang": "rizz",
+    "meaning": "魅力、人を惹きつける能力",
+    "register": "SLANG",
+    "origin": {"source": "Twitch", "year": "2021", "background": "charisma の短縮"},
+    "usage": {
+        "how_to_use": "名詞・動詞として使う",
+        "common_contexts": ["恋愛", "SNS"],
+        "variations": ["rizzler", "rizz up"],
+    },
+    "tpo_advice": {
+        "appropriate": ["友人との会話"],
+        "avoid": ["職場"],
+        "audience": "Z世代",
+    },
+    "examples": [
+        {
+            "sentence": "He's got serious rizz.",
+            "translation": "彼は本当に魅力がある。",
+            "context": "会話",
+        }
+    ],
+    "related_slang": [{"word": "game", "relationship": "similar"}],
+    "generational_note": "Gen Z",
+    "formal_alternatives": ["charisma", "charm"],
+    "popularity_rating": 9,
+    "cultural_sensitivity": "特になし",
+}
+
+LEARNING_PLAN_RESPONSE: dict[str, Any] = {
+    "summary": "B1からB2へ到達するための12週間の学習プラン。" * 2,
+    "estimated_duration": "約3〜4ヶ月",
+    "current_assessment": {
+        "strengths": ["ニュース記事の要旨把握", "基本的な経済用語"],
+        "areas_to_improve": ["リスニング", "複雑な構文の理解", "コロケーション"],
+        "readiness_score": 62,
+    },
+    "weekly_goals": {
+        "vocabulary": {"target": 80, "focus_areas": ["経済", "政治", "テクノロジー"]},
+        "reading": {
+            "articles_per_week": 6,
+            "recommended_difficulty": "B1-B2",
+            "topics": ["economy", "technology", "science"],
+        },
+        "practice": {"flashcard_reviews": "40", "quiz_sessions": "3"},
+    },
+    "daily_routine": {
+        "morning": "通勤中にフラッシュカードを20枚復習",
+        "afternoon": "ニュース記事を1本精読",
+        "evening": "その日の新出単語を例文とともに復習",
+        "estimated_time": "45",
+    },
+    "milestone_targets": [
+        {"week": week, "goal": f"{week}週目の目標", "metrics": "語彙数と読解クイズの正答率"}
+        for week in (1, 2, 4, 6, 8, 10, 12)
+    ],
+    "recommended_content": {
+        "article_categories": ["business", "technology", "world"],
+        "vocabulary_themes": ["金融政策", "気候変動", "選挙"],
+        "grammar_points": ["仮定法", "分詞構文", "関係副詞"],
+    },
+    "weak_area_strategies": [
+        {
+            "area": area,
+            "strategy": f"{area}を毎日15分練習する",
+            "resources": ["NewsLingua 記事", "ポッドキャスト", "フラッシュカード"],
+        }
+        for area in ("リスニング", "文法", "語彙", "速読")
+    ],
+    "motivational_tips": [
+        "毎日同じ時間に学習する",
+        "興味のある記事から読む",
+        "小さな達成を記録する",
+    ],
+    "next_actions": [
+        {
+            "action": f"アクション{i + 1}",
+            "priority": ("high", "medium", "low")[i],
+            "estimated_time": "15",
+        }
+        for i in range(3)
+    ],
+}
+
+PROGRESS_RESPONSE: dict[str, Any] = {
+    "overall_progress": {"score": 71, "trend": "improving", "summary": "順調に成長しています"},
+    "vocabulary_insights": {
+        "pace": "average",
+        "retention_estimate": "75%",
+        "recommendation": "復習間隔を広げましょう",
+    },
+    "reading_insights": {"consistency": "consistent", "recommendation": "B2の記事に挑戦"},
+    "engagement": {
+        "streak_assessment": "良好",
+        "xp_pace": "平均以上",
+        "motivation_level": "high",
+    },
+    "achievements_near": ["30日連続学習", "語彙500語"],
+    "personalized_encouragement": "この調子で続けましょう！",
+}
+
+COLLOCATIONS_RESPONSE: list[dict[str, str]] = [
+    {
+        "collocation": f"raise {noun}",
+        "meaning": f"{noun}を上げる",
+        "example": f"They raised {noun}.",
+    }
+    for noun in ("rates", "prices", "awareness", "funds", "concerns")
+]
+
+# (プロンプト中のマーカー, 返すレスポンス) - 上から順に最初に一致したものを使う
+CANNED_RESPONSES: list[tuple[str, Any]] = [
+    ("comprehension questions", COMPREHENSION_RESPONSE),
+    ("learning progress", PROGRESS_RESPONSE),
+    ("learning plan", LEARNING_PLAN_RESPONSE),
+    ("slang expression", SLANG_RESPONSE),
+    ("different situations", SITUATIONAL_RESPONSE),
+    ("register (formality level)", REGISTER_RESPONSE),
+    ("collocations", COLLOCATIONS_RESPONSE),
+    ("Analyze the grammar", GRAMMAR_RESPONSE),
+    ("example sentences", EXAMPLES_RESPONSE),
+    ("used in the given sentence", WORD_SENSE_RESPONSE),
+    ("Explain the", EXPLAIN_WORD_RESPONSE),
+    ("Revise the summary", SUMMARY_UPDATE_RESPONSE),
+    ("Summarize", SUMMARY_RESPONSE),
+    ("Extract", VOCABULARY_RESPONSE),
+    ("difficulty", DIFFICULTY_RESPONSE),
+]
+
+
+def canned_response_for(text: str) -> str:
+    """Return the canned LLM output text matching a prompt."""
+    for marker, payload in CANNED_RESPONSES:
+        if marker in text:
+            return json.dumps(payload, ensure_ascii=False)
+    return "{}"
+
+
+# 復習カード（列指向）: 半分は復習済み、残りは新規
+REVIEW_NOW = 1_750_000_000.0
+REVIEW_CARD_COUNT = 2000
+REVIEW_CARDS: dict[str, list[Any]] = {
+    "ids": [f"card-{i}" for i in range(REVIEW_CARD_COUNT)],
+    "stability": [0.0 if i % 2 else 1.0 + i % 30 for i in range(REVIEW_CARD_COUNT)],
+    "difficulty": [0.0 if i % 2 else 1.0 + i % 9 for i in range(REVIEW_CARD_COUNT)],
+    "last_review": [
+        0.0 if i % 2 else REVIEW_NOW - 86400.0 * (i % 40) for i in range(REVIEW_CARD_COUNT)
+    ],
+    "due": [0.0 if i % 2 else REVIEW_NOW + 86400.0 * (i % 7 - 3) for i in range(REVIEW_CARD_COUNT)],
+    "reps": [0 if i % 2 else 1 + i % 12 for i in range(REVIEW_CARD_COUNT)],
+    "lapses": [0 if i % 2 else i % 3 for i in range(REVIEW_CARD_COUNT)],
+}
+REVIEW_RATINGS = [1 + i % 4 for i in range(REVIEW_CARD_COUNT)]
+
+# レベル判定の項目バンク（vocabulary_question のエクスポート形式）
+ASSESSMENT_ITEMS: list[dict[str, Any]] = [
+    {
+        "id": f"item-{level}-{i}",
+        "language": "english",
+        "cefrLevel": level,
+        "difficulty": i / 39,
+        "options": ["a", "b", "c", "d"],
+    }
+    for level in ("A1", "A2", "B1", "B2", "C1", "C2")
+    for i in range(40)
+]
+
+# HTTP API routes under /api (method, path, JSON body)
+HTTP_TARGETS: list[tuple[str, str, dict[str, Any] | None]] = [
+    ("GET", "/api/health", None),
+    (
+        "POST",
+        "/api/words/explain",
+        {"word": "resilient", "user_level": "B1", "context": ARTICLE[:200]},
+    ),
+    ("POST", "/api/words/examples", {"word": "resilient", "count": 3}),
+    ("POST", "/api/articles/analyze-difficulty", {"content": ARTICLE}),
+    ("POST", "/api/articles/summarize", {"content": ARTICLE, "user_level": "B1"}),
+    ("POST", "/api/articles/extract-vocabulary", {"content": ARTICLE, "max_words": 50}),
+    (
+        "POST",
+        "/api/articles/summarize/update",
+        {
+            "previous_content": PREVIOUS_ARTICLE,
+            "previous_summary": SUMMARY_RESPONSE,
+            "content": REVISED_ARTICLE,
+            "user_level": "B1",
+        },
+    ),
+    ("POST", "/api/articles/comprehension-questions", {"content": ARTICLE, "count": 3}),
+    ("POST", "/api/articles/opened", {"content": ARTICLE, "user_level": "B1"}),
+    ("POST", "/api/reviews/due", {"cards": REVIEW_CARDS, "now": REVIEW_NOW}),
+    (
+        "POST",
+        "/api/reviews/bulk",
+        {"cards": REVIEW_CARDS, "ratings": REVIEW_RATINGS, "reviewed_at": None},
+    ),
+    (
+        "POST",
+        "/api/stories/assign",
+        {"id": "loadgen-article", "title": "Central bank raises rates", "content": ARTICLE},
+    ),
+    ("GET", "/api/stories?min_size=1", None),
+]
+
+# NDJSON で送るルート (path, 1 行ずつの記事)
+NDJSON_TARGETS: list[tuple[str, list[dict[str, Any]]]] = [
+    (
+        "/api/articles/ingest",
+        [
+            {
+                "id": f"loadgen-{i}",
+                "title": "Central bank raises rates",
+                "content": ARTICLE,
+                "analyses": ["difficulty", "summary", "vocabulary", "questions", "story"],
+            }
+            for i in range(4)
+        ],
+    ),
+]
+
+# WebSocket のルート (path, 1 セッションで送る検索)
+WEBSOCKET_TARGETS: list[tuple[str, list[dict[str, Any]]]] = [
+    (
+        "/api/words/session",
+        [
+            {"id": i, "op": "explain", "word": word, "user_level": "B1"}
+            for i, word in enumerate(VOCABULARY_WORDS[:4])
+        ]
+        + [{"id": 4, "op": "examples", "word": "resilient", "count": 3}],
+    ),
+]
+
+# MCP tools (tool name, arguments)
+MCP_TARGETS: list[tuple[str, dict[str, Any]]] = [
+    ("explain_word", {"word": "resilient", "context": ARTICLE[:200]}),
+    ("generate_comprehension_questions", {"content": ARTICLE, "count": 3}),
+    ("generate_examples", {"word": "resilient"}),
+    ("analyze_difficulty", {"content": ARTICLE}),
+    ("extract_vocabulary", {"content": ARTICLE, "max_words": 50}),
+    ("explain_grammar", {"text": ARTICLE[:400]}),
+    ("summarize_article", {"content": ARTICLE}),
+    ("analyze_register", {"expression": "gonna"}),
+    ("generate_situational_examples", {"word": "leverage"}),
+    ("get_buzzwords", {"count": 10}),
+    ("analyze_slang", {"slang": "rizz"}),
+    (
+        "suggest_learning_plan",
+        {
+            "vocabulary_count": 420,
+            "articles_read": 37,
+            "weak_areas": ["listening", "grammar"],
+            "interests": ["economy", "technology"],
+        },
+    ),
+]
@@ -0,0 +1 @@
+"""Offline build tools for the AI service."""
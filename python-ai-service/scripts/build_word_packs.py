@@ -0,0 +1,162 @@
+"""Build word packs - Precompute explain_word results for a word list.
+
+Usage:
+    python -m scripts.build_word_packs --words words.txt
+    python -m scripts.build_word_packs --words words.txt --native-languages japanese,korean \
+        --levels B1,B2 --concurrency 8
+    python -m scripts.build_word_packs --words words.txt --incremental   # only new words
+
+The word list has one word per line (blank lines and ``#`` comments are
+ignored). One pack per (language, native_language, level) is written to
+``--output`` (default ``WORD_PACKS_DIR``). Calls go through the normal
+LLMService path with background priority, so the builder can run next to a
+serving instance without starving users.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_NATIVE_LANGUAGES = "japanese,english,korean,chinese,spanish"
+DEFAULT_LEVELS = "A1,A2,B1,B2,C1,C2"
+
+
+def read_word_list(path: Path) -> list[str]:
+    """Words of the list file, de-duplicated by their lookup key."""
+    from app.services.word_packs import normalize_word
+
+    words: dict[str, str] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        word = line.split("#", 1)[0].strip()
+        if word:
+            words.setdefault(normalize_word(word), word)
+    return list(words.values())
+
+
+async def build_pack(
+    words: list[str],
+    language: str,
+    native_language: str,
+    level: str,
+    output: Path,
+    concurrency: int,
+    incremental: bool,
+) -> None:
+    from app.services.cache import call_json
+    from app.services.llm import get_llm_service
+    from app.services.word_packs import WordPack, normalize_word, pack_filename, write_pack
+
+    llm = get_llm_service()
+    path = output / pack_filename(language, native_language, level)
+    entries: dict[str, bytes] = {}
+    if incremental and path.is_file():
+        pack = WordPack(path)
+        entries = pack.entries()
+        pack.close()
+    pending = [word for word in words if normalize_word(word) not in entries]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed: list[str] = []
+
+    async def explain(word: str) -> None:
+        async with semaphore:
+            try:
+                body = await call_json(
+                    llm.explain_word,
+                    {
+                        "word": word,
+                        "language": language,
+                        "user_level": level,
+                        "context": None,
+                        "native_language": native_language,
+                    },
+                )
+            except Exception as e:
+                print(f"  {word}: {type(e).__name__}: {e}", file=sys.stderr)
+                failed.append(word)
+                return
+            # JSON として解析できなかった応答（生テキストのフォールバック）は収録しない
+            if not json.loads(body).get("part_of_speech"):
+                failed.append(word)
+                return
+            entries[word] = body
+
+    started = time.perf_counter()
+    await asyncio.gather(*(explain(word) for word in pending))
+    write_pack(
+        path,
+        entries,
+        {
+            "language": language,
+            "native_language": native_language,
+            "level": level,
+            "model": llm.default_model,
+        },
+    )
+    print(
+        f"{path.name}: {len(entries)} words ({len(pending) - len(failed)} generated, "
+        f"{len(failed)} failed) in {time.perf_counter() - started:.1f}s"
+    )
+
+
+async def run(args: argparse.Namespace) -> int:
+    from app.core.config import settings
+    from app.core.tenancy import current_tenant
+    from app.services.scheduler import Priority, current_priority
+
+    # 配信中のユーザーより優先度を下げ、テナントも分けて公平キューに載せる
+    current_priority.set(Priority.BACKGROUND)
+    current_tenant.set("word-pack-builder")
+
+    words = read_word_list(args.words)
+    output = args.output or Path(settings.word_packs_dir)
+    levels = [level.strip().upper() for level in args.levels.split(",") if level.strip()]
+    native_languages = [
+        native.strip().lower()
+        for native in args.native_languages.split(",")
+        if native.strip() and native.strip().lower() != args.language
+    ]
+    print(
+        f"{len(words)} words x {len(native_languages)} native languages x {len(levels)} levels"
+        f" -> {output}"
+    )
+
+    for native_language in native_languages:
+        for level in levels:
+            await build_pack(
+                words,
+                args.language,
+                native_language,
+                level,
+                output,
+                args.concurrency,
+                args.incremental,
+            )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=Path, required=True, help="Word list file")
+    parser.add_argument("--language", default="english", help="Language of the words")
+    parser.add_argument("--native-languages", default=DEFAULT_NATIVE_LANGUAGES)
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="Comma-separated CEFR levels")
+    parser.add_argument("--output", type=Path, default=None, help="Pack directory")
+    parser.add_argument("--concurrency", type=int, default=8, help="Explanations in flight")
+    parser.add_argument(
+        "--incremental", action="store_true", help="Keep packed words, generate only new ones"
+    )
+    args = parser.parse_args()
+    args.language = args.language.lower()
+
+    # app をインポートする前に設定する（既存のパックから再収録しないようにする）
+    os.environ["WORD_PACKS_ENABLED"] = "false"
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
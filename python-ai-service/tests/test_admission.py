@@ -0,0 +1,85 @@
+"""Tests for the provider circuit breaker."""
+
+import pytest
+
+from app.services.admission import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    while breaker.state != OPEN:
+        breaker.after_call(breaker.before_call(), True)
+
+
+def test_opens_after_consecutive_failures() -> None:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    breaker.after_call(breaker.before_call(), True)
+    breaker.after_call(breaker.before_call(), True)
+    breaker.after_call(breaker.before_call(), False)  # 成功で連続失敗数は戻る
+    breaker.after_call(breaker.before_call(), True)
+    assert breaker.state == CLOSED
+
+    _open(breaker)
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after >= 59
+
+
+def test_single_trial_call_when_half_open() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    _open(breaker)
+
+    trial = breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.after_call(trial, False)
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    _open(breaker)
+
+    breaker.after_call(breaker.before_call(), True)
+
+    assert breaker.state == OPEN
+
+
+def test_cancelled_trial_allows_another_trial() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    _open(breaker)
+
+    breaker.after_call(breaker.before_call(), None)
+    assert breaker.state == HALF_OPEN
+
+    breaker.after_call(breaker.before_call(), False)
+    assert breaker.state == CLOSED
+
+
+def test_calls_from_before_the_trial_do_not_decide_it() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    slow_success = breaker.before_call()
+    slow_failure = breaker.before_call()
+    _open(breaker)
+    trial = breaker.before_call()
+
+    # 開く前から実行中だった呼び出しが試行中に終わっても状態は変わらない
+    breaker.after_call(slow_success, False)
+    breaker.after_call(slow_failure, True)
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.after_call(trial, True)
+    assert breaker.state == OPEN
+
+
+def test_disabled_breaker_never_opens() -> None:
+    breaker = CircuitBreaker(failure_threshold=0)
+
+    for _ in range(10):
+        breaker.after_call(breaker.before_call(), True)
+
+    assert breaker.state == CLOSED
@@ -0,0 +1,121 @@
+"""Tests for the adaptive level assessment stopping rules."""
+
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.services.assessment import AssessmentEngine, ItemBank
+
+LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+
+
+def _bank(per_level: int = 20) -> ItemBank:
+    items = [
+        {
+            "id": f"{level}-{i}",
+            "cefrLevel": level,
+            "difficulty": i / per_level,
+            "options": ["a", "b", "c", "d"],
+        }
+        for level in LEVELS
+        for i in range(per_level)
+    ]
+    return ItemBank(items)
+
+
+def _run(
+    engine: AssessmentEngine, answer: bool | None = None, ability: float = 0.0
+) -> dict[str, Any]:
+    """Answer until the test finishes (fixed answer, or correct when b < ability)."""
+    state = engine.start()
+    while not state["finished"]:
+        item_id = state["next_item_id"]
+        b = engine.bank.b[engine.bank.index[item_id]]
+        correct = bool(b < ability) if answer is None else answer
+        state = engine.answer(state["session_id"], item_id, correct)
+    return state
+
+
+def test_never_stops_before_min_items() -> None:
+    engine = AssessmentEngine(_bank(), min_items=6, se_target=10.0, level_confidence=0.0)
+
+    assert _run(engine, answer=True)["answered"] == 6
+
+
+def test_stops_at_max_items() -> None:
+    engine = AssessmentEngine(
+        _bank(), min_items=2, max_items=12, se_target=0.0, level_confidence=1.1
+    )
+
+    assert _run(engine, ability=0.3)["answered"] == 12
+
+
+def test_stops_once_the_level_is_confident() -> None:
+    engine = AssessmentEngine(
+        _bank(), min_items=3, max_items=40, se_target=0.0, level_confidence=0.9
+    )
+
+    state = _run(engine, ability=-1.5)
+
+    assert state["answered"] < 40
+    assert state["confidence"] >= 0.9
+    assert state["level"] == "A2"
+
+
+def test_stops_once_the_standard_error_is_small() -> None:
+    engine = AssessmentEngine(
+        _bank(), min_items=3, max_items=40, se_target=0.35, level_confidence=1.1
+    )
+
+    state = _run(engine, ability=1.4)
+
+    assert state["answered"] < 40
+    assert state["standard_error"] <= 0.35
+    assert state["level"] == "C1"
+
+
+def test_stops_when_the_bank_runs_out() -> None:
+    engine = AssessmentEngine(_bank(per_level=1), min_items=2, max_items=30, se_target=0.0)
+
+    state = _run(engine, answer=False)
+
+    assert state["answered"] == len(LEVELS)
+    assert state["finished"]
+
+
+def test_items_are_not_repeated() -> None:
+    engine = AssessmentEngine(
+        _bank(per_level=4), min_items=24, max_items=24, se_target=0.0, level_confidence=1.1
+    )
+    state = engine.start()
+    seen = []
+    while not state["finished"]:
+        seen.append(state["next_item_id"])
+        state = engine.answer(state["session_id"], seen[-1], len(seen) % 2 == 0)
+
+    assert len(seen) == len(set(seen)) == 24
+
+
+def test_only_the_pending_item_can_be_answered() -> None:
+    engine = AssessmentEngine(_bank(), min_items=1, se_target=10.0)
+    state = engine.start()
+    other = next(i for i in engine.bank.ids if i != state["next_item_id"])
+
+    with pytest.raises(ValueError, match="pending"):
+        engine.answer(state["session_id"], other, True)
+
+    finished = engine.answer(state["session_id"], state["next_item_id"], True)
+    assert finished["finished"]
+    with pytest.raises(ValueError, match="finished"):
+        engine.answer(state["session_id"], state["next_item_id"], True)
+
+
+def test_estimate_moves_toward_the_answers() -> None:
+    engine = AssessmentEngine(_bank(), min_items=8, max_items=8, se_target=0.0)
+
+    high = _run(engine, answer=True)["theta"]
+    low = _run(engine, answer=False)["theta"]
+
+    assert low < 0 < high
+    assert np.isfinite([low, high]).all()
@@ -0,0 +1,229 @@
+"""Tests for the cross-process shared response cache and ``call_json``."""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from app.services import cache
+from app.services.cache import (
+    _RECORD,
+    LocalCache,
+    ResponseCache,
+    SharedCache,
+    cached,
+    call_json,
+    encode_json,
+)
+
+SIZE = 1024 * 1024
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+def _record_position(shared: SharedCache, digest: bytes) -> int:
+    """Absolute offset of the record the index points at for ``digest``."""
+    fingerprint = shared._fingerprint(digest)
+    for slot in shared._slots(fingerprint):
+        slot_fingerprint, location = cache._SLOT.unpack_from(shared._mm, slot)
+        if slot_fingerprint == fingerprint:
+            return shared._data_offset + location - 1
+    raise AssertionError("record not indexed")
+
+
+def test_round_trip_between_handles(tmp_path: Path) -> None:
+    path = tmp_path / "cache"
+    writer = SharedCache(path, SIZE)
+    reader = SharedCache(path, SIZE)
+
+    assert writer.set(_digest("a"), b'{"word":"a"}', time.time() + 60)
+
+    assert reader.get(_digest("a")) == b'{"word":"a"}'
+    assert reader.get(_digest("b")) is None
+    writer.close()
+    reader.close()
+
+
+def test_expired_record_is_a_miss(tmp_path: Path) -> None:
+    shared = SharedCache(tmp_path / "cache", SIZE)
+    shared.set(_digest("a"), b"value", time.time() - 1)
+
+    assert shared.get(_digest("a")) is None
+    shared.close()
+
+
+def test_corrupted_value_fails_the_crc(tmp_path: Path) -> None:
+    shared = SharedCache(tmp_path / "cache", SIZE)
+    digest = _digest("a")
+    shared.set(digest, b"value", time.time() + 60)
+
+    position = _record_position(shared, digest)
+    shared._mm[position + _RECORD.size] ^= 0xFF
+
+    assert shared.get(digest) is None
+    shared.close()
+
+
+def test_record_overwritten_during_read_is_discarded(tmp_path: Path) -> None:
+    shared = SharedCache(tmp_path / "cache", SIZE)
+    digest = _digest("a")
+    shared.set(digest, b"value", time.time() + 60)
+    position = _record_position(shared, digest)
+
+    class _TornMap(bytearray):
+        """A writer reuses the record between the value read and the header re-check."""
+
+        def __getitem__(self, item):  # type: ignore[no-untyped-def]
+            value = super().__getitem__(item)
+            if isinstance(item, slice):
+                _RECORD.pack_into(self, position, cache._RECORD_MAGIC, digest, 0.0, 5, 0)
+            return value
+
+    mm = shared._mm
+    shared._mm = _TornMap(mm[:])  # type: ignore[assignment]
+    value = shared._read_record(position - shared._data_offset, digest)
+    shared._mm = mm
+
+    assert value is None
+    shared.close()
+
+
+def test_existing_segment_of_another_size_is_left_alone(tmp_path: Path) -> None:
+    path = tmp_path / "cache"
+    first = SharedCache(path, SIZE)
+    first.set(_digest("a"), b"value", time.time() + 60)
+
+    with pytest.raises(ValueError, match="expected"):
+        SharedCache(path, 2 * SIZE)
+
+    # 既存のワーカーのマップは切り詰められていない
+    assert path.stat().st_size == SIZE
+    assert first.get(_digest("a")) == b"value"
+    first.close()
+
+
+def test_get_cache_falls_back_to_local_only(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "cache"
+    path.write_bytes(b"\x00" * 4096)
+    monkeypatch.setattr(cache.settings, "shared_cache_path", str(path))
+    monkeypatch.setattr(cache.settings, "shared_cache_enabled", True)
+    monkeypatch.setattr(cache, "_cache", None)
+
+    response_cache = cache.get_cache()
+
+    assert response_cache.shared is None
+    assert path.stat().st_size == 4096
+
+
+class Entry(BaseModel):
+    word: str
+    level: str = "B1"
+    examples: list[str] = []
+
+
+class Service:
+    """A ``@cached`` method whose result the test controls."""
+
+    def __init__(self, result: Any) -> None:
+        self.result = result
+        self.calls = 0
+
+    @cached(schema=Entry, precomputed=lambda params: PREBUILT.get(params["word"]))
+    async def lookup(self, word: str, language: str = "english") -> Any:
+        self.calls += 1
+        return self.result
+
+
+PREBUILT = {"packed": b'{"word":"packed","level":"A2","examples":[]}'}
+
+
+@pytest.fixture
+def response_cache(monkeypatch: pytest.MonkeyPatch) -> ResponseCache:
+    monkeypatch.setattr(cache.settings, "cache_enabled", True)
+    monkeypatch.setattr(cache.settings, "degraded_mode", "off")
+    response_cache = ResponseCache(LocalCache(64), None, ttl=60)
+    monkeypatch.setattr(cache, "_cache", response_cache)
+    return response_cache
+
+
+async def test_call_json_bytes_match_the_cached_value(response_cache: ResponseCache) -> None:
+    service = Service({"word": "ledger", "examples": ("a ledger",)})
+    spec = Service.lookup.cache_spec  # type: ignore[attr-defined]
+    params = {"word": "ledger", "language": "english"}
+
+    miss = await call_json(service.lookup, {"word": "ledger"})
+    hit = await call_json(service.lookup, {"word": "ledger"})
+
+    # 未命中でもスキーマで正規化した値をそのまま保存・返却する
+    stored = response_cache.get_bytes(spec.namespace, params)
+    assert miss == hit == stored == encode_json(response_cache.get(spec.namespace, params))
+    assert json.loads(miss) == {"word": "ledger", "level": "B1", "examples": ["a ledger"]}
+    # デコレートされたメソッドも同じ値を返す
+    assert await service.lookup("ledger") == json.loads(miss)
+    assert service.calls == 1
+
+
+async def test_call_json_encodes_once_without_the_cache(
+    response_cache: ResponseCache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cache.settings, "cache_enabled", False)
+    service = Service({"word": "ledger"})
+
+    body = await call_json(service.lookup, {"word": "ledger"})
+
+    assert json.loads(body) == {"word": "ledger", "level": "B1", "examples": []}
+    assert len(response_cache.local) == 0
+
+
+async def test_call_json_returns_precomputed_bytes_as_stored(response_cache: ResponseCache) -> None:
+    service = Service({"word": "unused"})
+
+    assert await call_json(service.lookup, {"word": "packed"}) == PREBUILT["packed"]
+    assert service.calls == 0
+
+
+async def test_call_json_strict_raises_on_a_schema_mismatch(response_cache: ResponseCache) -> None:
+    service = Service({"definition": "no word"})
+
+    with pytest.raises(ValidationError):
+        await call_json(service.lookup, {"word": "ledger"})
+    assert len(response_cache.local) == 0
+
+
+async def test_call_json_non_strict_encodes_a_mismatch_as_is(response_cache: ResponseCache) -> None:
+    # MCP ツールは不一致の結果もそのまま返す（キャッシュはしない）
+    service = Service({"definition": "no word"})
+
+    body = await call_json(service.lookup, {"word": "ledger"}, strict=False)
+    again = await call_json(service.lookup, {"word": "ledger"}, strict=False)
+
+    assert body == again == encode_json({"definition": "no word"})
+    assert service.calls == 2
+    assert len(response_cache.local) == 0
+
+
+async def test_call_json_non_strict_returns_error_payloads_uncached(
+    response_cache: ResponseCache,
+) -> None:
+    service = Service({"error": "upstream failed"})
+
+    body = await call_json(service.lookup, {"word": "ledger"}, strict=False)
+
+    assert json.loads(body) == {"error": "upstream failed"}
+    assert len(response_cache.local) == 0
+
+
+async def test_call_json_encodes_undecorated_methods() -> None:
+    class Plain:
+        async def plan(self, weeks: int) -> dict[str, Any]:
+            return {"weeks": weeks, "goal": "B2"}
+
+    assert await call_json(Plain().plan, {"weeks": 4}) == b'{"weeks":4,"goal":"B2"}'
@@ -0,0 +1,87 @@
+"""Tests for recording and replaying provider calls."""
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.services import llm
+from app.services.cassette import CassetteMissError, LLMCassette
+
+
+class FakeMessages:
+    """Stands in for ``client.messages`` and counts provider calls."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+
+    async def create(self, **kwargs: Any) -> Any:
+        self.calls.append(kwargs)
+        text = f"Answer {len(self.calls)}"
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=text)],
+            stop_reason="end_turn",
+            usage=SimpleNamespace(input_tokens=12, output_tokens=3),
+        )
+
+
+def _service(monkeypatch: pytest.MonkeyPatch, cassette: LLMCassette) -> llm.LLMService:
+    monkeypatch.setattr(llm, "get_cassette", lambda: cassette)
+    return llm.LLMService()
+
+
+@pytest.fixture(params=["llm.jsonl", "llm.jsonl.gz"])
+def path(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    return tmp_path / "cassettes" / request.param
+
+
+async def test_recorded_completion_is_replayed_by_request(
+    path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test")
+    recorder = _service(monkeypatch, LLMCassette(path, "record"))
+    provider = FakeMessages()
+    monkeypatch.setattr(recorder.client, "messages", provider)
+
+    recorded = await recorder.generate("Explain ledger", system="Be brief", max_tokens=100)
+    await recorder.generate("Explain reserves", system="Be brief", max_tokens=100)
+
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "")
+    replayer = _service(monkeypatch, LLMCassette(path, "replay", latency_scale=0))
+    monkeypatch.setattr(replayer.client, "messages", FakeMessages())
+
+    # 同じパラメータのリクエストには録画した応答を、呼び出し順に関係なく返す
+    assert await replayer.generate("Explain reserves", system="Be brief", max_tokens=100) == (
+        "Answer 2"
+    )
+    assert await replayer.generate("Explain ledger", system="Be brief", max_tokens=100) == recorded
+    assert recorded == "Answer 1"
+    assert len(provider.calls) == 2
+    assert replayer.client.messages.calls == []
+
+
+async def test_unrecorded_request_is_a_miss(path: Path) -> None:
+    cassette = LLMCassette(path, "replay")
+
+    with pytest.raises(CassetteMissError):
+        await cassette.replay({"model": "m", "messages": []})
+
+
+async def test_repeated_recordings_are_replayed_in_turn(path: Path) -> None:
+    request = {"model": "m", "messages": [{"role": "user", "content": "Hi"}]}
+    recorder = LLMCassette(path, "record")
+    for text in ("first", "second"):
+        recorder.record(
+            request,
+            text=text,
+            stop_reason="end_turn",
+            input_tokens=1,
+            output_tokens=1,
+            latency_ms=0,
+        )
+
+    replayer = LLMCassette(path, "replay")
+    texts = [(await replayer.replay(dict(request))).text for _ in range(3)]
+
+    assert texts == ["first", "second", "first"]
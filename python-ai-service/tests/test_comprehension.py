@@ -0,0 +1,168 @@
+"""Tests for comprehension quizzes served from per-article question pools."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import cache, comprehension
+from app.services.cache import LocalCache, ResponseCache
+from app.services.comprehension import ComprehensionQuizService, pool_id
+
+ARTICLE = "The central bank kept interest rates unchanged on Tuesday. " * 10
+
+
+def _question(index: int) -> dict[str, Any]:
+    return {
+        "question": f"Question {index}?",
+        "options": ["a", "b", "c", "d"],
+        "correct_index": index % 4,
+        "explanation": "",
+    }
+
+
+class FakeAnalyzer:
+    """Generates a pool of numbered questions after a short delay."""
+
+    def __init__(self, questions: list[Any]) -> None:
+        self.questions = questions
+        self.calls: list[dict[str, Any]] = []
+
+    async def generate_comprehension_questions(self, **kwargs: Any) -> list[Any]:
+        self.calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return self.questions
+
+
+@pytest.fixture(autouse=True)
+def quiz_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(comprehension.settings, "cache_enabled", True)
+    monkeypatch.setattr(comprehension.settings, "comprehension_pool_size", 6)
+    monkeypatch.setattr(cache, "_cache", ResponseCache(LocalCache(1024), None, ttl=60))
+
+
+def _service(monkeypatch: pytest.MonkeyPatch, questions: list[Any]) -> ComprehensionQuizService:
+    monkeypatch.setattr(comprehension, "get_article_analyzer", lambda: FakeAnalyzer(questions))
+    return ComprehensionQuizService()
+
+
+def _indices(quiz: dict[str, Any]) -> list[int]:
+    return [int(question["id"].rsplit(":", 1)[1]) for question in quiz["questions"]]
+
+
+def test_pool_id_is_per_article_language_and_level() -> None:
+    assert pool_id(ARTICLE, "english", "b1") == pool_id(ARTICLE, "english", "B1")
+    assert pool_id(ARTICLE, "english", "B1") != pool_id(ARTICLE, "english", "B2")
+    assert pool_id(ARTICLE, "english", "B1") != pool_id(ARTICLE + "!", "english", "B1")
+
+
+async def test_concurrent_readers_share_one_generation(monkeypatch: pytest.MonkeyPatch) -> None:
+    service = _service(monkeypatch, [_question(i) for i in range(6)])
+
+    quizzes = await asyncio.gather(*(service.quiz(ARTICLE, user_id=f"user-{i}") for i in range(3)))
+
+    assert len(service.analyzer.calls) == 1
+    assert service.analyzer.calls[0]["count"] == 6
+    assert all(quiz["pool_size"] == 6 for quiz in quizzes)
+
+
+async def test_reader_sees_the_whole_pool_before_repeats(monkeypatch: pytest.MonkeyPatch) -> None:
+    service = _service(monkeypatch, [_question(i) for i in range(6)])
+
+    first = await service.quiz(ARTICLE, user_id="reader")
+    second = await service.quiz(ARTICLE, user_id="reader")
+    third = await service.quiz(ARTICLE, user_id="reader")
+
+    assert sorted(_indices(first) + _indices(second)) == list(range(6))
+    assert (first["remaining"], second["remaining"]) == (3, 0)
+    # 一巡したら同じ順序で最初から
+    assert _indices(third) == _indices(first)
+    assert third["remaining"] == 3
+
+
+async def test_answered_ids_from_the_client_are_skipped(monkeypatch: pytest.MonkeyPatch) -> None:
+    service = _service(monkeypatch, [_question(i) for i in range(4)])
+    key = pool_id(ARTICLE, "english", "B1")
+
+    quiz = await service.quiz(
+        ARTICLE, count=2, seen_ids=[f"{key}:0", f"{key}:1", "other-pool:2", f"{key}:x"]
+    )
+
+    assert sorted(_indices(quiz)) == [2, 3]
+    assert quiz["pool_id"] == key
+    assert quiz["questions"][0]["question"].startswith("Question")
+
+
+async def test_malformed_questions_are_dropped(monkeypatch: pytest.MonkeyPatch) -> None:
+    service = _service(monkeypatch, [_question(0), {"question": "No options?"}, "text"])
+
+    quiz = await service.quiz(ARTICLE, count=3)
+
+    assert quiz["pool_size"] == 1
+    assert _indices(quiz) == [0]
+
+
+async def test_article_without_questions_is_an_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    service = _service(monkeypatch, [])
+
+    with pytest.raises(ValueError):
+        await service.quiz(ARTICLE)
+
+
+class FakeQuizService:
+    """Records quiz arguments and returns a one-question quiz (or raises)."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.calls: list[dict[str, Any]] = []
+
+    async def quiz(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        return {
+            "pool_id": "p1",
+            "questions": [{"id": "p1:0", **_question(0)}],
+            "pool_size": 6,
+            "remaining": 5,
+        }
+
+
+def test_comprehension_questions_route(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeQuizService()
+    monkeypatch.setattr(comprehension, "get_quiz_service", lambda: fake)
+
+    response = TestClient(app).post(
+        "/api/articles/comprehension-questions",
+        json={"content": ARTICLE, "user_level": "B2", "count": 1, "seen_ids": ["p1:3"]},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["questions"][0]["id"] == "p1:0"
+    assert fake.calls == [
+        {
+            "content": ARTICLE,
+            "language": "english",
+            "user_level": "B2",
+            "count": 1,
+            "user_id": "anonymous",
+            "seen_ids": ["p1:3"],
+        }
+    ]
+
+
+def test_comprehension_questions_route_without_questions(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeQuizService(ValueError("Could not generate comprehension questions"))
+    monkeypatch.setattr(comprehension, "get_quiz_service", lambda: fake)
+
+    response = TestClient(app).post(
+        "/api/articles/comprehension-questions", json={"content": ARTICLE, "count": 11}
+    )
+    assert response.status_code == 422
+
+    response = TestClient(app).post(
+        "/api/articles/comprehension-questions", json={"content": ARTICLE}
+    )
+    assert response.status_code == 503
@@ -0,0 +1,183 @@
+"""Tests for request deadlines and client-disconnect cancellation."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.core import deadline
+from app.core.deadline import (
+    REQUESTS_CANCELLED,
+    RequestDeadlineMiddleware,
+    current_deadline,
+    deadline_scope,
+    remaining,
+    request_timeout,
+    requested_timeout,
+)
+
+
+@pytest.fixture(autouse=True)
+def timeouts(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(deadline.settings, "request_timeout_seconds", 60.0)
+    monkeypatch.setattr(deadline.settings, "request_max_timeout_seconds", 300.0)
+
+
+def test_no_deadline_outside_a_scope() -> None:
+    assert current_deadline.get() is None
+    assert remaining() is None
+
+
+def test_nested_scope_takes_the_earlier_deadline() -> None:
+    with deadline_scope(10):
+        outer = current_deadline.get()
+        # 内側の方が長ければ外側の期限のまま
+        with deadline_scope(60):
+            assert current_deadline.get() == outer
+        with deadline_scope(1):
+            inner = current_deadline.get()
+            assert outer is not None and inner is not None
+            assert inner < outer
+            remaining_inner = remaining()
+            assert remaining_inner is not None and 0 < remaining_inner <= 1
+        assert current_deadline.get() == outer
+    assert current_deadline.get() is None
+
+
+@pytest.mark.parametrize("seconds", [None, 0, -1])
+def test_scope_without_a_positive_timeout_keeps_the_outer_deadline(seconds: float | None) -> None:
+    with deadline_scope(5):
+        outer = current_deadline.get()
+        with deadline_scope(seconds):
+            assert current_deadline.get() == outer
+    with deadline_scope(seconds):
+        assert current_deadline.get() is None
+
+
+@pytest.mark.parametrize(
+    ("milliseconds", "seconds"),
+    [(1500, 1.5), (10_000_000, 300.0), (None, 60.0), (0, 60.0), (-5, 60.0)],
+)
+def test_requested_timeout_is_clamped(milliseconds: float | None, seconds: float) -> None:
+    assert requested_timeout(milliseconds) == seconds
+
+
+@pytest.mark.parametrize(
+    ("headers", "seconds"),
+    [
+        ([(b"X-Request-Timeout-Ms", b"2500")], 2.5),
+        ([(b"x-request-timeout-ms", b"999999999")], 300.0),
+        ([(b"x-request-timeout-ms", b"soon")], 60.0),
+        ([(b"content-type", b"application/json")], 60.0),
+    ],
+)
+def test_request_timeout_header(headers: list[tuple[bytes, bytes]], seconds: float) -> None:
+    assert request_timeout(headers) == seconds
+
+
+class Client:
+    """ASGI receive/send pair: sends one body message, then disconnects on demand."""
+
+    def __init__(self) -> None:
+        self.disconnect = asyncio.Event()
+        self.sent: list[dict[str, Any]] = []
+        self._body_sent = False
+
+    async def receive(self) -> dict[str, Any]:
+        if not self._body_sent:
+            self._body_sent = True
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: dict[str, Any]) -> None:
+        self.sent.append(message)
+
+
+def _scope(headers: list[tuple[bytes, bytes]] | None = None) -> dict[str, Any]:
+    return {"type": "http", "path": "/api/words/explain", "headers": headers or []}
+
+
+class SlowApp:
+    """Reads the body, records its deadline, then waits until cancelled or released."""
+
+    def __init__(self) -> None:
+        self.remaining: float | None = None
+        self.cancelled = False
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        await receive()
+        self.remaining = remaining()
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def test_handler_runs_under_the_requested_deadline() -> None:
+    app = SlowApp()
+    client = Client()
+    middleware = RequestDeadlineMiddleware(app)
+
+    serving = asyncio.create_task(
+        middleware(_scope([(b"x-request-timeout-ms", b"2000")]), client.receive, client.send)
+    )
+    await app.started.wait()
+    app.release.set()
+    await serving
+
+    assert app.remaining is not None and 1.5 < app.remaining <= 2.0
+    assert not app.cancelled
+    assert [message["type"] for message in client.sent] == [
+        "http.response.start",
+        "http.response.body",
+    ]
+
+
+async def test_disconnect_cancels_the_handler() -> None:
+    app = SlowApp()
+    client = Client()
+    middleware = RequestDeadlineMiddleware(app)
+    before = REQUESTS_CANCELLED.get(reason="client_disconnect", transport="http")
+
+    serving = asyncio.create_task(middleware(_scope(), client.receive, client.send))
+    await app.started.wait()
+    client.disconnect.set()
+    # 切断によるキャンセルはミドルウェアの外へは伝播しない
+    await asyncio.wait_for(serving, timeout=1)
+
+    assert app.cancelled
+    assert client.sent == []
+    assert REQUESTS_CANCELLED.get(reason="client_disconnect", transport="http") == before + 1
+
+
+async def test_server_cancellation_still_propagates() -> None:
+    app = SlowApp()
+    client = Client()
+    middleware = RequestDeadlineMiddleware(app)
+
+    serving = asyncio.create_task(middleware(_scope(), client.receive, client.send))
+    await app.started.wait()
+    serving.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await serving
+    assert app.cancelled
+
+
+async def test_non_http_scopes_pass_through() -> None:
+    seen: list[str] = []
+
+    async def lifespan_app(scope: dict[str, Any], receive: Any, send: Any) -> None:
+        seen.append(scope["type"])
+        assert current_deadline.get() is None
+
+    await RequestDeadlineMiddleware(lifespan_app)({"type": "lifespan"}, None, None)
+
+    assert seen == ["lifespan"]
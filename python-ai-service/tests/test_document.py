@@ -0,0 +1,147 @@
+"""Tests for article preprocessing shared by the analyzers."""
+
+import pytest
+
+from app.services import document
+from app.services.document import Document, diff_paragraphs, get_document, lemmatize
+
+
+def test_content_hash_is_the_hash_of_the_normalized_text() -> None:
+    # キャッシュキーになるので、ハッシュの作り方が変わったらテストで気づけるようにする
+    assert Document("a").content_hash == "ca978112ca1bbdcafac231b39a23dc4d"
+    assert Document("a").cache_key == "doc:ca978112ca1bbdcafac231b39a23dc4d"
+
+
+@pytest.mark.parametrize(
+    "variant",
+    [
+        "Café is open.\n\nCome in.",
+        "Cafe\u0301 is open.\n\nCome in.",  # 結合文字（NFD）
+        "Café  is\topen.\r\n\r\n\r\nCome in.  ",
+        "  Café is open.\r\r Come in.",
+    ],
+)
+def test_content_hash_ignores_encoding_and_whitespace_differences(variant: str) -> None:
+    assert Document(variant).content_hash == Document("Café is open.\n\nCome in.").content_hash
+
+
+def test_content_hash_changes_with_the_text() -> None:
+    assert Document("Rates rose.").content_hash != Document("Rates fell.").content_hash
+
+
+@pytest.mark.parametrize("content", ["", "   \n\n\t  "])
+def test_empty_text(content: str) -> None:
+    doc = Document(content)
+
+    assert doc.text == ""
+    assert doc.content_hash == Document("").content_hash
+    assert doc.sentences == ()
+    assert doc.paragraphs == ()
+    assert doc.tokens == ()
+    assert doc.language is None
+    assert doc.excerpt(100) == ""
+    assert doc.statistics() == {
+        "sentences": 0,
+        "words": 0,
+        "average_sentence_length": 0.0,
+        "lexical_diversity": 0.0,
+        "reading_time_minutes": 1,
+    }
+
+
+def test_english_tokens_keep_contractions_and_numbers() -> None:
+    doc = Document("Don't panic: the well-known index rose 2,500.75 points.")
+
+    assert doc.tokens == (
+        "Don't",
+        "panic",
+        "the",
+        "well-known",
+        "index",
+        "rose",
+        "2,500.75",
+        "points",
+    )
+    assert doc.language == "english"
+
+
+def test_cjk_text_is_tokenized_per_character() -> None:
+    doc = Document("東京は晴れです。明日は雨が降るでしょう！")
+
+    assert doc.tokens[:4] == ("東", "京", "は", "晴")
+    assert doc.word_count == doc.cjk_characters == 18
+    assert doc.sentences == ("東京は晴れです。", "明日は雨が降るでしょう！")
+    assert doc.language == "japanese"
+
+
+def test_mixed_cjk_and_latin_text() -> None:
+    doc = Document("日本語とEnglishの混在、価格は2,500円。")
+
+    assert "English" in doc.tokens
+    assert "2,500" in doc.tokens
+    assert doc.cjk_characters == 11
+
+
+@pytest.mark.parametrize(
+    ("text", "language"),
+    [
+        ("한국어 문장입니다", "korean"),
+        ("中文新闻报道", "chinese"),
+        ("el perro y la casa", "spanish"),
+    ],
+)
+def test_language_detection(text: str, language: str) -> None:
+    assert Document(text).language == language
+
+
+def test_sentences_do_not_split_after_abbreviations() -> None:
+    doc = Document('Mr. Smith went home. "He slept." Then he left!')
+
+    assert doc.sentences == ("Mr. Smith went home.", '"He slept."', "Then he left!")
+
+
+@pytest.mark.parametrize(
+    ("token", "lemma"),
+    [
+        ("running", "run"),
+        ("Studies", "study"),
+        ("classes", "class"),
+        ("went", "go"),
+        ("bus", "bus"),
+    ],
+)
+def test_lemmatize(token: str, lemma: str) -> None:
+    assert lemmatize(token) == lemma
+
+
+def test_excerpt_is_cut_at_a_sentence_boundary() -> None:
+    doc = Document("First sentence here. Second sentence is longer than the limit.")
+
+    assert doc.excerpt(30) == "First sentence here."
+    assert doc.excerpt(1000) == doc.text
+    # 最初の文だけで上限を超える場合は文字数で切る
+    assert Document("x" * 50).excerpt(10) == "x" * 10
+
+
+def test_documents_are_memoized_per_content(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(document, "_documents", type(document._documents)())
+    monkeypatch.setattr(document.settings, "document_cache_max_entries", 2)
+
+    first = get_document("One.")
+    assert get_document("One.") is first
+    assert get_document(first) is first
+
+    get_document("Two.")
+    get_document("Three.")
+
+    assert list(document._documents) == ["Two.", "Three."]
+
+
+def test_paragraph_diff() -> None:
+    diff = diff_paragraphs("A.\n\nB.\n\nC.", "A.\n\nB2.\n\nC.\n\nD.")
+
+    assert diff.added == ("B2.", "D.")
+    assert diff.removed == ("B.",)
+    assert diff.changes == 2
+    assert not diff.unchanged
+    assert diff_paragraphs("A.\n\nB.", "A.\r\n\r\nB.  ").unchanged
@@ -0,0 +1,122 @@
+"""Tests for the streaming NDJSON ingest pipeline."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.services import ingest
+from app.services.admission import OverloadedError
+from app.services.ingest import IngestPipeline
+
+
+class FakeAnalyzer:
+    """Stage methods that can be held back and made to fail per article."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.release.set()
+        self.started: list[str] = []
+        self.llm = SimpleNamespace(analyze_article_difficulty=self.analyze_article_difficulty)
+
+    async def analyze_article_difficulty(self, content: str, language: str) -> dict[str, Any]:
+        self.started.append(content)
+        await self.release.wait()
+        if content.startswith("overload"):
+            raise OverloadedError("Too many AI requests are waiting", 3)
+        if content.startswith("slow"):
+            await asyncio.sleep(0.05)
+        return {"level": "B1", "score": 50}
+
+    async def summarize_article(self, **kwargs: Any) -> dict[str, Any]:
+        if kwargs["content"].startswith("broken"):
+            raise ValueError("No LLM provider")
+        return {"summary": "..."}
+
+
+@pytest.fixture
+def analyzer(monkeypatch: pytest.MonkeyPatch) -> FakeAnalyzer:
+    fake = FakeAnalyzer()
+    monkeypatch.setattr(ingest, "get_article_analyzer", lambda: fake)
+    return fake
+
+
+def _line(content: str, **fields: Any) -> bytes:
+    return json.dumps({"content": content, "analyses": ["difficulty"], **fields}).encode() + b"\n"
+
+
+async def _body(*lines: bytes, pulled: list[int] | None = None) -> AsyncIterator[bytes]:
+    for line in lines:
+        if pulled is not None:
+            pulled.append(1)
+        yield line
+
+
+async def _collect(pipeline: IngestPipeline, body: AsyncIterator[bytes]) -> list[dict[str, Any]]:
+    return [json.loads(line) async for line in pipeline.run(body)]
+
+
+async def test_results_carry_line_numbers_and_ids(analyzer: FakeAnalyzer) -> None:
+    body = _body(_line("slow article", id="a"), b"\n", _line("fast article", id="b"))
+
+    results = await _collect(IngestPipeline(concurrency=2), body)
+
+    # 終わった順に返る（空行も行番号に数える）
+    assert [(r["line"], r["id"]) for r in results] == [(3, "b"), (1, "a")]
+    assert all(r["ok"] and r["results"]["difficulty"]["level"] == "B1" for r in results)
+
+
+async def test_errors_use_the_route_status(
+    analyzer: FakeAnalyzer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(ingest.settings, "ingest_max_line_bytes", 80)
+    body = _body(
+        b"{not json\n",
+        _line("overload me"),
+        _line("broken summary", analyses=["difficulty", "summary"]),
+        _line("x" * 100),
+    )
+    results = {r["line"]: r for r in await _collect(IngestPipeline(concurrency=1), body)}
+
+    assert results[1]["status"] == 422
+    assert results[2]["errors"]["difficulty"] == {
+        "status": 429,
+        "error": "Too many AI requests are waiting",
+        "retry_after": 3,
+    }
+    # 一部の分析だけ失敗した記事は成功した分も返す
+    assert results[3]["ok"] is False
+    assert results[3]["results"]["difficulty"]["level"] == "B1"
+    assert results[3]["errors"]["summary"]["status"] == 503
+    assert results[4]["status"] == 413
+
+
+async def test_body_is_not_read_while_workers_are_busy(analyzer: FakeAnalyzer) -> None:
+    analyzer.release.clear()
+    pulled: list[int] = []
+    body = _body(*(_line(f"article {i}") for i in range(50)), pulled=pulled)
+    results = IngestPipeline(concurrency=2).run(body)
+
+    first = asyncio.create_task(results.__anext__())
+    await asyncio.sleep(0.05)
+    # 作業中の 2 件 + 受信箱の 2 件 + 読み手が置こうとしている 1 件まで
+    assert len(pulled) <= 5
+
+    analyzer.release.set()
+    await first
+    await results.aclose()
+
+
+async def test_workers_stop_while_results_are_not_read(analyzer: FakeAnalyzer) -> None:
+    body = _body(*(_line(f"article {i}") for i in range(50)))
+    results = IngestPipeline(concurrency=2).run(body)
+
+    await results.__anext__()
+    await asyncio.sleep(0.05)
+    # 読まれていない結果は送信箱の 2 件と、置こうとしている各ワーカーの 1 件まで
+    assert len(analyzer.started) <= 6
+
+    await results.aclose()
@@ -0,0 +1,17 @@
+"""Tests for the learning-plan profile buckets."""
+
+from app.services.learning_metrics import normalize_topics, profile_bucket
+
+
+def test_topics_are_truncated_in_user_order() -> None:
+    topics = ["Technology", "politics", "Art", "business", "ART"]
+
+    # 先頭の 3 つを残し、キーの安定のために並べ替えるのはその後
+    assert normalize_topics(topics) == ("art", "politics", "technology")
+
+
+def test_topic_order_does_not_change_the_bucket() -> None:
+    first = profile_bucket("b1", "B2", 1200, 30, ["grammar", "Listening"], None)
+    second = profile_bucket("B1", "b2", 1500, 40, ["listening", "grammar "], [])
+
+    assert first == second
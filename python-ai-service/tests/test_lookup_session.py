@@ -0,0 +1,77 @@
+"""Tests for authentication of the word lookup WebSocket."""
+
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.testclient import WebSocketTestSession
+
+from app.api import words
+from app.core import tenancy
+from app.core.tenancy import current_tenant
+from app.main import app
+from app.services.cache import encode_json
+
+SECRET = "test-secret"
+
+
+def _jwt(sub: str) -> str:
+    def b64(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    header = b64(json.dumps({"alg": "HS256"}).encode())
+    signing_input = f"{header}.{b64(json.dumps({'sub': sub}).encode())}"
+    signature = hmac.new(SECRET.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{b64(signature)}"
+
+
+@pytest.fixture(autouse=True)
+def _whoami(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Answer explain lookups with the tenant they run as."""
+
+    async def whoami(request: words.ExplainWordRequest) -> bytes:
+        return encode_json({"tenant": current_tenant.get()})
+
+    monkeypatch.setattr(tenancy.settings, "jwt_secret", SECRET)
+    monkeypatch.setitem(words._LOOKUPS, "explain", (words.ExplainWordRequest, whoami))
+
+
+def _lookup(ws: WebSocketTestSession) -> str:
+    ws.send_json({"id": 1, "op": "explain", "word": "ledger"})
+    return str(ws.receive_json()["result"]["tenant"])
+
+
+def test_anonymous_session() -> None:
+    with TestClient(app).websocket_connect("/api/words/session") as ws:
+        assert _lookup(ws) == "anonymous"
+
+
+def test_token_in_subprotocol() -> None:
+    protocols = [words.LOOKUP_SUBPROTOCOL, f"bearer.{_jwt('user-1')}"]
+    with TestClient(app).websocket_connect("/api/words/session", subprotocols=protocols) as ws:
+        # トークンを含むプロトコルは返さない
+        assert ws.accepted_subprotocol == words.LOOKUP_SUBPROTOCOL
+        assert _lookup(ws) == "user-1"
+
+
+def test_auth_message_before_lookups() -> None:
+    with TestClient(app).websocket_connect("/api/words/session") as ws:
+        ws.send_json({"type": "auth", "token": _jwt("user-2")})
+        assert ws.receive_json() == {"type": "auth", "ok": True, "authenticated": True}
+        assert _lookup(ws) == "user-2"
+
+
+def test_auth_message_after_a_lookup_is_rejected() -> None:
+    with TestClient(app).websocket_connect("/api/words/session") as ws:
+        assert _lookup(ws) == "anonymous"
+        ws.send_json({"type": "auth", "token": _jwt("user-3")})
+        assert ws.receive_json()["status"] == 400
+        assert _lookup(ws) == "anonymous"
+
+
+def test_token_in_query_string_is_ignored() -> None:
+    with TestClient(app).websocket_connect(f"/api/words/session?token={_jwt('user-4')}") as ws:
+        assert _lookup(ws) == "anonymous"
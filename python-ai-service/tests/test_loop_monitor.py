@@ -0,0 +1,75 @@
+"""Tests for the event-loop lag monitor and the sampling profiler."""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+
+from app.core.loop_monitor import LoopMonitor
+from app.core.profiler import sample_stacks, to_collapsed
+
+
+def _block_the_loop(seconds: float) -> None:
+    # コルーチンの中で同期的に待つ（ループが止まる）
+    time.sleep(seconds)
+
+
+async def test_blocked_loop_is_recorded() -> None:
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _block_the_loop(0.2)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["samples"] > 0
+    assert stats["lag_max_ms"] >= 150
+    assert stats["blocked_events"] == 1
+    # ウォッチドッグはブロック中のループスレッドのスタックを記録する
+    assert "_block_the_loop" in stats["last_block"]["stack"]
+    assert stats["last_block"]["blocked_ms"] >= 50
+
+
+async def test_idle_loop_has_no_blocked_events() -> None:
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.5)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["samples"] > 0
+    assert stats["blocked_events"] == 0
+    assert stats["last_block"] is None
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_profiler_samples_other_threads() -> None:
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        counts = sample_stacks(0.1, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    spinning = [stack for stack in counts if stack.startswith("spinner;")]
+    assert spinning
+    assert all("_spin (" in stack for stack in spinning)
+    # 呼び出し元（このスレッド）自身はサンプルしない
+    assert not any("test_profiler_samples_other_threads" in stack for stack in counts)
+
+
+def test_collapsed_stacks_are_sorted_by_count() -> None:
+    counts = Counter({"main;a;b": 2, "main;a": 5})
+
+    assert to_collapsed(counts) == "main;a 5\nmain;a;b 2\n"
@@ -0,0 +1,160 @@
+"""Tests for MCP tool dispatch."""
+
+import json
+from typing import Any
+
+import pytest
+
+from app.core.deadline import current_deadline, deadline_scope, remaining
+from app.mcp import server
+from app.services import cache, comprehension, llm
+from app.services.cache import LocalCache, ResponseCache
+
+CONTEXT = "The bridge proved resilient in the storm."
+
+
+class FakeGenerate:
+    """Answers word explanation prompts and records them."""
+
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    async def __call__(self, prompt: str, **kwargs: Any) -> str:
+        self.prompts.append(prompt)
+        if "Context:" in prompt:
+            return json.dumps(
+                {"part_of_speech": "adjective", "definition": "not broken", "usage_notes": None}
+            )
+        return json.dumps(
+            {
+                "word": "resilient",
+                "pronunciation": "/rɪˈzɪliənt/",
+                "part_of_speech": "adjective",
+                "definition": "able to recover",
+                "synonyms": ["tough"],
+            }
+        )
+
+
+@pytest.fixture
+def generate(monkeypatch: pytest.MonkeyPatch) -> FakeGenerate:
+    fake = FakeGenerate()
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test")
+    monkeypatch.setattr(llm.settings, "cache_enabled", True)
+    monkeypatch.setattr(llm.settings, "word_packs_enabled", False)
+    service = llm.LLMService()
+    monkeypatch.setattr(service, "generate", fake)
+    monkeypatch.setattr(llm, "_llm_service", service)
+    monkeypatch.setattr(cache, "_cache", ResponseCache(LocalCache(1024), None, ttl=60))
+    return fake
+
+
+def _result(content: list[Any]) -> Any:
+    assert len(content) == 1
+    return json.loads(content[0].text)
+
+
+async def test_explain_word_in_context_is_one_cache_entry(generate: FakeGenerate) -> None:
+    arguments = {"word": "resilient", "context": CONTEXT}
+
+    first = _result(await server.call_tool("explain_word", arguments))
+    second = _result(await server.call_tool("explain_word", arguments))
+
+    # 文脈での意味がコアの上に重なる
+    assert first["definition"] == "not broken"
+    assert first["synonyms"] == ["tough"]
+    assert second == first
+    assert len(generate.prompts) == 2
+    # キャッシュされるのは文脈なしのコアと文脈ごとの結果だけ
+    assert len(cache.get_cache().local) == 2
+
+
+async def test_new_context_generates_only_the_sense(generate: FakeGenerate) -> None:
+    await server.call_tool("explain_word", {"word": "resilient", "context": CONTEXT})
+    other = _result(
+        await server.call_tool(
+            "explain_word", {"word": "resilient", "context": "Resilient crops survived."}
+        )
+    )
+
+    assert other["pronunciation"] == "/rɪˈzɪliənt/"
+    # 2 つ目の文脈では文脈での意味だけを生成する
+    assert len(generate.prompts) == 3
+    assert "Context: Resilient crops survived." in generate.prompts[-1]
+
+
+class FakeQuizService:
+    """Records quiz arguments and the deadline the tool ran with."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.calls: list[dict[str, Any]] = []
+        self.remaining: float | None = None
+
+    async def quiz(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls.append(kwargs)
+        self.remaining = remaining()
+        if self.error is not None:
+            raise self.error
+        return {"pool_id": "p1", "questions": [{"id": "q1", "question": "Who?"}]}
+
+
+@pytest.fixture
+def quiz_service(monkeypatch: pytest.MonkeyPatch) -> FakeQuizService:
+    fake = FakeQuizService()
+    monkeypatch.setattr(comprehension, "get_quiz_service", lambda: fake)
+    return fake
+
+
+async def test_comprehension_questions_tool(quiz_service: FakeQuizService) -> None:
+    result = _result(
+        await server.call_tool(
+            "generate_comprehension_questions",
+            {"content": "An article.", "count": 2, "user_id": "u1", "seen_ids": ["q0"]},
+        )
+    )
+
+    assert result["questions"][0]["id"] == "q1"
+    assert quiz_service.calls == [
+        {
+            "content": "An article.",
+            "language": "english",
+            "user_level": "B1",
+            "count": 2,
+            "user_id": "u1",
+            "seen_ids": ["q0"],
+        }
+    ]
+
+
+async def test_tool_errors_are_returned_as_json(quiz_service: FakeQuizService) -> None:
+    quiz_service.error = ValueError("Could not generate comprehension questions")
+
+    result = _result(
+        await server.call_tool("generate_comprehension_questions", {"content": "An article."})
+    )
+
+    assert result == {"error": "Could not generate comprehension questions"}
+
+
+async def test_tool_runs_under_the_tool_deadline(
+    quiz_service: FakeQuizService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(server.settings, "mcp_tool_timeout_seconds", 5.0)
+
+    await server.call_tool("generate_comprehension_questions", {"content": "An article."})
+
+    assert quiz_service.remaining is not None
+    assert 4.0 < quiz_service.remaining <= 5.0
+    assert current_deadline.get() is None
+
+
+async def test_tool_deadline_does_not_extend_an_earlier_one(
+    quiz_service: FakeQuizService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(server.settings, "mcp_tool_timeout_seconds", 60.0)
+    with deadline_scope(1.0):
+        await server.call_tool("generate_comprehension_questions", {"content": "An article."})
+
+    assert quiz_service.remaining is not None
+    assert quiz_service.remaining <= 1.0
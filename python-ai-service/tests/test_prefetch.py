@@ -0,0 +1,144 @@
+"""Tests for predictive prefetching of word explanations."""
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from app.core.deadline import DeadlineExceededError, deadline_scope
+from app.services import cache, llm, prefetch
+from app.services.cache import LocalCache, ResponseCache, call_json
+from app.services.prefetch import WordPrefetcher
+from app.services.scheduler import Priority
+
+ARTICLE = "The central bank kept its ledger of resilient reserves. " * 20
+WORDS = ["ledger", "resilient", "reserves"]
+
+
+class FakeGenerate:
+    """Counts LLM calls by kind and answers them after a short delay."""
+
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = {}
+
+    async def __call__(self, prompt: str, **kwargs: Any) -> str:
+        kind = prompt.split()[0].lower()
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        await asyncio.sleep(0.05)
+        if kind == "explain":
+            word = prompt.rsplit(" ", 1)[-1]
+            return json.dumps(
+                {"word": word, "pronunciation": "", "part_of_speech": "noun", "definition": word}
+            )
+        if kind == "extract":
+            return json.dumps({"words": [{"word": word} for word in WORDS]})
+        return "{}"
+
+
+@pytest.fixture
+def generate(monkeypatch: pytest.MonkeyPatch) -> FakeGenerate:
+    fake = FakeGenerate()
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test")
+    monkeypatch.setattr(llm.settings, "cache_enabled", True)
+    monkeypatch.setattr(llm.settings, "word_packs_enabled", False)
+    monkeypatch.setattr(llm.settings, "prefetch_max_words", 2)
+    service = llm.LLMService()
+    monkeypatch.setattr(service, "generate", fake)
+    monkeypatch.setattr(llm, "_llm_service", service)
+    monkeypatch.setattr(cache, "_cache", ResponseCache(LocalCache(1024), None, ttl=60))
+    return fake
+
+
+async def _wait_for_jobs(prefetcher: WordPrefetcher) -> None:
+    while prefetcher._jobs:
+        await asyncio.sleep(0.01)
+
+
+async def test_tap_during_prefetch_waits_for_it(
+    generate: FakeGenerate, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    prefetcher = WordPrefetcher()
+    monkeypatch.setattr(prefetch, "_prefetcher", prefetcher)
+
+    assert prefetcher.schedule(ARTICLE)
+    while prefetcher.in_flight("ledger", "english", "B1", "japanese") is None:
+        await asyncio.sleep(0.01)
+    result = await llm.get_llm_service().explain_word("ledger", "english", "B1")
+    await _wait_for_jobs(prefetcher)
+
+    assert result["word"] == "ledger"
+    # 先読みと同じ説明は 1 回しか生成しない
+    assert generate.calls["explain"] == 2
+
+
+async def test_capitalized_tap_finds_the_prefetched_word(
+    generate: FakeGenerate, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    prefetcher = WordPrefetcher()
+    monkeypatch.setattr(prefetch, "_prefetcher", prefetcher)
+    service = llm.get_llm_service()
+
+    prefetcher.schedule(ARTICLE)
+    while prefetcher.in_flight("Ledger", "english", "B1", "japanese") is None:
+        await asyncio.sleep(0.01)
+    # 本文中の表記のままのタップも生成中の先読みを待ち、終わった後はキャッシュに当たる
+    await service.explain_word("Ledger", "english", "B1")
+    await _wait_for_jobs(prefetcher)
+    await service.explain_word("LEDGER", "english", "B1")
+
+    assert generate.calls["explain"] == 2
+
+
+async def test_tap_raises_the_prefetch_to_its_priority_and_deadline(
+    generate: FakeGenerate, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    prefetcher = WordPrefetcher()
+    monkeypatch.setattr(prefetch, "_prefetcher", prefetcher)
+    promoted: list[Priority] = []
+    monkeypatch.setattr(
+        llm.get_scheduler(), "promote", lambda task, priority: promoted.append(priority)
+    )
+
+    prefetcher.schedule(ARTICLE)
+    while prefetcher.in_flight("ledger", "english", "B1", "japanese") is None:
+        await asyncio.sleep(0.01)
+    # 先読みの期限（PREFETCH_TIMEOUT_SECONDS）ではなくタップ側の期限で打ち切る
+    with deadline_scope(0.01), pytest.raises(DeadlineExceededError):
+        await llm.get_llm_service().explain_word("ledger", "english", "B1")
+    await _wait_for_jobs(prefetcher)
+
+    assert promoted == [Priority.INTERACTIVE]
+
+
+async def test_words_are_recorded_when_scheduled(
+    generate: FakeGenerate, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    prefetcher = WordPrefetcher()
+    monkeypatch.setattr(prefetch, "_prefetcher", prefetcher)
+
+    prefetcher.schedule(ARTICLE)
+    while prefetcher.in_flight("ledger", "english", "B1", "japanese") is None:
+        await asyncio.sleep(0.01)
+    # 説明の生成が終わる前のタップも先読み済みとして数える
+    prefetcher.record_tap("Ledger", "english", "b1")
+    await _wait_for_jobs(prefetcher)
+
+    stats = prefetcher.stats()
+    assert stats["words_prefetched"] == 2
+    assert stats["taps_prefetched"] == 1
+    assert stats["used_by_rank"][0] == 1
+
+
+async def test_candidates_share_the_vocabulary_cache_with_the_route(
+    generate: FakeGenerate,
+) -> None:
+    words = await WordPrefetcher()._candidates(ARTICLE, "english", "B1")
+    assert words == WORDS[:2]
+
+    # /api/articles/extract-vocabulary の既定値での呼び出しは先読みの結果に当たる
+    await call_json(
+        llm.get_llm_service().extract_vocabulary,
+        {"content": ARTICLE, "language": "english", "user_level": "B1", "max_words": 10},
+    )
+    assert generate.calls["extract"] == 1
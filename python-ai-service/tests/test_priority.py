@@ -0,0 +1,112 @@
+"""Tests for priority classes and the X-Request-Priority header."""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.services import llm
+from app.services.llm import Completion
+from app.services.scheduler import Priority, current_priority, priority_class, requested_priority
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("background", Priority.BACKGROUND),
+        ("Standard", Priority.STANDARD),
+        (" BACKGROUND ", Priority.BACKGROUND),
+        # 上げる指定と不正な値は無視する
+        ("interactive", None),
+        ("urgent", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_requested_priority_can_only_lower(header: str | None, expected: Priority | None) -> None:
+    assert requested_priority(header) is expected
+
+
+@priority_class(Priority.INTERACTIVE)
+async def _interactive() -> Priority | None:
+    return current_priority.get()
+
+
+@priority_class(Priority.BACKGROUND)
+async def _background() -> Priority | None:
+    return await _interactive()
+
+
+async def test_nested_priority_never_raises() -> None:
+    assert await _interactive() is Priority.INTERACTIVE
+    assert await _background() is Priority.BACKGROUND
+
+
+async def test_header_lowers_a_declared_class() -> None:
+    token = current_priority.set(requested_priority("background"))
+    try:
+        assert await _interactive() is Priority.BACKGROUND
+    finally:
+        current_priority.reset(token)
+
+
+class _Span:
+    def __init__(self) -> None:
+        self.attributes: dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+
+class _Scheduler:
+    def __init__(self) -> None:
+        self.priorities: list[Priority] = []
+
+    @asynccontextmanager
+    async def slot(
+        self, tenant: str, tokens: float, priority: Priority = Priority.STANDARD
+    ) -> AsyncIterator[Any]:
+        self.priorities.append(priority)
+        yield SimpleNamespace(queue_wait=0.0, settle=lambda tokens: None)
+
+
+@pytest.mark.parametrize(
+    "level", [Priority.INTERACTIVE, Priority.STANDARD, Priority.BACKGROUND, None]
+)
+async def test_llm_call_is_admitted_and_queued_in_its_class(
+    level: Priority | None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test")
+    monkeypatch.setattr(llm.settings, "llm_cassette_mode", "")
+    service = llm.LLMService()
+    admitted: list[Priority] = []
+    scheduler = _Scheduler()
+
+    def admit(priority: Priority) -> int:
+        admitted.append(priority)
+        return 0
+
+    async def create_message(kwargs: dict[str, Any], span: Any) -> Completion:
+        return Completion(text="ok", stop_reason="end_turn", input_tokens=1, output_tokens=1)
+
+    monkeypatch.setattr(llm, "admit", admit)
+    monkeypatch.setattr(llm, "get_scheduler", lambda: scheduler)
+    monkeypatch.setattr(service, "_create_message", create_message)
+
+    async def call() -> Completion:
+        return await service._complete({"messages": []}, 10, span)
+
+    span = _Span()
+    if level is not None:
+        call = priority_class(level)(call)
+    await call()
+
+    expected = Priority.STANDARD if level is None else level
+    assert admitted == [expected]
+    assert scheduler.priorities == [expected]
+    assert span.attributes["llm.priority"] == expected.label
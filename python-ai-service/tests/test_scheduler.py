@@ -0,0 +1,194 @@
+"""Tests for the per-tenant fair-share LLM scheduler."""
+
+import asyncio
+
+import pytest
+
+from app.services.scheduler import IN_FLIGHT, FairScheduler, PreemptedError, Priority
+
+
+async def _run(
+    scheduler: FairScheduler,
+    calls: list[tuple[str, Priority]],
+    tokens: float = 100,
+) -> list[str]:
+    """Queue ``calls`` behind a call holding the only slot; return the grant order."""
+    order: list[str] = []
+    release = asyncio.Event()
+
+    async def blocker() -> None:
+        async with scheduler.slot("blocker", tokens):
+            await release.wait()
+
+    async def call(tenant: str, priority: Priority) -> None:
+        async with scheduler.slot(tenant, tokens, priority):
+            order.append(tenant)
+            await asyncio.sleep(0)
+
+    holder = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(call(tenant, priority)) for tenant, priority in calls]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+
+async def test_tenants_are_served_in_proportion_to_their_share() -> None:
+    scheduler = FairScheduler(max_concurrency=1, tenant_max_concurrency=1)
+    calls = [("heavy", Priority.STANDARD)] * 6 + [("light", Priority.STANDARD)] * 2
+
+    order = await _run(scheduler, calls)
+
+    # 後から来た light も heavy の残りを待たずに交互に割り当てられる
+    assert order[:4].count("light") == 2
+
+
+async def test_weights_scale_the_share() -> None:
+    scheduler = FairScheduler(max_concurrency=1, tenant_max_concurrency=1, weights={"gold": 3.0})
+    calls = [("basic", Priority.STANDARD)] * 8 + [("gold", Priority.STANDARD)] * 8
+
+    order = await _run(scheduler, calls)
+
+    assert order[:8].count("gold") == 6
+
+
+async def test_priority_classes_are_served_first() -> None:
+    scheduler = FairScheduler(max_concurrency=1, tenant_max_concurrency=1)
+    calls = [
+        ("a", Priority.BACKGROUND),
+        ("b", Priority.STANDARD),
+        ("c", Priority.INTERACTIVE),
+    ]
+
+    order = await _run(scheduler, calls)
+
+    assert order == ["c", "b", "a"]
+
+
+async def test_idle_tenants_are_forgotten() -> None:
+    scheduler = FairScheduler(max_concurrency=2, tenant_max_concurrency=2)
+
+    await _run(scheduler, [(f"user-{i}", Priority.STANDARD) for i in range(50)])
+
+    assert scheduler.stats()["tenants"] == {}
+    assert scheduler.backlog(Priority.BACKGROUND) == (0, 0.0)
+
+
+async def test_tenant_with_quota_debt_is_kept_until_refilled() -> None:
+    scheduler = FairScheduler(
+        max_concurrency=1, tenant_max_concurrency=1, tenant_tokens_per_minute=6000
+    )
+
+    async with scheduler.slot("user", 3000) as lease:
+        lease.settle(4000)
+
+    # 休止しても使い込んだトークン枠はリセットされない
+    tenants = scheduler.stats()["tenants"]
+    assert tenants["user"]["bucket_tokens"] == pytest.approx(2000, abs=5)
+    assert tenants["user"]["in_flight"] == 0
+
+
+async def test_cancelled_waiter_is_removed() -> None:
+    scheduler = FairScheduler(max_concurrency=1, tenant_max_concurrency=1)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with scheduler.slot("holder", 100):
+            await release.wait()
+
+    async def wait() -> None:
+        async with scheduler.slot("waiter", 100):
+            pass
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(wait())
+    await asyncio.sleep(0)
+    assert scheduler.backlog(Priority.STANDARD)[0] == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.backlog(Priority.STANDARD)[0] == 0
+    assert "waiter" not in scheduler.stats()["tenants"]
+
+    release.set()
+    await holder
+    assert scheduler.stats()["tenants"] == {}
+
+
+async def test_metric_labels_are_bounded() -> None:
+    scheduler = FairScheduler(max_concurrency=1, tenant_max_concurrency=1, weights={"partner": 2.0})
+    release = asyncio.Event()
+
+    async def hold(tenant: str) -> None:
+        async with scheduler.slot(tenant, 100):
+            await release.wait()
+
+    task = asyncio.create_task(hold("user-12345"))
+    await asyncio.sleep(0)
+    assert IN_FLIGHT.get(tenant="default") >= 1
+    assert IN_FLIGHT.get(tenant="user-12345") == 0
+    release.set()
+    await task
+
+    assert scheduler._label("partner") == "partner"
+
+
+async def test_background_call_is_preempted_for_starved_interactive_call() -> None:
+    scheduler = FairScheduler(
+        max_concurrency=1, tenant_max_concurrency=1, interactive_wait_target=0.01
+    )
+    outcome: list[str] = []
+
+    async def background() -> None:
+        try:
+            async with scheduler.slot("batch", 100, Priority.BACKGROUND):
+                await asyncio.sleep(1)
+        except PreemptedError:
+            outcome.append("preempted")
+
+    async def interactive() -> None:
+        async with scheduler.slot("reader", 100, Priority.INTERACTIVE):
+            outcome.append("interactive")
+
+    task = asyncio.create_task(background())
+    await asyncio.sleep(0)
+    await asyncio.wait_for(interactive(), timeout=0.5)
+    await task
+
+    assert outcome == ["preempted", "interactive"]
+
+
+async def test_promoted_task_is_served_in_its_new_class() -> None:
+    scheduler = FairScheduler(max_concurrency=1, tenant_max_concurrency=1)
+    order: list[str] = []
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with scheduler.slot("holder", 100):
+            await release.wait()
+
+    async def call(tenant: str, priority: Priority) -> None:
+        async with scheduler.slot(tenant, 100, priority):
+            order.append(tenant)
+        # 引き上げたタスクの次の呼び出しも同じクラスで並ぶ
+        async with scheduler.slot(tenant, 100, priority) as lease:
+            order.append(f"{tenant}:{lease.priority.label}")
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    standard = asyncio.create_task(call("reader", Priority.STANDARD))
+    prefetch = asyncio.create_task(call("prefetch", Priority.BACKGROUND))
+    await asyncio.sleep(0)
+
+    scheduler.promote(prefetch, Priority.INTERACTIVE)
+    scheduler.promote(prefetch, Priority.BACKGROUND)  # 下げることはない
+    assert scheduler.backlog(Priority.INTERACTIVE)[0] == 1
+    release.set()
+    await asyncio.gather(holder, standard, prefetch)
+
+    assert order[0] == "prefetch"
+    assert "prefetch:interactive" in order
+    assert scheduler._promoted == {}
@@ -0,0 +1,150 @@
+"""Tests for the FSRS-4.5 review scheduler and the review API."""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import reviews
+from app.main import app
+from app.services.spaced_repetition import (
+    AGAIN,
+    EASY,
+    FSRS,
+    GOOD,
+    HARD,
+    SECONDS_PER_DAY,
+    CardBatch,
+)
+
+T0 = 1_700_000_000.0
+
+
+def _new_cards(n: int) -> CardBatch:
+    zeros = np.zeros(n)
+    return CardBatch.from_columns(
+        {
+            "stability": zeros,
+            "difficulty": zeros,
+            "last_review": zeros,
+            "due": zeros,
+            "reps": zeros,
+            "lapses": zeros,
+        }
+    )
+
+
+def test_first_review_uses_the_initial_states() -> None:
+    result = FSRS().review(_new_cards(4), np.array([AGAIN, HARD, GOOD, EASY]), np.array(T0))
+
+    # S0 = w[G-1], D0(G) = w4 - (G-3)·w5、保持率 0.9 なら間隔 = S
+    np.testing.assert_allclose(result.cards.stability, [0.4872, 1.4003, 3.7145, 13.8206])
+    np.testing.assert_allclose(result.cards.difficulty, [7.6214, 6.3916, 5.1618, 3.932])
+    assert result.interval_days.tolist() == [1, 1, 4, 14]
+
+
+def test_second_review_matches_reference_values() -> None:
+    fsrs = FSRS()
+    first = fsrs.review(_new_cards(4), np.full(4, GOOD), np.array(T0)).cards
+    reviewed_at = np.full(4, T0 + 4 * SECONDS_PER_DAY)
+
+    result = fsrs.review(first, np.array([AGAIN, HARD, GOOD, EASY]), reviewed_at)
+
+    np.testing.assert_allclose(result.retrievability, 0.8935, atol=1e-4)
+    np.testing.assert_allclose(result.cards.stability, [1.4332, 6.235, 14.8081, 35.6141], atol=1e-4)
+    # FSRS-4.5 は D0(Good) へ平均回帰する（Good が続いても難易度は w4 のまま）
+    np.testing.assert_allclose(result.cards.difficulty, [6.9012, 6.0315, 5.1618, 4.2921], atol=1e-4)
+    assert result.interval_days.tolist() == [1, 6, 15, 36]
+    assert result.cards.lapses.tolist() == [1, 0, 0, 0]
+
+
+def test_good_reviews_on_schedule() -> None:
+    fsrs = FSRS()
+    cards = _new_cards(1)
+    now = T0
+    intervals = []
+    for _ in range(5):
+        result = fsrs.review(cards, np.array([GOOD]), np.array([now]))
+        cards = result.cards
+        intervals.append(int(result.interval_days[0]))
+        now += intervals[-1] * SECONDS_PER_DAY
+
+    assert intervals == [4, 15, 49, 146, 393]
+    assert cards.difficulty[0] == pytest.approx(5.1618)
+
+
+def test_due_queue_orders_by_retrievability() -> None:
+    cards = CardBatch.from_columns(
+        {
+            "stability": [10.0, 1.0, 5.0, 0.0],
+            "difficulty": [5.0, 5.0, 5.0, 0.0],
+            "last_review": [T0, T0, T0, 0.0],
+            "due": [T0, T0, T0 + 30 * SECONDS_PER_DAY, 0.0],
+            "reps": [1, 1, 1, 0],
+            "lapses": [0, 0, 0, 0],
+        }
+    )
+
+    queue = FSRS().due_queue(cards, now=T0 + 3 * SECONDS_PER_DAY)
+
+    assert queue.indices.tolist() == [1, 0, 3]
+    assert (queue.due_count, queue.new_count) == (2, 1)
+
+
+def _bulk_body(**overrides: object) -> dict[str, object]:
+    body: dict[str, object] = {
+        "cards": {
+            "ids": ["a"],
+            "stability": [0],
+            "difficulty": [0],
+            "last_review": [0],
+            "due": [0],
+            "reps": [0],
+            "lapses": [0],
+        },
+        "ratings": [GOOD],
+        "reviewed_at": [T0],
+    }
+    body.update(overrides)
+    return body
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"ratings": [300]},
+        {"ratings": [0]},
+        {"reviewed_at": [-1.0]},
+        {"reviewed_at": [1e300]},
+        {"cards": {**_bulk_body()["cards"], "reps": [2**40]}},  # type: ignore[dict-item]
+        {"cards": {**_bulk_body()["cards"], "lapses": [-1]}},  # type: ignore[dict-item]
+    ],
+)
+def test_out_of_range_input_is_rejected(overrides: dict[str, object]) -> None:
+    response = TestClient(app).post("/api/reviews/bulk", json=_bulk_body(**overrides))
+
+    assert response.status_code == 422
+
+
+def test_bulk_review() -> None:
+    response = TestClient(app).post("/api/reviews/bulk", json=_bulk_body())
+
+    assert response.status_code == 200
+    assert response.json()["interval_days"] == [4]
+
+
+def test_bulk_review_defaults_to_the_server_time(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(reviews.time, "time", lambda: T0)
+    body = _bulk_body()
+    del body["reviewed_at"]
+
+    response = TestClient(app).post("/api/reviews/bulk", json=body)
+
+    assert response.status_code == 200
+    assert response.json()["cards"]["last_review"] == [T0]
+
+
+def test_bulk_review_needs_one_rating_per_card() -> None:
+    response = TestClient(app).post("/api/reviews/bulk", json=_bulk_body(ratings=[GOOD, GOOD]))
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "ratings must have one entry per card"
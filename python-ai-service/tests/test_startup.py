@@ -0,0 +1,22 @@
+"""Tests for the deferred imports that keep worker startup fast."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_app_import_does_not_load_the_provider_sdk() -> None:
+    # 他のテストが import 済みのことがあるので、新しいインタープリターで確かめる
+    code = "import sys, app.main; assert 'anthropic' not in sys.modules, 'anthropic imported'"
+
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SERVICE_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert completed.returncode == 0, completed.stderr
@@ -0,0 +1,105 @@
+"""Tests for online story clustering, merges and splits."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from app.services.stories import StoryClusterer, StoryNotFoundError
+
+STORM = (
+    "City storm floods towns",
+    "Storm floods hit city streets. Storm water floods nearby towns.",
+)
+ELECTION = (
+    "City election results",
+    "Election results are in. Voters and officials count ballots, ballots and voters.",
+)
+
+
+def _ids(clusterer: StoryClusterer, story_id: str) -> list[str]:
+    return sorted(article["id"] for article in clusterer.story(story_id)["articles"])
+
+
+def test_similar_article_joins_the_story() -> None:
+    clusterer = StoryClusterer()
+
+    first = clusterer.assign("a1", *STORM)
+    second = clusterer.assign("a2", *STORM)
+    other = clusterer.assign(
+        "b1", "Chess final", "Chess players drew the final. Chess fans cheered."
+    )
+
+    assert first["created"] and not second["created"]
+    assert second["story_id"] == first["story_id"]
+    assert other["story_id"] != first["story_id"]
+
+
+def test_converged_stories_are_merged_and_the_absorbed_id_resolves() -> None:
+    # 加わるほどではないが重心が近い記事は、新しいストーリーを作ってすぐ統合される
+    clusterer = StoryClusterer(join_threshold=0.9, merge_threshold=0.3)
+    first = clusterer.assign(
+        "a1",
+        "Storm floods coastal towns",
+        "The storm flooded coastal towns. Storm surge flooded roads and towns near the coast.",
+    )
+    second = clusterer.assign(
+        "a2",
+        "Coastal storm leaves towns flooded",
+        "Storm damage grows as flooded towns wait. The storm surge hit coastal towns overnight.",
+    )
+
+    assert second["created"]
+    assert second["merged"] == first["story_id"]
+    assert clusterer.stats()["stories"] == 1
+    assert clusterer.stats()["merges"] == 1
+    story = clusterer.story(first["story_id"])
+    assert story["story_id"] == second["story_id"]
+    assert story["size"] == 2
+
+
+def test_story_holding_two_topics_is_split() -> None:
+    # 閾値が低いので、共通語 "city" だけで別の話題の記事も同じストーリーに入る
+    clusterer = StoryClusterer(join_threshold=0.01, min_split_size=2, split_check_interval=6)
+    results = [clusterer.assign(f"s{i}", *STORM) for i in range(3)]
+    results += [clusterer.assign(f"e{i}", *ELECTION) for i in range(3)]
+
+    assert all(not result["created"] for result in results[1:5])
+    split = results[-1]["split"]
+    assert split is not None
+    assert clusterer.stats()["splits"] == 1
+    groups = sorted([_ids(clusterer, results[0]["story_id"]), _ids(clusterer, split)])
+    assert groups == [["e0", "e1", "e2"], ["s0", "s1", "s2"]]
+    assert clusterer.story_of("e0")["story_id"] == clusterer.story_of("e2")["story_id"]
+
+
+def test_split_needs_enough_members_on_both_sides() -> None:
+    clusterer = StoryClusterer(join_threshold=0.01, min_split_size=3, split_check_interval=4)
+    for i in range(3):
+        clusterer.assign(f"s{i}", *STORM)
+    result = clusterer.assign("e0", *ELECTION)
+
+    assert result["split"] is None
+    assert clusterer.stats()["stories"] == 1
+
+
+def test_articles_are_listed_oldest_first_with_undated_last() -> None:
+    clusterer = StoryClusterer()
+    clusterer.assign("undated", *STORM)
+    clusterer.assign("late", *STORM, published_at=datetime(2024, 5, 2, tzinfo=UTC))
+    story = clusterer.assign("early", *STORM, published_at=datetime(2024, 5, 1))
+
+    ids = [article["id"] for article in clusterer.story(story["story_id"])["articles"]]
+
+    assert ids == ["early", "late", "undated"]
+
+
+def test_reassigned_article_leaves_its_old_story() -> None:
+    clusterer = StoryClusterer()
+    old = clusterer.assign("a1", *STORM)
+
+    new = clusterer.assign("a1", *ELECTION)
+
+    assert new["story_id"] != old["story_id"]
+    assert clusterer.stats()["stories"] == 1
+    with pytest.raises(StoryNotFoundError):
+        clusterer.story(old["story_id"])
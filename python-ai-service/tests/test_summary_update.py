@@ -0,0 +1,176 @@
+"""Tests for incremental summary updates of revised articles."""
+
+import json
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import cache, llm
+from app.services.cache import LocalCache, ResponseCache
+from app.services.document import get_document
+
+PARAGRAPHS = [
+    f"Paragraph {i} reports on the storm in detail, sentence after sentence." for i in range(8)
+]
+ARTICLE = "\n\n".join(PARAGRAPHS)
+REVISION = "\n\n".join([*PARAGRAPHS[:7], "The storm moved north overnight, officials said."])
+PREVIOUS_SUMMARY = {
+    "summary": "嵐の記事",
+    "key_points": ["嵐が来た"],
+    "main_topic": "嵐",
+    "vocabulary_to_learn": [{"word": "storm", "definition": "嵐"}],
+}
+
+
+class FakeGenerate:
+    """Answers update prompts with ``update`` and full summaries with a fixed summary."""
+
+    def __init__(self, update: str) -> None:
+        self.update = update
+        self.prompts: list[str] = []
+
+    async def __call__(self, prompt: str, **kwargs: Any) -> str:
+        self.prompts.append(prompt)
+        if prompt.startswith("Previous summary:"):
+            return self.update
+        return json.dumps(
+            {
+                "summary": "全体の要約",
+                "key_points": ["新しい要点"],
+                "main_topic": "嵐",
+                "vocabulary_to_learn": [],
+            }
+        )
+
+
+def _update(vocabulary: list[dict[str, str]] | None = None) -> str:
+    update = {
+        "summary": "嵐は北へ移動した",
+        "key_points": ["嵐が北へ移動"],
+        "main_topic": "",
+        "vocabulary_to_learn": vocabulary or [],
+    }
+    return json.dumps(update, ensure_ascii=False)
+
+
+@pytest.fixture
+def install(monkeypatch: pytest.MonkeyPatch) -> Any:
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test")
+    monkeypatch.setattr(llm.settings, "cache_enabled", True)
+    monkeypatch.setattr(llm.settings, "summary_update_max_changed_ratio", 0.5)
+    monkeypatch.setattr(cache, "_cache", ResponseCache(LocalCache(1024), None, ttl=60))
+
+    def install(update: str) -> tuple[llm.LLMService, FakeGenerate]:
+        fake = FakeGenerate(update)
+        service = llm.LLMService()
+        monkeypatch.setattr(service, "generate", fake)
+        monkeypatch.setattr(llm, "_llm_service", service)
+        return service, fake
+
+    return install
+
+
+async def test_unchanged_article_returns_the_previous_summary(install: Any) -> None:
+    service, generate = install(_update())
+
+    result = await service.update_summary(ARTICLE, PREVIOUS_SUMMARY, ARTICLE + "\r\n")
+
+    assert result == {**PREVIOUS_SUMMARY, "update_mode": "unchanged", "changed_paragraphs": 0}
+    assert generate.prompts == []
+
+
+async def test_only_the_changed_paragraphs_are_sent(install: Any) -> None:
+    vocabulary = [
+        {"word": "storm", "definition": "嵐"},
+        {"word": "overnight", "definition": "夜通し"},
+    ]
+    service, generate = install(_update(vocabulary))
+
+    result = await service.update_summary(ARTICLE, PREVIOUS_SUMMARY, REVISION)
+
+    (prompt,) = generate.prompts
+    assert PARAGRAPHS[7] in prompt
+    assert "The storm moved north overnight" in prompt
+    assert PARAGRAPHS[0] not in prompt
+    assert json.dumps(PREVIOUS_SUMMARY["summary"], ensure_ascii=False) in prompt
+    assert result["update_mode"] == "incremental"
+    assert result["changed_paragraphs"] == 1
+    assert result["summary"] == "嵐は北へ移動した"
+    # 空の main_topic は前回の値で補い、語彙は重複させずに足す
+    assert result["main_topic"] == "嵐"
+    assert [entry["word"] for entry in result["vocabulary_to_learn"]] == ["storm", "overnight"]
+
+
+async def test_large_revision_is_summarized_from_scratch(install: Any) -> None:
+    service, generate = install(_update())
+    rewritten = "\n\n".join(f"An unrelated story, part {i}." for i in range(8))
+
+    result = await service.update_summary(ARTICLE, PREVIOUS_SUMMARY, rewritten)
+
+    assert result["update_mode"] == "full"
+    assert result["summary"] == "全体の要約"
+    assert not any(prompt.startswith("Previous summary:") for prompt in generate.prompts)
+
+
+async def test_unparseable_update_falls_back_to_a_full_summary(install: Any) -> None:
+    service, generate = install("Sorry, I cannot do that.")
+
+    result = await service.update_summary(ARTICLE, PREVIOUS_SUMMARY, REVISION)
+
+    assert result["update_mode"] == "full"
+    assert len(generate.prompts) == 2
+
+
+async def test_cache_key_uses_both_document_hashes(install: Any) -> None:
+    service, generate = install(_update())
+    spec = llm.LLMService.update_summary.cache_spec  # type: ignore[attr-defined]
+    arguments = {
+        "previous_content": ARTICLE,
+        "previous_summary": PREVIOUS_SUMMARY,
+        "content": REVISION,
+    }
+
+    params = spec.params((service,), arguments)
+
+    assert params["previous_content"] == get_document(ARTICLE).cache_key
+    assert params["content"] == get_document(REVISION).cache_key
+    assert params["previous_summary"] == PREVIOUS_SUMMARY
+
+    first = await service.update_summary(**arguments)
+    # 空白や改行コードだけが違う本文は同じエントリ
+    second = await service.update_summary(
+        ARTICLE.replace("\n", "\r\n"), PREVIOUS_SUMMARY, REVISION + "  "
+    )
+    other_summary = await service.update_summary(
+        ARTICLE, {**PREVIOUS_SUMMARY, "summary": "別の要約"}, REVISION
+    )
+
+    assert second == first
+    assert other_summary["update_mode"] == "incremental"
+    assert len(generate.prompts) == 2
+
+
+def test_summarize_update_route(install: Any) -> None:
+    _, generate = install(_update())
+    body = {"previous_content": ARTICLE, "previous_summary": PREVIOUS_SUMMARY, "content": REVISION}
+
+    client = TestClient(app)
+    first = client.post("/api/articles/summarize/update", json=body)
+    second = client.post("/api/articles/summarize/update", json=body)
+
+    assert first.status_code == 200
+    assert first.json()["update_mode"] == "incremental"
+    assert first.json()["changed_paragraphs"] == 1
+    assert second.content == first.content
+    assert len(generate.prompts) == 1
+
+
+def test_summarize_update_route_validates_the_previous_summary(install: Any) -> None:
+    install(_update())
+    body = {"previous_content": ARTICLE, "previous_summary": {"summary": "x"}, "content": ARTICLE}
+
+    response = TestClient(app).post("/api/articles/summarize/update", json=body)
+
+    assert response.status_code == 422
@@ -0,0 +1,183 @@
+"""Tests for calibrated token budgets and the continuation of cut-off responses."""
+
+from collections import deque
+from typing import Any
+
+import pytest
+
+from app.core.tracing import current_operation
+from app.services import llm, token_budget
+from app.services.llm import Completion
+from app.services.token_budget import TokenBudgets, _percentile
+
+OPERATION = "LLMService.summarize_article"
+
+
+@pytest.fixture(autouse=True)
+def budget_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(token_budget.settings, "token_budget_enabled", True)
+    monkeypatch.setattr(token_budget.settings, "token_budget_min_samples", 20)
+    monkeypatch.setattr(token_budget.settings, "token_budget_percentile", 0.99)
+    monkeypatch.setattr(token_budget.settings, "token_budget_margin", 1.2)
+    monkeypatch.setattr(token_budget.settings, "token_budget_min_tokens", 64)
+    monkeypatch.setattr(token_budget.settings, "token_budget_max_tokens", 8192)
+    monkeypatch.setattr(token_budget.settings, "llm_max_continuations", 2)
+
+
+def _calibrate(budgets: TokenBudgets, requested: int, samples: list[int]) -> None:
+    for output_tokens in samples:
+        budgets.record(OPERATION, requested, output_tokens, 0, False)
+
+
+def test_percentile_is_nearest_rank() -> None:
+    samples = deque(range(1, 101))
+
+    assert _percentile(samples, 0.5) == 50
+    assert _percentile(samples, 0.99) == 99
+    assert _percentile(samples, 1.0) == 100
+    assert _percentile(deque([7]), 0.99) == 7
+    assert _percentile(deque(), 0.99) == 0
+
+
+def test_requested_budget_is_kept_until_enough_samples() -> None:
+    budgets = TokenBudgets()
+    _calibrate(budgets, 2048, [100] * 19)
+
+    assert budgets.max_tokens(OPERATION, 2048) == 2048
+
+    _calibrate(budgets, 2048, [200])
+
+    # 20 件の 99 パーセンタイル（200）× 1.2
+    assert budgets.max_tokens(OPERATION, 2048) == 240
+    # 指定した max_tokens が違う呼び出しは別に較正する
+    assert budgets.max_tokens(OPERATION, 1024) == 1024
+
+
+def test_budget_has_a_floor() -> None:
+    budgets = TokenBudgets()
+    _calibrate(budgets, 2048, [10] * 20)
+
+    assert budgets.max_tokens(OPERATION, 2048) == 64
+
+
+def test_budget_grows_past_the_request_only_up_to_the_cap() -> None:
+    budgets = TokenBudgets()
+    _calibrate(budgets, 1000, [10000] * 20)
+    _calibrate(budgets, 10000, [10000] * 20)
+
+    assert budgets.max_tokens(OPERATION, 1000) == 8192
+    assert budgets.max_tokens(OPERATION, 10000) == 10000
+
+
+def test_calls_outside_a_traced_method_or_disabled_are_not_calibrated(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    budgets = TokenBudgets()
+    budgets.record(None, 2048, 100, 0, False)
+    _calibrate(budgets, 2048, [100] * 20)
+
+    assert budgets.stats()["tasks"][0]["samples"] == 20
+    assert budgets.max_tokens(None, 2048) == 2048
+
+    monkeypatch.setattr(token_budget.settings, "token_budget_enabled", False)
+
+    assert budgets.max_tokens(OPERATION, 2048) == 2048
+
+
+def test_continued_and_truncated_calls_are_counted() -> None:
+    budgets = TokenBudgets()
+    budgets.record(OPERATION, 2048, 300, 1, False)
+    budgets.record(OPERATION, 2048, 500, 2, True)
+
+    task = budgets.stats()["tasks"][0]
+
+    assert (task["calls"], task["continued"], task["truncated"]) == (2, 2, 1)
+    assert task["p50_output_tokens"] == 300
+
+
+class FakeProvider:
+    """Answers ``_complete`` calls from a script of (text, stop_reason) pairs."""
+
+    def __init__(self, script: list[tuple[str, str]]) -> None:
+        self.script = script
+        self.calls: list[dict[str, Any]] = []
+
+    async def __call__(
+        self, kwargs: dict[str, Any], estimated_tokens: float, span: Any
+    ) -> Completion:
+        self.calls.append({**kwargs, "messages": list(kwargs["messages"])})
+        text, stop_reason = self.script[len(self.calls) - 1]
+        return Completion(text=text, stop_reason=stop_reason, input_tokens=10, output_tokens=5)
+
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch) -> llm.LLMService:
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test")
+    monkeypatch.setattr(llm.settings, "llm_cassette_mode", "")
+    budgets = TokenBudgets()
+    monkeypatch.setattr(token_budget, "_budgets", budgets)
+    return llm.LLMService()
+
+
+async def test_cut_off_response_is_continued(
+    service: llm.LLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    provider = FakeProvider([("The first half ", "max_tokens"), ("and the rest.", "end_turn")])
+    monkeypatch.setattr(service, "_complete", provider)
+    token = current_operation.set(OPERATION)
+    try:
+        text = await service.generate("Summarize", max_tokens=100)
+    finally:
+        current_operation.reset(token)
+
+    # 末尾の空白は落として続きを書かせる（続きが空白で始まらなければ元の空白を残す）
+    assert text == "The first half and the rest."
+    assert provider.calls[1]["messages"] == [
+        {"role": "user", "content": "Summarize"},
+        {"role": "assistant", "content": "The first half"},
+    ]
+    task = token_budget.get_token_budgets().stats()["tasks"][0]
+    assert task["p50_output_tokens"] == 10
+    assert (task["continued"], task["truncated"]) == (1, 0)
+
+
+async def test_continuation_starting_with_a_space_replaces_the_trailing_one(
+    service: llm.LLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    provider = FakeProvider([("Line one\n", "max_tokens"), (" line two", "end_turn")])
+    monkeypatch.setattr(service, "_complete", provider)
+
+    assert await service.generate("Write") == "Line one line two"
+
+
+async def test_continuations_are_limited(
+    service: llm.LLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    provider = FakeProvider([("a", "max_tokens")] * 3)
+    monkeypatch.setattr(service, "_complete", provider)
+    token = current_operation.set(OPERATION)
+    try:
+        text = await service.generate("Write", max_tokens=100)
+    finally:
+        current_operation.reset(token)
+
+    assert text == "aaa"
+    assert len(provider.calls) == 3
+    task = token_budget.get_token_budgets().stats()["tasks"][0]
+    assert (task["continued"], task["truncated"]) == (1, 1)
+    assert task["high_output_tokens"] == 15
+
+
+async def test_calibrated_budget_is_sent(
+    service: llm.LLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _calibrate(token_budget.get_token_budgets(), 2048, [100] * 20)
+    provider = FakeProvider([("done", "end_turn")])
+    monkeypatch.setattr(service, "_complete", provider)
+    token = current_operation.set(OPERATION)
+    try:
+        await service.generate("Summarize", max_tokens=2048)
+    finally:
+        current_operation.reset(token)
+
+    assert provider.calls[0]["max_tokens"] == 120
@@ -0,0 +1,65 @@
+"""Tests for the span helpers and ``@traced``."""
+
+from typing import Any
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.core import tracing
+from app.core.tracing import current_operation, set_span_attributes, start_span, traced
+
+
+class Lookup:
+    @traced
+    async def explain(self, word: str) -> dict[str, Any]:
+        set_span_attributes(word=word, cache=None)
+        return {"word": word, "operation": current_operation.get()}
+
+
+@pytest.fixture
+def exporter(monkeypatch: pytest.MonkeyPatch) -> InMemorySpanExporter:
+    # グローバルのプロバイダーは一度しか設定できないので、トレーサーだけ差し替える
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_provider", provider)
+    monkeypatch.setattr(tracing.otel_trace, "get_tracer", provider.get_tracer)
+    return exporter
+
+
+async def test_traced_sets_the_operation_without_an_exporter() -> None:
+    assert tracing._provider is None
+
+    result = await Lookup().explain("ledger")
+
+    assert result == {"word": "ledger", "operation": "Lookup.explain"}
+    assert current_operation.get() is None
+    with start_span("request") as span:
+        assert span is tracing._NOOP_SPAN
+
+
+async def test_traced_records_a_span_with_an_exporter(exporter: InMemorySpanExporter) -> None:
+    with start_span("request", attributes={"path": "/words", "user": None}):
+        result = await Lookup().explain("ledger")
+
+    assert result["operation"] == "Lookup.explain"
+    inner, outer = exporter.get_finished_spans()
+    assert (inner.name, outer.name) == ("Lookup.explain", "request")
+    assert inner.parent is not None
+    assert inner.parent.span_id == outer.context.span_id
+    # None の属性は落とす
+    assert dict(inner.attributes or {}) == {"word": "ledger"}
+    assert dict(outer.attributes or {}) == {"path": "/words"}
+
+
+async def test_incoming_traceparent_is_continued(exporter: InMemorySpanExporter) -> None:
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    carrier = {"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+
+    with start_span("request", carrier=carrier):
+        pass
+
+    (span,) = exporter.get_finished_spans()
+    assert format(span.context.trace_id, "032x") == trace_id
@@ -0,0 +1,65 @@
+"""Tests for the word pack store."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.services import word_packs
+from app.services.word_packs import WordPackStore, pack_filename, write_pack
+
+
+def _write(directory: Path, entries: dict[str, str]) -> Path:
+    path = directory / pack_filename("english", "ja", "B1")
+    write_pack(
+        path,
+        {word: json.dumps({"word": word, "definition": d}).encode() for word, d in entries.items()},
+        {"language": "english", "native_language": "ja", "level": "B1"},
+    )
+    return path
+
+
+def test_lookup_normalizes_the_word(tmp_path: Path) -> None:
+    _write(tmp_path, {"ephemeral": "short-lived"})
+    store = WordPackStore(tmp_path)
+
+    value = store.lookup("  Ephemeral ", "english", "ja", "b1")
+
+    assert value is not None
+    assert json.loads(value)["definition"] == "short-lived"
+    assert store.lookup("unknown", "english", "ja", "B1") is None
+
+
+def test_only_packs_found_at_startup_are_tracked(tmp_path: Path) -> None:
+    _write(tmp_path, {"ephemeral": "short-lived"})
+    store = WordPackStore(tmp_path)
+
+    for i in range(100):
+        assert store.lookup("word", f"lang{i}", "ja", "B1") is None
+
+    assert store.load_all() == 1
+    assert list(store.stats()["packs"]) == [pack_filename("english", "ja", "B1")]
+    assert len(store._signatures) == 1
+
+
+def test_rebuilt_pack_is_reopened(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(word_packs, "_RELOAD_CHECK_SECONDS", 0.0)
+    _write(tmp_path, {"ephemeral": "short-lived"})
+    store = WordPackStore(tmp_path)
+    assert store.lookup("lucid", "english", "ja", "B1") is None
+
+    _write(tmp_path, {"ephemeral": "short-lived", "lucid": "clear"})
+
+    assert store.lookup("lucid", "english", "ja", "B1") is not None
+    assert store.stats()["packs"][pack_filename("english", "ja", "B1")] == 2
+
+
+def test_removed_pack_stops_serving(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(word_packs, "_RELOAD_CHECK_SECONDS", 0.0)
+    path = _write(tmp_path, {"ephemeral": "short-lived"})
+    store = WordPackStore(tmp_path)
+    assert store.lookup("ephemeral", "english", "ja", "B1") is not None
+
+    path.unlink()
+
+    assert store.lookup("ephemeral", "english", "ja", "B1") is None